@@ -0,0 +1,64 @@
+# clean_check.py - 끊긴 줄 재결합(rejoin_lines) 확인
+#
+# 사용법:
+#   python benchmarks/clean_check.py
+#
+# 줄바꿈 종류별 (입력, 기대 결과)를 비교
+# - 단어 사이 줄바꿈은 공백으로 연결
+# - 글자 단위로 끊긴 단어(조사/어미, 숫자 뒤 단위)만 공백 없이 연결
+# - 표 행, 짧은 줄, 끝 줄바꿈은 그대로 유지
+# 하나라도 다르면 실패 코드로 종료
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.text_cleaner import rejoin_lines  # noqa: E402
+
+# (이름, 입력, 기대 결과)
+CASES = (
+    ('단어 사이 줄바꿈',
+     '이번 보고서는 사업의 개선 방안을\n제시하기 위하여 관계 기관과 함께 조사를\n실시하였다.',
+     '이번 보고서는 사업의 개선 방안을 제시하기 위하여 관계 기관과 함께 조사를 실시하였다.'),
+    ('조사에서 끊긴 단어',
+     '관계 기관의 의견을 들어 각 기관 내에\n서 추진 일정을 정리하고 결과를 공유한다.',
+     '관계 기관의 의견을 들어 각 기관 내에서 추진 일정을 정리하고 결과를 공유한다.'),
+    ('어미에서 끊긴 단어',
+     '관계 기관과 협의하여 세부 계획을 수립하\n였다. 이후 점검 결과를 반영하여 보완하\n였다.',
+     '관계 기관과 협의하여 세부 계획을 수립하였다. 이후 점검 결과를 반영하여 보완하였다.'),
+    ('숫자 뒤 단위',
+     '세부 추진 일정은 관계 기관과 협의하여 5\n월까지 확정하고 결과를 공유할 예정이다.',
+     '세부 추진 일정은 관계 기관과 협의하여 5월까지 확정하고 결과를 공유할 예정이다.'),
+    ('표 행',
+     '구분 | 2023년 | 2024년 | 증감률\n예산 | 1,200 | 1,350 | 12.5%\n인력 | 35 | 42 | 20.0%',
+     '구분 | 2023년 | 2024년 | 증감률\n예산 | 1,200 | 1,350 | 12.5%\n인력 | 35 | 42 | 20.0%'),
+    ('짧은 제목 줄',
+     '추진 배경\n관계 기관과 협의하여 세부 계획을 수립하고 점검 결과를 반영한다.',
+     '추진 배경\n관계 기관과 협의하여 세부 계획을 수립하고 점검 결과를 반영한다.'),
+    ('끝 줄바꿈',
+     '가나다라마바사아자차\n',
+     '가나다라마바사아자차\n'),
+)
+
+
+def main():
+    failed = False
+    for name, text, expected in CASES:
+        try:
+            got = rejoin_lines(text)
+        except Exception as e:  # 확인 스크립트이므로 예외도 실패로 기록
+            got = f"{type(e).__name__}: {e}"
+        ok = got == expected
+        print(f"{'✅' if ok else '❌'} {name}")
+        if not ok:
+            print(f"     결과 {got!r}")
+            print(f"     기대 {expected!r}")
+            failed = True
+    if failed:
+        return 1
+    print('✅ 통과')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,316 @@
+# corpus.py - 벤치마크용 합성 한글 PDF 코퍼스 생성 (외부 파일/네트워크 없이 항상 같은 결과)
+#
+# 사용법:
+#   python benchmarks/corpus.py 출력폴더 [--seed 42] [--scale 1.0]
+#
+# ReportLab 내장 CID 폰트(HYSMyeongJo/HYGothic)로 본문을 그리고, 스캔 문서는 같은 페이지를 pdfium으로
+# 래스터화하여 약간 기울인 이미지로 다시 넣음
+# 문서 종류: text(본문), two_column(2단), table(표 위주), scanned(이미지만), mixed(본문/스캔 페이지 교대)
+# 같은 seed/scale이면 파일 내용(sha256)이 같으므로 manifest.json으로 코퍼스가 바뀌었는지 확인 가능
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.lazy_import import require  # noqa: E402
+
+CORPUS_VERSION = 1
+DEFAULT_SEED = 42
+
+# (종류, 페이지 수) - scale로 페이지 수 조절
+DEFAULT_DOCUMENTS = (
+    ('text', 1),
+    ('text', 12),
+    ('text', 60),
+    ('two_column', 6),
+    ('two_column', 24),
+    ('table', 4),
+    ('table', 16),
+    ('scanned', 2),
+    ('scanned', 6),
+    ('mixed', 8),
+)
+KINDS = ('text', 'two_column', 'table', 'scanned', 'mixed')
+
+BODY_FONT = 'HYSMyeongJo-Medium'
+HEADING_FONT = 'HYGothic-Medium'
+PAGE_WIDTH, PAGE_HEIGHT = 595.27, 841.89  # A4 (pt)
+MARGIN = 56
+SCAN_DPI = 150
+SCAN_MAX_ANGLE = 0.8  # 스캔 기울기 (도)
+
+# 문장 재료 (행정/보고서 문체)
+SUBJECTS = ('본 사업은', '추진단은', '해당 부서는', '위원회는', '시행 기관은', '지방자치단체는', '연구진은', '담당자는')
+TOPICS = ('디지털 전환', '예산 집행', '인력 운영', '시설 개선', '민원 처리', '데이터 관리', '안전 점검', '교육 훈련')
+OBJECTS = ('세부 계획을', '추진 일정을', '성과 지표를', '개선 방안을', '점검 결과를', '예산 내역을', '협력 체계를')
+VERBS = ('수립하였다.', '검토하였다.', '보고하였다.', '확정하였다.', '공유하였다.', '보완할 예정이다.', '추진하고 있다.')
+CLAUSES = ('관계 법령에 따라', '전년도 실적을 바탕으로', '현장 의견을 반영하여', '외부 전문가 자문을 거쳐',
+           '분기별 점검 결과에 따라', '예산 범위 내에서')
+TABLE_ITEMS = ('서버 장비', '소프트웨어 라이선스', '교육 용역', '유지보수', '통신 회선', '보안 점검', '자문 수당', '인쇄물')
+
+
+def register_fonts():
+    pdfmetrics = require('reportlab.pdfbase.pdfmetrics')
+    cidfonts = require('reportlab.pdfbase.cidfonts')
+    for name in (BODY_FONT, HEADING_FONT):
+        if name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(cidfonts.UnicodeCIDFont(name))
+
+
+def make_sentence(rng):
+    parts = [rng.choice(SUBJECTS), rng.choice(TOPICS) + ' 관련']
+    if rng.random() < 0.5:
+        parts.append(rng.choice(CLAUSES))
+    if rng.random() < 0.3:
+        parts.append(f"{rng.randint(2020, 2026)}년 {rng.randint(1, 12)}월까지")
+    parts += [rng.choice(OBJECTS), rng.choice(VERBS)]
+    return ' '.join(parts)
+
+
+def make_paragraph(rng, sentences=None):
+    return ' '.join(make_sentence(rng) for _ in range(sentences or rng.randint(3, 6)))
+
+
+def wrap(text, width, font=BODY_FONT, size=10.5):
+    """글자 단위 줄바꿈 (한글은 어절 단위로 끊지 않아도 자연스러움)"""
+    string_width = require('reportlab.pdfbase.pdfmetrics').stringWidth
+    lines = []
+    line = ''
+    for char in text:
+        if string_width(line + char, font, size) > width:
+            lines.append(line.rstrip())
+            line = char.lstrip()
+        else:
+            line += char
+    if line:
+        lines.append(line)
+    return lines
+
+
+def draw_header_footer(c, title, page_number):
+    """모든 페이지에 반복되는 머리글/바닥글 (텍스트 정리 단계의 제거 대상)"""
+    c.setFont(HEADING_FONT, 8.5)
+    c.drawString(MARGIN, PAGE_HEIGHT - 32, f"{title} · 대외비 아님")
+    c.drawRightString(PAGE_WIDTH - MARGIN, 28, f"- {page_number} -")
+
+
+def draw_column(c, rng, x, top, width, bottom, size=10.5, leading=16):
+    """단락을 채워 넣고 마지막 y 반환"""
+    y = top
+    while True:
+        lines = wrap(make_paragraph(rng), width, size=size)
+        if y - leading * len(lines) < bottom:
+            return y
+        c.setFont(BODY_FONT, size)
+        for line in lines:
+            c.drawString(x, y, line)
+            y -= leading
+        y -= leading * 0.6
+
+
+def draw_text_page(c, rng, title, page_number):
+    draw_header_footer(c, title, page_number)
+    top = PAGE_HEIGHT - 80
+    if page_number == 1:
+        c.setFont(HEADING_FONT, 18)
+        c.drawString(MARGIN, top, title)
+        top -= 40
+    c.setFont(HEADING_FONT, 12.5)
+    c.drawString(MARGIN, top, f"{page_number}. {rng.choice(TOPICS)} 현황")
+    draw_column(c, rng, MARGIN, top - 26, PAGE_WIDTH - 2 * MARGIN, 60)
+
+
+def draw_two_column_page(c, rng, title, page_number):
+    draw_header_footer(c, title, page_number)
+    gutter = 24
+    width = (PAGE_WIDTH - 2 * MARGIN - gutter) / 2
+    top = PAGE_HEIGHT - 80
+    c.setFont(HEADING_FONT, 12.5)
+    c.drawString(MARGIN, top, f"{page_number}. {rng.choice(TOPICS)} 분석")
+    for column in range(2):
+        draw_column(c, rng, MARGIN + column * (width + gutter), top - 26, width, 60, size=9.5, leading=14)
+
+
+def draw_table_page(c, rng, title, page_number):
+    draw_header_footer(c, title, page_number)
+    top = PAGE_HEIGHT - 80
+    c.setFont(HEADING_FONT, 12.5)
+    c.drawString(MARGIN, top, f"표 {page_number}. {rng.choice(TOPICS)} 예산 내역 (단위: 천원)")
+    c.setFont(BODY_FONT, 9.5)
+    for offset, line in enumerate(wrap(make_paragraph(rng, 2), PAGE_WIDTH - 2 * MARGIN, size=9.5)):
+        c.drawString(MARGIN, top - 22 - offset * 14, line)
+
+    headers = ('항목', '수량', '단가', '금액', '비고')
+    widths = (150, 60, 80, 90, 103)
+    row_height = 20
+    y = top - 80
+    rows = rng.randint(18, 26)
+    c.setLineWidth(0.6)
+    for row in range(rows + 1):
+        if row == 0:
+            cells = headers
+            c.setFont(HEADING_FONT, 9.5)
+        else:
+            quantity = rng.randint(1, 40)
+            price = rng.randint(5, 900) * 10
+            cells = (rng.choice(TABLE_ITEMS), str(quantity), f"{price:,}", f"{quantity * price:,}",
+                     rng.choice(('', '신규', '계속', '변경')))
+            c.setFont(BODY_FONT, 9.5)
+        x = MARGIN
+        for cell, width in zip(cells, widths):
+            c.rect(x, y - row_height, width, row_height)
+            c.drawString(x + 5, y - row_height + 6, cell)
+            x += width
+        y -= row_height
+
+
+PAGE_DRAWERS = {
+    'text': draw_text_page,
+    'two_column': draw_two_column_page,
+    'table': draw_table_page,
+}
+
+
+def new_canvas(target):
+    canvas = require('reportlab.pdfgen.canvas')
+    # invariant: 생성 시각/문서 ID를 고정하여 같은 입력이면 같은 바이트
+    return canvas.Canvas(target, pagesize=(PAGE_WIDTH, PAGE_HEIGHT), invariant=1)
+
+
+def render_scans(pages, rng, title, dpi=SCAN_DPI):
+    """[(종류, 페이지 번호)]를 본문 PDF로 그린 뒤 래스터화, 기울인 회색조 이미지 목록 반환"""
+    pdfium = require('pypdfium2')
+    Image = require('PIL.Image')
+
+    buffer = BytesIO()
+    c = new_canvas(buffer)
+    for kind, page_number in pages:
+        PAGE_DRAWERS[kind](c, rng, title, page_number)
+        c.showPage()
+    c.save()
+
+    images = []
+    document = pdfium.PdfDocument(buffer.getvalue())
+    try:
+        for index in range(len(document)):
+            image = document[index].render(scale=dpi / 72, grayscale=True).to_pil().convert('L')
+            angle = rng.uniform(-SCAN_MAX_ANGLE, SCAN_MAX_ANGLE)
+            images.append(image.rotate(angle, resample=Image.BICUBIC, fillcolor=255))
+    finally:
+        document.close()
+    return images
+
+
+def page_plan(kind, num_pages):
+    """페이지별 (그리는 방식, 스캔 여부)"""
+    if kind == 'scanned':
+        return [('text', True)] * num_pages
+    if kind == 'mixed':
+        return [('text' if number % 3 else 'table', number % 2 == 0) for number in range(1, num_pages + 1)]
+    return [(kind, False)] * num_pages
+
+
+def build_document(path, kind, num_pages, seed):
+    """문서 하나 생성 (종류와 페이지 수, seed가 같으면 같은 파일)"""
+    rng = random.Random(f"{seed}:{kind}:{num_pages}")
+    title = f"{rng.choice(TOPICS)} 추진 계획 보고서"
+    plan = page_plan(kind, num_pages)
+
+    scanned = [(drawer, number) for number, (drawer, is_scan) in enumerate(plan, 1) if is_scan]
+    images = iter(render_scans(scanned, rng, title)) if scanned else iter(())
+    image_reader = require('reportlab.lib.utils').ImageReader if scanned else None
+
+    c = new_canvas(path)
+    c.setTitle(title)
+    for number, (drawer, is_scan) in enumerate(plan, 1):
+        if is_scan:
+            c.drawImage(image_reader(next(images)), 0, 0, PAGE_WIDTH, PAGE_HEIGHT)
+        else:
+            PAGE_DRAWERS[drawer](c, rng, title, number)
+        c.showPage()
+    c.save()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_corpus(out_dir, seed=DEFAULT_SEED, scale=1.0, documents=DEFAULT_DOCUMENTS):
+    """코퍼스 생성 후 manifest(dict) 반환, out_dir/manifest.json에도 저장
+
+    이미 같은 설정의 manifest가 있고 파일 해시가 맞으면 다시 만들지 않음
+    """
+    register_fonts()
+    os.makedirs(out_dir, exist_ok=True)
+    settings = {'version': CORPUS_VERSION, 'seed': seed, 'scale': scale}
+    manifest_path = os.path.join(out_dir, 'manifest.json')
+    existing = load_manifest(out_dir)
+    if existing and existing['settings'] == settings and verify_manifest(out_dir, existing):
+        return existing
+
+    entries = []
+    for kind, pages in documents:
+        num_pages = max(1, round(pages * scale))
+        name = f"{kind}_{num_pages:03d}p.pdf"
+        path = os.path.join(out_dir, name)
+        build_document(path, kind, num_pages, seed)
+        entries.append({
+            'name': name,
+            'kind': kind,
+            'pages': num_pages,
+            'bytes': os.path.getsize(path),
+            'sha256': file_sha256(path),
+        })
+
+    manifest = {
+        'settings': settings,
+        'documents': entries,
+        'digest': hashlib.sha256(''.join(entry['sha256'] for entry in entries).encode()).hexdigest(),
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def verify_manifest(out_dir, manifest):
+    """manifest의 모든 파일이 있고 해시가 같은지"""
+    for entry in manifest['documents']:
+        path = os.path.join(out_dir, entry['name'])
+        if not os.path.exists(path) or file_sha256(path) != entry['sha256']:
+            return False
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='합성 한글 PDF 코퍼스 생성')
+    parser.add_argument('out_dir', help='코퍼스를 만들 폴더')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--scale', type=float, default=1.0, help='페이지 수 배율 (빠른 확인은 0.25)')
+    args = parser.parse_args(argv)
+
+    manifest = build_corpus(args.out_dir, seed=args.seed, scale=args.scale)
+    for entry in manifest['documents']:
+        print(f"{entry['name']:<24}{entry['pages']:>5}쪽{entry['bytes'] / 1024:>10.1f} KB  {entry['sha256'][:12]}")
+    print(f"\n코퍼스 digest: {manifest['digest']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
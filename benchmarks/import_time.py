@@ -0,0 +1,93 @@
+# import_time.py - 앱 시작 시 임포트 시간 측정 및 회귀 검사 (python -X importtime 기반)
+#
+# 사용법:
+#   python benchmarks/import_time.py [--budget-ms 500] [--runs 3]
+#
+# streamlit_app.py가 임포트하는 modules.* 를 새 인터프리터에서 불러와
+# 1) 무거운 선택 의존성(PDF/OCR/PDF 생성 라이브러리)이 시작 시 임포트되면 실패
+# 2) 누적 임포트 시간(여러 번 실행 중 최솟값)이 예산을 넘으면 실패
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, 'streamlit_app.py')
+
+# 처음 사용할 때까지 임포트하면 안 되는 모듈
+HEAVY_MODULES = (
+    'PyPDF2', 'pypdfium2', 'pymupdf', 'fitz', 'pytesseract', 'pdf2image', 'PIL', 'cv2', 'numpy', 'pandas',
+    'reportlab', 'weasyprint', 'fpdf', 'markdown2',
+)
+
+
+def app_modules(app_path=APP_PATH):
+    """streamlit_app.py가 최상위에서 임포트하는 modules.* 목록"""
+    with open(app_path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module and node.module.startswith('modules.'):
+            names.append(node.module)
+        elif isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names if alias.name.startswith('modules.'))
+    return sorted(set(names))
+
+
+def measure(modules):
+    """새 인터프리터에서 임포트, {모듈: (자체 us, 누적 us)}와 최상위 누적 합계(us) 반환"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+        cwd=ROOT, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=ROOT)
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    timings = {}
+    total = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        timings[name] = (int(self_us), int(cumulative_us))
+        if depth == 1:
+            total += int(cumulative_us)
+    return timings, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='앱 시작 임포트 시간 검사')
+    parser.add_argument('--budget-ms', type=float, default=500, help='누적 임포트 시간 예산 (ms)')
+    parser.add_argument('--runs', type=int, default=3, help='측정 횟수 (최솟값 사용)')
+    parser.add_argument('--top', type=int, default=10, help='출력할 느린 모듈 수')
+    args = parser.parse_args(argv)
+
+    modules = app_modules()
+    runs = [measure(modules) for _ in range(args.runs)]
+    timings, total = min(runs, key=lambda run: run[1])
+
+    print(f"대상: {', '.join(modules)}")
+    print(f"누적 임포트 시간: {total / 1000:.1f} ms (예산 {args.budget_ms:.0f} ms, {args.runs}회 중 최솟값)")
+    print("\n가장 느린 모듈 (누적):")
+    for name, (self_us, cumulative_us) in sorted(timings.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    heavy = sorted({name.split('.')[0] for name in timings} & set(HEAVY_MODULES))
+    if heavy:
+        failures.append(f"시작 시 무거운 모듈 임포트: {', '.join(heavy)}")
+    if total / 1000 > args.budget_ms:
+        failures.append(f"임포트 시간 예산 초과: {total / 1000:.1f} ms > {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"\n❌ {failure}")
+    if not failures:
+        print("\n✅ 통과")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
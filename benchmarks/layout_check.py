@@ -0,0 +1,127 @@
+# layout_check.py - 레이아웃 분석 읽기 순서 확인 (2단 본문, 표)
+#
+# 사용법:
+#   python benchmarks/layout_check.py [--backends pdfium pymupdf] [--pages 2]
+#
+# corpus.py의 그리기 함수를 기록용 캔버스로 한 번 더 실행해 그린 순서(= 올바른 읽기 순서)를 얻고,
+# 같은 seed로 만든 PDF를 layout=True로 추출한 본문과 줄 단위로 비교 (공백 무시)
+# - two_column: 단이 2개로 잡히고 왼쪽 단 전체 → 오른쪽 단 순서
+# - table: 칸 사이 여백을 단으로 보지 않고(단 1개), 표는 행 단위로 칸이 ' | '로 이어지며 빈 칸도 자리를 유지
+# 하나라도 다르면 실패 코드로 종료
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import DEFAULT_SEED, PAGE_DRAWERS, TOPICS, build_document, register_fonts  # noqa: E402
+
+from modules.converter import available_backends, extract_native_pages  # noqa: E402
+from modules.layout import CELL_SEPARATOR  # noqa: E402
+
+# (종류, 기대 단 수)
+CASES = (('two_column', 2), ('table', 1))
+
+
+class RecordingCanvas:
+    """drawString 호출만 (y, 텍스트)로 기록하는 캔버스 대역"""
+
+    def __init__(self):
+        self.pages = [[]]
+
+    def drawString(self, x, y, text):
+        self.pages[-1].append((y, text))
+
+    drawRightString = drawString
+
+    def showPage(self):
+        self.pages.append([])
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def expected_pages(kind, num_pages, seed):
+    """페이지마다 기대하는 본문 줄 목록 (머리글/바닥글 제외, 같은 y에 그린 칸은 한 행)"""
+    # build_document와 같은 순서로 난수를 소비
+    rng = random.Random(f"{seed}:{kind}:{num_pages}")
+    title = f"{rng.choice(TOPICS)} 추진 계획 보고서"
+    canvas = RecordingCanvas()
+    for number in range(1, num_pages + 1):
+        PAGE_DRAWERS[kind](canvas, rng, title, number)
+        canvas.showPage()
+
+    pages = []
+    for records in canvas.pages[:num_pages]:
+        rows = []
+        previous_y = None
+        for y, text in records[2:]:  # draw_header_footer의 머리글, 쪽 번호
+            if y == previous_y:
+                rows[-1].append(text)
+            else:
+                rows.append([text])
+            previous_y = y
+        pages.append([CELL_SEPARATOR.join(row) for row in rows])
+    return pages
+
+
+def squeeze(text):
+    return ''.join(text.split())
+
+
+def check(kind, columns, backend, num_pages, seed, work_dir):
+    """오류 메시지 목록 (비어 있으면 통과)"""
+    path = os.path.join(work_dir, f"{kind}.pdf")
+    if not os.path.exists(path):
+        build_document(path, kind, num_pages, seed)
+    pages, _, _ = extract_native_pages(path, backend=backend, layout=True)
+
+    errors = []
+    for page, expected in zip(pages, expected_pages(kind, num_pages, seed)):
+        if page.get('columns') != columns:
+            errors.append(f"{page['page']}쪽: 단 {page.get('columns')}개 (기대 {columns}개)")
+        # 첫 줄은 머리글, 마지막 줄은 쪽 번호
+        body = page['text'].split('\n')[1:-1]
+        for index, (got, want) in enumerate(zip(body, expected)):
+            if squeeze(got) != squeeze(want):
+                errors.append(f"{page['page']}쪽 {index + 1}번째 줄: {got!r} (기대 {want!r})")
+                break
+        else:
+            if len(body) != len(expected):
+                errors.append(f"{page['page']}쪽: 본문 {len(body)}줄 (기대 {len(expected)}줄)")
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='레이아웃 분석 읽기 순서 확인')
+    parser.add_argument('--backends', nargs='+', help='확인할 엔진 (기본: 설치된 pdfium/pymupdf)')
+    parser.add_argument('--pages', type=int, default=2, help='문서당 페이지 수')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    # pypdf2는 글자 상자가 없어 레이아웃 분석을 하지 않음
+    backends = args.backends or [name for name in available_backends() if name != 'pypdf2']
+    if not backends:
+        print('레이아웃 분석을 지원하는 엔진(pypdfium2, PyMuPDF)이 없습니다')
+        return 1
+
+    register_fonts()
+    failed = False
+    with tempfile.TemporaryDirectory() as work_dir:
+        for backend in backends:
+            for kind, columns in CASES:
+                errors = check(kind, columns, backend, args.pages, args.seed, work_dir)
+                print(f"{'❌' if errors else '✅'} {backend:<8} {kind}")
+                for error in errors[:5]:
+                    print(f"     {error}")
+                failed = failed or bool(errors)
+    if failed:
+        return 1
+    print('✅ 통과')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+# mock_drive.py - Google Drive REST API 로컬 모의 서버 (폴더 생성, 재개 가능 업로드)
+#
+# 사용법:
+#   python benchmarks/mock_drive.py [--port 8767] [--fail-first 0] [--truncate-first 0] [--latency-ms 0]
+#   HANGULPDF_GDRIVE_BASE_URL=http://127.0.0.1:8767 HANGULPDF_GDRIVE_ACCESS_TOKEN=test streamlit run streamlit_app.py
+#
+# uploadType=resumable 세션을 열면 Location으로 세션 주소를 돌려주고, 조각(PUT + Content-Range)은 308 + Range로,
+# 마지막 조각은 파일 dict로 응답 - 'bytes */크기' 요청에는 지금까지 받은 위치를 알려줌
+# --fail-first N은 처음 N번의 조각 전송에 503을, --truncate-first N은 조각의 절반만 받고 503을 돌려줘
+# 재시도와 받은 위치부터 이어서 보내는지 확인하는 용도 (state.expire_sessions()로 세션 만료도 흉내)
+# GET /stats로 세션/조각/바이트/실패 횟수와 완료된 파일(크기, sha256)을 확인
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+UPLOAD_PATH = '/upload/drive/v3/files'
+FILES_PATH = '/drive/v3/files'
+
+
+class MockDrive:
+    """모의 서버 상태 (업로드 세션, 완료된 파일, 실패 주입)"""
+
+    def __init__(self, fail_first=0, truncate_first=0, latency=0.0, token=None):
+        self.fail_remaining = fail_first
+        self.truncate_remaining = truncate_first
+        self.latency = latency
+        self.token = token
+        self.sessions = {}  # upload_id -> {'name', 'parents', 'size', 'data'}
+        self.files = {}     # file id -> {'name', 'parents', 'size', 'sha256', 'mimeType'}
+        self.stats = {'sessions': 0, 'chunks': 0, 'bytes': 0, 'failed': 0, 'truncated': 0, 'queries': 0,
+                      'folders': 0}
+        self.lock = threading.Lock()
+
+    def expire_sessions(self):
+        with self.lock:
+            self.sessions.clear()
+
+    def create_file(self, body):
+        file_id = uuid.uuid4().hex[:16]
+        with self.lock:
+            self.files[file_id] = {'name': body.get('name'), 'parents': body.get('parents', []),
+                                   'mimeType': body.get('mimeType')}
+            self.stats['folders'] += body.get('mimeType') == 'application/vnd.google-apps.folder'
+        return {'id': file_id}
+
+    def start(self, body, size, mime_type):
+        upload_id = uuid.uuid4().hex
+        with self.lock:
+            self.sessions[upload_id] = {'name': body.get('name'), 'parents': body.get('parents', []),
+                                        'size': size, 'mimeType': mime_type, 'data': bytearray()}
+            self.stats['sessions'] += 1
+        return upload_id
+
+    def _finish(self, upload_id, session):
+        file_id = uuid.uuid4().hex[:16]
+        self.files[file_id] = {'name': session['name'], 'parents': session['parents'], 'size': len(session['data']),
+                               'mimeType': session['mimeType'],
+                               'sha256': hashlib.sha256(session['data']).hexdigest()}
+        session['file_id'] = file_id
+        return {'id': file_id, 'name': session['name'], 'size': str(len(session['data']))}
+
+    def put(self, upload_id, content_range, data):
+        """(상태, 헤더, 응답 dict)"""
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            session = self.sessions.get(upload_id)
+            if session is None:
+                return 404, {}, {'error': {'code': 404, 'message': 'upload session not found'}}
+            if session.get('file_id'):
+                file = self.files[session['file_id']]
+                return 200, {}, {'id': session['file_id'], 'name': file['name'], 'size': str(file['size'])}
+            received = len(session['data'])
+            spec, _, total = content_range.partition('bytes ')[2].partition('/')
+            if spec == '*':
+                self.stats['queries'] += 1
+            else:
+                start, _, end = spec.partition('-')
+                self.stats['chunks'] += 1
+                if self.fail_remaining > 0:
+                    self.fail_remaining -= 1
+                    self.stats['failed'] += 1
+                    return 503, {}, {'error': {'code': 503, 'message': 'mock backend error'}}
+                if int(start) == received:
+                    if self.truncate_remaining > 0 and len(data) > 1:
+                        # 전송 중 끊김: 앞부분만 받고 실패 응답
+                        self.truncate_remaining -= 1
+                        self.stats['truncated'] += 1
+                        session['data'] += data[:len(data) // 2]
+                        self.stats['bytes'] += len(data) // 2
+                        return 503, {}, {'error': {'code': 503, 'message': 'connection reset'}}
+                    session['data'] += data
+                    self.stats['bytes'] += len(data)
+                received = len(session['data'])
+            if total != '*' and received >= int(total):
+                return 200, {}, self._finish(upload_id, session)
+            headers = {'Range': f'bytes=0-{received - 1}'} if received else {}
+            return 308, headers, None
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, headers=None):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else b''
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            if body is not None:
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return self.rfile.read(length) if length else b''
+
+        def _authorized(self):
+            if state.token and self.headers.get('Authorization') != f'Bearer {state.token}':
+                self._send(401, {'error': {'code': 401, 'message': 'invalid credentials'}})
+                return False
+            return True
+
+        def do_GET(self):
+            if urlparse(self.path).path == '/stats':
+                with state.lock:
+                    files = {file['name']: {'size': file['size'], 'sha256': file['sha256']}
+                             for file in state.files.values() if 'sha256' in file}
+                    self._send(200, dict(state.stats, files=files, open_sessions=sum(
+                        1 for session in state.sessions.values() if not session.get('file_id'))))
+            else:
+                self._send(404, {'error': {'code': 404, 'message': 'unknown path'}})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = json.loads(self._read_body() or b'{}')
+            if not self._authorized():
+                return
+            if url.path == FILES_PATH:
+                self._send(200, state.create_file(body))
+            elif url.path == UPLOAD_PATH and parse_qs(url.query).get('uploadType') == ['resumable']:
+                size = int(self.headers.get('X-Upload-Content-Length') or 0)
+                upload_id = state.start(body, size, self.headers.get('X-Upload-Content-Type'))
+                host = self.headers.get('Host')
+                self._send(200, None, {'Location': f"http://{host}{UPLOAD_PATH}?uploadType=resumable&upload_id={upload_id}"})
+            else:
+                self._send(404, {'error': {'code': 404, 'message': 'unknown path'}})
+
+        def do_PUT(self):
+            url = urlparse(self.path)
+            data = self._read_body()
+            if not self._authorized():
+                return
+            upload_id = (parse_qs(url.query).get('upload_id') or [''])[0]
+            if url.path != UPLOAD_PATH or not upload_id:
+                self._send(404, {'error': {'code': 404, 'message': 'unknown path'}})
+                return
+            status, headers, body = state.put(upload_id, self.headers.get('Content-Range', ''), data)
+            self._send(status, body, headers)
+
+    return Handler
+
+
+def start_server(port=0, fail_first=0, truncate_first=0, latency=0.0, token=None):
+    """백그라운드 스레드에서 서버 시작, (서버, 상태) 반환 (server.server_address로 주소 확인, shutdown()으로 종료)"""
+    state = MockDrive(fail_first=fail_first, truncate_first=truncate_first, latency=latency, token=token)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    threading.Thread(target=server.serve_forever, name='mock-drive', daemon=True).start()
+    return server, state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Google Drive API 로컬 모의 서버')
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--fail-first', type=int, default=0, help='처음 N번의 조각 전송에 503 응답')
+    parser.add_argument('--truncate-first', type=int, default=0, help='처음 N번의 조각은 절반만 받고 503 응답')
+    parser.add_argument('--latency-ms', type=int, default=0, help='조각 전송 응답 지연')
+    parser.add_argument('--token', default=None, help='지정하면 Authorization 헤더를 확인')
+    args = parser.parse_args(argv)
+
+    server, _ = start_server(args.port, args.fail_first, args.truncate_first, args.latency_ms / 1000, args.token)
+    print(f"모의 Drive 서버: http://127.0.0.1:{server.server_address[1]} (Ctrl+C로 종료)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
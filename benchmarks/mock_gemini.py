@@ -0,0 +1,181 @@
+# mock_gemini.py - Gemini REST API 로컬 모의 서버 (generateContent, cachedContents)
+#
+# 사용법:
+#   python benchmarks/mock_gemini.py [--port 8765] [--fail-first 0] [--latency-ms 0]
+#   HANGULPDF_GEMINI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=test streamlit run streamlit_app.py
+#
+# responseSchema가 있으면 스키마 형식의 고정된 분석 JSON을, 없으면 짧은 요약 텍스트를 돌려줌
+# --fail-first N은 처음 N번의 generateContent에 503을 돌려줘 재시도를 확인하는 용도
+# 토큰 수는 글자 수 / 2로 흉내 내며, cachedContent를 쓰면 캐시된 토큰을 usageMetadata에 따로 표시
+# GET /stats로 호출 횟수(generate, cached_generate, cache_create, failed)를 확인
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+API_PREFIX = '/v1beta/'
+
+
+def _tokens(text):
+    return max(1, len(text) // 2)
+
+
+def mock_analysis(text):
+    """스키마 형식의 고정된 분석 결과 (본문 앞부분으로 채움)"""
+    lines = [line.strip()[:60] for line in text.splitlines() if line.strip()][:6] or ['(빈 문서)']
+    return {
+        'info': {'title': lines[0], 'date': '', 'author': '', 'doc_type': '기타', 'purpose': '모의 분석'},
+        'structure': [{'title': f'섹션 {index}', 'summary': line} for index, line in enumerate(lines[:3], 1)],
+        'summary': lines[:3],
+        'keywords': [{'term': word, 'count': 1} for word in ' '.join(lines).split()[:5]],
+        'entities': [],
+        'decisions': [],
+        'action_items': [],
+        'type_analysis': [],
+        'issues': [],
+    }
+
+
+class MockGemini:
+    """모의 서버 상태 (캐시 목록, 호출 횟수, 실패 주입)"""
+
+    def __init__(self, fail_first=0, latency=0.0, api_key=None):
+        self.fail_remaining = fail_first
+        self.latency = latency
+        self.api_key = api_key
+        self.caches = {}  # 'cachedContents/ID' -> {'model', 'text', 'tokens'}
+        self.stats = {'generate': 0, 'cached_generate': 0, 'cache_create': 0, 'failed': 0}
+        self.lock = threading.Lock()
+
+    def create_cache(self, body):
+        name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+        text = ''.join(part.get('text', '') for part in (body.get('systemInstruction') or {}).get('parts', []))
+        text += ''.join(part.get('text', '') for content in body.get('contents', []) for part in content['parts'])
+        with self.lock:
+            self.caches[name] = {'model': body.get('model'), 'text': text, 'tokens': _tokens(text)}
+            self.stats['cache_create'] += 1
+        return {'name': name, 'model': body.get('model'), 'usageMetadata': {'totalTokenCount': _tokens(text)}}
+
+    def generate(self, model, body):
+        """(상태, 응답 dict)"""
+        with self.lock:
+            if self.fail_remaining > 0:
+                self.fail_remaining -= 1
+                self.stats['failed'] += 1
+                return 503, {'error': {'code': 503, 'message': 'mock overloaded', 'status': 'UNAVAILABLE'}}
+            cache = self.caches.get(body.get('cachedContent')) if body.get('cachedContent') else None
+            if body.get('cachedContent') and cache is None:
+                return 404, {'error': {'code': 404, 'message': 'cached content not found', 'status': 'NOT_FOUND'}}
+            self.stats['cached_generate' if cache else 'generate'] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = ''.join(part.get('text', '') for content in body.get('contents', []) for part in content['parts'])
+        source = (cache['text'] if cache else '') + prompt
+        config = body.get('generationConfig') or {}
+        if config.get('responseSchema'):
+            output = json.dumps(mock_analysis(source.split('---', 1)[-1]), ensure_ascii=False)
+        else:
+            output = '- ' + (source.strip().splitlines() or [''])[-1][:80]
+        cached_tokens = cache['tokens'] if cache else 0
+        return 200, {
+            'candidates': [{'content': {'role': 'model', 'parts': [{'text': output}]}, 'finishReason': 'STOP'}],
+            'usageMetadata': {
+                'promptTokenCount': _tokens(prompt) + cached_tokens,
+                'cachedContentTokenCount': cached_tokens,
+                'candidatesTokenCount': _tokens(output),
+                'totalTokenCount': _tokens(prompt) + cached_tokens + _tokens(output),
+            },
+            'modelVersion': model,
+        }
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self):
+            if state.api_key and self.headers.get('x-goog-api-key') != state.api_key:
+                self._send(403, {'error': {'code': 403, 'message': 'invalid api key', 'status': 'PERMISSION_DENIED'}})
+                return False
+            return True
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/stats':
+                with state.lock:
+                    self._send(200, dict(state.stats, caches=len(state.caches)))
+            elif path.startswith(API_PREFIX + 'cachedContents/') and self._authorized():
+                name = path[len(API_PREFIX):]
+                with state.lock:
+                    cache = state.caches.get(name)
+                if cache:
+                    self._send(200, {'name': name, 'model': cache['model']})
+                else:
+                    self._send(404, {'error': {'code': 404, 'message': 'not found', 'status': 'NOT_FOUND'}})
+            else:
+                self._send(404, {'error': {'code': 404, 'message': 'unknown path', 'status': 'NOT_FOUND'}})
+
+        def do_DELETE(self):
+            path = self.path.split('?')[0]
+            if path.startswith(API_PREFIX + 'cachedContents/') and self._authorized():
+                with state.lock:
+                    state.caches.pop(path[len(API_PREFIX):], None)
+                self._send(200, {})
+
+        def do_POST(self):
+            path = self.path.split('?')[0]
+            if not self._authorized():
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if path == API_PREFIX + 'cachedContents':
+                self._send(200, state.create_cache(body))
+            elif path.startswith(API_PREFIX + 'models/') and path.endswith(':generateContent'):
+                model = path[len(API_PREFIX + 'models/'):-len(':generateContent')]
+                self._send(*state.generate(model, body))
+            else:
+                self._send(404, {'error': {'code': 404, 'message': 'unknown path', 'status': 'NOT_FOUND'}})
+
+    return Handler
+
+
+def start_server(port=0, fail_first=0, latency=0.0, api_key=None):
+    """백그라운드 스레드에서 서버 시작, (서버, 상태) 반환 (server.server_address로 주소 확인, shutdown()으로 종료)"""
+    state = MockGemini(fail_first=fail_first, latency=latency, api_key=api_key)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    threading.Thread(target=server.serve_forever, name='mock-gemini', daemon=True).start()
+    return server, state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gemini API 로컬 모의 서버')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail-first', type=int, default=0, help='처음 N번의 generateContent에 503 응답')
+    parser.add_argument('--latency-ms', type=int, default=0, help='generateContent 응답 지연')
+    parser.add_argument('--api-key', default=None, help='지정하면 x-goog-api-key를 확인')
+    args = parser.parse_args(argv)
+
+    server, _ = start_server(args.port, args.fail_first, args.latency_ms / 1000, args.api_key)
+    print(f"모의 Gemini 서버: http://127.0.0.1:{server.server_address[1]} (Ctrl+C로 종료)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# mock_openai.py - OpenAI 호환 Chat Completions 로컬 모의 서버 (ChatGPT, Grok 공용)
+#
+# 사용법:
+#   python benchmarks/mock_openai.py [--port 8766] [--fail-first 0] [--latency-ms 0] [--chunk-chars 40]
+#   HANGULPDF_OPENAI_BASE_URL=http://127.0.0.1:8766/v1 HANGULPDF_GROK_BASE_URL=http://127.0.0.1:8766/v1 \
+#       XAI_API_KEY=test streamlit run streamlit_app.py
+#
+# response_format이 있으면 스키마 형식의 고정된 분석 JSON을(mock_gemini.mock_analysis), 없으면 짧은 요약 텍스트를 돌려줌
+# stream이면 SSE로 --chunk-chars 글자씩 나눠 보내고, stream_options.include_usage면 마지막에 usage 조각을 보냄
+# --fail-first N은 처음 N번의 호출에 503을 돌려줘 재시도를 확인하는 용도, 토큰 수는 글자 수 / 2로 흉내
+# 응답이 max_tokens를 넘으면 그만큼에서 자르고 finish_reason 'length' (출력 토큰 한도 확인용)
+# GET /stats로 호출 횟수(completions, streamed, failed, models별)를 확인
+import argparse
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mock_gemini import mock_analysis
+
+COMPLETIONS_PATH = '/v1/chat/completions'
+
+
+def _tokens(text):
+    return max(1, len(text) // 2)
+
+
+class MockOpenAI:
+    """모의 서버 상태 (호출 횟수, 실패 주입)"""
+
+    def __init__(self, fail_first=0, latency=0.0, api_key=None, chunk_chars=40):
+        self.fail_remaining = fail_first
+        self.latency = latency
+        self.api_key = api_key
+        self.chunk_chars = chunk_chars
+        self.stats = {'completions': 0, 'streamed': 0, 'failed': 0, 'models': {}}
+        self.lock = threading.Lock()
+
+    def complete(self, body):
+        """(상태, 응답 dict), 성공하면 응답 dict 대신 (내용, usage, finish_reason)"""
+        with self.lock:
+            if self.fail_remaining > 0:
+                self.fail_remaining -= 1
+                self.stats['failed'] += 1
+                return 503, {'error': {'message': 'mock overloaded', 'type': 'server_error'}}
+            self.stats['completions'] += 1
+            self.stats['streamed'] += bool(body.get('stream'))
+            model = body.get('model', '')
+            self.stats['models'][model] = self.stats['models'].get(model, 0) + 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = ''.join(message.get('content', '') for message in body.get('messages', []))
+        if body.get('response_format'):
+            output = json.dumps(mock_analysis(prompt.split('---', 1)[-1]), ensure_ascii=False)
+        else:
+            output = '- ' + (prompt.strip().splitlines() or [''])[-1][:80]
+        finish_reason = 'stop'
+        max_tokens = body.get('max_tokens')
+        if max_tokens and _tokens(output) > max_tokens:
+            output = output[:max_tokens * 2]
+            finish_reason = 'length'
+        usage = {'prompt_tokens': _tokens(prompt), 'completion_tokens': _tokens(output),
+                 'total_tokens': _tokens(prompt) + _tokens(output)}
+        return 200, (output, usage, finish_reason)
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # 연결 유지 (클라이언트 연결 풀 재사용 확인)
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, completion_id, model, output, usage, finish_reason, include_usage):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.close_connection = True
+
+            def event(choices, **extra):
+                chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'model': model,
+                         'choices': choices, **extra}
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+
+            size = max(1, state.chunk_chars)
+            for start in range(0, len(output), size):
+                event([{'index': 0, 'delta': {'content': output[start:start + size]}, 'finish_reason': None}])
+            event([{'index': 0, 'delta': {}, 'finish_reason': finish_reason}])
+            if include_usage:
+                event([], usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path.split('?')[0] == '/stats':
+                with state.lock:
+                    self._send(200, json.loads(json.dumps(state.stats)))
+            else:
+                self._send(404, {'error': {'message': 'unknown path', 'type': 'invalid_request_error'}})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if self.path.split('?')[0] != COMPLETIONS_PATH:
+                self._send(404, {'error': {'message': 'unknown path', 'type': 'invalid_request_error'}})
+                return
+            if state.api_key and self.headers.get('Authorization') != f'Bearer {state.api_key}':
+                self._send(401, {'error': {'message': 'invalid api key', 'type': 'invalid_request_error'}})
+                return
+
+            status, result = state.complete(body)
+            if status != 200:
+                self._send(status, result)
+                return
+            output, usage, finish_reason = result
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            model = body.get('model', '')
+            if body.get('stream'):
+                self._stream(completion_id, model, output, usage, finish_reason,
+                             (body.get('stream_options') or {}).get('include_usage'))
+            else:
+                self._send(200, {
+                    'id': completion_id,
+                    'object': 'chat.completion',
+                    'model': model,
+                    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': output},
+                                 'finish_reason': finish_reason}],
+                    'usage': usage,
+                })
+
+    return Handler
+
+
+def start_server(port=0, fail_first=0, latency=0.0, api_key=None, chunk_chars=40):
+    """백그라운드 스레드에서 서버 시작, (서버, 상태) 반환 (기본 주소는 http://127.0.0.1:포트/v1)"""
+    state = MockOpenAI(fail_first=fail_first, latency=latency, api_key=api_key, chunk_chars=chunk_chars)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    threading.Thread(target=server.serve_forever, name='mock-openai', daemon=True).start()
+    return server, state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='OpenAI 호환 API 로컬 모의 서버 (ChatGPT, Grok)')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--fail-first', type=int, default=0, help='처음 N번의 호출에 503 응답')
+    parser.add_argument('--latency-ms', type=int, default=0, help='응답 지연')
+    parser.add_argument('--api-key', default=None, help='지정하면 Authorization 헤더를 확인')
+    parser.add_argument('--chunk-chars', type=int, default=40, help='스트리밍 조각 하나의 글자 수')
+    args = parser.parse_args(argv)
+
+    server, _ = start_server(args.port, args.fail_first, args.latency_ms / 1000, args.api_key, args.chunk_chars)
+    print(f"모의 OpenAI 호환 서버: http://127.0.0.1:{server.server_address[1]}/v1 (Ctrl+C로 종료)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# native_backends.py - 기본 텍스트 추출 엔진 비교 (페이지/초, 실패 페이지 비율, 한글 비율)
+#
+# 사용법:
+#   python benchmarks/native_backends.py PDF폴더 [--backends pdfium pymupdf pypdf2] [--layout] [--json 결과.json]
+#
+# --layout이면 레이아웃 분석(다단 읽기 순서 복원)을 포함한 시간을 측정 (페이지당 50ms 이하 목표)
+# 한글 비율은 추출된 글자(공백/숫자/기호 제외) 중 완성형 한글의 비율로,
+# CID 폰트 매핑을 잘못 처리한 엔진은 글자가 깨져 이 값이 크게 낮아짐
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.batch import find_pdfs  # noqa: E402
+from modules.converter import available_backends, extract_native_pages  # noqa: E402
+
+
+def hangul_ratio(text):
+    """문자(letter) 중 완성형 한글 비율"""
+    letters = [char for char in text if char.isalpha()]
+    if not letters:
+        return 0.0
+    return sum(1 for char in letters if '가' <= char <= '힣') / len(letters)
+
+
+def run_backend(backend, paths, layout=False):
+    """엔진 하나로 모든 파일 추출, 집계 결과 반환"""
+    pages = 0
+    failed = 0
+    errors = 0
+    chars = 0
+    hangul_letters = 0.0
+    started = time.perf_counter()
+
+    for path in paths:
+        try:
+            page_results, num_pages, failed_pages = extract_native_pages(path, backend=backend, layout=layout)
+        except Exception:
+            errors += 1
+            continue
+        pages += num_pages
+        failed += failed_pages
+        for page in page_results:
+            chars += len(page['text'])
+            hangul_letters += hangul_ratio(page['text']) * len(page['text'])
+
+    elapsed = time.perf_counter() - started
+    return {
+        'backend': backend,
+        'files': len(paths),
+        'file_errors': errors,
+        'pages': pages,
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(pages / elapsed, 1) if elapsed else 0.0,
+        'ms_per_page': round(elapsed * 1000 / pages, 2) if pages else 0.0,
+        'failed_page_rate': round(failed / pages, 4) if pages else 0.0,
+        'hangul_ratio': round(hangul_letters / chars, 4) if chars else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='기본 텍스트 추출 엔진 비교')
+    parser.add_argument('input_dir', help='한글 PDF 코퍼스 폴더 (하위 폴더 포함)')
+    parser.add_argument('--backends', nargs='+', default=None, help='비교할 엔진 (기본: 설치된 전체)')
+    parser.add_argument('--layout', action='store_true', help='레이아웃 분석 포함')
+    parser.add_argument('--json', help='결과를 저장할 JSON 경로')
+    args = parser.parse_args(argv)
+
+    paths = find_pdfs(args.input_dir)
+    if not paths:
+        parser.error(f'PDF 파일이 없습니다: {args.input_dir}')
+
+    backends = args.backends or available_backends()
+    results = []
+    print(f"{len(paths)}개 파일\n")
+    print(f"{'엔진':<10}{'페이지':>8}{'초':>10}{'페이지/초':>12}{'ms/페이지':>12}{'실패율':>10}{'한글 비율':>11}")
+    for backend in backends:
+        result = run_backend(backend, paths, layout=args.layout)
+        results.append(result)
+        print(f"{backend:<10}{result['pages']:>8}{result['seconds']:>10.2f}{result['pages_per_second']:>12.1f}"
+              f"{result['ms_per_page']:>12.2f}{result['failed_page_rate']:>10.1%}{result['hangul_ratio']:>11.1%}"
+              + (f"  (파일 오류 {result['file_errors']})" if result['file_errors'] else ''))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
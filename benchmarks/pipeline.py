@@ -0,0 +1,310 @@
+# pipeline.py - 합성 코퍼스로 처리 단계별 시간 측정 (기본 추출, OCR, 텍스트 정리, 분석 PDF 생성, ZIP 패키징)
+#
+# 사용법:
+#   python benchmarks/pipeline.py [--corpus 폴더] [--scale 1.0] [--repeat 3] [--json 결과.json]
+#                                 [--compare 기준.json] [--tolerance 0.25]
+#
+# 코퍼스는 benchmarks/corpus.py로 만들며 (--corpus가 없으면 임시 폴더), LLM은 네트워크 없이 고정된
+# 분석 결과를 돌려주는 대역으로 바꿔 실행하므로 결과는 로컬 처리 시간만 반영함
+# 폰트 등록/지연 임포트가 첫 문서 시간에 섞이지 않도록 가장 작은 문서로 한 번 예열한 뒤,
+# 단계마다 repeat회 실행한 중앙값과 최솟값을 기록하고, --compare로 이전 결과와 (최솟값 기준) 비교하여
+# 허용 비율(--tolerance)보다 느려진 단계가 있으면 실패 코드로 종료
+# OCR은 tesseract와 poppler(pdftoppm)가 있을 때만 스캔/혼합 문서에 대해 측정
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import DEFAULT_SEED, build_corpus  # noqa: E402
+from native_backends import hangul_ratio  # noqa: E402
+
+from modules import gpt_summary  # noqa: E402
+from modules.analysis_model import Analysis, Keyword, Section  # noqa: E402
+from modules.converter import (  # noqa: E402
+    OCR_AVAILABLE, extract_native_pages, extract_ocr_pages, join_pages, merge_ocr_pages, resolve_backend,
+)
+from modules.report_pdf import create_analysis_zip, create_pdf_from_analysis  # noqa: E402
+from modules.text_cleaner import clean_pages  # noqa: E402
+
+RESULT_SCHEMA = 1
+STAGES = ('native', 'ocr', 'clean', 'analysis', 'render', 'zip')
+OCR_KINDS = ('scanned', 'mixed')
+MIN_COMPARE_SECONDS = 0.005  # 이보다 짧은 단계는 측정 잡음이 커서 비교하지 않음
+PACKAGES = ('pypdfium2', 'pymupdf', 'PyPDF2', 'pytesseract', 'reportlab', 'weasyprint', 'fpdf2')
+
+
+def quiet_notify(level, message):
+    pass
+
+
+def stub_analysis(provider, text):
+    """LLM 대역: 입력 앞부분으로 채운 고정된 구조화 분석 결과 (네트워크 호출 없음)"""
+    lines = [line[:80] for line in text.splitlines() if line.strip()][:12]
+    return Analysis(
+        provider,
+        model='stub',
+        title=f"{provider} 분석 결과 (대역)",
+        purpose=f"입력 {len(text):,}자",
+        structure=[Section(f"항목 {number}", ' '.join(lines[number - 1::6])) for number in range(1, 7)],
+        summary=lines[:5],
+        keywords=[Keyword(word, 1) for word in ' '.join(lines).split()[:10]],
+        issues=lines[5:8],
+    )
+
+
+def install_stub_llms():
+    """gpt_summary의 모델 호출을 대역으로 교체 (run_analyses는 그대로 사용)"""
+    gpt_summary.analyze_with_chatgpt = lambda text, api_key, **kwargs: stub_analysis('ChatGPT', text)
+    gpt_summary.analyze_with_gemini = lambda text, api_key=None, **kwargs: stub_analysis('Gemini', text)
+    gpt_summary.analyze_with_grok = lambda text, api_key=None, **kwargs: stub_analysis('Grok', text)
+
+
+def ocr_unavailable_reason():
+    if not OCR_AVAILABLE:
+        return 'pytesseract/pdf2image 미설치'
+    missing = [binary for binary in ('tesseract', 'pdftoppm') if not shutil.which(binary)]
+    return f"{', '.join(missing)} 없음" if missing else None
+
+
+def timed(func, repeat):
+    """func를 repeat회 실행, (마지막 결과, 실행 시간 목록)"""
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - started)
+    return result, seconds
+
+
+def stage_result(seconds, pages):
+    median = statistics.median(seconds)
+    return {
+        'median_seconds': round(median, 6),
+        'min_seconds': round(min(seconds), 6),
+        'runs': len(seconds),
+        'ms_per_page': round(median * 1000 / pages, 3) if pages else 0.0,
+    }
+
+
+def run_document(path, entry, backend, repeat, work_dir, ocr_skip_reason):
+    """문서 하나의 단계별 측정 결과"""
+    pages = entry['pages']
+    stages = {}
+    skipped = {}
+
+    (native_pages, num_pages, failed_pages), seconds = timed(
+        lambda: extract_native_pages(path, backend=backend, layout=True), repeat)
+    stages['native'] = stage_result(seconds, pages)
+
+    merged = native_pages
+    if entry['kind'] not in OCR_KINDS:
+        skipped['ocr'] = '텍스트 문서'
+    elif ocr_skip_reason:
+        skipped['ocr'] = ocr_skip_reason
+    else:
+        ocr_pages, seconds = timed(lambda: extract_ocr_pages(path, layout=True), repeat)
+        stages['ocr'] = stage_result(seconds, pages)
+        if ocr_pages:
+            merged, _ = merge_ocr_pages(native_pages, ocr_pages)
+
+    texts = [page['text'] for page in merged]
+    (cleaned_texts, removed_lines), seconds = timed(lambda: clean_pages(texts), repeat)
+    stages['clean'] = stage_result(seconds, pages)
+    cleaned = [dict(page, text=text) for page, text in zip(merged, cleaned_texts)]
+    text = join_pages(cleaned)
+
+    analyses, seconds = timed(lambda: gpt_summary.run_analyses(text, api_key='benchmark'), repeat)
+    stages['analysis'] = stage_result(seconds, pages)
+
+    render_path = os.path.join(work_dir, 'render.pdf')
+    rendered, seconds = timed(lambda: create_pdf_from_analysis(
+        analyses['chatgpt'], 'render.pdf', notify=quiet_notify, output_path=render_path), repeat)
+    if rendered:
+        stages['render'] = stage_result(seconds, pages)
+    else:
+        skipped['render'] = 'PDF 생성 라이브러리 없음'
+
+    zip_path = os.path.join(work_dir, 'package.zip')
+    packaged, seconds = timed(lambda: create_analysis_zip(
+        path, text, analyses['chatgpt'], analyses['gemini'], analyses['grok'], 'benchmark',
+        output_path=zip_path, notify=quiet_notify), repeat)
+    if packaged:
+        stages['zip'] = stage_result(seconds, pages)
+    else:
+        skipped['zip'] = 'ZIP 생성 실패'
+
+    return {
+        'name': entry['name'],
+        'kind': entry['kind'],
+        'pages': pages,
+        'bytes': entry['bytes'],
+        'failed_pages': failed_pages,
+        'chars': len(text),
+        'removed_lines': removed_lines,
+        'hangul_ratio': round(hangul_ratio(text), 4),
+        'stages': stages,
+        'skipped': skipped,
+    }
+
+
+def summarize(documents):
+    """단계별 합계 (중앙값 합, 측정한 페이지 수, ms/페이지)"""
+    totals = {}
+    for document in documents:
+        for stage, result in document['stages'].items():
+            total = totals.setdefault(stage, {'seconds': 0.0, 'pages': 0, 'documents': 0})
+            total['seconds'] += result['median_seconds']
+            total['pages'] += document['pages']
+            total['documents'] += 1
+    for total in totals.values():
+        total['ms_per_page'] = round(total['seconds'] * 1000 / total['pages'], 3) if total['pages'] else 0.0
+        total['seconds'] = round(total['seconds'], 6)
+    return {stage: totals[stage] for stage in STAGES if stage in totals}
+
+
+def environment(backend):
+    packages = {}
+    for name in PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            continue
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'native_backend': backend,
+        'packages': packages,
+    }
+
+
+def run_benchmark(corpus_dir, backend='auto', repeat=3, seed=DEFAULT_SEED, scale=1.0):
+    """코퍼스를 만들고(또는 재사용) 모든 문서의 단계를 측정한 결과(dict)"""
+    manifest = build_corpus(corpus_dir, seed=seed, scale=scale)
+    backend = resolve_backend(backend)
+    install_stub_llms()
+    ocr_skip_reason = ocr_unavailable_reason()
+
+    documents = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        smallest = min(manifest['documents'], key=lambda entry: entry['pages'])
+        run_document(os.path.join(corpus_dir, smallest['name']), smallest, backend, 1, work_dir, ocr_skip_reason)
+        for entry in manifest['documents']:
+            path = os.path.join(corpus_dir, entry['name'])
+            documents.append(run_document(path, entry, backend, repeat, work_dir, ocr_skip_reason))
+
+    return {
+        'schema': RESULT_SCHEMA,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'environment': environment(backend),
+        'corpus': {'settings': manifest['settings'], 'digest': manifest['digest']},
+        'repeat': repeat,
+        'documents': documents,
+        'totals': summarize(documents),
+    }
+
+
+def compare(current, baseline, tolerance):
+    """기준 결과 대비 단계별 변화, (행 목록, 느려진 항목 목록)
+
+    코퍼스 digest나 엔진이 다르면 비교 의미가 없으므로 호출자가 경고
+    """
+    rows = []
+    regressions = []
+    baseline_documents = {document['name']: document for document in baseline.get('documents', [])}
+    for document in current['documents']:
+        previous = baseline_documents.get(document['name'])
+        if not previous:
+            continue
+        for stage, result in document['stages'].items():
+            before = previous['stages'].get(stage)
+            if not before:
+                continue
+            old, new = before['min_seconds'], result['min_seconds']
+            if max(old, new) < MIN_COMPARE_SECONDS:
+                continue
+            change = (new - old) / old if old else 0.0
+            row = {'document': document['name'], 'stage': stage, 'before': old, 'after': new, 'change': change}
+            rows.append(row)
+            if change > tolerance:
+                regressions.append(row)
+    return rows, regressions
+
+
+def print_results(results):
+    print(f"코퍼스 {results['corpus']['digest'][:12]} · 엔진 {results['environment']['native_backend']}"
+          f" · {results['repeat']}회 중앙값\n")
+    print(f"{'문서':<24}" + ''.join(f"{stage:>11}" for stage in STAGES) + '   (ms/페이지)')
+    for document in results['documents']:
+        cells = []
+        for stage in STAGES:
+            result = document['stages'].get(stage)
+            cells.append(f"{result['ms_per_page']:>11.2f}" if result else f"{'-':>11}")
+        print(f"{document['name']:<24}" + ''.join(cells))
+    totals = results['totals']
+    print(f"{'합계':<24}" + ''.join(
+        f"{totals[stage]['ms_per_page']:>11.2f}" if stage in totals else f"{'-':>11}" for stage in STAGES))
+
+    skipped = {}
+    for document in results['documents']:
+        for stage, reason in document['skipped'].items():
+            if reason != '텍스트 문서':
+                skipped.setdefault(f"{stage}: {reason}", []).append(document['name'])
+    for reason, names in skipped.items():
+        print(f"\n건너뜀 ({reason}): {', '.join(names)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='합성 코퍼스 처리 단계별 벤치마크')
+    parser.add_argument('--corpus', help='코퍼스 폴더 (없으면 임시 폴더에 생성)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--scale', type=float, default=1.0, help='페이지 수 배율 (빠른 확인은 0.25)')
+    parser.add_argument('--backend', default='auto', help='기본 텍스트 추출 엔진')
+    parser.add_argument('--repeat', type=int, default=3, help='단계별 반복 횟수 (중앙값 사용)')
+    parser.add_argument('--json', help='결과를 저장할 JSON 경로')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='허용 지연 비율 (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        results = run_benchmark(args.corpus, args.backend, max(1, args.repeat), args.seed, args.scale)
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            results = run_benchmark(corpus_dir, args.backend, max(1, args.repeat), args.seed, args.scale)
+
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('corpus', {}).get('digest') != results['corpus']['digest']:
+        print('\n⚠️ 기준 결과와 코퍼스가 다릅니다 (seed/scale 또는 생성 라이브러리 버전 확인)')
+    if baseline.get('environment', {}).get('native_backend') != results['environment']['native_backend']:
+        print('⚠️ 기준 결과와 추출 엔진이 다릅니다')
+
+    rows, regressions = compare(results, baseline, args.tolerance)
+    print(f"\n기준 대비 {len(rows)}개 항목 비교 (허용 {args.tolerance:.0%})")
+    for row in regressions:
+        print(f"  ❌ {row['document']} {row['stage']}: {row['before'] * 1000:.1f} → {row['after'] * 1000:.1f} ms"
+              f" ({row['change']:+.0%})")
+    if regressions:
+        return 1
+    print('✅ 통과')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# search.py - 전문 검색 색인 벤치마크 (문서 저장 시 색인 갱신 시간, 검색 지연 시간)
+#
+# 사용법:
+#   python benchmarks/search.py [--documents 500] [--pages 10] [--repeat 20] [--json 결과.json]
+#
+# 임시 저장소에 가상의 한글 문서(기관명, 계약번호, 일반 문장)를 저장하며 문서당 저장+색인 시간을 재고,
+# 3글자 이상(FTS5 trigram), 2글자(LIKE), 여러 검색어 조합의 검색 지연 시간(p50/p95, 밀리초)을 출력
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.summary_store import SummaryStore  # noqa: E402
+
+ORGANIZATIONS = ['국토교통부', '행정안전부', '한국도로공사', '서울특별시', '부산광역시', '조달청', '한국전력공사',
+                 '환경부', '교육청', '보건복지부']
+WORDS = ['사업', '추진', '계획', '예산', '집행', '결과', '보고', '회의', '검토', '공정', '일정', '계약', '발주', '점검',
+         '개선', '현황', '분석', '정책', '지원', '운영', '관리', '시설', '안전', '협의', '승인']
+
+QUERIES = {
+    'trigram': ['한국도로공사', '국토교통부', '계약번호'],
+    'short': ['예산', '공정'],
+    'combined': ['서울특별시 예산', '조달청 계약번호'],
+}
+
+
+def make_document(rng, number, pages):
+    """페이지 마커가 있는 가상 문서 텍스트"""
+    parts = []
+    for page in range(1, pages + 1):
+        sentences = [' '.join(rng.choice(WORDS) for _ in range(8)) + '.' for _ in range(12)]
+        sentences.insert(rng.randrange(len(sentences)),
+                         f"{rng.choice(ORGANIZATIONS)} 계약번호 {2020 + number % 5}-{rng.randrange(10000):04d}")
+        parts.append(f"--- 페이지 {page} ---\n" + '\n'.join(sentences))
+    return '\n\n'.join(parts)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_benchmark(documents=500, pages=10, repeat=20, seed=42):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as work_dir:
+        store = SummaryStore(os.path.join(work_dir, 'search.db'))
+        if not store.search_available:
+            raise SystemExit('이 SQLite에는 FTS5 trigram 토크나이저가 없습니다 (3.34 이상 필요)')
+
+        save_seconds = []
+        for number in range(documents):
+            text = make_document(rng, number, pages)
+            started = time.perf_counter()
+            store.save_document(f"doc{number:05d}", f"문서_{number:05d}.pdf", text, pages=pages)
+            save_seconds.append(time.perf_counter() - started)
+
+        results = {
+            'documents': documents,
+            'pages': documents * pages,
+            'save_ms': {'p50': percentile(save_seconds, 0.5) * 1000, 'p95': percentile(save_seconds, 0.95) * 1000},
+            'db_mb': sum(os.path.getsize(os.path.join(work_dir, name)) for name in os.listdir(work_dir)) / 1024 / 1024,
+            'queries': {},
+        }
+        for kind, queries in QUERIES.items():
+            for query in queries:
+                timings = []
+                hits = 0
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    hits = len(store.search(query, limit=20))
+                    timings.append(time.perf_counter() - started)
+                results['queries'][query] = {
+                    'kind': kind,
+                    'hits': hits,
+                    'p50_ms': statistics.median(timings) * 1000,
+                    'p95_ms': percentile(timings, 0.95) * 1000,
+                }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='전문 검색 색인 벤치마크')
+    parser.add_argument('--documents', type=int, default=500)
+    parser.add_argument('--pages', type=int, default=10, help='문서당 페이지 수')
+    parser.add_argument('--repeat', type=int, default=20, help='검색어마다 반복 횟수')
+    parser.add_argument('--json', help='결과 저장 경로')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.documents, args.pages, args.repeat)
+    print(f"문서 {results['documents']:,}개 · 페이지 {results['pages']:,}개 · 저장소 {results['db_mb']:.1f} MB")
+    print(f"문서 저장+색인: p50 {results['save_ms']['p50']:.2f} ms · p95 {results['save_ms']['p95']:.2f} ms")
+    print(f"{'검색어':<20} {'방식':<10} {'결과':>6} {'p50 ms':>10} {'p95 ms':>10}")
+    for query, result in results['queries'].items():
+        print(f"{query:<20} {result['kind']:<10} {result['hits']:>6} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
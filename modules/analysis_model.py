@@ -0,0 +1,324 @@
+# analysis_model.py - 구조화(JSON) 분석 결과 모델 (스키마, 한 번만 검증, 렌더러용 블록/마크다운 변환)
+#
+# 분석 호출은 ANALYSIS_SCHEMA 형식의 JSON을 요청하고 parse_analysis로 한 번 검증하여 Analysis 객체로 바꿈
+# PDF 렌더러(modules/report_pdf.py), ZIP README, 분석 저장소(modules/summary_store.py)는 모두 이 객체를 그대로 사용
+import json
+from dataclasses import asdict, dataclass, field
+
+# 개체 종류 (스키마 enum) -> 표시 이름
+ENTITY_KINDS = {
+    'person': '인물',
+    'organization': '기관',
+    'date': '날짜',
+    'number': '수치',
+    'place': '장소',
+    'other': '기타',
+}
+
+
+def _string_schema():
+    return {'type': 'string'}
+
+
+def _object_schema(properties):
+    """모든 속성이 필수이고 추가 속성이 없는 객체 (OpenAI strict 구조화 출력 조건)"""
+    return {
+        'type': 'object',
+        'properties': properties,
+        'required': list(properties),
+        'additionalProperties': False,
+    }
+
+
+def _array_schema(items):
+    return {'type': 'array', 'items': items}
+
+
+_SECTION_SCHEMA = _object_schema({'title': _string_schema(), 'summary': _string_schema()})
+
+# 6단계 분석 결과 스키마 (6단계 '결과 형식'은 렌더러가 담당하므로 응답에는 내용만)
+ANALYSIS_SCHEMA = _object_schema({
+    'info': _object_schema({
+        'title': _string_schema(),
+        'date': _string_schema(),
+        'author': _string_schema(),
+        'doc_type': _string_schema(),
+        'purpose': _string_schema(),
+    }),
+    'structure': _array_schema(_SECTION_SCHEMA),
+    'summary': _array_schema(_string_schema()),
+    'keywords': _array_schema(_object_schema({'term': _string_schema(), 'count': {'type': 'integer'}})),
+    'entities': _array_schema(_object_schema({
+        'name': _string_schema(),
+        'kind': {'type': 'string', 'enum': list(ENTITY_KINDS)},
+        'context': _string_schema(),
+    })),
+    'decisions': _array_schema(_string_schema()),
+    'action_items': _array_schema(_object_schema({
+        'task': _string_schema(),
+        'owner': _string_schema(),
+        'due': _string_schema(),
+    })),
+    'type_analysis': _array_schema(_SECTION_SCHEMA),
+    'issues': _array_schema(_string_schema()),
+})
+
+
+class AnalysisFormatError(ValueError):
+    """스키마에 맞지 않는 분석 응답"""
+
+
+@dataclass
+class Section:
+    title: str
+    summary: str
+
+
+@dataclass
+class Keyword:
+    term: str
+    count: int
+
+
+@dataclass
+class Entity:
+    name: str
+    kind: str
+    context: str = ''
+
+
+@dataclass
+class ActionItem:
+    task: str
+    owner: str = ''
+    due: str = ''
+
+
+@dataclass
+class Analysis:
+    """제공자 하나의 분석 결과
+
+    error가 있으면 실패한 분석 (저장/재사용하지 않음), notes는 구조가 없는 본문 (이전 마크다운 기록 등)
+    """
+    provider: str
+    model: str = ''
+    title: str = ''
+    date: str = ''
+    author: str = ''
+    doc_type: str = ''
+    purpose: str = ''
+    structure: list = field(default_factory=list)      # [Section]
+    summary: list = field(default_factory=list)        # [str]
+    keywords: list = field(default_factory=list)       # [Keyword]
+    entities: list = field(default_factory=list)       # [Entity]
+    decisions: list = field(default_factory=list)      # [str]
+    action_items: list = field(default_factory=list)   # [ActionItem]
+    type_analysis: list = field(default_factory=list)  # [Section]
+    issues: list = field(default_factory=list)         # [str]
+    notes: list = field(default_factory=list)          # [str]
+    error: str = None
+
+    @classmethod
+    def failed(cls, provider, message):
+        return cls(provider, error=message)
+
+    @classmethod
+    def from_text(cls, provider, text, model=''):
+        """구조가 없는 텍스트 분석 결과 (줄 단위 본문으로만 보관)"""
+        return cls(provider, model=model or '', notes=[line.rstrip() for line in text.split('\n')])
+
+    def blocks(self):
+        """렌더러용 블록 [(kind, text)] - kind: 'heading' | 'subheading' | 'item' | 'text'"""
+        if self.error:
+            return [('text', self.error)]
+        blocks = []
+
+        def section(heading, items):
+            items = [item for item in items if item]
+            if items:
+                blocks.append(('heading', heading))
+                blocks.extend(('item', item) for item in items)
+
+        info = [f"{label}: {value}" for label, value in (
+            ('문서 제목', self.title), ('작성 시점', self.date), ('작성 주체', self.author),
+            ('문서 유형', self.doc_type), ('문서 목적', self.purpose)) if value]
+        section('📂 문서 기본 정보', info)
+
+        if self.structure:
+            blocks.append(('heading', '🧩 문서 구조 분석'))
+            for part in self.structure:
+                blocks.append(('subheading', part.title))
+                if part.summary:
+                    blocks.append(('text', part.summary))
+
+        if self.summary or self.keywords or self.entities or self.decisions or self.action_items:
+            blocks.append(('heading', '🧠 핵심 내용 요약'))
+            blocks.extend(('item', line) for line in self.summary)
+            for subheading, items in (
+                ('키워드', [f"{keyword.term} ({keyword.count}회)" for keyword in self.keywords]),
+                ('주요 수치·날짜·고유명사', [
+                    f"{entity.name} [{ENTITY_KINDS.get(entity.kind, entity.kind)}]"
+                    + (f" - {entity.context}" if entity.context else '')
+                    for entity in self.entities]),
+                ('결정사항', self.decisions),
+                ('액션 아이템', [
+                    item.task + ''.join(f" / {label}: {value}" for label, value in
+                                        (('담당', item.owner), ('기한', item.due)) if value)
+                    for item in self.action_items]),
+            ):
+                if items:
+                    blocks.append(('subheading', subheading))
+                    blocks.extend(('item', item) for item in items)
+
+        if self.type_analysis:
+            blocks.append(('heading', f"🛠️ 문서 유형별 특화 분석{f' ({self.doc_type})' if self.doc_type else ''}"))
+            for part in self.type_analysis:
+                blocks.append(('subheading', part.title))
+                if part.summary:
+                    blocks.append(('text', part.summary))
+
+        section('🔍 오류 및 주의요소', self.issues)
+        blocks.extend(('text', line) for line in self.notes)
+        return blocks
+
+    def to_markdown(self):
+        """마크다운 (ZIP의 .txt, 화면 미리보기용)"""
+        prefixes = {'heading': '## ', 'subheading': '### ', 'item': '- ', 'text': ''}
+        lines = []
+        for kind, text in self.blocks():
+            if kind in ('heading', 'subheading') and lines and lines[-1]:
+                lines.append('')
+            lines.append(prefixes[kind] + text)
+            if kind in ('heading', 'subheading'):
+                lines.append('')
+        return '\n'.join(lines).strip() + '\n'
+
+    def to_dict(self):
+        """스키마 형식 dict (+ provider/model/notes/error)"""
+        return {
+            'provider': self.provider,
+            'model': self.model,
+            'info': {'title': self.title, 'date': self.date, 'author': self.author,
+                     'doc_type': self.doc_type, 'purpose': self.purpose},
+            'structure': [asdict(part) for part in self.structure],
+            'summary': self.summary,
+            'keywords': [asdict(keyword) for keyword in self.keywords],
+            'entities': [asdict(entity) for entity in self.entities],
+            'decisions': self.decisions,
+            'action_items': [asdict(item) for item in self.action_items],
+            'type_analysis': [asdict(part) for part in self.type_analysis],
+            'issues': self.issues,
+            'notes': self.notes,
+            'error': self.error,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+
+def _text(data, key):
+    value = data.get(key)
+    if value is None:
+        return ''
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise AnalysisFormatError(f"'{key}'는 문자열이어야 합니다")
+    return str(value).strip()
+
+
+def _list(data, key):
+    value = data.get(key)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise AnalysisFormatError(f"'{key}'는 배열이어야 합니다")
+    return value
+
+
+def _object(value, key):
+    if not isinstance(value, dict):
+        raise AnalysisFormatError(f"'{key}' 항목은 객체여야 합니다")
+    return value
+
+
+def _strings(data, key):
+    return [text for text in (_text({key: value}, key) for value in _list(data, key)) if text]
+
+
+def _sections(data, key):
+    sections = []
+    for value in _list(data, key):
+        value = _object(value, key)
+        section = Section(_text(value, 'title'), _text(value, 'summary'))
+        if section.title or section.summary:
+            sections.append(section)
+    return sections
+
+
+def _count(value):
+    if isinstance(value, bool):
+        raise AnalysisFormatError("'count'는 정수여야 합니다")
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        raise AnalysisFormatError("'count'는 정수여야 합니다") from None
+
+
+def validate_analysis(data, provider, model=''):
+    """스키마 형식 dict를 검증하여 Analysis로 변환 (빠진 항목은 빈 값, 형식이 틀리면 AnalysisFormatError)"""
+    data = _object(data, 'analysis')
+    info = _object(data.get('info') or {}, 'info')
+    keywords = [
+        Keyword(_text(item, 'term'), _count(item.get('count')))
+        for item in (_object(value, 'keywords') for value in _list(data, 'keywords'))
+    ]
+    entities = [
+        Entity(_text(item, 'name'), item.get('kind') if item.get('kind') in ENTITY_KINDS else 'other',
+               _text(item, 'context'))
+        for item in (_object(value, 'entities') for value in _list(data, 'entities'))
+    ]
+    action_items = [
+        ActionItem(_text(item, 'task'), _text(item, 'owner'), _text(item, 'due'))
+        for item in (_object(value, 'action_items') for value in _list(data, 'action_items'))
+    ]
+    return Analysis(
+        provider=provider,
+        model=model or _text(data, 'model'),
+        title=_text(info, 'title'),
+        date=_text(info, 'date'),
+        author=_text(info, 'author'),
+        doc_type=_text(info, 'doc_type'),
+        purpose=_text(info, 'purpose'),
+        structure=_sections(data, 'structure'),
+        summary=_strings(data, 'summary'),
+        keywords=[keyword for keyword in keywords if keyword.term],
+        entities=[entity for entity in entities if entity.name],
+        decisions=_strings(data, 'decisions'),
+        action_items=[item for item in action_items if item.task],
+        type_analysis=_sections(data, 'type_analysis'),
+        issues=_strings(data, 'issues'),
+        notes=[line for line in _list(data, 'notes') if isinstance(line, str)],
+        error=data.get('error') or None,
+    )
+
+
+def parse_analysis(raw, provider, model=''):
+    """모델 응답(JSON 문자열)을 한 번 검증하여 Analysis로 변환"""
+    raw = raw.strip()
+    if raw.startswith('```'):
+        # 코드 블록으로 감싼 응답 (JSON 모드를 지원하지 않는 모델)
+        raw = raw.strip('`').removeprefix('json').strip()
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise AnalysisFormatError(f"JSON 형식이 아닙니다: {e}") from None
+    return validate_analysis(data, provider, model)
+
+
+def load_analysis(stored, provider, model=''):
+    """저장된 분석 결과 복원 (JSON이 아니면 이전 버전의 마크다운 기록)"""
+    if stored.lstrip().startswith('{'):
+        try:
+            return parse_analysis(stored, provider, model)
+        except AnalysisFormatError:
+            pass
+    return Analysis.from_text(provider, stored, model)
@@ -0,0 +1,171 @@
+# artifact_store.py - 생성 결과물(ZIP/PDF) 저장소 (작업별 폴더, 세션 참조 카운트, TTL 정리, 디스크 한도)
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+ARTIFACT_STORE_DIR = os.environ.get(
+    'HANGULPDF_ARTIFACT_DIR', os.path.join(tempfile.gettempdir(), 'hangulpdf_artifacts')
+)
+ARTIFACT_TTL_SECONDS = int(os.environ.get('HANGULPDF_ARTIFACT_TTL_MINUTES', '60')) * 60
+ARTIFACT_QUOTA_BYTES = int(os.environ.get('HANGULPDF_ARTIFACT_QUOTA_MB', '1024')) * MB
+SWEEP_INTERVAL_SECONDS = 300
+# 만든 직후 아직 소유자가 참조하기 전인 작업은 한도 초과여도 삭제하지 않음
+MIN_AGE_SECONDS = 60
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # 정리 중 삭제된 파일
+    return total
+
+
+class ArtifactStore:
+    """작업(job)별 폴더에 결과물을 저장하고 참조가 없는 작업을 정리
+
+    세션 등 소유자가 acquire한 작업은 삭제하지 않으며, 모든 소유자가 release하면
+    마지막 사용 후 TTL이 지나거나 디스크 한도를 넘을 때 오래된 것부터 삭제함
+    """
+
+    def __init__(self, root_dir=ARTIFACT_STORE_DIR, ttl_seconds=ARTIFACT_TTL_SECONDS,
+                 quota_bytes=ARTIFACT_QUOTA_BYTES):
+        self.root_dir = root_dir
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+
+        self._lock = threading.Lock()
+        self._owners = {}  # job_id -> 참조 중인 소유자 집합
+        self._sweeper = None
+        self._stop = threading.Event()
+
+        os.makedirs(root_dir, exist_ok=True)
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root_dir, job_id)
+
+    def create_job(self, owner=None):
+        """새 작업 폴더 생성 (owner가 있으면 바로 참조), 작업 ID 반환"""
+        self.sweep()  # 새 결과물을 쓰기 전에 한도 확보
+        job_id = f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.job_dir(job_id))
+        if owner:
+            self.acquire(job_id, owner)
+        return job_id
+
+    def path(self, job_id, name):
+        """작업 폴더 안의 결과물 경로"""
+        return os.path.join(self.job_dir(job_id), os.path.basename(name))
+
+    def exists(self, job_id, name):
+        return os.path.exists(self.path(job_id, name))
+
+    def touch(self, job_id):
+        """마지막 사용 시각 갱신 (TTL 기준)"""
+        try:
+            os.utime(self.job_dir(job_id))
+        except FileNotFoundError:
+            pass
+
+    def acquire(self, job_id, owner):
+        """소유자 참조 추가"""
+        with self._lock:
+            self._owners.setdefault(job_id, set()).add(owner)
+        self.touch(job_id)
+
+    def release(self, job_id, owner):
+        """소유자 참조 해제 (삭제는 sweep에서 TTL 경과 후)"""
+        with self._lock:
+            owners = self._owners.get(job_id)
+            if owners is not None:
+                owners.discard(owner)
+                if not owners:
+                    del self._owners[job_id]
+        self.touch(job_id)
+
+    def release_owner(self, owner):
+        """소유자가 참조하는 모든 작업 해제 (예: 만료된 세션)"""
+        with self._lock:
+            job_ids = [job_id for job_id, owners in self._owners.items() if owner in owners]
+        for job_id in job_ids:
+            self.release(job_id, owner)
+        return len(job_ids)
+
+    def refcount(self, job_id):
+        with self._lock:
+            return len(self._owners.get(job_id, ()))
+
+    def _jobs(self):
+        """(작업 ID, 마지막 사용 시각, 크기) 목록, 오래된 순"""
+        jobs = []
+        for entry in os.scandir(self.root_dir):
+            if not entry.is_dir():
+                continue
+            try:
+                mtime = entry.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            jobs.append((entry.name, mtime, _dir_size(entry.path)))
+        jobs.sort(key=lambda job: job[1])
+        return jobs
+
+    def sweep(self, now=None):
+        """TTL이 지났거나 한도를 넘는 참조 없는 작업 삭제, {'removed', 'bytes'} 반환"""
+        now = now or time.time()
+        jobs = self._jobs()
+        total = sum(size for _, _, size in jobs)
+        removed = 0
+
+        for job_id, mtime, size in jobs:
+            if self.refcount(job_id) or now - mtime < MIN_AGE_SECONDS:
+                continue
+            if now - mtime > self.ttl_seconds or total > self.quota_bytes:
+                shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+                total -= size
+                removed += 1
+
+        if total > self.quota_bytes:
+            logger.warning('결과물 저장소가 한도를 초과했지만 모두 사용 중입니다: %d / %d bytes',
+                           total, self.quota_bytes)
+        return {'removed': removed, 'bytes': total}
+
+    def usage(self):
+        """저장소 사용량 {'jobs', 'referenced', 'bytes', 'quota_bytes'}"""
+        jobs = self._jobs()
+        with self._lock:
+            referenced = sum(1 for job_id, _, _ in jobs if self._owners.get(job_id))
+        return {
+            'jobs': len(jobs),
+            'referenced': referenced,
+            'bytes': sum(size for _, _, size in jobs),
+            'quota_bytes': self.quota_bytes,
+        }
+
+    def start_sweeper(self, interval=SWEEP_INTERVAL_SECONDS):
+        """백그라운드 정리 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except Exception:
+                    logger.exception('결과물 저장소 정리 실패')
+
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=run, name='artifact-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
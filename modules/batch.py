@@ -0,0 +1,333 @@
+# batch.py - 폴더 단위 PDF 일괄 변환 CLI (프로세스 풀, 체크포인트 재개)
+#
+# 사용법:
+#   python -m modules.batch 입력폴더 -o 출력폴더 [--workers 4] [--ocr] [--analyze]
+#
+# 처리 결과는 출력폴더/batch_checkpoint.jsonl 에 파일마다 한 줄씩 기록되며,
+# 같은 명령을 다시 실행하면 이미 완료된 문서(내용 해시 기준)는 건너뜀
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from modules.converter import NATIVE_BACKENDS, convert_pdf, open_ocr_checkpoint
+from modules.gpt_summary import PROVIDERS, available_providers, is_analysis_error, run_analyses
+from modules.metrics import run_report
+from modules.report_pdf import create_analysis_zip
+from modules.summary_store import DEFAULT_DB_PATH, SummaryStore, file_hash
+
+CHECKPOINT_NAME = 'batch_checkpoint.jsonl'
+SUMMARY_NAME = 'batch_summary.json'
+
+# 워커 프로세스 하나가 처리할 최대 파일 수 (메모리 누수/단편화 방지를 위해 주기적으로 교체)
+MAX_TASKS_PER_WORKER = 50
+
+
+def find_pdfs(input_dir):
+    """입력 폴더 아래의 PDF 파일 경로 (정렬됨)"""
+    paths = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith('.pdf'):
+                paths.append(os.path.join(root, name))
+    return paths
+
+
+def load_checkpoint(checkpoint_path):
+    """체크포인트 기록 읽기, (완료 해시 집합, 완료 파일 서명 집합) 반환
+
+    파일 서명은 (경로, 크기, 수정 시각)으로, 변경되지 않은 파일은 해시 계산 없이 건너뜀
+    """
+    done_hashes = set()
+    done_signatures = set()
+    if not os.path.exists(checkpoint_path):
+        return done_hashes, done_signatures
+
+    with open(checkpoint_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 중단 시점에 잘린 마지막 줄
+            if record.get('status') == 'done':
+                done_hashes.add(record['hash'])
+                done_signatures.add((record['path'], record['size'], record['mtime']))
+    return done_hashes, done_signatures
+
+
+def _write_atomic(path, data):
+    """임시 파일에 쓴 뒤 교체하여 중단되어도 반쯤 쓴 출력이 남지 않게 함"""
+    temp_path = f"{path}.part"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def process_file(task):
+    """워커 프로세스에서 PDF 한 건 처리 (모든 예외를 기록으로 변환하여 다른 파일과 격리)"""
+    started = time.perf_counter()
+    record = {
+        'path': task['path'],
+        'hash': task['hash'],
+        'size': task['size'],
+        'mtime': task['mtime'],
+        'pages': 0,
+    }
+
+    # 단계별 시간을 파일마다 기록 (워커 프로세스의 실행 보고서)
+    with run_report(task['path']) as report:
+        try:
+            # OCR은 페이지마다 체크포인트에 기록 (중단된 문서를 다시 실행하면 빠진 페이지부터 처리)
+            checkpoint = open_ocr_checkpoint(task['hash'], layout=task['layout']) if task['use_ocr'] else None
+            result = convert_pdf(task['path'], use_ocr=task['use_ocr'], clean=task['clean'], backend=task['backend'],
+                                 layout=task['layout'], ocr_checkpoint=checkpoint)
+            record['pages'] = result.get('pages', 0)
+            record['backend'] = result.get('backend')
+            if not result.get('success'):
+                raise RuntimeError(result.get('error', '알 수 없는 오류'))
+
+            output_dir = task['output_dir']
+            filename_base = os.path.splitext(os.path.basename(task['path']))[0]
+            os.makedirs(output_dir, exist_ok=True)
+
+            text_path = os.path.join(output_dir, f"{filename_base}_추출텍스트.txt")
+            _write_atomic(text_path, result['extracted_text'].encode('utf-8'))
+            record['outputs'] = [text_path]
+
+            store = SummaryStore(task['store_path']) if task['store_path'] else None
+            if store:
+                store.save_document(task['hash'], os.path.basename(task['path']), result['extracted_text'],
+                                    pages=result['pages'])
+
+            if task['analyze']:
+                cached = store.get_analyses(task['hash']) if store else {}
+                analyses = run_analyses(result['extracted_text'], task['api_key'], cached=cached,
+                                        gemini_api_key=task['gemini_api_key'], grok_api_key=task['grok_api_key'],
+                                        page_results=result['page_results'])
+
+                zip_path = os.path.join(output_dir, f"{filename_base}_AI분석결과.zip")
+                created = create_analysis_zip(
+                    original_pdf=task['path'],
+                    extracted_text=result['extracted_text'],
+                    chatgpt_result=analyses['chatgpt'],
+                    gemini_result=analyses['gemini'],
+                    grok_result=analyses['grok'],
+                    filename_base=filename_base,
+                    output_path=f"{zip_path}.part"
+                )
+                if not created:
+                    raise RuntimeError('ZIP 파일 생성 실패')
+                os.replace(created, zip_path)
+                record['outputs'].append(zip_path)
+
+                if store:
+                    for provider in PROVIDERS:
+                        if provider not in cached and not is_analysis_error(analyses[provider]):
+                            store.save_analysis(task['hash'], provider, analyses[provider])
+
+            record['status'] = 'done'
+
+        except Exception as e:
+            record['status'] = 'failed'
+            record['error'] = str(e)
+
+    record['stages'] = report.stage_totals()
+    record['elapsed'] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def _append_checkpoint(f, record):
+    """체크포인트에 한 줄 기록 후 즉시 디스크에 반영"""
+    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def build_tasks(paths, input_dir, output_dir, done_hashes, done_signatures, options):
+    """처리할 작업 목록 생성, (작업 목록, 건너뛴 파일 수) 반환"""
+    tasks = []
+    skipped = 0
+    seen_hashes = set(done_hashes)
+
+    for path in paths:
+        stat = os.stat(path)
+        signature = (path, stat.st_size, stat.st_mtime)
+        if signature in done_signatures:
+            skipped += 1
+            continue
+
+        digest = file_hash(path)
+        if digest in seen_hashes:
+            skipped += 1  # 이미 처리했거나 같은 배치 안의 중복 문서
+            continue
+        seen_hashes.add(digest)
+
+        relative = os.path.splitext(os.path.relpath(path, input_dir))[0]
+        tasks.append(dict(
+            options,
+            path=path,
+            hash=digest,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            output_dir=os.path.join(output_dir, relative)
+        ))
+    return tasks, skipped
+
+
+def _crash_record(task):
+    return {
+        'path': task['path'],
+        'hash': task['hash'],
+        'size': task['size'],
+        'mtime': task['mtime'],
+        'pages': 0,
+        'elapsed': 0.0,
+        'status': 'failed',
+        'error': '워커 프로세스 비정상 종료'
+    }
+
+
+def _run_pool(tasks, workers, handle, isolated):
+    """프로세스 풀에서 작업 실행, 워커 비정상 종료로 끝내지 못한 작업 목록 반환
+
+    isolated이면 작업이 하나뿐이므로 비정상 종료를 해당 파일의 실패로 기록
+    """
+    unfinished = []
+    # spawn: 워커가 부모 프로세스의 Streamlit/스레드 상태를 물려받지 않도록 함
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        max_tasks_per_child=MAX_TASKS_PER_WORKER
+    ) as pool:
+        futures = {pool.submit(process_file, task): task for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                record = future.result()
+            except BrokenProcessPool:
+                if not isolated:
+                    unfinished.append(task)
+                    continue
+                record = _crash_record(task)
+            handle(record)
+    return unfinished
+
+
+def run_batch(input_dir, output_dir, workers=None, use_ocr=False, clean=True, analyze=False,
+              api_key=None, store_path=DEFAULT_DB_PATH, on_record=None, backend='auto', layout=True,
+              gemini_api_key=None, grok_api_key=None):
+    """폴더 일괄 변환 실행 후 처리량 요약 반환"""
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_NAME)
+
+    done_hashes, done_signatures = load_checkpoint(checkpoint_path)
+    options = {
+        'use_ocr': use_ocr,
+        'clean': clean,
+        'backend': backend,
+        'layout': layout,
+        'analyze': analyze,
+        'api_key': api_key,
+        'gemini_api_key': gemini_api_key,
+        'grok_api_key': grok_api_key,
+        'store_path': store_path,
+    }
+    tasks, skipped = build_tasks(find_pdfs(input_dir), input_dir, output_dir,
+                                 done_hashes, done_signatures, options)
+
+    summary = {'documents': 0, 'pages': 0, 'failures': 0, 'skipped': skipped, 'stage_seconds': {}}
+
+    with open(checkpoint_path, 'a', encoding='utf-8') as checkpoint:
+        def handle(record):
+            _append_checkpoint(checkpoint, record)
+            summary['documents'] += 1
+            summary['pages'] += record['pages']
+            if record['status'] != 'done':
+                summary['failures'] += 1
+            for stage, stats in record.get('stages', {}).items():
+                summary['stage_seconds'][stage] = round(summary['stage_seconds'].get(stage, 0.0) + stats['seconds'], 6)
+            if on_record:
+                on_record(record, summary, len(tasks))
+
+        suspects = _run_pool(tasks, workers, handle, isolated=False)
+        # 워커 비정상 종료로 풀이 깨졌을 때 미완료 파일은 하나씩 격리하여 다시 실행
+        for task in suspects:
+            _run_pool([task], 1, handle, isolated=True)
+
+    elapsed = time.perf_counter() - started
+    minutes = elapsed / 60 if elapsed else 0
+    summary.update({
+        'elapsed_seconds': round(elapsed, 2),
+        'docs_per_minute': round(summary['documents'] / minutes, 2) if minutes else 0.0,
+        'pages_per_minute': round(summary['pages'] / minutes, 2) if minutes else 0.0,
+    })
+    _write_atomic(os.path.join(output_dir, SUMMARY_NAME),
+                  json.dumps(summary, ensure_ascii=False, indent=2).encode('utf-8'))
+    return summary
+
+
+def _print_record(record, summary, total):
+    status = '✅' if record['status'] == 'done' else '❌'
+    line = f"[{summary['documents']}/{total}] {status} {record['path']} ({record['pages']}p, {record['elapsed']}s)"
+    if record.get('error'):
+        line += f" - {record['error']}"
+    print(line, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HangulPDF 폴더 일괄 변환')
+    parser.add_argument('input_dir', help='PDF가 들어 있는 폴더 (하위 폴더 포함)')
+    parser.add_argument('-o', '--output-dir', required=True, help='결과 저장 폴더')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='워커 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--ocr', action='store_true', help='OCR 사용')
+    parser.add_argument('--backend', default='auto', choices=['auto', *NATIVE_BACKENDS],
+                        help='텍스트 추출 엔진 (기본: 설치된 가장 빠른 엔진)')
+    parser.add_argument('--no-layout', action='store_true', help='레이아웃 분석(다단 읽기 순서 복원) 생략')
+    parser.add_argument('--no-clean', action='store_true', help='텍스트 정리 생략')
+    parser.add_argument('--analyze', action='store_true', help='AI 분석 후 ZIP 생성')
+    parser.add_argument('--api-key', default=os.environ.get('OPENAI_API_KEY'), help='OpenAI API 키')
+    parser.add_argument('--gemini-api-key', default=os.environ.get('GEMINI_API_KEY'), help='Gemini API 키')
+    parser.add_argument('--grok-api-key', default=os.environ.get('XAI_API_KEY'), help='Grok(xAI) API 키')
+    parser.add_argument('--store', default=DEFAULT_DB_PATH, help='분석 기록 저장소 경로')
+    parser.add_argument('--no-store', action='store_true', help='분석 기록 저장소 사용 안 함')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.analyze and not available_providers(args.api_key, args.gemini_api_key, args.grok_api_key):
+        parser.error('--analyze에는 OpenAI, Gemini, Grok 중 하나 이상의 API 키가 필요합니다 '
+                     '(--api-key/--gemini-api-key/--grok-api-key 또는 OPENAI_API_KEY/GEMINI_API_KEY/XAI_API_KEY).')
+
+    summary = run_batch(
+        args.input_dir,
+        args.output_dir,
+        workers=args.workers,
+        use_ocr=args.ocr,
+        backend=args.backend,
+        layout=not args.no_layout,
+        clean=not args.no_clean,
+        analyze=args.analyze,
+        api_key=args.api_key,
+        gemini_api_key=args.gemini_api_key,
+        grok_api_key=args.grok_api_key,
+        store_path=None if args.no_store else args.store,
+        on_record=_print_record
+    )
+
+    print(
+        f"\n처리 {summary['documents']}건 (건너뜀 {summary['skipped']}, 실패 {summary['failures']}), "
+        f"{summary['pages']} 페이지, {summary['elapsed_seconds']}초\n"
+        f"처리량: {summary['docs_per_minute']} 문서/분, {summary['pages_per_minute']} 페이지/분"
+    )
+    return 1 if summary['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# chat_client.py - OpenAI 호환 Chat Completions 클라이언트 (ChatGPT, Grok 공용: 연결 풀, 타임아웃/재시도, 스트리밍)
+#
+# 두 제공자는 프로세스에 하나뿐인 requests.Session(호스트별 연결 풀)을 공유하고, 연결 실패와 429/5xx는 지수 백오프로 재시도
+# 스트리밍(on_delta)을 쓰면 응답을 조각마다 받아 진행 상황을 알리고, 읽기 타임아웃도 전체가 아닌 조각 사이 간격에 적용
+# 기본 주소는 HANGULPDF_OPENAI_BASE_URL / HANGULPDF_GROK_BASE_URL로 바꿔 로컬 대역(benchmarks/mock_openai.py)으로 시험 가능
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from modules.metrics import count, count_llm_usage, log_event, span
+from modules.token_budget import count_tokens
+
+CONNECT_TIMEOUT_SECONDS = 5
+READ_TIMEOUT_SECONDS = 60          # 스트리밍이면 조각 사이 최대 간격
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5               # 재시도 간격 0.5, 1, 2초... (Retry-After가 있으면 그 값)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = 8                      # 호스트별 유지할 연결 수 (동시 분석 수보다 크게)
+
+
+def pooled_session(retries=MAX_RETRIES, pool_size=POOL_SIZE):
+    """연결 풀과 재시도를 설정한 Session
+
+    응답을 읽다가 끊긴 요청(read)은 생성이 이미 진행되었을 수 있어 재시도하지 않음
+    """
+    retry = Retry(total=retries, connect=retries, read=0, status=retries, backoff_factor=BACKOFF_FACTOR,
+                  status_forcelist=RETRY_STATUSES, allowed_methods=frozenset({'GET', 'POST', 'DELETE'}),
+                  respect_retry_after_header=True, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def shared_session():
+    """ChatGPT/Grok 공용 Session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = pooled_session()
+        return _session
+
+
+class ChatError(Exception):
+    """Chat Completions 호출 실패 (메시지는 분석 결과로 돌려줄 오류 문자열, status는 HTTP 상태)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ChatTruncated(ChatError):
+    """구조화 응답이 출력 토큰 한도(max_tokens)에서 잘림 (finish_reason == 'length', 잘린 JSON은 쓸 수 없음)"""
+
+    def __init__(self, message, max_tokens):
+        super().__init__(message)
+        self.max_tokens = max_tokens
+
+
+class ChatClient:
+    """제공자 하나의 OpenAI 호환 엔드포인트 (연결 풀은 shared_session 공유)
+
+    provider: 지표 레이블 ('chatgpt', 'grok'), label: 오류 메시지에 쓸 이름
+    """
+
+    def __init__(self, provider, label, base_url, session=None,
+                 timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS)):
+        self.provider = provider
+        self.label = label
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self._session = session
+        self.timeout = timeout
+
+    @property
+    def session(self):
+        # 처음 호출할 때 공용 Session 생성 (모듈 임포트 시에는 만들지 않음)
+        return self._session or shared_session()
+
+    def complete(self, prompt, api_key, model, max_tokens, kind='single', totals=None, response_format=None,
+                 on_delta=None, temperature=0.7):
+        """호출 한 번, 응답 내용 반환
+
+        kind: 'single' | 'map' | 'reduce' | 'qa' (보내기 전 계산한 토큰과 실제 사용량을 실행 보고서에 함께 기록)
+        totals: 분석 하나의 호출 합계 {'prompt_tokens', 'completion_tokens', 'calls'} (있으면 누적)
+        on_delta(text): 있으면 스트리밍으로 받으며 받은 조각마다 호출
+        response_format이 있는 호출이 max_tokens에서 잘리면 ChatTruncated (사용량은 기록한 뒤)
+        """
+        estimated_tokens = count_tokens(prompt, model)
+        count('llm_estimated_tokens_total', estimated_tokens, provider=self.provider)
+        count('llm_calls_total', provider=self.provider, kind=kind)
+        started = time.perf_counter()
+
+        data = {
+            'model': model,
+            'messages': [
+                {'role': 'user', 'content': prompt}
+            ],
+            'max_tokens': max_tokens,
+            'temperature': temperature
+        }
+        if response_format:
+            data['response_format'] = response_format
+        if on_delta:
+            data['stream'] = True
+            data['stream_options'] = {'include_usage': True}
+
+        with span('llm_call', detail=kind):
+            try:
+                response = self.session.post(self.url, json=data, timeout=self.timeout, stream=bool(on_delta),
+                                             headers={'Authorization': f'Bearer {api_key}'})
+            except requests.RequestException as e:
+                raise ChatError(f"{self.label} 연결 오류: {e}") from None
+            with response:
+                if response.status_code != 200:
+                    raise ChatError(f"{self.label} API 오류: {response.status_code} - {response.text}",
+                                    response.status_code)
+                if on_delta:
+                    content, usage, finish_reason = self._read_stream(response, on_delta)
+                else:
+                    result = response.json()
+                    choice = result['choices'][0]
+                    content = choice['message']['content']
+                    usage = result.get('usage') or {}
+                    finish_reason = choice.get('finish_reason')
+
+        count_llm_usage(self.provider, usage)
+        if totals is not None:
+            totals['prompt_tokens'] += usage.get('prompt_tokens') or estimated_tokens
+            totals['completion_tokens'] += usage.get('completion_tokens') or 0
+            totals['calls'] += 1
+        log_event('llm_call', provider=self.provider, model=model, call=kind, estimated_prompt_tokens=estimated_tokens,
+                  prompt_tokens=usage.get('prompt_tokens'), completion_tokens=usage.get('completion_tokens'),
+                  finish_reason=finish_reason, streamed=bool(on_delta), seconds=round(time.perf_counter() - started, 3))
+        if finish_reason == 'length':
+            count('llm_truncated_total', provider=self.provider, kind=kind)
+            if response_format:
+                raise ChatTruncated(f"{self.label} 응답이 출력 토큰 한도({max_tokens:,})에서 잘렸습니다", max_tokens)
+        return content
+
+    def _read_stream(self, response, on_delta):
+        """SSE 응답에서 (내용, usage, finish_reason) 읽기 (usage는 include_usage로 받은 마지막 조각)"""
+        parts = []
+        usage = {}
+        finish_reason = None
+        try:
+            for line in response.iter_lines():
+                if not line.startswith(b'data:'):
+                    continue
+                payload = line[5:].strip()
+                if payload == b'[DONE]':
+                    break
+                chunk = json.loads(payload)
+                usage = chunk.get('usage') or usage
+                for choice in chunk.get('choices') or ():
+                    finish_reason = choice.get('finish_reason') or finish_reason
+                    text = (choice.get('delta') or {}).get('content')
+                    if text:
+                        parts.append(text)
+                        on_delta(text)
+        except requests.RequestException as e:
+            raise ChatError(f"{self.label} 스트리밍 중 연결 오류: {e}") from None
+        return ''.join(parts), usage, finish_reason
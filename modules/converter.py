@@ -1 +1,404 @@
-# converter.py - 모듈 구현 내용 포함
\ No newline at end of file
+# converter.py - PDF 텍스트 추출 (페이지 단위 결과)
+import os
+import time
+from contextlib import contextmanager
+from io import BytesIO
+
+from modules.layout import analyze_layout, pdfium_words, pymupdf_words, tesseract_words
+from modules.lazy_import import is_installed, require
+from modules.metrics import count, span
+from modules.ocr_checkpoint import open_checkpoint
+from modules.scheduler import admit
+from modules.text_cleaner import clean_pages, cleaning_stats, line_stats
+
+# 기본 텍스트 추출 엔진: 이름 -> 필요한 모듈
+# pdfium/MuPDF는 C 구현이라 PyPDF2보다 빠르고 한글 CID 폰트의 ToUnicode 매핑도 제대로 처리함
+NATIVE_BACKEND_MODULES = {
+    'pdfium': 'pypdfium2',
+    'pymupdf': 'pymupdf',
+    'pypdf2': 'PyPDF2',
+}
+DEFAULT_NATIVE_BACKEND = os.environ.get('HANGULPDF_PDF_BACKEND', 'auto')
+
+# 설치 여부만 확인하고 실제 임포트는 처음 추출할 때 (pytesseract는 pandas까지 불러와 시작이 느려짐)
+PDF_AVAILABLE = any(is_installed(module) for module in NATIVE_BACKEND_MODULES.values())
+OCR_AVAILABLE = is_installed('pytesseract') and is_installed('pdf2image')
+
+# 기본 OCR 설정
+OCR_DPI = 300
+OCR_CONFIG = r'--oem 3 --psm 3 -l kor+eng'
+
+
+@contextmanager
+def open_pdf(pdf_source):
+    """PDF 경로 또는 bytes/memoryview를 읽기 스트림으로 열기 (경로는 메모리에 통째로 올리지 않음)"""
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        yield BytesIO(pdf_source)
+    else:
+        with open(pdf_source, 'rb') as f:
+            yield f
+
+
+def pdf_size(pdf_source):
+    """PDF 경로 또는 bytes의 크기 (bytes)"""
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        return len(pdf_source)
+    return os.path.getsize(pdf_source)
+
+
+def pdf_page_count(pdf_source):
+    """poppler 기준 전체 페이지 수"""
+    pdf2image = require('pdf2image')
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        return pdf2image.pdfinfo_from_bytes(bytes(pdf_source))['Pages']
+    return pdf2image.pdfinfo_from_path(pdf_source)['Pages']
+
+
+def render_page(pdf_source, page_number, dpi=OCR_DPI):
+    """한 페이지만 래스터화"""
+    pdf2image = require('pdf2image')
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        images = pdf2image.convert_from_bytes(bytes(pdf_source), dpi=dpi, fmt='PNG',
+                                              first_page=page_number, last_page=page_number)
+    else:
+        images = pdf2image.convert_from_path(pdf_source, dpi=dpi, fmt='PNG',
+                                             first_page=page_number, last_page=page_number)
+    return images[0]
+
+
+def make_page(page_number, source, text, elapsed, layout=None):
+    """페이지 단위 추출 결과 생성
+
+    source: 'native' (PDF 텍스트 레이어) 또는 'ocr'
+    elapsed: 해당 페이지 처리에 걸린 시간(초)
+    layout: analyze_layout 결과가 있으면 단 수, 표 행 수, 머리글/바닥글을 함께 기록
+    """
+    page = {
+        'page': page_number,
+        'source': source,
+        'text': text,
+        'elapsed': elapsed
+    }
+    if layout:
+        page['columns'] = layout['columns']
+        page['table_rows'] = layout['table_rows']
+        page['headers'] = layout['headers']
+        page['footers'] = layout['footers']
+    return page
+
+
+def page_marker(page):
+    """기존 추출 텍스트 형식의 페이지 구분 마커"""
+    if page['source'] == 'ocr':
+        return f"--- 페이지 {page['page']} (OCR) ---"
+    return f"--- 페이지 {page['page']} ---"
+
+
+def join_pages(pages):
+    """페이지 목록을 한 번에 이어붙여 전체 텍스트 생성"""
+    parts = []
+    previous_source = None
+    for page in pages:
+        # 기본 추출 결과 뒤에 붙는 OCR 페이지는 별도 구역으로 표시
+        if previous_source == 'native' and page['source'] == 'ocr':
+            parts.append("\n=== OCR 추가 텍스트 ===\n")
+        parts.append(f"\n{page_marker(page)}\n")
+        parts.append(page['text'])
+        parts.append("\n")
+        previous_source = page['source']
+    return ''.join(parts)
+
+
+def count_chars(pages):
+    """공백을 제외한 페이지 텍스트 길이 합계"""
+    return sum(len(page['text'].strip()) for page in pages)
+
+
+def available_backends():
+    """설치된 기본 텍스트 추출 엔진 이름 (auto 선택 우선순위 순)"""
+    return [name for name, module in NATIVE_BACKEND_MODULES.items() if is_installed(module)]
+
+
+def resolve_backend(backend='auto'):
+    """'auto'면 설치된 엔진 중 가장 빠른 것, 아니면 이름 검증 후 그대로 반환"""
+    if backend == 'auto':
+        installed = available_backends()
+        if not installed:
+            raise ImportError('PDF 텍스트 추출 라이브러리(pypdfium2, PyMuPDF, PyPDF2)가 설치되지 않았습니다.')
+        return installed[0]
+    if backend not in NATIVE_BACKEND_MODULES:
+        raise ValueError(f"알 수 없는 텍스트 추출 엔진: {backend}")
+    return backend
+
+
+@contextmanager
+def _open_pypdf2(pdf_source):
+    PyPDF2 = require('PyPDF2')
+    with open_pdf(pdf_source) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        # 글자 상자를 제공하지 않아 레이아웃 분석은 지원하지 않음
+        yield len(reader.pages), lambda index, layout: (reader.pages[index].extract_text(), None)
+
+
+@contextmanager
+def _open_pdfium(pdf_source):
+    pdfium = require('pypdfium2')
+    if isinstance(pdf_source, memoryview):
+        pdf_source = bytes(pdf_source)
+    document = pdfium.PdfDocument(pdf_source)
+
+    def extract(index, layout):
+        page = document[index]
+        try:
+            textpage = page.get_textpage()
+            try:
+                if layout:
+                    width, height = page.get_size()
+                    result = analyze_layout(pdfium_words(textpage, height), width, height)
+                    return result['text'], result
+                return textpage.get_text_range().replace('\r\n', '\n'), None
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+
+    try:
+        yield len(document), extract
+    finally:
+        document.close()
+
+
+@contextmanager
+def _open_pymupdf(pdf_source):
+    pymupdf = require('pymupdf')
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        document = pymupdf.open(stream=bytes(pdf_source), filetype='pdf')
+    else:
+        document = pymupdf.open(pdf_source)
+    def extract(index, layout):
+        page = document[index]
+        if layout:
+            result = analyze_layout(pymupdf_words(page), page.rect.width, page.rect.height)
+            return result['text'], result
+        return page.get_text(), None
+
+    try:
+        yield document.page_count, extract
+    finally:
+        document.close()
+
+
+# 엔진 이름 -> 문서를 열어 (페이지 수, 추출 함수)를 제공하는 컨텍스트 관리자
+# 추출 함수(페이지 번호(0부터), layout)는 (텍스트, analyze_layout 결과 또는 None) 반환
+NATIVE_BACKENDS = {
+    'pdfium': _open_pdfium,
+    'pymupdf': _open_pymupdf,
+    'pypdf2': _open_pypdf2,
+}
+
+
+def extract_native_pages(pdf_source, on_page=None, backend=DEFAULT_NATIVE_BACKEND, layout=True):
+    """PDF 텍스트 레이어에서 페이지별 텍스트 추출
+
+    pdf_source: PDF 파일 경로 또는 bytes/memoryview
+    on_page(page_number, num_pages, failed_pages)는 페이지마다 호출되는 진행 콜백
+    backend: 'auto', 'pdfium', 'pymupdf', 'pypdf2'
+    layout: 글자 상자로 다단 읽기 순서를 복원 (pypdf2는 무시)
+    반환: (페이지 목록, 전체 페이지 수, 실패 페이지 수)
+    """
+    # 문서 전체를 한 번 열어 빠르게 처리하므로 문서 단위로 입장 제어 (비용은 파일 크기 기준)
+    backend = resolve_backend(backend)
+    with admit('extract', pages=0, nbytes=pdf_size(pdf_source)), span('extract', detail=backend):
+        with NATIVE_BACKENDS[backend](pdf_source) as (num_pages, extract_page):
+            return _extract_native_pages(num_pages, extract_page, on_page, layout, backend)
+
+
+def _extract_native_pages(num_pages, extract_page, on_page, layout, backend):
+    pages = []
+    failed_pages = 0
+
+    for page_num in range(num_pages):
+        if on_page:
+            on_page(page_num + 1, num_pages, failed_pages)
+
+        started = time.perf_counter()
+        try:
+            # 페이지 스팬은 진행 중에도 보이므로 한 페이지가 오래 걸리면 자동 프로파일링 대상이 됨
+            with span('native_page', detail=backend, page=page_num + 1):
+                page_text, page_layout = extract_page(page_num, layout)
+        except Exception:
+            failed_pages += 1
+            continue
+        elapsed = time.perf_counter() - started
+
+        if page_text and page_text.strip():
+            pages.append(make_page(page_num + 1, 'native', page_text, elapsed, page_layout))
+        else:
+            failed_pages += 1
+
+    return pages, num_pages, failed_pages
+
+
+def ocr_options(dpi=OCR_DPI, config=OCR_CONFIG, layout=True):
+    """OCR 결과에 영향을 주는 옵션 (체크포인트 키)"""
+    return {'dpi': dpi, 'config': config, 'layout': bool(layout)}
+
+
+def open_ocr_checkpoint(doc_hash, dpi=OCR_DPI, config=OCR_CONFIG, layout=True):
+    """문서 해시와 OCR 옵션에 해당하는 페이지별 체크포인트"""
+    return open_checkpoint(doc_hash, ocr_options(dpi, config, layout))
+
+
+def extract_ocr_pages(pdf_source, on_page=None, on_error=None, dpi=OCR_DPI, config=OCR_CONFIG, layout=True,
+                      checkpoint=None):
+    """Tesseract OCR로 페이지별 텍스트 추출
+
+    페이지를 하나씩 래스터화하여 전체 이미지를 동시에 메모리에 올리지 않음
+    layout이면 image_to_data 단어 상자로 다단 읽기 순서를 복원
+    checkpoint(OCRCheckpoint)가 있으면 이미 기록된 페이지는 건너뛰고, 새로 처리한 페이지는 바로 기록
+    on_page(page_number, num_pages, text)는 페이지 처리 후 호출 (체크포인트에서 복원한 페이지 포함)
+    on_error(page_number, exception)는 페이지 처리 실패 시 호출
+    """
+    pytesseract = require('pytesseract')
+    num_pages = pdf_page_count(pdf_source)
+    done = checkpoint.load() if checkpoint else {}
+    pages = []
+    failed = False
+
+    for page_number in range(1, num_pages + 1):
+        if page_number in done:
+            count('cache_hits_total', cache='ocr_checkpoint')
+            page = done[page_number]
+            if page['text'].strip():
+                pages.append(page)
+            if on_page:
+                on_page(page_number, num_pages, page['text'])
+            continue
+
+        started = time.perf_counter()
+        try:
+            # 래스터화 + tesseract는 페이지 단위로 입장 제어 (여러 사용자의 긴 OCR 작업이 페이지마다 번갈아 실행)
+            with admit('ocr', dpi=dpi), span('ocr_page', page=page_number):
+                with span('rasterize', page=page_number):
+                    image = render_page(pdf_source, page_number, dpi=dpi)
+                page_layout = None
+                with span('tesseract', page=page_number):
+                    if layout:
+                        data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+                    else:
+                        text = pytesseract.image_to_string(image, config=config)
+                if layout:
+                    page_layout = analyze_layout(tesseract_words(data), image.width, image.height)
+                    text = page_layout['text']
+        except Exception as e:
+            failed = True
+            if on_error:
+                on_error(page_number, e)
+            continue
+
+        page = make_page(page_number, 'ocr', text, time.perf_counter() - started, page_layout)
+        if checkpoint:
+            count('cache_misses_total', cache='ocr_checkpoint')
+            checkpoint.append(page)
+        if text.strip():
+            pages.append(page)
+        if on_page:
+            on_page(page_number, num_pages, text)
+
+    if checkpoint and not failed:
+        checkpoint.mark_complete(num_pages)
+    return pages
+
+
+def merge_ocr_pages(native_pages, ocr_pages):
+    """OCR 결과가 더 풍부하면 대체, 아니면 기본 추출 결과 뒤에 추가
+
+    반환: (병합된 페이지 목록, 대체 여부)
+    """
+    if count_chars(ocr_pages) > count_chars(native_pages):
+        return ocr_pages, True
+    return native_pages + ocr_pages, False
+
+
+def convert_pdf(pdf_source, use_ocr=False, clean=True, on_stage=None, on_page=None,
+                on_ocr_page=None, on_ocr_error=None, backend=DEFAULT_NATIVE_BACKEND, layout=True,
+                ocr_checkpoint=None):
+    """PDF 한 건 변환 (기본 추출 → 선택적 OCR → 텍스트 정리)
+
+    pdf_source: PDF 파일 경로 또는 bytes/memoryview
+    backend: 기본 텍스트 추출 엔진 ('auto'면 설치된 가장 빠른 엔진)
+    layout: 다단 읽기 순서 복원 및 머리글/바닥글 표시 (modules/layout.py)
+    ocr_checkpoint: OCR 페이지별 체크포인트 (open_ocr_checkpoint), 있으면 중단된 OCR을 이어서 처리
+    on_stage(stage)는 'extract', 'ocr', 'clean' 단계 시작 시 호출
+    나머지 콜백은 extract_native_pages / extract_ocr_pages로 전달
+    """
+    try:
+        backend = resolve_backend(backend)
+    except (ImportError, ValueError) as e:
+        return {'error': str(e)}
+
+    # 1. 기본 텍스트 추출
+    if on_stage:
+        on_stage('extract')
+    try:
+        pages, num_pages, failed_pages = extract_native_pages(pdf_source, on_page=on_page, backend=backend, layout=layout)
+    except Exception as e:
+        return {'error': f'PDF 읽기 실패: {str(e)}'}
+
+    # 2. OCR 처리 (선택적)
+    ocr_replaced = None
+    ocr_error = None
+    if use_ocr and OCR_AVAILABLE:
+        if on_stage:
+            on_stage('ocr')
+        try:
+            ocr_pages = extract_ocr_pages(pdf_source, on_page=on_ocr_page, on_error=on_ocr_error, layout=layout,
+                                          checkpoint=ocr_checkpoint)
+            if ocr_pages:
+                pages, ocr_replaced = merge_ocr_pages(pages, ocr_pages)
+        except Exception as e:
+            ocr_error = str(e)
+
+    # 분석 경로 선택용 줄 통계(표 밀도)는 정리 단계가 줄을 잇기 전에 계산 (modules/routing.py)
+    for page in pages:
+        page.update(line_stats(page['text']))
+
+    # 3. 텍스트 정리 (머리글/바닥글 제거, 줄 재결합)
+    stats = None
+    if clean and pages:
+        if on_stage:
+            on_stage('clean')
+        with span('clean'):
+            raw_text = join_pages(pages)
+            cleaned_texts, removed_lines = clean_pages([page['text'] for page in pages])
+            pages = [dict(page, text=text) for page, text in zip(pages, cleaned_texts)]
+            extracted_text = join_pages(pages)
+            stats = cleaning_stats(raw_text, extracted_text, removed_lines)
+    else:
+        extracted_text = join_pages(pages)
+
+    for page in pages:
+        count('pages_total', source=page['source'])
+    if failed_pages:
+        count('failed_pages_total', failed_pages)
+    if ocr_replaced:
+        count('ocr_fallbacks_total')
+
+    result = {
+        'extracted_text': extracted_text,
+        'text_length': len(extracted_text),
+        'pages': num_pages,
+        'page_results': pages,  # 페이지별 구조 (페이지 번호, 추출 방식, 텍스트, 처리 시간, 정리 전 줄 통계)
+        'failed_pages': failed_pages,
+        'backend': backend,
+        'cleaning': stats,
+        'ocr_replaced': ocr_replaced,
+        'ocr_error': ocr_error
+    }
+
+    # 4. 결과 검증
+    if count_chars(pages) < 10:
+        result['error'] = '텍스트 추출에 실패했습니다. OCR 옵션을 사용해보세요.'
+    else:
+        result['success'] = True
+    return result
@@ -1 +1,504 @@
-# drive_uploader.py - 모듈 구현 내용 포함
\ No newline at end of file
+# drive_uploader.py - Google Drive 내보내기 (재개 가능한 분할 업로드, 결과물 병렬 업로드, 업로드 세션 상태 저장)
+#
+# 파일마다 재개 가능 업로드 세션(uploadType=resumable)을 열어 CHUNK_SIZE씩 보내고, 세션 주소와 완료 기록은
+# JSONL 상태 파일에 바로 남김 - 전송이 끊기거나 프로세스가 다시 시작되어도 서버가 받은 만큼(Range)부터 이어서 보냄
+# DriveExport는 문서 하나의 결과물을 스테이징 폴더에 모으며 추가하는 즉시 업로드를 시작하므로, ZIP을 만들며
+# 분석 PDF를 렌더링하는 동안 먼저 나온 원본 PDF/추출 텍스트가 이미 올라감 (report_pdf.create_analysis_zip의 on_artifact)
+# 인증은 서비스 계정 JSON(GDRIVE_SERVICE_JSON, google-auth 필요) 또는 액세스 토큰(HANGULPDF_GDRIVE_ACCESS_TOKEN)
+# HANGULPDF_GDRIVE_BASE_URL을 로컬 모의 서버(benchmarks/mock_drive.py)로 바꿔 시험 가능
+import argparse
+import contextvars
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from modules.chat_client import CONNECT_TIMEOUT_SECONDS, pooled_session
+from modules.lazy_import import is_installed, require
+from modules.metrics import count, span
+from modules.summary_store import DEFAULT_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+DRIVE_BASE_URL = os.environ.get('HANGULPDF_GDRIVE_BASE_URL', 'https://www.googleapis.com')
+DRIVE_FOLDER_ID = os.environ.get('HANGULPDF_GDRIVE_FOLDER_ID')  # 내보낼 상위 폴더 (없으면 내 드라이브 최상위)
+DRIVE_ACCESS_TOKEN = os.environ.get('HANGULPDF_GDRIVE_ACCESS_TOKEN')
+DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive.file']
+DRIVE_STATE_PATH = os.environ.get('HANGULPDF_GDRIVE_STATE', os.path.join(DEFAULT_DATA_DIR, 'drive_uploads.jsonl'))
+DRIVE_STAGING_DIR = os.environ.get('HANGULPDF_GDRIVE_STAGING_DIR', os.path.join(DEFAULT_DATA_DIR, 'drive_staging'))
+
+CHUNK_ALIGN = 256 * 1024  # Drive는 마지막 조각 외에는 256KiB 배수만 받음
+CHUNK_SIZE = max(1, -(-int(os.environ.get('HANGULPDF_GDRIVE_CHUNK_KB', '8192')) * 1024 // CHUNK_ALIGN)) * CHUNK_ALIGN
+UPLOAD_CONCURRENCY = int(os.environ.get('HANGULPDF_GDRIVE_CONCURRENCY', '3'))
+READ_TIMEOUT_SECONDS = 120
+MAX_CHUNK_RETRIES = 5            # 같은 위치에서 연속으로 실패하면 포기 (상태는 남아 다음 실행에서 이어서 보냄)
+BACKOFF_SECONDS = 1.0            # 재시도 간격 1, 2, 4초... (최대 BACKOFF_MAX_SECONDS)
+BACKOFF_MAX_SECONDS = 30
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+SESSION_EXPIRED_STATUSES = (404, 410)
+SESSION_MAX_AGE_SECONDS = 6 * 86400  # Drive는 업로드 세션을 1주일 유지
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+_RANGE_RE = re.compile(r'bytes=(\d+)-(\d+)')
+
+
+class DriveError(Exception):
+    """Drive 호출 실패 (status는 HTTP 상태, 응답이 없으면 None)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def folder_url(folder_id):
+    return f"https://drive.google.com/drive/folders/{folder_id}"
+
+
+def drive_configured(service_json=None):
+    """Drive 내보내기를 쓸 수 있는지 (액세스 토큰, 또는 서비스 계정 JSON + google-auth)"""
+    if DRIVE_ACCESS_TOKEN:
+        return True
+    return bool(service_json or os.environ.get('GDRIVE_SERVICE_JSON')) and is_installed('google.oauth2')
+
+
+class AccessToken:
+    """Drive 액세스 토큰 (서비스 계정이면 만료 전에 google-auth로 갱신, 스레드 간 공유)"""
+
+    def __init__(self, service_json=None, token=None):
+        self._token = token
+        self._credentials = None
+        self._lock = threading.Lock()
+        if not token:
+            try:
+                info = json.loads(service_json) if isinstance(service_json, str) else dict(service_json)
+            except (TypeError, ValueError) as e:
+                raise DriveError(f"GDRIVE_SERVICE_JSON 형식 오류: {e}") from None
+            service_account = require('google.oauth2.service_account')
+            self._credentials = service_account.Credentials.from_service_account_info(info, scopes=DRIVE_SCOPES)
+
+    def get(self):
+        if self._token:
+            return self._token
+        with self._lock:
+            if not self._credentials.valid:
+                self._credentials.refresh(require('google.auth.transport.requests').Request())
+            return self._credentials.token
+
+
+class UploadState:
+    """업로드 상태 파일 (JSONL, 같은 키는 마지막 기록이 유효)
+
+    'upload:<해시>': {'session', 'created', 'file_id'}, 'export:<ID>': {'folder', 'parent', 'folder_id', 'files', 'complete'}
+    기록할 때마다 한 줄을 덧붙여 바로 디스크에 반영하고, 불러올 때 오래된 줄이 많으면 마지막 기록만 남겨 다시 씀
+    """
+
+    def __init__(self, path=DRIVE_STATE_PATH):
+        self.path = path
+        self._records = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._records is not None:
+            return self._records
+        self._records = {}
+        lines = 0
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 중단 시점에 잘린 마지막 줄
+                    lines += 1
+                    self._records[record.pop('key')] = record
+        if lines > 2 * len(self._records) + 100:
+            self._rewrite()
+        return self._records
+
+    def _rewrite(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for key, record in self._records.items():
+                f.write(json.dumps(dict(record, key=key), ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def get(self, key):
+        with self._lock:
+            return dict(self._load().get(key) or {})
+
+    def items(self, prefix):
+        with self._lock:
+            return [(key, dict(record)) for key, record in self._load().items() if key.startswith(prefix)]
+
+    def put(self, key, **fields):
+        """기존 기록에 fields를 합쳐 저장, 합친 기록 반환"""
+        with self._lock:
+            records = self._load()
+            record = dict(records.get(key) or {}, **fields)
+            records[key] = record
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write((json.dumps(dict(record, key=key), ensure_ascii=False) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            return dict(record)
+
+
+def _range_end(response):
+    """308 응답의 Range 헤더로 서버가 받은 바이트 수"""
+    match = _RANGE_RE.search(response.headers.get('Range', ''))
+    return int(match.group(2)) + 1 if match else 0
+
+
+class DriveUploader:
+    """Drive REST 클라이언트 (연결 풀 공유, 파일은 재개 가능 세션으로 분할 업로드)"""
+
+    def __init__(self, token, base_url=DRIVE_BASE_URL, state=None, chunk_size=CHUNK_SIZE, session=None,
+                 timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS)):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.state = state or UploadState()
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        # 세션 시작/폴더 생성(POST)만 자동 재시도, 조각 전송(PUT)은 받은 위치를 확인하여 직접 이어서 보냄
+        self.session = session or pooled_session()
+
+    def _headers(self, **extra):
+        return dict({'Authorization': f'Bearer {self.token.get()}'}, **extra)
+
+    def _post(self, path, body, **headers):
+        try:
+            response = self.session.post(f"{self.base_url}/{path}", json=body, timeout=self.timeout,
+                                         headers=self._headers(**headers))
+        except requests.RequestException as e:
+            raise DriveError(f"Drive 연결 오류: {e}") from None
+        if response.status_code >= 400:
+            raise DriveError(f"Drive API 오류: {response.status_code} - {response.text[:500]}", response.status_code)
+        return response
+
+    def create_folder(self, name, parent=None):
+        """폴더를 만들고 ID 반환"""
+        body = {'name': name, 'mimeType': FOLDER_MIME_TYPE}
+        if parent:
+            body['parents'] = [parent]
+        return self._post('drive/v3/files?fields=id&supportsAllDrives=true', body).json()['id']
+
+    def _start(self, name, parent, size, mime_type):
+        """재개 가능 업로드 세션 시작, 세션 주소 반환"""
+        body = {'name': name}
+        if parent:
+            body['parents'] = [parent]
+        response = self._post('upload/drive/v3/files?uploadType=resumable&fields=id,name,size&supportsAllDrives=true',
+                              body, **{'X-Upload-Content-Type': mime_type, 'X-Upload-Content-Length': str(size)})
+        location = response.headers.get('Location')
+        if not location:
+            raise DriveError("Drive 업로드 세션 주소를 받지 못했습니다")
+        return location
+
+    def _query(self, session_uri, size):
+        """서버가 받은 바이트 수 (완료되었으면 파일 dict, 세션이 만료되었으면 None)"""
+        response = self.session.put(session_uri, data=b'', timeout=self.timeout,
+                                    headers=self._headers(**{'Content-Range': f'bytes */{size}'}))
+        if response.status_code in (200, 201):
+            return response.json()
+        if response.status_code == 308:
+            return _range_end(response)
+        if response.status_code in SESSION_EXPIRED_STATUSES:
+            return None
+        raise DriveError(f"Drive 업로드 상태 확인 오류: {response.status_code} - {response.text[:200]}",
+                         response.status_code)
+
+    @staticmethod
+    def _upload_key(path, name, parent, stat):
+        digest = hashlib.sha256()
+        for part in (os.path.abspath(path), name, parent or '', str(stat.st_size), str(stat.st_mtime_ns)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return f"upload:{digest.hexdigest()[:24]}"
+
+    def upload_file(self, path, name=None, parent=None, mime_type=None, on_progress=None):
+        """파일 하나를 분할 업로드하고 Drive 파일 ID 반환
+
+        같은 파일(경로, 크기, 수정 시각, 상위 폴더)의 이전 세션이 남아 있으면 서버가 받은 위치부터 이어서 보내고,
+        이미 끝난 파일은 다시 보내지 않음
+        on_progress(name, sent, size)는 조각을 보낼 때마다 호출
+        """
+        name = name or os.path.basename(path)
+        stat = os.stat(path)
+        size = stat.st_size
+        mime_type = mime_type or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        key = self._upload_key(path, name, parent, stat)
+        record = self.state.get(key)
+        if record.get('file_id'):
+            count('drive_uploads_total', result='skipped')
+            return record['file_id']
+
+        with span('drive_upload', detail=name):
+            file = self._send(path, name, parent, size, mime_type, key, record, on_progress)
+        self.state.put(key, file_id=file['id'], session=None)
+        count('drive_uploads_total', result='resumed' if record.get('session') else 'uploaded')
+        return file['id']
+
+    def _send(self, path, name, parent, size, mime_type, key, record, on_progress):
+        session_uri = record.get('session')
+        offset = 0
+        if session_uri and time.time() - record.get('created', 0) < SESSION_MAX_AGE_SECONDS:
+            try:
+                status = self._query(session_uri, size)
+            except (requests.RequestException, DriveError) as e:
+                logger.info('Drive 세션 상태 확인 실패, 새 세션으로 시작 (%s): %s', name, e)
+                status = None
+            if isinstance(status, dict):
+                return status
+            if status is None:
+                session_uri = None
+            else:
+                offset = status
+                logger.info('Drive 업로드 이어서 보냄 (%s): %d/%d 바이트', name, offset, size)
+        else:
+            session_uri = None
+        if session_uri is None:
+            session_uri = self._start(name, parent, size, mime_type)
+            self.state.put(key, session=session_uri, created=time.time(), name=name)
+
+        failures = 0
+        with open(path, 'rb') as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(self.chunk_size)
+                content_range = f'bytes {offset}-{offset + len(chunk) - 1}/{size}' if chunk else f'bytes */{size}'
+                error = None
+                try:
+                    response = self.session.put(session_uri, data=chunk, timeout=self.timeout,
+                                                headers=self._headers(**{'Content-Range': content_range}))
+                except requests.RequestException as e:
+                    response, error = None, f"연결 오류: {e}"
+
+                if response is not None:
+                    if response.status_code in (200, 201):
+                        count('drive_upload_bytes_total', len(chunk))
+                        if on_progress:
+                            on_progress(name, size, size)
+                        return response.json()
+                    if response.status_code == 308 and _range_end(response) > offset:
+                        received = _range_end(response)
+                        count('drive_upload_bytes_total', received - offset)
+                        offset, failures = received, 0
+                        if on_progress:
+                            on_progress(name, offset, size)
+                        continue
+                    if response.status_code == 308:
+                        error = "받은 위치가 늘지 않음"
+                    elif response.status_code in SESSION_EXPIRED_STATUSES:
+                        # 세션 만료: 처음부터 새 세션으로 (반복되면 실패로 셈)
+                        session_uri = self._start(name, parent, size, mime_type)
+                        self.state.put(key, session=session_uri, created=time.time(), name=name)
+                        offset = 0
+                        error = f"세션 만료 ({response.status_code})"
+                    elif response.status_code not in RETRY_STATUSES:
+                        count('drive_uploads_total', result='failed')
+                        raise DriveError(f"Drive 업로드 오류 ({name}): {response.status_code} - {response.text[:200]}",
+                                         response.status_code)
+                    else:
+                        error = f"{response.status_code}"
+
+                failures += 1
+                if failures > MAX_CHUNK_RETRIES:
+                    count('drive_uploads_total', result='failed')
+                    raise DriveError(f"Drive 업로드 실패 ({name}, {offset}/{size} 바이트에서 중단): {error}")
+                time.sleep(min(BACKOFF_SECONDS * 2 ** (failures - 1), BACKOFF_MAX_SECONDS))
+                # 끊긴 조각의 일부를 서버가 받았을 수 있으므로 받은 위치를 다시 확인
+                try:
+                    status = self._query(session_uri, size)
+                except (requests.RequestException, DriveError) as e:
+                    logger.info('Drive 업로드 위치 확인 실패 (%s): %s', name, e)
+                    continue
+                if isinstance(status, dict):
+                    return status
+                if status is not None:
+                    offset = status
+
+
+class DriveExport:
+    """문서 하나의 결과물을 Drive 폴더 하나로 내보내기
+
+    add()로 추가한 파일은 스테이징 폴더에 옮겨 두고 바로 병렬 업로드를 시작하며, 목록은 상태 파일에 남겨
+    중단되면 resume_exports()로 남은 파일을 이어서 올림 (스테이징 폴더는 모두 올린 뒤 삭제)
+    """
+
+    def __init__(self, uploader, folder_name, parent=DRIVE_FOLDER_ID, export_id=None, staging_dir=DRIVE_STAGING_DIR,
+                 concurrency=UPLOAD_CONCURRENCY, on_progress=None):
+        self.uploader = uploader
+        self.export_id = export_id or uuid.uuid4().hex[:16]
+        self.key = f"export:{self.export_id}"
+        self.dir = os.path.join(staging_dir, self.export_id)
+        self.on_progress = on_progress
+        record = uploader.state.get(self.key)
+        self.folder_name = record.get('folder', folder_name)
+        self.parent = record.get('parent', parent)
+        self.folder_id = record.get('folder_id')
+        self.files = list(record.get('files', []))
+        if not record:
+            uploader.state.put(self.key, folder=self.folder_name, parent=self.parent, files=[], created=time.time())
+        self._lock = threading.Lock()
+        self._folder_lock = threading.Lock()
+        self._futures = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='drive-upload')
+
+    def add(self, name, path=None, data=None):
+        """결과물 하나를 스테이징하고 업로드 시작 (create_analysis_zip의 on_artifact와 같은 인자)
+
+        path의 파일은 작업이 끝나면 지워질 수 있어 하드 링크(안 되면 복사)로 옮겨 둠
+        """
+        name = os.path.basename(name)
+        os.makedirs(self.dir, exist_ok=True)
+        target = os.path.join(self.dir, name)
+        temp_path = f"{target}.part"
+        if data is not None:
+            with open(temp_path, 'wb') as f:
+                f.write(bytes(data))
+        else:
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                os.link(path, temp_path)
+            except OSError:
+                shutil.copyfile(path, temp_path)
+        os.replace(temp_path, target)
+        with self._lock:
+            if name not in self.files:
+                self.files.append(name)
+                self.uploader.state.put(self.key, files=list(self.files))
+        self._submit(name)
+
+    def _submit(self, name):
+        # 현재 컨텍스트(실행 보고서, 취소 확인)를 복사해 업로드 스레드에서 실행
+        future = self._executor.submit(contextvars.copy_context().run, self._upload, name)
+        with self._lock:
+            self._futures[name] = future
+
+    def _folder(self):
+        with self._folder_lock:
+            if not self.folder_id:
+                self.folder_id = self.uploader.create_folder(self.folder_name, self.parent)
+                self.uploader.state.put(self.key, folder_id=self.folder_id)
+            return self.folder_id
+
+    def _upload(self, name):
+        return self.uploader.upload_file(os.path.join(self.dir, name), name, self._folder(),
+                                         on_progress=self.on_progress)
+
+    def resume(self):
+        """상태 파일에 남은 파일 전체를 다시 제출 (이미 끝난 파일은 바로 건너뜀)"""
+        for name in self.files:
+            if os.path.exists(os.path.join(self.dir, name)):
+                self._submit(name)
+
+    def wait(self):
+        """모든 업로드를 기다려 결과 반환
+
+        {'export_id', 'folder', 'folder_id', 'url', 'uploaded': {이름: 파일 ID}, 'failed': {이름: 오류}}
+        모두 성공하면 스테이징 폴더를 지우고 완료로 기록, 실패가 있으면 남겨 다음에 이어서 올림
+        """
+        uploaded, failed = {}, {}
+        with self._lock:
+            futures = dict(self._futures)
+        for name, future in futures.items():
+            try:
+                uploaded[name] = future.result()
+            except Exception as e:
+                failed[name] = str(e)
+        self._executor.shutdown(wait=True)
+        if not failed:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            self.uploader.state.put(self.key, complete=True)
+        return {
+            'export_id': self.export_id,
+            'folder': self.folder_name,
+            'folder_id': self.folder_id,
+            'url': folder_url(self.folder_id) if self.folder_id else None,
+            'uploaded': uploaded,
+            'failed': failed,
+        }
+
+
+def pending_exports(state=None):
+    """끝나지 않은 내보내기 [(ID, 기록)]"""
+    state = state or UploadState()
+    return [(key.split(':', 1)[1], record) for key, record in state.items('export:') if not record.get('complete')]
+
+
+def resume_exports(uploader, staging_dir=DRIVE_STAGING_DIR):
+    """중단된 내보내기를 이어서 올리고 결과 목록 반환 (스테이징 폴더가 사라진 내보내기는 완료 처리)"""
+    results = []
+    for export_id, record in pending_exports(uploader.state):
+        if not os.path.isdir(os.path.join(staging_dir, export_id)):
+            uploader.state.put(f"export:{export_id}", complete=True)
+            continue
+        export = DriveExport(uploader, record.get('folder'), export_id=export_id, staging_dir=staging_dir)
+        export.resume()
+        results.append(export.wait())
+    return results
+
+
+_uploader = None
+_uploader_lock = threading.Lock()
+
+
+def get_uploader(service_json=None):
+    """프로세스 공용 업로더 (설정이 없으면 None)
+
+    service_json: 서비스 계정 JSON 문자열 (없으면 GDRIVE_SERVICE_JSON 환경 변수)
+    """
+    global _uploader
+    with _uploader_lock:
+        if _uploader is None and drive_configured(service_json):
+            token = AccessToken(token=DRIVE_ACCESS_TOKEN) if DRIVE_ACCESS_TOKEN else \
+                AccessToken(service_json or os.environ.get('GDRIVE_SERVICE_JSON'))
+            _uploader = DriveUploader(token)
+        return _uploader
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='결과물 Google Drive 내보내기 (재개 가능 업로드)')
+    parser.add_argument('paths', nargs='*', help='올릴 파일')
+    parser.add_argument('--folder', help='만들 Drive 폴더 이름 (기본: 첫 파일 이름)')
+    parser.add_argument('--resume', action='store_true', help='중단된 내보내기 이어서 올리기')
+    args = parser.parse_args(argv)
+
+    uploader = get_uploader()
+    if uploader is None:
+        print("Drive 설정이 없습니다 (GDRIVE_SERVICE_JSON 또는 HANGULPDF_GDRIVE_ACCESS_TOKEN)", file=sys.stderr)
+        return 2
+
+    results = resume_exports(uploader) if args.resume else []
+    if args.paths:
+        export = DriveExport(uploader, args.folder or os.path.splitext(os.path.basename(args.paths[0]))[0])
+        for path in args.paths:
+            export.add(os.path.basename(path), path=path)
+        results.append(export.wait())
+
+    failed = 0
+    for result in results:
+        print(f"{result['folder']}: {len(result['uploaded'])}개 업로드 · 실패 {len(result['failed'])}개"
+              + (f" · {result['url']}" if result['url'] else ''))
+        for name, error in result['failed'].items():
+            print(f"  ✗ {name}: {error}")
+        failed += len(result['failed'])
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1 +1,41 @@
-# export_grok.py - 모듈 구현 내용 포함
\ No newline at end of file
+# export_grok.py - Grok(xAI) API 설정과 클라이언트 (OpenAI 호환 엔드포인트)
+#
+# ChatGPT와 같은 modules/chat_client.py 클라이언트(공용 연결 풀, 재시도, 스트리밍)를 쓰고,
+# 분석 흐름(토큰 예산, 분할 분석, 구조화 응답 검증)은 gpt_summary.analyze_with_grok에서 ChatGPT와 공유
+# HANGULPDF_GROK_BASE_URL을 로컬 모의 서버(benchmarks/mock_openai.py)로 바꿔 키 없이 시험 가능
+import os
+import threading
+
+from modules.analysis_model import ANALYSIS_SCHEMA
+from modules.chat_client import ChatClient
+
+GROK_BASE_URL = os.environ.get('HANGULPDF_GROK_BASE_URL', 'https://api.x.ai/v1')
+GROK_MODEL = os.environ.get('HANGULPDF_GROK_MODEL', 'grok-3-mini')
+GROK_API_KEY = os.environ.get('XAI_API_KEY')
+
+GROK_MAX_OUTPUT_TOKENS = 4000
+GROK_TOKEN_BUDGET = int(os.environ.get('HANGULPDF_GROK_TOKEN_BUDGET', '60000'))
+
+# strict 구조화 출력(json_schema)을 지원하는 모델 (그 밖의 모델은 JSON 모드 + 프롬프트의 형식 설명)
+GROK_JSON_SCHEMA_MODELS = ('grok-2-1212', 'grok-3', 'grok-4')
+
+
+def grok_response_format(model):
+    """구조화 분석 응답 형식"""
+    if model.startswith(GROK_JSON_SCHEMA_MODELS):
+        return {'type': 'json_schema',
+                'json_schema': {'name': 'document_analysis', 'strict': True, 'schema': ANALYSIS_SCHEMA}}
+    return {'type': 'json_object'}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """프로세스 공용 Grok 클라이언트 (연결 풀은 ChatGPT와 공유)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ChatClient('grok', 'Grok', GROK_BASE_URL)
+        return _client
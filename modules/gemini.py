@@ -0,0 +1,217 @@
+# gemini.py - Gemini API 클라이언트 (연결 풀 재사용, 타임아웃/재시도, 공통 프롬프트 접두부 컨텍스트 캐시)
+#
+# 모든 요청은 프로세스에 하나뿐인 requests.Session(연결 풀)을 공유하고, 연결 실패와 429/5xx는 지수 백오프로 재시도
+# 분석 지시문 + 문서 본문(호출마다 같은 긴 접두부)은 cachedContents로 캐시하여 같은 문서를 다시 분석하면
+# 캐시된 토큰 요금만 내고, 캐시가 만료/삭제되었으면 한 번 캐시 없이 다시 보냄
+# HANGULPDF_GEMINI_BASE_URL을 로컬 모의 서버(benchmarks/mock_gemini.py)로 바꿔 키 없이 시험 가능
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import requests
+
+from modules.chat_client import POOL_SIZE, pooled_session
+from modules.metrics import count, count_llm_usage, log_event, span
+from modules.token_budget import count_tokens
+
+logger = logging.getLogger(__name__)
+
+GEMINI_BASE_URL = os.environ.get('HANGULPDF_GEMINI_BASE_URL', 'https://generativelanguage.googleapis.com')
+GEMINI_API_VERSION = 'v1beta'
+GEMINI_MODEL = os.environ.get('HANGULPDF_GEMINI_MODEL', 'gemini-2.0-flash')
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+
+CONNECT_TIMEOUT_SECONDS = 5
+READ_TIMEOUT_SECONDS = float(os.environ.get('HANGULPDF_GEMINI_TIMEOUT_SECONDS', '120'))
+MAX_RETRIES = int(os.environ.get('HANGULPDF_GEMINI_RETRIES', '3'))  # 재시도 간격/상태는 chat_client.pooled_session
+
+CACHE_TTL_SECONDS = int(os.environ.get('HANGULPDF_GEMINI_CACHE_TTL_SECONDS', '3600'))
+CACHE_MIN_TOKENS = int(os.environ.get('HANGULPDF_GEMINI_CACHE_MIN_TOKENS', '4096'))  # 이보다 짧은 접두부는 캐시 안 함
+CACHE_EXPIRY_MARGIN_SECONDS = 60  # 만료 직전 캐시는 쓰지 않음
+CACHE_MISSING_STATUSES = (400, 403, 404)  # 캐시가 만료/삭제되었을 때 돌아오는 상태
+
+
+class GeminiError(Exception):
+    """Gemini 호출 실패 (status는 HTTP 상태, 응답이 없으면 None)"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def gemini_schema(schema):
+    """JSON 스키마를 Gemini responseSchema(OpenAPI 부분집합)로 변환
+
+    타입은 대문자, additionalProperties는 지원하지 않아 제거, 속성 순서는 propertyOrdering으로 유지
+    """
+    converted = {}
+    for key, value in schema.items():
+        if key == 'additionalProperties':
+            continue
+        if key == 'type':
+            converted['type'] = value.upper()
+        elif key == 'properties':
+            converted['properties'] = {name: gemini_schema(child) for name, child in value.items()}
+            converted['propertyOrdering'] = list(value)
+        elif key == 'items':
+            converted['items'] = gemini_schema(value)
+        else:
+            converted[key] = value
+    if 'enum' in converted:
+        converted['format'] = 'enum'
+    return converted
+
+
+def _usage(data):
+    """usageMetadata -> OpenAI 호환 usage (+ cached_tokens)"""
+    metadata = data.get('usageMetadata') or {}
+    return {
+        'prompt_tokens': metadata.get('promptTokenCount', 0),
+        'completion_tokens': metadata.get('candidatesTokenCount', 0),
+        'cached_tokens': metadata.get('cachedContentTokenCount', 0),
+    }
+
+
+class GeminiClient:
+    """연결 풀을 공유하는 Gemini REST 클라이언트 (스레드 간 공유, 캐시 목록은 잠금으로 보호)"""
+
+    def __init__(self, base_url=GEMINI_BASE_URL, retries=MAX_RETRIES, pool_size=POOL_SIZE,
+                 timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS)):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = pooled_session(retries, pool_size)
+        self._caches = {}  # 접두부 해시 -> (캐시 이름, 만료 시각)
+        self._lock = threading.Lock()
+
+    def _request(self, method, path, api_key, body=None):
+        url = f"{self.base_url}/{GEMINI_API_VERSION}/{path}"
+        try:
+            response = self.session.request(method, url, json=body, timeout=self.timeout,
+                                            headers={'x-goog-api-key': api_key})
+        except requests.RequestException as e:
+            raise GeminiError(f"Gemini 연결 오류: {e}") from None
+        if response.status_code >= 400:
+            raise GeminiError(f"Gemini API 오류: {response.status_code} - {response.text[:500]}",
+                              response.status_code)
+        return response.json() if response.content else {}
+
+    @staticmethod
+    def _cache_key(model, system, document):
+        digest = hashlib.sha256()
+        for part in (model, system, document):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def cached_prefix(self, model, system, document, api_key, tokens=None):
+        """지시문 + 문서 접두부의 캐시 이름 (짧거나 만들 수 없으면 None)"""
+        key = self._cache_key(model, system, document)
+        now = time.time()
+        with self._lock:
+            entry = self._caches.get(key)
+        if entry and entry[1] - CACHE_EXPIRY_MARGIN_SECONDS > now:
+            count('llm_context_cache_total', provider='gemini', result='hit')
+            return entry[0]
+
+        tokens = tokens if tokens is not None else count_tokens(system + document, model)
+        if tokens < CACHE_MIN_TOKENS:
+            return None
+        try:
+            data = self._request('POST', 'cachedContents', api_key, {
+                'model': f'models/{model}',
+                'systemInstruction': {'parts': [{'text': system}]},
+                'contents': [{'role': 'user', 'parts': [{'text': document}]}],
+                'ttl': f'{CACHE_TTL_SECONDS}s',
+            })
+        except GeminiError as e:
+            count('llm_context_cache_total', provider='gemini', result='error')
+            logger.warning('Gemini 컨텍스트 캐시 생성 실패 (캐시 없이 진행): %s', e)
+            return None
+        count('llm_context_cache_total', provider='gemini', result='created')
+        with self._lock:
+            self._caches[key] = (data['name'], now + CACHE_TTL_SECONDS)
+        return data['name']
+
+    def forget_prefix(self, model, system, document):
+        with self._lock:
+            self._caches.pop(self._cache_key(model, system, document), None)
+
+    def generate(self, model, contents, api_key, max_output_tokens, kind='single', schema=None, system=None,
+                 cached=None, totals=None):
+        """generateContent 호출 한 번, 응답 텍스트 반환
+
+        contents: 사용자 메시지 텍스트 목록, cached: 캐시 이름 (있으면 system 대신 사용)
+        totals: 분석 하나의 호출 합계 {'prompt_tokens', 'completion_tokens', 'calls'} (있으면 누적)
+        """
+        body = {
+            'contents': [{'role': 'user', 'parts': [{'text': text} for text in contents]}],
+            'generationConfig': {'maxOutputTokens': max_output_tokens, 'temperature': 0.7},
+        }
+        if schema is not None:
+            body['generationConfig']['responseMimeType'] = 'application/json'
+            body['generationConfig']['responseSchema'] = gemini_schema(schema)
+        if cached:
+            body['cachedContent'] = cached
+        elif system:
+            body['systemInstruction'] = {'parts': [{'text': system}]}
+
+        estimated_tokens = count_tokens(''.join(contents), model)
+        count('llm_estimated_tokens_total', estimated_tokens, provider='gemini')
+        count('llm_calls_total', provider='gemini', kind=kind)
+        started = time.perf_counter()
+        with span('llm_call', detail=kind):
+            data = self._request('POST', f'models/{model}:generateContent', api_key, body)
+
+        usage = _usage(data)
+        count_llm_usage('gemini', usage)
+        if usage['cached_tokens']:
+            count('llm_cached_tokens_total', usage['cached_tokens'], provider='gemini')
+        if totals is not None:
+            totals['prompt_tokens'] += usage['prompt_tokens'] or estimated_tokens
+            totals['completion_tokens'] += usage['completion_tokens']
+            totals['calls'] += 1
+        log_event('llm_call', provider='gemini', model=model, call=kind, estimated_prompt_tokens=estimated_tokens,
+                  prompt_tokens=usage['prompt_tokens'], completion_tokens=usage['completion_tokens'],
+                  cached_tokens=usage['cached_tokens'], cached=bool(cached),
+                  seconds=round(time.perf_counter() - started, 3))
+
+        candidates = data.get('candidates') or []
+        if not candidates:
+            reason = (data.get('promptFeedback') or {}).get('blockReason', '응답 없음')
+            raise GeminiError(f"Gemini 응답 없음: {reason}")
+        parts = (candidates[0].get('content') or {}).get('parts') or []
+        return ''.join(part.get('text', '') for part in parts)
+
+    def generate_with_prefix(self, model, system, document, instruction, api_key, max_output_tokens,
+                             schema=None, totals=None):
+        """지시문(system) + 문서(document)를 캐시한 접두부 뒤에 instruction을 붙여 생성
+
+        접두부가 짧으면 캐시 없이 한 번에 보내고, 캐시가 사라졌으면 캐시를 잊고 캐시 없이 다시 보냄
+        """
+        cached = self.cached_prefix(model, system, document, api_key)
+        if cached:
+            try:
+                return self.generate(model, [instruction], api_key, max_output_tokens, schema=schema,
+                                     cached=cached, totals=totals)
+            except GeminiError as e:
+                if e.status not in CACHE_MISSING_STATUSES:
+                    raise
+                logger.info('Gemini 캐시 %s 사용 실패, 캐시 없이 다시 보냄: %s', cached, e)
+                self.forget_prefix(model, system, document)
+        return self.generate(model, [document, instruction], api_key, max_output_tokens, schema=schema,
+                             system=system, totals=totals)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """프로세스 공용 클라이언트 (연결 풀과 캐시 목록 공유)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeminiClient()
+        return _client
@@ -1 +1,216 @@
-# gpt_qa.py - 모듈 구현 내용 포함
\ No newline at end of file
+# gpt_qa.py - 문서 Q&A (문자 n-gram BM25 로컬 검색 + 관련 청크만 GPT에 전달)
+#
+# 답변과 임베딩 호출은 분석과 같은 OpenAI 주소(HANGULPDF_OPENAI_BASE_URL)와 연결 풀/재시도(modules/chat_client.py)를 사용
+import math
+import re
+from collections import Counter, defaultdict
+
+import requests
+
+from modules.chat_client import ChatError, shared_session
+from modules.gpt_summary import OPENAI_BASE_URL, OPENAI_CLIENT
+from modules.lazy_import import is_installed, load
+from modules.metrics import count_llm_usage, span
+
+# numpy는 임베딩 검색을 쓸 때만 임포트
+NUMPY_AVAILABLE = is_installed('numpy')
+
+OPENAI_EMBEDDING_URL = f"{OPENAI_BASE_URL.rstrip('/')}/embeddings"
+
+QA_MODEL = 'gpt-3.5-turbo'
+EMBEDDING_MODEL = 'text-embedding-3-small'
+
+_WORD_RE = re.compile(r'[0-9A-Za-z가-힣]+')
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+
+
+def tokenize(text, n=2):
+    """한글 친화적 문자 n-gram 토큰화 (어절 단위, 짧은 어절은 그대로 사용)"""
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        if len(word) <= n:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+def chunk_pages(pages, max_chars=600):
+    """페이지별 결과를 검색 단위 청크로 분할 (청크는 페이지 경계를 넘지 않음)"""
+    chunks = []
+    for page in pages:
+        buffer = ''
+        for paragraph in _PARAGRAPH_RE.split(page['text']):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if buffer and len(buffer) + len(paragraph) > max_chars:
+                chunks.append({'page': page['page'], 'text': buffer})
+                buffer = ''
+            # 단락 하나가 너무 길면 고정 길이로 자름
+            while len(paragraph) > max_chars:
+                chunks.append({'page': page['page'], 'text': paragraph[:max_chars]})
+                paragraph = paragraph[max_chars:]
+            buffer = f"{buffer}\n{paragraph}" if buffer else paragraph
+        if buffer:
+            chunks.append({'page': page['page'], 'text': buffer})
+    return chunks
+
+
+class QAIndex:
+    """문서 하나에 대한 BM25 역색인 (선택적으로 임베딩 벡터 포함)"""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.embeddings = None
+
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+        for chunk_id, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk['text']))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((chunk_id, tf))
+
+        total = len(chunks)
+        self.avg_length = (sum(self.doc_lengths) / total) if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    @classmethod
+    def from_pages(cls, pages, max_chars=600):
+        """페이지별 추출 결과로부터 색인 생성"""
+        return cls(chunk_pages(pages, max_chars=max_chars))
+
+    def bm25_scores(self, query):
+        """질문과 일치하는 청크별 BM25 점수"""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for chunk_id, tf in self.postings[term]:
+                norm = 1 - self.b + self.b * self.doc_lengths[chunk_id] / self.avg_length
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return scores
+
+    def attach_embeddings(self, vectors):
+        """청크 임베딩 벡터 연결 (chunks와 같은 순서)"""
+        np = load('numpy') if NUMPY_AVAILABLE else None
+        if np is not None:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self.embeddings = matrix / np.maximum(norms, 1e-8)
+        else:
+            self.embeddings = [_normalize(vector) for vector in vectors]
+
+    def search(self, query, top_k=4, query_vector=None, semantic_weight=0.5):
+        """상위 k개 관련 청크 검색, [{'page', 'text', 'score'}] 반환"""
+        scores = self.bm25_scores(query)
+        if scores:
+            best = max(scores.values())
+            scores = {chunk_id: score / best for chunk_id, score in scores.items()}
+
+        # 임베딩이 있으면 BM25 점수와 코사인 유사도를 가중 합산
+        if query_vector is not None and self.embeddings is not None:
+            similarities = self._similarities(query_vector)
+            scores = {
+                chunk_id: (1 - semantic_weight) * scores.get(chunk_id, 0.0) + semantic_weight * similarity
+                for chunk_id, similarity in enumerate(similarities)
+            }
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [dict(self.chunks[chunk_id], score=score) for chunk_id, score in ranked if score > 0]
+
+    def _similarities(self, query_vector):
+        if not isinstance(self.embeddings, list):
+            np = load('numpy')
+            query = np.asarray(query_vector, dtype=np.float32)
+            query = query / max(float(np.linalg.norm(query)), 1e-8)
+            return (self.embeddings @ query).tolist()
+        query = _normalize(query_vector)
+        return [sum(a * b for a, b in zip(vector, query)) for vector in self.embeddings]
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(value * value for value in vector)) or 1e-8
+    return [value / norm for value in vector]
+
+
+def embed_texts(texts, api_key, model=EMBEDDING_MODEL, batch_size=256, timeout=60):
+    """OpenAI 임베딩 API로 텍스트 목록을 벡터화 (연결/응답 오류는 ChatError)"""
+    headers = {
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json'
+    }
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        with span('llm', detail='embedding'):
+            try:
+                response = shared_session().post(
+                    OPENAI_EMBEDDING_URL,
+                    headers=headers,
+                    json={'model': model, 'input': texts[start:start + batch_size]},
+                    timeout=timeout
+                )
+            except requests.RequestException as e:
+                raise ChatError(f"{OPENAI_CLIENT.label} 임베딩 연결 오류: {e}") from None
+        if response.status_code != 200:
+            raise ChatError(f"{OPENAI_CLIENT.label} 임베딩 API 오류: {response.status_code} - {response.text}",
+                            response.status_code)
+        result = response.json()
+        count_llm_usage('embedding', result.get('usage'))
+        data = sorted(result['data'], key=lambda item: item['index'])
+        vectors.extend(item['embedding'] for item in data)
+    return vectors
+
+
+def build_qa_index(pages, api_key=None, use_embeddings=False):
+    """Q&A 색인 생성 (use_embeddings이면 청크 임베딩까지 계산)"""
+    index = QAIndex.from_pages(pages)
+    if use_embeddings and api_key and index.chunks:
+        index.attach_embeddings(embed_texts([chunk['text'] for chunk in index.chunks], api_key))
+    return index
+
+
+def build_qa_prompt(question, sources):
+    """검색된 청크만 포함한 Q&A 프롬프트"""
+    context = '\n\n'.join(f"[페이지 {source['page']}]\n{source['text']}" for source in sources)
+    return f"""다음은 한글 문서에서 질문과 관련된 부분만 발췌한 내용입니다.
+발췌 내용만 근거로 질문에 한국어로 답하고, 근거가 된 페이지 번호를 함께 표시해주세요.
+발췌 내용으로 답할 수 없으면 문서에서 찾을 수 없다고 답하세요.
+
+---
+
+{context}
+
+---
+
+질문: {question}"""
+
+
+def answer_question(index, question, api_key, top_k=4, model=QA_MODEL, max_tokens=800):
+    """관련 청크 top-k만 GPT에 보내 질문에 답변"""
+    try:
+        query_vector = None
+        if index.embeddings is not None:
+            query_vector = embed_texts([question], api_key)[0]
+
+        sources = index.search(question, top_k=top_k, query_vector=query_vector)
+        if not sources:
+            return {'answer': '문서에서 질문과 관련된 내용을 찾을 수 없습니다.', 'sources': [], 'usage': None}
+
+        usage = {'prompt_tokens': 0, 'completion_tokens': 0, 'calls': 0}
+        with span('llm', detail='qa'):
+            answer = OPENAI_CLIENT.complete(build_qa_prompt(question, sources), api_key, model, max_tokens,
+                                            kind='qa', totals=usage, temperature=0.2)
+        return {'answer': answer, 'sources': sources, 'usage': usage}
+
+    except ChatError as e:
+        return {'error': str(e), 'sources': sources}
+    except Exception as e:
+        return {'error': f"Q&A 처리 중 오류: {str(e)}"}
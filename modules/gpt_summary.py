@@ -1 +1,409 @@
-# gpt_summary.py - 모듈 구현 내용 포함
\ No newline at end of file
+# gpt_summary.py - AI 모델별 문서 분석 (ChatGPT / Gemini / Grok)
+#
+# API 분석은 구조화(JSON) 결과를 요청하여 modules/analysis_model.py의 Analysis로 한 번만 검증하고,
+# 모든 분석 함수는 Analysis를 반환 (실패하면 error가 있는 Analysis)
+# ChatGPT와 Grok은 같은 OpenAI 호환 클라이언트(modules/chat_client.py)를, Gemini는 modules/gemini.py를 사용하고
+# run_analyses는 세 모델을 동시에 호출 (HANGULPDF_ANALYSIS_CONCURRENCY)
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from modules import export_grok
+from modules.analysis_model import ANALYSIS_SCHEMA, Analysis, AnalysisFormatError, parse_analysis
+from modules.chat_client import ChatClient, ChatError, ChatTruncated
+from modules.gemini import GEMINI_API_KEY, GEMINI_MODEL, GeminiError, get_client
+from modules.metrics import count, log_event, span
+from modules.routing import (
+    DEFAULT_MODEL,
+    STANDARD_OUTPUT_TOKENS,
+    choose_route,
+    document_features,
+    larger_output_tokens,
+    log_route,
+)
+from modules.token_budget import ANALYSIS_TOKEN_BUDGET, CHUNK_SUMMARY_TOKENS, chunk_text, count_tokens, plan_analysis
+
+OPENAI_BASE_URL = os.environ.get('HANGULPDF_OPENAI_BASE_URL', 'https://api.openai.com/v1')
+OPENAI_CLIENT = ChatClient('chatgpt', 'ChatGPT', OPENAI_BASE_URL)  # 연결 풀은 Grok과 공유
+
+ANALYSIS_CONCURRENCY = int(os.environ.get('HANGULPDF_ANALYSIS_CONCURRENCY', '3'))  # 동시에 호출할 모델 수
+
+GEMINI_MAX_OUTPUT_TOKENS = 4000
+GEMINI_TOKEN_BUDGET = int(os.environ.get('HANGULPDF_GEMINI_TOKEN_BUDGET', '200000'))  # 긴 컨텍스트 모델이라 예산을 크게
+
+# 6단계 구조화 분석 프롬프트 (사용자가 복사해 쓰는 마크다운용, ChatGPT/Gemini 공용)
+ANALYSIS_PROMPT = """다음 한글 문서를 AI가 자동 분석한 뒤, 문서 유형과 주요 내용을 파악하여 다음 항목들을 포함한 요약 및 구조화된 분석 결과를 생성해주세요.
+
+1. 📂 문서 기본 정보:
+   - 문서 제목 또는 추정 제목
+   - 작성 날짜 또는 추정 시점
+   - 작성 주체 또는 관련 기관/담당자 추정
+   - 문서 목적(정책 문서/보고서/계획안/회의록/제안서 등) 자동 분류
+
+2. 🧩 문서 구조 분석:
+   - 목차 또는 섹션 구성 추정
+   - 각 섹션별 요약 (3줄 이내)
+   - 표, 그림, 도표가 포함된 경우 해당 내용 요약
+
+3. 🧠 핵심 내용 요약 및 인사이트:
+   - 전체 문서의 핵심 주제 및 주요 주장 요약 (5줄 이내)
+   - 자주 등장하는 키워드 및 핵심 개념(빈도 분석 포함)
+   - 문서 내 등장하는 중요한 수치, 날짜, 고유명사(인물, 기관 등) 추출
+   - 중요한 결정사항, 요청사항, 일정, 액션 아이템 자동 분리
+
+4. 🛠️ 문서 유형별 특화 분석 (자동 판단하여 포함):
+   - ✅ 기획안/제안서: 핵심 아이디어, 제안 배경, 기대 효과 요약
+   - ✅ 회의록: 참석자, 주요 논의사항, 결정사항 및 후속 조치 정리
+   - ✅ 정책/행정문서: 정책 목적, 대상, 추진 전략 및 일정 요약
+   - ✅ 공사/계약문서: 계약 조건, 공정 일정, 이해관계자 분석
+   - ✅ 보고서: 분석 대상, 방법, 결론 및 제언 구분
+
+5. 🔍 오류 및 주의요소 감지:
+   - 문서 내 날짜 오류, 논리 비약, 누락 정보 자동 감지
+   - 문맥상 혼란을 줄 수 있는 표현 또는 오탈자 추정
+
+6. 🧾 결과 요약 형식:
+   - 마크다운(.md) 형식으로 요약 결과 제공
+   - 제목, 소제목, 목록 등을 구조적으로 제공
+
+문서를 사람이 읽지 않고도 전체적 흐름과 인사이트를 파악할 수 있도록 분석해주세요.
+
+---
+
+"""
+
+# API 분석용 구조화(JSON) 프롬프트 (응답은 ANALYSIS_SCHEMA 형식, 마크다운 꾸밈 없이 내용만)
+STRUCTURED_PROMPT = """다음 한글 문서를 분석하여 아래 형식의 JSON 객체 하나만 응답하세요. 마크다운이나 설명은 붙이지 마세요.
+
+- info: title(제목 또는 추정 제목), date(작성 날짜 또는 추정 시점), author(작성 주체/기관/담당자 추정),
+  doc_type(정책문서/보고서/계획안/회의록/제안서/계약문서/기타), purpose(문서 목적 한 문장)
+- structure: 섹션 목록 [{title, summary(3줄 이내, 표/도표 내용 포함)}]
+- summary: 핵심 주제와 주요 주장 (5개 이내 문장)
+- keywords: 자주 등장하는 키워드 [{term, count(등장 횟수)}]
+- entities: 중요한 수치/날짜/고유명사 [{name, kind(person/organization/date/number/place/other), context(한 줄)}]
+- decisions: 결정사항 및 요청사항
+- action_items: 일정과 후속 조치 [{task, owner, due}] (모르면 빈 문자열)
+- type_analysis: 문서 유형별 특화 분석 [{title, summary}]
+  (기획안/제안서: 핵심 아이디어·배경·기대 효과, 회의록: 참석자·논의사항·후속 조치,
+  정책/행정문서: 목적·대상·추진 전략·일정, 공사/계약문서: 계약 조건·공정 일정·이해관계자, 보고서: 대상·방법·결론·제언)
+- issues: 날짜 오류, 논리 비약, 누락 정보, 혼란스러운 표현이나 오탈자 추정
+
+해당 내용이 없으면 빈 문자열이나 빈 배열을 사용하세요.
+
+---
+
+"""
+
+# Grok용 영문 프롬프트
+GROK_PROMPT = """Analyze this Korean document and provide insights in Korean:
+
+- Document type and key themes
+- Important data points and statistics
+- Main conclusions and recommendations
+- Creative perspectives on the content
+
+---
+
+"""
+
+# 분할 분석(map)용 부분 요약 프롬프트 ({index}/{total}은 부분 번호)
+CHUNK_PROMPT = """다음은 긴 한글 문서의 일부({index}/{total})입니다. 이후 전체 문서 분석에 쓸 수 있도록 이 부분을 요약해주세요.
+
+- 다루는 주제와 섹션 제목
+- 중요한 수치, 날짜, 고유명사(인물, 기관 등)
+- 결정사항, 요청사항, 일정, 액션 아이템
+- 표가 있으면 핵심 내용
+
+불릿 목록으로 간결하게 작성하세요.
+
+---
+
+"""
+
+# 캐시한 접두부(지시문 + 문서) 뒤에 붙이는 요청 (Gemini 컨텍스트 캐시)
+PREFIX_INSTRUCTION = "위 문서를 지시에 따라 분석하여 JSON으로 응답하세요."
+
+# 분할 분석 최종 단계(reduce)에서 문서 대신 부분 요약을 보낼 때 붙이는 안내
+CHUNKED_NOTE = "(아래 내용은 긴 문서를 부분별로 요약한 것입니다. 원문 대신 이 요약들을 바탕으로 분석해주세요.)\n\n"
+
+PROVIDERS = ('chatgpt', 'gemini', 'grok')
+
+# OpenAI strict 구조화 출력(json_schema)을 지원하는 모델 (그 밖의 모델은 JSON 모드 + 프롬프트의 형식 설명)
+JSON_SCHEMA_MODELS = ('gpt-4o-mini', 'gpt-4o')
+
+
+def is_analysis_error(result):
+    """분석이 실패했는지 확인 (실패한 결과는 저장/재사용하지 않음)"""
+    return result is None or bool(result.error)
+
+
+def build_analysis_prompt(text):
+    """구조화 분석 프롬프트 생성"""
+    return ANALYSIS_PROMPT + text
+
+
+def build_grok_prompt(text):
+    """Grok 분석 프롬프트 생성"""
+    return GROK_PROMPT + text
+
+
+def _response_format(model):
+    """구조화 분석 응답 형식"""
+    if model.startswith(JSON_SCHEMA_MODELS):
+        return {'type': 'json_schema',
+                'json_schema': {'name': 'document_analysis', 'strict': True, 'schema': ANALYSIS_SCHEMA}}
+    return {'type': 'json_object'}
+
+
+def _chat_call(client, api_key, model, totals, response_format, on_delta=None, on_truncated=None):
+    """OpenAI 호환 호출 함수 call(prompt, max_tokens, kind, structured) (_analyze_chunked와 한 번에 분석 공용)
+
+    on_delta(text)는 구조화 호출(최종 분석)에만 전달 (부분 요약은 스트리밍하지 않음)
+    구조화 응답이 출력 토큰 한도에서 잘리면 더 큰 경로의 출력 토큰으로 한 번 다시 호출하고 on_truncated(max_tokens) 호출
+    """
+    def call(prompt, max_tokens, kind, structured):
+        if not structured:
+            return client.complete(prompt, api_key, model, max_tokens, kind, totals)
+        try:
+            return client.complete(prompt, api_key, model, max_tokens, kind, totals,
+                                   response_format=response_format, on_delta=on_delta)
+        except ChatTruncated:
+            if on_truncated:
+                on_truncated(max_tokens)
+            larger = larger_output_tokens(max_tokens)
+            if larger is None:
+                raise
+            return client.complete(prompt, api_key, model, larger, kind, totals,
+                                   response_format=response_format, on_delta=on_delta)
+    return call
+
+
+def _summarize_chunks(chunks, call):
+    """부분 요약(map) 목록, call(prompt, max_tokens, kind, structured)은 제공자별 호출 함수"""
+    total = len(chunks)
+    return [
+        f"### 부분 {index}/{total}\n" + call(CHUNK_PROMPT.format(index=index, total=total) + chunk,
+                                            CHUNK_SUMMARY_TOKENS, 'map', False)
+        for index, chunk in enumerate(chunks, 1)
+    ]
+
+
+def _analyze_chunked(plan, call):
+    """부분별로 요약한 뒤 요약들로 최종 분석 (요약들도 한도를 넘으면 다시 묶어 요약)"""
+    model = plan['model']
+    combined = '\n\n'.join(_summarize_chunks(plan['chunks'], call))
+    while count_tokens(combined, model) > plan['limit']:
+        groups = chunk_text(combined, plan['chunk_limit'], model)
+        if len(groups) < 2:
+            break
+        combined = '\n\n'.join(_summarize_chunks(groups, call))
+    return call(STRUCTURED_PROMPT + CHUNKED_NOTE + combined, plan['max_output_tokens'], 'reduce', True)
+
+
+def _log_plan(provider, plan):
+    log_event('llm_plan', provider=provider, route=plan.get('route', {}).get('route'), model=plan['model'],
+              strategy=plan['strategy'], original_tokens=plan['original_tokens'], tokens=plan['tokens'],
+              limit=plan['limit'], steps=plan['steps'], chunks=len(plan.get('chunks', ())), exact=plan['exact'],
+              estimated_prompt_tokens=plan['estimated_prompt_tokens'],
+              estimated_cost_usd=plan['estimated_cost_usd'])
+
+
+def plan_chatgpt_analysis(text, model=DEFAULT_MODEL, max_output_tokens=STANDARD_OUTPUT_TOKENS,
+                          budget=ANALYSIS_TOKEN_BUDGET):
+    """ChatGPT 분석 호출 계획 (토큰 예산, 압축, 단일/분할, 예상 비용) - modules/token_budget.py plan_analysis"""
+    return plan_analysis(text, STRUCTURED_PROMPT, model, max_output_tokens, budget, chunk_prompt=CHUNK_PROMPT)
+
+
+def analyze_with_chatgpt(text, api_key, on_plan=None, pages=None, on_delta=None, page_results=None):
+    """ChatGPT API를 사용한 자동 분석, Analysis 반환
+
+    문서 특성으로 모델/출력 토큰/예산을 고르고(modules/routing.py), 보내기 전에 토큰 수를 계산하여
+    예산 안으로 압축하고, 그래도 넘으면 처음부터 분할 분석
+    on_plan(provider, plan)은 호출 계획이 정해지면 호출 (plan['route']에 경로 결정)
+    pages: 페이지 수 (없으면 페이지 마커로 계산)
+    page_results: convert_pdf의 페이지 목록, 있으면 정리 전 줄 통계로 표 밀도 계산
+    on_delta(provider, text)는 최종 분석 응답을 스트리밍으로 받으며 조각마다 호출
+    """
+    if not api_key:
+        return Analysis.failed('chatgpt', "ChatGPT 분석 중 오류: API 키가 없습니다 (OPENAI_API_KEY)")
+    started = time.perf_counter()
+    features = route = plan = None
+    totals = {'prompt_tokens': 0, 'completion_tokens': 0, 'calls': 0}
+    truncated = []
+    error = None
+    try:
+        features = document_features(text, pages, page_results=page_results)
+        route = choose_route(features)
+        count('llm_routes_total', provider='chatgpt', route=route['route'])
+        plan = plan_chatgpt_analysis(text, route['model'], route['max_output_tokens'], route['budget'])
+        plan['route'] = route
+        _log_plan('chatgpt', plan)
+        if on_plan:
+            on_plan('chatgpt', plan)
+
+        call = _chat_call(OPENAI_CLIENT, api_key, plan['model'], totals, _response_format(plan['model']),
+                          (lambda delta: on_delta('chatgpt', delta)) if on_delta else None,
+                          on_truncated=truncated.append)
+        if plan['strategy'] == 'chunked':
+            content = _analyze_chunked(plan, call)
+        else:
+            content = call(STRUCTURED_PROMPT + plan['text'], plan['max_output_tokens'], 'single', True)
+        return parse_analysis(content, 'chatgpt', plan['model'])
+
+    except ChatError as e:
+        error = str(e)
+    except AnalysisFormatError as e:
+        error = f"ChatGPT 응답 형식 오류: {str(e)}"
+    except Exception as e:
+        error = f"ChatGPT 분석 중 오류: {str(e)}"
+    finally:
+        if route is not None:
+            record = log_route('chatgpt', features, route, plan, totals, time.perf_counter() - started,
+                               error=error[:200] if error else None, truncated=len(truncated))
+            if truncated:
+                count('llm_route_truncated_total', provider='chatgpt', route=route['route'])
+            log_event('llm_route', provider='chatgpt', route=route['route'], model=route['model'],
+                      reason=route['reason'], features=features, strategy=record['strategy'],
+                      seconds=record['seconds'], calls=totals['calls'], cost_usd=record['cost_usd'],
+                      truncated=len(truncated))
+    return Analysis.failed('chatgpt', error)
+
+
+def plan_gemini_analysis(text, model=GEMINI_MODEL, max_output_tokens=GEMINI_MAX_OUTPUT_TOKENS,
+                         budget=GEMINI_TOKEN_BUDGET):
+    """Gemini 분석 호출 계획 - modules/token_budget.py plan_analysis"""
+    return plan_analysis(text, STRUCTURED_PROMPT, model, max_output_tokens, budget, chunk_prompt=CHUNK_PROMPT)
+
+
+def analyze_with_gemini(text, api_key=None, on_plan=None):
+    """Gemini API를 사용한 자동 분석, Analysis 반환 (modules/gemini.py)
+
+    api_key가 없으면 GEMINI_API_KEY 환경 변수 사용
+    한 번에 보내는 문서는 지시문 + 문서를 컨텍스트 캐시로 보내 같은 문서를 다시 분석할 때 입력 비용을 줄임
+    """
+    api_key = api_key or GEMINI_API_KEY
+    if not api_key:
+        return Analysis.failed('gemini', "Gemini 분석 중 오류: API 키가 없습니다 (GEMINI_API_KEY)")
+    try:
+        plan = plan_gemini_analysis(text)
+        _log_plan('gemini', plan)
+        if on_plan:
+            on_plan('gemini', plan)
+
+        client = get_client()
+        if plan['strategy'] == 'chunked':
+            content = _analyze_chunked(plan, lambda prompt, max_tokens, kind, structured: client.generate(
+                plan['model'], [prompt], api_key, max_tokens, kind, schema=ANALYSIS_SCHEMA if structured else None))
+        else:
+            content = client.generate_with_prefix(plan['model'], STRUCTURED_PROMPT, plan['text'], PREFIX_INSTRUCTION,
+                                                  api_key, plan['max_output_tokens'], schema=ANALYSIS_SCHEMA)
+        return parse_analysis(content, 'gemini', plan['model'])
+
+    except GeminiError as e:
+        return Analysis.failed('gemini', str(e))
+    except AnalysisFormatError as e:
+        return Analysis.failed('gemini', f"Gemini 응답 형식 오류: {str(e)}")
+    except Exception as e:
+        return Analysis.failed('gemini', f"Gemini 분석 중 오류: {str(e)}")
+
+
+def plan_grok_analysis(text, model=export_grok.GROK_MODEL, max_output_tokens=export_grok.GROK_MAX_OUTPUT_TOKENS,
+                       budget=export_grok.GROK_TOKEN_BUDGET):
+    """Grok 분석 호출 계획 - modules/token_budget.py plan_analysis"""
+    return plan_analysis(text, STRUCTURED_PROMPT, model, max_output_tokens, budget, chunk_prompt=CHUNK_PROMPT)
+
+
+def analyze_with_grok(text, api_key=None, on_plan=None, on_delta=None):
+    """Grok API를 사용한 자동 분석, Analysis 반환 (modules/export_grok.py)
+
+    api_key가 없으면 XAI_API_KEY 환경 변수 사용
+    ChatGPT와 같은 구조화 프롬프트/응답 검증을 써서 세 모델 결과를 같은 기준으로 비교
+    """
+    api_key = api_key or export_grok.GROK_API_KEY
+    if not api_key:
+        return Analysis.failed('grok', "Grok 분석 중 오류: API 키가 없습니다 (XAI_API_KEY)")
+    try:
+        plan = plan_grok_analysis(text)
+        _log_plan('grok', plan)
+        if on_plan:
+            on_plan('grok', plan)
+
+        call = _chat_call(export_grok.get_client(), api_key, plan['model'], None,
+                          export_grok.grok_response_format(plan['model']),
+                          (lambda delta: on_delta('grok', delta)) if on_delta else None)
+        if plan['strategy'] == 'chunked':
+            content = _analyze_chunked(plan, call)
+        else:
+            content = call(STRUCTURED_PROMPT + plan['text'], plan['max_output_tokens'], 'single', True)
+        return parse_analysis(content, 'grok', plan['model'])
+
+    except ChatError as e:
+        return Analysis.failed('grok', str(e))
+    except AnalysisFormatError as e:
+        return Analysis.failed('grok', f"Grok 응답 형식 오류: {str(e)}")
+    except Exception as e:
+        return Analysis.failed('grok', f"Grok 분석 중 오류: {str(e)}")
+
+
+def available_providers(api_key=None, gemini_api_key=None, grok_api_key=None):
+    """API 키가 있는 제공자 목록 (Gemini/Grok은 GEMINI_API_KEY/XAI_API_KEY 환경 변수 포함)"""
+    keys = {
+        'chatgpt': api_key,
+        'gemini': gemini_api_key or GEMINI_API_KEY,
+        'grok': grok_api_key or export_grok.GROK_API_KEY,
+    }
+    return [provider for provider in PROVIDERS if keys[provider]]
+
+
+def run_analyses(text, api_key, cached=None, on_provider=None, on_plan=None, gemini_api_key=None,
+                 grok_api_key=None, on_done=None, on_delta=None, page_results=None):
+    """세 모델 분석을 동시에 실행, {provider: Analysis} 반환
+
+    api_key: OpenAI API 키, gemini_api_key/grok_api_key: 없으면 GEMINI_API_KEY/XAI_API_KEY 환경 변수
+    키가 없는 제공자는 호출하지 않고 '키 없음' 실패 결과를 돌려줌
+    cached: 이전 분석 결과 {provider: Analysis}, 있으면 해당 모델 호출 생략
+    on_provider(provider)는 각 모델 분석 시작 시, on_done(provider, result)는 끝날 때마다 (끝난 순서대로) 호출
+    on_plan(provider, plan)은 토큰 예산 계획이 정해지면 호출 (modules/token_budget.py)
+    on_delta(provider, text)는 스트리밍 응답 조각마다 호출 (ChatGPT/Grok)
+    page_results: convert_pdf의 페이지 목록, 있으면 ChatGPT 경로 선택에 정리 전 줄 통계 사용
+    콜백은 작업 스레드에서 호출되므로 스레드 안전해야 함
+    """
+    cached = cached or {}
+    analyzers = {
+        'chatgpt': lambda: analyze_with_chatgpt(text, api_key, on_plan=on_plan, on_delta=on_delta,
+                                                page_results=page_results),
+        'gemini': lambda: analyze_with_gemini(text, gemini_api_key, on_plan=on_plan),
+        'grok': lambda: analyze_with_grok(text, grok_api_key, on_plan=on_plan, on_delta=on_delta),
+    }
+
+    def analyze(provider):
+        if on_provider:
+            on_provider(provider)
+        with span('llm', detail=provider):
+            return analyzers[provider]()
+
+    results = {}
+    pending = []
+    for provider in PROVIDERS:
+        if cached.get(provider):
+            count('cache_hits_total', cache='analysis')
+            results[provider] = cached[provider]
+            if on_done:
+                on_done(provider, cached[provider])
+        else:
+            count('cache_misses_total', cache='analysis')
+            pending.append(provider)
+
+    if pending:
+        # 작업마다 현재 컨텍스트(실행 보고서, 상위 구간, 취소 확인)를 복사해 스레드에서 실행
+        with ThreadPoolExecutor(max_workers=max(1, min(ANALYSIS_CONCURRENCY, len(pending))),
+                                thread_name_prefix='analysis') as executor:
+            futures = {executor.submit(contextvars.copy_context().run, analyze, provider): provider
+                       for provider in pending}
+            for future in as_completed(futures):
+                provider = futures[future]
+                results[provider] = future.result()
+                if on_done:
+                    on_done(provider, results[provider])
+    return {provider: results[provider] for provider in PROVIDERS}
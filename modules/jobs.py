@@ -0,0 +1,307 @@
+# jobs.py - 백그라운드 작업 큐 (Streamlit 재실행과 무관하게 변환/분석/패키징 실행, 서버/사용자별 동시 실행 제한)
+#
+# 작업 함수는 func(job, *args, **kwargs) 형태로 워커 스레드에서 실행되며
+# job.progress / job.notify로 진행 상황을 기록하고, UI는 job.snapshot()을 주기적으로 읽어 표시함
+# 워커 스레드에는 Streamlit 스크립트 컨텍스트가 없으므로 작업 함수에서 st.* 를 호출하면 안 됨
+# 작업별로 프로파일링(modules/profiling.py)을 켤 수 있고, 꺼져 있어도 단계가 임계 시간을 넘으면 자동 샘플링
+import logging
+import os
+import threading
+import time
+import uuid
+
+from modules.metrics import count, run_report, span
+from modules.profiling import PROFILE_DIR, JobProfiler
+from modules.scheduler import job_context
+
+logger = logging.getLogger(__name__)
+
+MAX_JOBS = int(os.environ.get('HANGULPDF_MAX_JOBS', '2'))                    # 서버 전체 동시 실행
+MAX_JOBS_PER_USER = int(os.environ.get('HANGULPDF_MAX_JOBS_PER_USER', '1'))  # 사용자(세션)별 동시 실행
+JOB_RETENTION_SECONDS = 3600  # 끝난 작업 상태 보관 시간 (UI가 결과를 가져가지 않은 경우)
+MAX_MESSAGES = 200            # 작업당 보관할 알림 수
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """취소 요청된 작업에서 check_cancelled 호출 시"""
+
+
+class Job:
+    """작업 하나의 상태, 진행률, 알림, 결과"""
+
+    def __init__(self, owner, func, args, kwargs, label=None, profile=None, on_profile=None):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.label = label or getattr(func, '__name__', 'job')
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.profile = profile        # 프로파일링 모드 (None, 'sample', 'cprofile')
+        self.on_profile = on_profile  # 프로파일 저장 함수 on_profile(job, profile, result) -> 정보 dict
+
+        self.status = QUEUED
+        self.stage = '대기 중'
+        self.fraction = 0.0
+        self.messages = []  # (level, message)
+        self.result = None
+        self.error = None
+        self.report = None  # 실행 보고서 (modules/metrics.py RunReport)
+        self.profile_info = None  # 저장된 프로파일 정보 (파일 위치, 모드, 계기)
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    def progress(self, stage, fraction=None):
+        """현재 단계와 진행률(0~1) 기록, 취소 요청되었으면 JobCancelled"""
+        with self._lock:
+            self.stage = stage
+            if fraction is not None:
+                self.fraction = max(0.0, min(1.0, fraction))
+        self.check_cancelled()
+
+    def notify(self, level, message):
+        """report_pdf 등 모듈의 notify 콜백과 같은 형식의 알림 기록"""
+        with self._lock:
+            self.messages.append((level, message))
+            del self.messages[:-MAX_MESSAGES]
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled('작업이 취소되었습니다.')
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def snapshot(self):
+        """UI 표시용 상태 복사본"""
+        with self._lock:
+            now = time.time()
+            return {
+                'job_id': self.job_id,
+                'owner': self.owner,
+                'label': self.label,
+                'status': self.status,
+                'stage': self.stage,
+                'fraction': self.fraction,
+                'messages': list(self.messages),
+                'result': self.result,
+                'error': self.error,
+                'report': self.report.to_dict() if self.report and self.status in FINISHED_STATES else None,
+                'profile': self.profile_info,
+                'wait_seconds': (self.started_at or now) - self.created_at,
+                'run_seconds': (self.finished_at or now) - self.started_at if self.started_at else 0.0,
+            }
+
+
+class JobQueue:
+    """워커 스레드 풀 + 대기열
+
+    서버 전체로 max_workers개, 소유자(세션)별로 max_per_owner개까지만 동시에 실행하고
+    나머지는 대기열 순서대로 기다림 (한 사용자가 작업을 여러 개 넣어도 다른 사용자 작업이 먼저 시작될 수 있음)
+    """
+
+    def __init__(self, max_workers=MAX_JOBS, max_per_owner=MAX_JOBS_PER_USER,
+                 retention_seconds=JOB_RETENTION_SECONDS):
+        self.max_workers = max(1, max_workers)
+        self.max_per_owner = max(1, max_per_owner)
+        self.retention_seconds = retention_seconds
+
+        self._jobs = {}     # job_id -> Job (대기, 실행 중, 끝난 작업)
+        self._pending = []  # 대기 중인 Job, 들어온 순서
+        self._running = {}  # owner -> 실행 중인 작업 수
+        self._workers = []
+        self._cond = threading.Condition()
+        self._stopping = False
+
+    def submit(self, owner, func, *args, label=None, profile=None, on_profile=None, **kwargs):
+        """작업 추가, 작업 ID 반환
+
+        profile: 프로파일링 모드 ('sample', 'cprofile'), 없으면 임계값 초과 시에만 자동 샘플링
+        on_profile(job, profile, result): 프로파일(JobProfile) 저장 후 정보 dict 반환 (없으면 PROFILE_DIR/작업 ID에 저장)
+        """
+        job = Job(owner, func, args, kwargs, label=label, profile=profile, on_profile=on_profile)
+        with self._cond:
+            self._prune(time.time())
+            self._jobs[job.job_id] = job
+            self._pending.append(job)
+            self._start_workers()
+            self._cond.notify()
+        return job.job_id
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """작업 상태 복사본 (없거나 정리되었으면 None)"""
+        job = self.get(job_id)
+        return job.snapshot() if job else None
+
+    def position(self, job_id):
+        """대기열에서의 순서 (1부터, 대기 중이 아니면 0)"""
+        with self._cond:
+            for index, job in enumerate(self._pending):
+                if job.job_id == job_id:
+                    return index + 1
+        return 0
+
+    def cancel(self, job_id):
+        """대기 중이면 바로 취소, 실행 중이면 다음 progress/check_cancelled에서 중단"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return False
+            job._cancel.set()
+            if job.status == QUEUED:
+                self._pending.remove(job)
+                self._finish(job, CANCELLED, error='작업이 취소되었습니다.')
+        return True
+
+    def forget(self, job_id):
+        """끝난 작업의 상태 삭제 (실행 중이면 취소 요청 후 끝날 때 삭제하지 않고 보관 시간 후 정리)"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if job.status in FINISHED_STATES:
+                del self._jobs[job_id]
+                return
+        self.cancel(job_id)
+
+    def release_owner(self, owner):
+        """소유자(만료된 세션)의 모든 작업 취소 및 삭제, 처리한 작업 수 반환"""
+        with self._cond:
+            job_ids = [job_id for job_id, job in self._jobs.items() if job.owner == owner]
+        for job_id in job_ids:
+            self.forget(job_id)
+        return len(job_ids)
+
+    def jobs(self, owner=None):
+        """작업 상태 목록 (owner가 있으면 해당 소유자만)"""
+        with self._cond:
+            jobs = [job for job in self._jobs.values() if owner is None or job.owner == owner]
+        return [job.snapshot() for job in jobs]
+
+    def metrics(self):
+        """{'queued', 'running', 'workers', 'max_per_owner'}"""
+        with self._cond:
+            return {
+                'queued': len(self._pending),
+                'running': sum(self._running.values()),
+                'workers': self.max_workers,
+                'max_per_owner': self.max_per_owner,
+            }
+
+    def shutdown(self, wait=True):
+        """대기 중인 작업을 취소하고 워커 종료"""
+        with self._cond:
+            self._stopping = True
+            for job in self._pending:
+                job._cancel.set()
+                self._finish(job, CANCELLED, error='서버 종료로 작업이 취소되었습니다.')
+            self._pending.clear()
+            self._cond.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    # 아래 메서드는 모두 self._cond를 잡은 상태에서 호출
+
+    def _start_workers(self):
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f'job-worker-{len(self._workers)}', daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        """소유자 동시 실행 한도에 걸리지 않는 가장 오래된 대기 작업"""
+        for job in self._pending:
+            if self._running.get(job.owner, 0) < self.max_per_owner:
+                return job
+        return None
+
+    def _finish(self, job, status, result=None, error=None):
+        with job._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            if status == DONE:
+                job.fraction = 1.0
+
+    def _prune(self, now):
+        """보관 시간이 지난 끝난 작업 삭제"""
+        for job_id, job in list(self._jobs.items()):
+            if job.status in FINISHED_STATES and now - job.finished_at > self.retention_seconds:
+                del self._jobs[job_id]
+
+    def _save_profile(self, job, profile, result):
+        """프로파일이 있으면 저장 (실패해도 작업 결과에는 영향 없음)"""
+        if profile is None:
+            return
+        count('profiles_total', trigger='manual' if profile.trigger == 'manual' else 'threshold')
+        try:
+            if job.on_profile:
+                job.profile_info = job.on_profile(job, profile, result)
+            else:
+                out_dir = os.path.join(PROFILE_DIR, job.job_id)
+                job.profile_info = dict(profile.describe(), dir=out_dir, files=profile.save(out_dir))
+        except Exception:
+            logger.exception('프로파일 저장 실패: %s', job.label)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None and not self._stopping:
+                    self._cond.wait()
+                    job = self._next_job()
+                if job is None:
+                    return
+                self._pending.remove(job)
+                self._running[job.owner] = self._running.get(job.owner, 0) + 1
+                with job._lock:
+                    job.status = RUNNING
+                    job.started_at = time.time()
+
+            status, result, error = DONE, None, None
+            try:
+                # 작업 안의 추출/OCR/렌더링 단계는 소유자별로 공정하게 입장 (대기 중에도 취소 확인)
+                # 단계/페이지별 시간과 카운터는 작업의 실행 보고서에 기록
+                with job_context(job.owner, job.check_cancelled), run_report(job.label) as report:
+                    job.report = report
+                    profiler = JobProfiler(job.profile, report, root=job.func)
+                    profiler.start()
+                    try:
+                        with span('job'):
+                            result = job.func(job, *job.args, **job.kwargs)
+                    finally:
+                        self._save_profile(job, profiler.stop(), result)
+                if job.cancel_requested:
+                    status, error = CANCELLED, '작업이 취소되었습니다.'
+            except JobCancelled as e:
+                status, error = CANCELLED, str(e)
+            except Exception as e:
+                logger.exception('작업 실패: %s', job.label)
+                status, error = FAILED, str(e)
+
+            count('jobs_total', status=status)
+            with self._cond:
+                self._finish(job, status, result, error)
+                self._running[job.owner] -= 1
+                if not self._running[job.owner]:
+                    del self._running[job.owner]
+                self._cond.notify_all()
@@ -1 +1,349 @@
-# layout.py - 모듈 구현 내용 포함
\ No newline at end of file
+# layout.py - 페이지 레이아웃 분석 (단 구분, 읽기 순서 복원, 머리글/바닥글 표시)
+#
+# 입력은 단어 상자 목록 (x0, top, x1, bottom, text)로, 좌표는 페이지 왼쪽 위가 원점
+# - 기본 추출: pdfium 글자 상자 / PyMuPDF 단어 상자
+# - OCR: Tesseract image_to_data 단어 상자
+#
+# 2단 보고서에서 엔진이 좌우 단을 한 줄씩 섞어 내보내는 문제를 막기 위해
+# 줄 조각을 만든 뒤 세로 여백(단 사이 공백)으로 단을 나누고, 단을 가로지르는 제목 줄을 경계로
+# 구역마다 왼쪽 단 → 오른쪽 단 순서로 이어붙임
+# 표의 칸 사이 여백은 단 구분으로 보지 않음: 여백 양쪽이 모두 여러 줄의 본문일 때만 단으로 인정하고,
+# 같은 x 위치에서 나뉘는 줄이 이어지면 표로 보아 행 단위(칸은 ' | '로 구분)로 내보냄
+
+from modules.metrics import span
+
+# 머리글/바닥글: 페이지 위/아래 이 비율 안에 있고 본문과 빈 줄 이상 떨어진 줄
+EDGE_BAND = 0.12
+HISTOGRAM_BINS = 200
+MIN_GUTTER_RATIO = 0.015   # 단 사이 최소 여백 (페이지 너비 대비)
+WIDE_LINE_RATIO = 0.6      # 이보다 넓은 줄은 단 구분 계산에서 제외
+WORD_GAP_FACTOR = 1.0      # 줄 높이의 이 배수보다 넓은 가로 간격은 다른 조각 (단 사이 여백)
+TESSERACT_MIN_CONFIDENCE = 0
+PROSE_MIN_LINES = 3        # 단으로 인정하려면 여백 양쪽에 이 이상의 줄
+PROSE_MIN_CHARS = 12       # 그리고 줄 길이(중앙값)가 이 이상 (표의 칸은 짧음)
+GRID_MIN_ROWS = 3          # 같은 x 위치에서 나뉘는 행이 이만큼 이어지면 표
+CELL_SEPARATOR = ' | '
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else 0
+
+
+def group_lines(words):
+    """단어 상자를 줄 조각으로 묶음
+
+    세로 중심이 가까운 단어를 한 행으로 모은 뒤, 행 안에서 넓은 가로 간격(단 사이 여백)으로 나눔
+    반환: [{'x0', 'top', 'x1', 'bottom', 'text'}]
+    """
+    words = [word for word in words if word[4].strip()]
+    if not words:
+        return []
+
+    line_height = _median([bottom - top for _, top, _, bottom, _ in words]) or 1
+    words.sort(key=lambda word: (word[1] + word[3]) / 2)
+
+    rows = []
+    row = []
+    center_sum = 0.0
+    for word in words:
+        center = (word[1] + word[3]) / 2
+        if row and center - center_sum / len(row) > line_height / 2:
+            rows.append(row)
+            row = []
+            center_sum = 0.0
+        row.append(word)
+        center_sum += center
+    rows.append(row)
+
+    lines = []
+    for row in rows:
+        row.sort(key=lambda word: word[0])
+        segment = [row[0]]
+        for word in row[1:]:
+            if word[0] - segment[-1][2] > WORD_GAP_FACTOR * line_height:
+                lines.append(_make_line(segment))
+                segment = []
+            segment.append(word)
+        lines.append(_make_line(segment))
+    return lines
+
+
+def _make_line(words):
+    parts = [words[0][4]]
+    for previous, word in zip(words, words[1:]):
+        # 글자 단위 상자(pdfium)는 붙어 있으면 공백 없이, 떨어져 있으면 공백으로 연결
+        gap = word[0] - previous[2]
+        height = word[3] - word[1]
+        parts.append(word[4] if gap < height * 0.15 else ' ' + word[4])
+    return {
+        'x0': min(word[0] for word in words),
+        'top': min(word[1] for word in words),
+        'x1': max(word[2] for word in words),
+        'bottom': max(word[3] for word in words),
+        'text': ''.join(parts),
+    }
+
+
+def find_gutters(lines, width):
+    """단 사이 세로 여백 구간 [(x_start, x_end)] 찾기"""
+    candidates = [line for line in lines if line['x1'] - line['x0'] < WIDE_LINE_RATIO * width]
+    if len(candidates) < 4 or width <= 0:
+        return []
+
+    bin_width = width / HISTOGRAM_BINS
+    coverage = [0] * HISTOGRAM_BINS
+    for line in candidates:
+        start = max(0, int(line['x0'] / bin_width))
+        end = min(HISTOGRAM_BINS - 1, int(line['x1'] / bin_width))
+        for index in range(start, end + 1):
+            coverage[index] += 1
+
+    # 단을 가로지르는 제목 몇 줄은 허용
+    threshold = max(1, len(candidates) // 20)
+    occupied = [index for index, count in enumerate(coverage) if count > threshold]
+    if not occupied:
+        return []
+
+    gutters = []
+    run_start = None
+    for index in range(occupied[0], occupied[-1] + 1):
+        if coverage[index] <= threshold:
+            if run_start is None:
+                run_start = index
+        elif run_start is not None:
+            if (index - run_start) * bin_width >= MIN_GUTTER_RATIO * width:
+                gutters.append((run_start * bin_width, index * bin_width))
+            run_start = None
+
+    # 표의 칸 사이 여백 제외: 양쪽 단이 모두 본문이 될 때까지 여백을 하나씩 제거
+    while gutters:
+        columns = [[] for _ in range(len(gutters) + 1)]
+        for line in lines:
+            column = _column_of(line, gutters)
+            if column is not None:
+                columns[column].append(line)
+        failing = [index for index in range(len(gutters))
+                   if not (_is_prose(columns[index]) and _is_prose(columns[index + 1]))]
+        if not failing:
+            break
+        del gutters[failing[0]]
+    return gutters
+
+
+def _is_prose(lines):
+    """여러 줄의 본문인지 (짧은 칸이 이어진 표의 열은 제외)"""
+    return len(lines) >= PROSE_MIN_LINES and _median([len(line['text']) for line in lines]) >= PROSE_MIN_CHARS
+
+
+def _column_of(line, gutters):
+    """줄이 속한 단 번호, 여백을 가로지르면 None"""
+    column = 0
+    for start, end in gutters:
+        if line['x0'] < start and line['x1'] > end:
+            return None
+        if line['x0'] >= start:
+            column += 1
+    return column
+
+
+def _rows(lines):
+    """세로 중심이 가까운 줄 조각을 행으로 묶음 (행 안은 왼쪽부터)"""
+    if not lines:
+        return []
+    line_height = _median([line['bottom'] - line['top'] for line in lines]) or 1
+    rows = []
+    for line in sorted(lines, key=lambda line: (line['top'] + line['bottom']) / 2):
+        center = (line['top'] + line['bottom']) / 2
+        if rows and center - rows[-1][0] <= line_height / 2:
+            rows[-1][1].append(line)
+        else:
+            rows.append((center, [line]))
+    return [sorted(row, key=lambda line: line['x0']) for _, row in rows]
+
+
+def _aligned(previous, row, tolerance):
+    """두 행이 같은 x 위치(왼쪽 또는 오른쪽 정렬)에서 나뉘는지"""
+    matches = sum(1 for line in row if any(
+        abs(line['x0'] - other['x0']) <= tolerance or abs(line['x1'] - other['x1']) <= tolerance
+        for other in previous))
+    return matches >= 2
+
+
+def _grid_lines(block):
+    """표 행 목록을 행마다 한 줄로 합침 (칸 위치는 표 전체의 x 범위로 정해 빈 칸도 자리를 유지)"""
+    spans = []
+    for start, end in sorted((line['x0'], line['x1']) for row in block for line in row):
+        if spans and start <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([start, end])
+
+    merged = []
+    for row in block:
+        cells = [[] for _ in spans]
+        for line in row:
+            center = (line['x0'] + line['x1']) / 2
+            index = next((index for index, (_, end) in enumerate(spans) if center <= end), len(spans) - 1)
+            cells[index].append(line['text'])
+        merged.append({
+            'x0': min(line['x0'] for line in row),
+            'top': min(line['top'] for line in row),
+            'x1': max(line['x1'] for line in row),
+            'bottom': max(line['bottom'] for line in row),
+            'text': CELL_SEPARATOR.join(' '.join(cell) for cell in cells).rstrip(),
+            'table': True,
+        })
+    return merged
+
+
+def merge_grid_rows(lines, gutters):
+    """같은 단 안에서 같은 x 위치로 나뉘는 행이 GRID_MIN_ROWS 이상 이어지면 표 행으로 합침"""
+    if not lines:
+        return []
+    tolerance = _median([line['bottom'] - line['top'] for line in lines]) or 1
+    by_column = {}
+    for line in lines:
+        by_column.setdefault(_column_of(line, gutters), []).append(line)
+
+    result = by_column.pop(None, [])
+    for column_lines in by_column.values():
+        block = []
+
+        def flush():
+            if len(block) >= GRID_MIN_ROWS:
+                result.extend(_grid_lines(block))
+            else:
+                for row in block:
+                    result.extend(row)
+            block.clear()
+
+        for row in _rows(column_lines):
+            if len(row) < 2:
+                flush()
+                result.extend(row)
+                continue
+            if block and not _aligned(block[-1], row, tolerance):
+                flush()
+            block.append(row)
+        flush()
+    return result
+
+
+def reading_order(lines, gutters):
+    """단을 가로지르는 줄을 경계로 구역을 나누고, 구역마다 단 순서 → 위에서 아래 순으로 정렬"""
+    ordered = []
+    section = []
+
+    def flush():
+        section.sort(key=lambda line: (line['column'], line['top'], line['x0']))
+        ordered.extend(section)
+        section.clear()
+
+    for line in sorted(lines, key=lambda line: (line['top'], line['x0'])):
+        line['column'] = _column_of(line, gutters)
+        if line['column'] is None:
+            flush()
+            ordered.append(line)
+        else:
+            section.append(line)
+    flush()
+    return ordered
+
+
+def split_edges(lines, height):
+    """(머리글, 본문, 바닥글) 줄 목록으로 나눔
+
+    띠 안에 있더라도 본문과 줄 높이 이상 떨어져 있지 않으면 본문으로 취급 (여백이 좁은 문서 보호)
+    """
+    lines = sorted(lines, key=lambda line: (line['top'], line['x0']))
+    if len(lines) < 2:
+        return [], lines, []
+    line_height = _median([line['bottom'] - line['top'] for line in lines])
+
+    header_end = 0
+    for index in range(len(lines) - 1):
+        if lines[index]['bottom'] > EDGE_BAND * height:
+            break
+        if lines[index + 1]['top'] - max(line['bottom'] for line in lines[:index + 1]) >= line_height:
+            header_end = index + 1
+
+    footer_start = len(lines)
+    for index in range(len(lines) - 1, header_end, -1):
+        if lines[index]['top'] < (1 - EDGE_BAND) * height:
+            break
+        if min(line['top'] for line in lines[index:]) - lines[index - 1]['bottom'] >= line_height:
+            footer_start = index
+
+    return lines[:header_end], lines[header_end:footer_start], lines[footer_start:]
+
+
+def analyze_layout(words, width, height):
+    """단어 상자로 페이지 레이아웃 분석
+
+    반환: {'text': 머리글 → 본문(읽기 순서) → 바닥글 텍스트, 'headers', 'footers', 'columns', 'table_rows', 'lines'}
+    """
+    with span('layout'):
+        headers, body, footers = split_edges(group_lines(list(words)), height)
+        gutters = find_gutters(body, width)
+        body = reading_order(merge_grid_rows(body, gutters), gutters)
+
+    for role, group in (('header', headers), ('body', body), ('footer', footers)):
+        for line in group:
+            line['role'] = role
+
+    ordered = headers + body + footers
+    return {
+        'text': '\n'.join(line['text'] for line in ordered),
+        'headers': [line['text'] for line in headers],
+        'footers': [line['text'] for line in footers],
+        'columns': len(gutters) + 1,
+        'table_rows': sum(1 for line in body if line.get('table')),
+        'lines': ordered,
+    }
+
+
+def pdfium_words(textpage, page_height):
+    """pdfium 텍스트 페이지의 글자 상자를 단어 상자로 변환 (PDF 좌표는 왼쪽 아래가 원점)"""
+    text = textpage.get_text_range()
+    count = min(textpage.count_chars(), len(text))
+    words = []
+    current = None
+    for index in range(count):
+        char = text[index]
+        if char.isspace():
+            current = None
+            continue
+        left, bottom, right, top = textpage.get_charbox(index, loose=True)
+        box = [left, page_height - top, right, page_height - bottom, char]
+        if current is not None and left - current[2] < (top - bottom) * 0.15 and abs(box[1] - current[1]) < (top - bottom) / 2:
+            current[2] = max(current[2], right)
+            current[1] = min(current[1], box[1])
+            current[3] = max(current[3], box[3])
+            current[4] += char
+        else:
+            current = box
+            words.append(current)
+    return [tuple(word) for word in words]
+
+
+def pymupdf_words(page):
+    """PyMuPDF 페이지의 단어 상자"""
+    return [(x0, y0, x1, y1, text) for x0, y0, x1, y1, text, *_ in page.get_text('words')]
+
+
+def tesseract_words(data, min_confidence=TESSERACT_MIN_CONFIDENCE):
+    """pytesseract.image_to_data(output_type=DICT) 결과를 단어 상자로 변환"""
+    words = []
+    for index, text in enumerate(data['text']):
+        if not text or not text.strip():
+            continue
+        try:
+            confidence = float(data['conf'][index])
+        except (TypeError, ValueError):
+            confidence = -1
+        if confidence < min_confidence:
+            continue
+        left, top = data['left'][index], data['top'][index]
+        words.append((left, top, left + data['width'][index], top + data['height'][index], text))
+    return words
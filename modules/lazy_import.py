@@ -0,0 +1,41 @@
+# lazy_import.py - 무거운 선택 의존성의 설치 확인과 지연 임포트
+import importlib
+import importlib.util
+
+# 임포트에 실패한 모듈과 예외 (같은 실패를 반복하지 않음)
+_failed = {}
+
+
+def is_installed(name):
+    """모듈을 실제로 임포트하지 않고 설치 여부만 확인"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def load(name):
+    """처음 사용할 때 실제로 임포트하여 모듈 반환, 실패하면 None
+
+    WeasyPrint처럼 시스템 라이브러리(pango 등)가 없으면 ImportError 대신 OSError가 나므로 함께 처리
+    """
+    if name in _failed:
+        return None
+    try:
+        return importlib.import_module(name)
+    except (ImportError, OSError) as e:
+        _failed[name] = e
+        return None
+
+
+def require(name):
+    """load와 같지만 실패하면 ImportError"""
+    module = load(name)
+    if module is None:
+        raise ImportError(f"{name} 모듈을 불러올 수 없습니다: {_failed[name]}")
+    return module
+
+
+def load_error(name):
+    """load 실패 원인 (실패하지 않았으면 None)"""
+    return _failed.get(name)
@@ -0,0 +1,354 @@
+# metrics.py - 처리 단계 계측 (단계/페이지별 스팬, 카운터, 히스토그램), Prometheus 텍스트 내보내기, 작업별 JSON 실행 보고서
+#
+# 계측 지점에서는 span(stage, detail=...)으로 시간을 재고 count(name, ...)로 횟수를 더하면
+# 1) 프로세스 전체 레지스트리(REGISTRY)의 히스토그램/카운터에 누적되어 /metrics 로 내보내지고
+# 2) 현재 실행 보고서(run_report로 시작, 작업 큐 워커가 작업마다 하나씩)에 스팬과 카운터가 기록됨
+#
+# Prometheus 레이블은 값 종류가 적은 stage/detail(엔진, 제공자, 생성 방법)만 사용하고
+# 페이지 번호는 실행 보고서에만 남김
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'hangulpdf_'
+METRICS_PORT = int(os.environ.get('HANGULPDF_METRICS_PORT', '9108') or 0)  # 0이면 엔드포인트를 열지 않음
+METRICS_HOST = os.environ.get('HANGULPDF_METRICS_HOST', '127.0.0.1')
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+MAX_REPORT_SPANS = 5000  # 보고서 하나에 남길 최대 스팬 수 (넘으면 합계만 누적)
+MAX_REPORT_EVENTS = 1000  # 보고서 하나에 남길 최대 이벤트 수 (LLM 호출 기록 등)
+
+# 메트릭 설명 (Prometheus # HELP)
+METRIC_HELP = {
+    'stage_seconds': '처리 단계별 소요 시간',
+    'admission_wait_seconds': '단계 입장 제어 대기 시간',
+    'pages_total': '추출한 페이지 수 (source=native|ocr)',
+    'failed_pages_total': '텍스트를 얻지 못한 페이지 수',
+    'ocr_fallbacks_total': 'OCR 결과가 기본 추출 결과를 대체한 문서 수',
+    'cache_hits_total': '캐시 적중 수 (cache=analysis|ocr_checkpoint|artifact)',
+    'cache_misses_total': '캐시 미스 수',
+    'llm_tokens_total': 'LLM 토큰 사용량 (kind=prompt|completion)',
+    'llm_estimated_tokens_total': 'LLM 호출 전에 계산한 입력 토큰 수',
+    'llm_calls_total': 'LLM 호출 수 (kind=single|map|reduce)',
+    'llm_routes_total': 'LLM 분석 경로 선택 수 (route=short|standard|detailed|long)',
+    'llm_truncated_total': '출력 토큰 한도에서 잘린 LLM 응답 수 (finish_reason=length)',
+    'llm_route_truncated_total': '응답이 출력 토큰 한도에서 잘린 분석 수 (route, 더 큰 출력 토큰으로 한 번 다시 호출)',
+    'llm_cached_tokens_total': '컨텍스트 캐시에서 읽은 입력 토큰 수',
+    'llm_context_cache_total': '컨텍스트 캐시 사용 (result=hit|created|error)',
+    'drive_uploads_total': 'Drive 파일 업로드 수 (result=uploaded|resumed|skipped|failed)',
+    'drive_upload_bytes_total': 'Drive로 보낸 바이트 수',
+    'jobs_total': '끝난 작업 수 (status)',
+    'profiles_total': '프로파일을 남긴 작업 수 (trigger=manual|threshold)',
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    """프로세스 전체 카운터/히스토그램 (스레드 안전)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, label_key) -> 값
+        self._histograms = {}  # (name, label_key) -> [버킷별 개수, 합계, 개수]
+        self._collectors = []  # 내보낼 때 호출하여 게이지 값을 얻는 함수
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def add_collector(self, collector):
+        """collector()는 {메트릭 이름: 값 또는 [(레이블 dict, 값)]} 게이지를 반환 (내보낼 때마다 호출)"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def render(self):
+        """Prometheus 텍스트 형식 (0.0.4)"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(value[0]), value[1], value[2])) for key, value in self._histograms.items())
+            collectors = list(self._collectors)
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f'# HELP {METRIC_PREFIX}{name} {METRIC_HELP.get(name, name)}')
+                lines.append(f'# TYPE {METRIC_PREFIX}{name} {kind}')
+
+        for (name, key), value in counters:
+            describe(name, 'counter')
+            lines.append(f'{METRIC_PREFIX}{name}{_format_labels(key)} {value}')
+
+        for (name, key), (bucket_counts, total, observations) in histograms:
+            describe(name, 'histogram')
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f'{METRIC_PREFIX}{name}_bucket{_format_labels(key, [("le", bound)])} {bucket_count}')
+            lines.append(f'{METRIC_PREFIX}{name}_bucket{_format_labels(key, [("le", "+Inf")])} {observations}')
+            lines.append(f'{METRIC_PREFIX}{name}_sum{_format_labels(key)} {total}')
+            lines.append(f'{METRIC_PREFIX}{name}_count{_format_labels(key)} {observations}')
+
+        for collector in collectors:
+            try:
+                gauges = collector()
+            except Exception:
+                logger.exception('메트릭 수집 실패')
+                continue
+            for name, value in sorted(gauges.items()):
+                describe(name, 'gauge')
+                samples = value if isinstance(value, list) else [({}, value)]
+                for labels, sample in samples:
+                    lines.append(f'{METRIC_PREFIX}{name}{_format_labels(_label_key(labels))} {sample}')
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class RunReport:
+    """실행(작업/배치 파일) 하나의 스팬과 카운터"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.duration = None
+        self.spans = []    # {'stage', 'detail', 'page', 'start', 'seconds', 'parent'}
+        self.dropped_spans = 0
+        self.counters = {}  # 'name{label=value,...}' -> 값
+        self.events = []    # {'kind', ...} LLM 호출 기록 등
+        self._totals = {}   # (stage, detail) -> [횟수, 초]
+        self._active = {}   # 토큰 -> (stage, detail, page, 시작) 진행 중인 스팬
+        self._tokens = itertools.count()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, stage, detail, page, started, seconds, parent):
+        with self._lock:
+            total = self._totals.setdefault((stage, detail), [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+            if len(self.spans) >= MAX_REPORT_SPANS:
+                self.dropped_spans += 1
+                return
+            self.spans.append({
+                'stage': stage,
+                'detail': detail,
+                'page': page,
+                'start': round(started - self._origin, 6),
+                'seconds': round(seconds, 6),
+                'parent': parent,
+            })
+
+    def begin(self, stage, detail, page, started):
+        """진행 중인 스팬 등록, end에 넘길 토큰 반환"""
+        token = next(self._tokens)
+        with self._lock:
+            self._active[token] = (stage, detail, page, started)
+        return token
+
+    def end(self, token):
+        with self._lock:
+            self._active.pop(token, None)
+
+    def active_spans(self):
+        """진행 중인 스팬 [{'stage', 'detail', 'page', 'seconds'}] (오래 걸린 순, 다른 스레드에서 호출 가능)"""
+        now = time.perf_counter()
+        with self._lock:
+            active = list(self._active.values())
+        spans = [{'stage': stage, 'detail': detail, 'page': page, 'seconds': now - started}
+                 for stage, detail, page, started in active]
+        return sorted(spans, key=lambda span: -span['seconds'])
+
+    def add_event(self, event):
+        with self._lock:
+            if len(self.events) < MAX_REPORT_EVENTS:
+                self.events.append(event)
+
+    def inc(self, name, value, labels):
+        key = name + (_format_labels(_label_key(labels)) if labels else '')
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def stage_totals(self):
+        """{'stage' 또는 'stage/detail': {'count', 'seconds'}}"""
+        with self._lock:
+            return {
+                (f'{stage}/{detail}' if detail else stage): {'count': count, 'seconds': round(seconds, 6)}
+                for (stage, detail), (count, seconds) in sorted(self._totals.items())
+            }
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._origin
+
+    def to_dict(self, include_spans=True):
+        report = {
+            'name': self.name,
+            'started_at': self.started_at,
+            'seconds': round(self.duration if self.duration is not None else time.perf_counter() - self._origin, 6),
+            'stages': self.stage_totals(),
+        }
+        with self._lock:
+            report['counters'] = dict(self.counters)
+            report['events'] = list(self.events)
+            if include_spans:
+                report['spans'] = list(self.spans)
+                report['dropped_spans'] = self.dropped_spans
+        return report
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+
+_report = contextvars.ContextVar('run_report', default=None)
+_parent = contextvars.ContextVar('span_parent', default=None)
+
+
+def current_report():
+    return _report.get()
+
+
+@contextmanager
+def run_report(name):
+    """이 블록 안의 스팬/카운터를 새 실행 보고서에 기록"""
+    report = RunReport(name)
+    token = _report.set(report)
+    try:
+        yield report
+    finally:
+        report.finish()
+        _report.reset(token)
+
+
+def record(stage, seconds, detail='', page=None, started=None):
+    """이미 잰 시간을 스팬으로 기록 (make_page의 elapsed처럼 따로 측정한 경우)"""
+    REGISTRY.observe('stage_seconds', seconds, stage=stage, detail=detail)
+    report = _report.get()
+    if report is not None:
+        started = started if started is not None else time.perf_counter() - seconds
+        report.add_span(stage, detail, page, started, seconds, _parent.get())
+
+
+@contextmanager
+def span(stage, detail='', page=None):
+    """블록 실행 시간을 stage_seconds{stage, detail} 히스토그램과 실행 보고서에 기록 (안쪽 스팬은 부모 단계 표시)
+
+    실행 중에는 보고서의 진행 중 스팬으로 등록 (modules/profiling.py의 임계값 감시)
+    """
+    token = _parent.set(stage)
+    started = time.perf_counter()
+    report = _report.get()
+    active = report.begin(stage, detail, page, started) if report is not None else None
+    try:
+        yield
+    finally:
+        _parent.reset(token)
+        if active is not None:
+            report.end(active)
+        record(stage, time.perf_counter() - started, detail=detail, page=page, started=started)
+
+
+def count(name, value=1, **labels):
+    """카운터 증가 (이름은 METRIC_HELP 참고, 레이블 키는 이름마다 일정하게)"""
+    REGISTRY.inc(name, value, **labels)
+    report = _report.get()
+    if report is not None:
+        report.inc(name, value, labels)
+
+
+def observe(name, value, **labels):
+    """히스토그램 관측 (실행 보고서에는 합계로 기록)"""
+    REGISTRY.observe(name, value, **labels)
+    report = _report.get()
+    if report is not None:
+        report.inc(name, value, labels)
+
+
+def log_event(kind, **fields):
+    """현재 실행 보고서에 이벤트 기록 (보고서가 없으면 무시)"""
+    report = _report.get()
+    if report is not None:
+        report.add_event(dict(fields, kind=kind, at=round(time.perf_counter() - report._origin, 6)))
+
+
+def count_llm_usage(provider, usage):
+    """OpenAI 호환 usage {'prompt_tokens', 'completion_tokens'} 기록"""
+    if not usage:
+        return
+    for kind in ('prompt', 'completion'):
+        tokens = usage.get(f'{kind}_tokens')
+        if tokens:
+            count('llm_tokens_total', tokens, provider=provider, kind=kind)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 수집기 요청마다 로그를 남기지 않음
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """/metrics 를 제공하는 HTTP 서버를 백그라운드 스레드로 시작 (port가 0이거나 포트 사용 중이면 None)"""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning('메트릭 엔드포인트를 열 수 없습니다 (%s:%s): %s', host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
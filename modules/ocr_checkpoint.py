@@ -0,0 +1,119 @@
+# ocr_checkpoint.py - 페이지별 OCR 결과 체크포인트 (문서 해시 + OCR 옵션 키, 중단/반복 실행 시 이어서 처리)
+#
+# 체크포인트는 문서와 옵션마다 JSONL 파일 하나로, 페이지 OCR이 끝날 때마다 한 줄씩 추가하고 바로 디스크에 반영함
+# 500페이지 중 480페이지에서 실패하거나 세션이 끊겨도 다시 실행하면 빠진 페이지부터 처리하며,
+# 작업이 진행 중일 때도 파일을 읽어 지금까지의 결과를 볼 수 있음
+import hashlib
+import json
+import os
+import time
+
+from modules.summary_store import DEFAULT_DATA_DIR
+
+OCR_CHECKPOINT_DIR = os.environ.get('HANGULPDF_OCR_CHECKPOINT_DIR', os.path.join(DEFAULT_DATA_DIR, 'ocr_checkpoints'))
+OCR_CHECKPOINT_TTL_SECONDS = int(os.environ.get('HANGULPDF_OCR_CHECKPOINT_TTL_DAYS', '7')) * 86400
+PRUNE_INTERVAL_SECONDS = 3600
+
+_last_prune = {}  # root_dir -> 마지막 정리 시각
+
+
+def options_key(options):
+    """OCR 옵션(DPI, tesseract 설정, 레이아웃 등)이 같으면 같은 키"""
+    encoded = json.dumps(options, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def checkpoint_path(doc_hash, options, root_dir=OCR_CHECKPOINT_DIR):
+    return os.path.join(root_dir, f"{doc_hash}_{options_key(options)}.jsonl")
+
+
+class OCRCheckpoint:
+    """체크포인트 파일 하나 (페이지 기록: make_page 결과, 완료 기록: {'complete': True, 'num_pages'})"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # 중단 시점에 잘린 마지막 줄
+
+    def load(self):
+        """{페이지 번호: 페이지} (같은 페이지가 여러 번 기록되었으면 마지막 기록)"""
+        return {record['page']: record for record in self._records() if 'page' in record}
+
+    def pages(self):
+        """지금까지 OCR된 페이지 목록 (페이지 순서, 텍스트가 빈 페이지 제외)"""
+        done = self.load()
+        return [done[number] for number in sorted(done) if done[number]['text'].strip()]
+
+    def status(self):
+        """{'done_pages', 'num_pages' (완료 전이면 None), 'complete'}"""
+        done_pages = set()
+        num_pages = None
+        for record in self._records():
+            if 'page' in record:
+                done_pages.add(record['page'])
+            elif record.get('complete'):
+                num_pages = record['num_pages']
+        return {'done_pages': len(done_pages), 'num_pages': num_pages, 'complete': num_pages is not None}
+
+    def append(self, page):
+        """페이지 결과 한 줄 추가 후 즉시 디스크에 반영 (텍스트가 빈 페이지도 기록하여 다시 처리하지 않음)"""
+        self._append(page)
+
+    def mark_complete(self, num_pages):
+        self._append({'complete': True, 'num_pages': num_pages})
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with open(self.path, 'ab') as f:
+            # 이전 실행이 줄 중간에 중단되었으면 새 줄에서 시작 (잘린 줄에 이어 써서 기록을 잃지 않도록)
+            if f.tell() and not self._ends_with_newline():
+                line = '\n' + line
+            # 한 번의 write로 줄 전체를 기록 (같은 문서를 동시에 처리해도 줄이 섞이지 않음)
+            f.write(line.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+
+def prune_checkpoints(root_dir=OCR_CHECKPOINT_DIR, ttl_seconds=OCR_CHECKPOINT_TTL_SECONDS, now=None):
+    """마지막 기록 후 TTL이 지난 체크포인트 삭제, 삭제한 수 반환"""
+    now = now or time.time()
+    removed = 0
+    if not os.path.isdir(root_dir):
+        return removed
+    for entry in os.scandir(root_dir):
+        try:
+            if entry.name.endswith('.jsonl') and now - entry.stat().st_mtime > ttl_seconds:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # 다른 프로세스가 먼저 정리
+    return removed
+
+
+def open_checkpoint(doc_hash, options, root_dir=OCR_CHECKPOINT_DIR):
+    """문서 해시와 OCR 옵션에 해당하는 체크포인트 (오래된 체크포인트는 주기적으로 정리)"""
+    now = time.time()
+    if now - _last_prune.get(root_dir, 0) > PRUNE_INTERVAL_SECONDS:
+        _last_prune[root_dir] = now
+        prune_checkpoints(root_dir, now=now)
+    return OCRCheckpoint(checkpoint_path(doc_hash, options, root_dir))
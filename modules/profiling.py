@@ -0,0 +1,223 @@
+# profiling.py - 작업별 프로파일링 (선택 시 샘플링/cProfile, 단계가 임계 시간을 넘으면 자동 샘플링)
+#
+# 특정 PDF에서만 느린 경우(예: 한 페이지 추출에 40초) 운영 중에 어디서 시간이 걸리는지 확인하기 위한 기능
+# 샘플링: 작업 스레드의 호출 스택을 주기적으로 읽어 flamegraph용 접힌 스택(profile.folded)과 요약(profile.txt) 저장
+# cProfile: 작업 스레드에서만 켜서 pstats(profile.pstats)와 요약(profile.txt) 저장
+# 자동: 감시 스레드가 실행 보고서의 진행 중인 스팬을 확인하다가 임계 시간을 넘으면 그때부터 샘플링
+# 모드가 없고 임계값이 0이면 스레드도 만들지 않음
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from io import StringIO
+
+from modules.summary_store import DEFAULT_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('sample', 'cprofile')
+PROFILE_DIR = os.environ.get('HANGULPDF_PROFILE_DIR', os.path.join(DEFAULT_DATA_DIR, 'profiles'))
+PROFILE_THRESHOLD_SECONDS = float(os.environ.get('HANGULPDF_PROFILE_THRESHOLD_SECONDS', '0'))  # 0이면 자동 샘플링 끔
+SAMPLE_INTERVAL_SECONDS = int(os.environ.get('HANGULPDF_PROFILE_INTERVAL_MS', '10')) / 1000
+IGNORED_STAGES = ('job',)  # 작업 전체 스팬은 임계값 비교에서 제외
+SUMMARY_LINES = 40
+
+
+def _frame_label(code):
+    """접힌 스택의 프레임 이름 (';'와 공백은 flamegraph 형식 구분자)"""
+    path = code.co_filename
+    parts = path.replace('\\', '/').split('/')
+    short = '/'.join(parts[-2:]) if len(parts) > 1 else path
+    return f"{code.co_name}({short}:{code.co_firstlineno})".replace(';', ':').replace(' ', '_')
+
+
+class SamplingProfiler:
+    """다른 스레드의 호출 스택을 interval마다 읽어 접힌 스택별 횟수 집계
+
+    root_code가 있으면 그 함수(작업 함수) 아래 프레임만 남겨 작업 큐/스레드 내부 프레임은 제외
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_SECONDS, root_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = {}   # 'a;b;c' -> 샘플 수
+        self.samples = 0
+        self._labels = {}  # code -> 프레임 이름
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return  # 작업 스레드 종료
+            self._add(frame)
+
+    def _add(self, frame):
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(code)
+            labels.append(label)
+            if code is self.root_code:
+                break
+            frame = frame.f_back
+        if frame is None and self.root_code is not None:
+            return  # 작업 함수 밖 (시작 전/종료 후 정리 중)
+        stack = ';'.join(reversed(labels))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+    def top_functions(self, limit=SUMMARY_LINES):
+        """[(프레임, 자체 샘플 수, 포함 샘플 수)] 포함 샘플 수 순"""
+        own = {}
+        inclusive = {}
+        for stack, samples in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] = own.get(frames[-1], 0) + samples
+            for label in set(frames):
+                inclusive[label] = inclusive.get(label, 0) + samples
+        ranked = sorted(inclusive, key=lambda label: (-inclusive[label], label))[:limit]
+        return [(label, own.get(label, 0), inclusive[label]) for label in ranked]
+
+
+class JobProfile:
+    """작업 하나의 프로파일 결과"""
+
+    def __init__(self, mode, trigger, seconds, sampler=None, profile=None):
+        self.mode = mode
+        self.trigger = trigger  # 'manual' 또는 {'stage', 'detail', 'page', 'seconds'} (임계값을 넘은 스팬)
+        self.seconds = seconds
+        self.sampler = sampler
+        self.profile = profile
+
+    def describe(self):
+        return {
+            'mode': self.mode,
+            'trigger': self.trigger,
+            'seconds': round(self.seconds, 3),
+            'samples': self.sampler.samples if self.sampler else None,
+        }
+
+    def summary(self):
+        """사람이 읽는 요약 (상위 함수)"""
+        lines = [f"mode: {self.mode}", f"trigger: {self.trigger}", f"profiled seconds: {self.seconds:.3f}", '']
+        if self.sampler:
+            total = self.sampler.samples or 1
+            lines.append(f"samples: {self.sampler.samples} (interval {self.sampler.interval * 1000:.0f} ms)")
+            lines.append(f"{'inclusive':>10} {'self':>8}  function")
+            for label, own, inclusive in self.sampler.top_functions():
+                lines.append(f"{inclusive / total:>10.1%} {own / total:>8.1%}  {label}")
+        else:
+            buffer = StringIO()
+            pstats.Stats(self.profile, stream=buffer).sort_stats('cumulative').print_stats(SUMMARY_LINES)
+            lines.append(buffer.getvalue())
+        return '\n'.join(lines) + '\n'
+
+    def save(self, out_dir):
+        """out_dir에 결과 파일 저장, 파일 이름 목록 반환"""
+        os.makedirs(out_dir, exist_ok=True)
+        files = []
+        if self.sampler:
+            with open(os.path.join(out_dir, 'profile.folded'), 'w', encoding='utf-8') as f:
+                for stack, samples in sorted(self.sampler.stacks.items()):
+                    f.write(f"{stack} {samples}\n")
+            files.append('profile.folded')
+        else:
+            self.profile.dump_stats(os.path.join(out_dir, 'profile.pstats'))
+            files.append('profile.pstats')
+        with open(os.path.join(out_dir, 'profile.txt'), 'w', encoding='utf-8') as f:
+            f.write(self.summary())
+        files.append('profile.txt')
+        return files
+
+
+class JobProfiler:
+    """작업 함수 실행을 감싸는 프로파일러 (작업 스레드에서 start/stop 호출)
+
+    mode: None, 'sample', 'cprofile' (None이면 임계값 초과 시에만 샘플링)
+    report: 진행 중인 스팬을 확인할 실행 보고서 (modules/metrics.py RunReport)
+    root: 작업 함수 (샘플링 스택을 이 함수 아래로 한정)
+    """
+
+    def __init__(self, mode=None, report=None, root=None, threshold=PROFILE_THRESHOLD_SECONDS):
+        if mode not in (None,) + PROFILE_MODES:
+            raise ValueError(f"알 수 없는 프로파일링 모드: {mode}")
+        self.mode = mode
+        self.report = report
+        self.root_code = getattr(root, '__code__', None)
+        self.threshold = threshold
+        self.trigger = None
+        self._sampler = None
+        self._profile = None
+        self._started = None
+        self._watch_stop = threading.Event()
+        self._watcher = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        thread_id = threading.get_ident()
+        if self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._begin('manual')
+            self._profile.enable()  # 이 스레드에서만 기록
+        elif self.mode == 'sample':
+            self._start_sampler(thread_id, 'manual')
+        elif self.threshold > 0 and self.report is not None:
+            self._watcher = threading.Thread(target=self._watch, args=(thread_id,), name='profile-watch', daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        """프로파일링 종료, 결과(JobProfile) 반환 (아무것도 기록하지 않았으면 None)"""
+        if self._watcher:
+            self._watch_stop.set()
+            self._watcher.join()
+        if self._profile:
+            self._profile.disable()
+        with self._lock:
+            if self._sampler:
+                self._sampler.stop()
+            if self._started is None:
+                return None
+            seconds = time.perf_counter() - self._started
+        return JobProfile(self.mode or 'sample', self.trigger, seconds, sampler=self._sampler, profile=self._profile)
+
+    def _begin(self, trigger):
+        self.trigger = trigger
+        self._started = time.perf_counter()
+
+    def _start_sampler(self, thread_id, trigger):
+        self._sampler = SamplingProfiler(thread_id, root_code=self.root_code)
+        self._begin(trigger)
+        self._sampler.start()
+
+    def _watch(self, thread_id):
+        """임계값을 넘은 진행 중 스팬이 생기면 샘플링 시작 (작업당 한 번)"""
+        interval = max(0.05, min(1.0, self.threshold / 4))
+        while not self._watch_stop.wait(interval):
+            slow = [active for active in self.report.active_spans()
+                    if active['stage'] not in IGNORED_STAGES and active['seconds'] >= self.threshold]
+            if not slow:
+                continue
+            with self._lock:
+                if not self._watch_stop.is_set():
+                    # 바깥 단계(extract)보다 안쪽 단계(native_page)가 원인을 더 잘 가리키므로 가장 안쪽 스팬
+                    trigger = dict(slow[-1], seconds=round(slow[-1]['seconds'], 3))
+                    self._start_sampler(thread_id, trigger)
+                    logger.info('단계가 %.1f초를 넘어 샘플링 시작: %s', self.threshold, trigger)
+            return
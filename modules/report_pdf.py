@@ -0,0 +1,628 @@
+# report_pdf.py - 분석 결과 한글 PDF 생성 및 ZIP 패키징
+#
+# 렌더러는 구조화 분석 결과(modules/analysis_model.py Analysis)의 블록을 그대로 사용 (마크다운을 다시 파싱하지 않음)
+import html
+import logging
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+
+from modules.lazy_import import is_installed, load, load_error
+from modules.metrics import span
+from modules.scheduler import admit
+
+# PDF 생성을 위한 라이브러리들 (설치 여부만 확인하고 실제 임포트는 처음 PDF를 만들 때,
+# WeasyPrint/ReportLab/FPDF를 모두 임포트하면 앱 시작이 수 초 늦어짐)
+REPORTLAB_AVAILABLE = is_installed('reportlab')
+WEASYPRINT_AVAILABLE = is_installed('weasyprint')
+FPDF_AVAILABLE = is_installed('fpdf')
+
+logger = logging.getLogger(__name__)
+
+_LOG_LEVELS = {
+    'info': logging.INFO,
+    'success': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+}
+
+
+def log_notify(level, message):
+    """기본 알림: 로그로 기록 (Streamlit에서는 화면 알림 함수를 대신 전달)"""
+    logger.log(_LOG_LEVELS.get(level, logging.INFO), message)
+
+
+# 한글 폰트 설정 (TTF 파일만 사용)
+KOREAN_FONTS = [
+    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf'
+]
+
+# TTF 폰트만 찾기 (TTC 파일 제외)
+TTF_FONTS = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+    '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf'
+]
+
+def find_korean_font():
+    """사용 가능한 한글 폰트 찾기 (TTF 우선)"""
+    # TTF 폰트 우선 검색
+    for font_path in TTF_FONTS:
+        if os.path.exists(font_path):
+            return font_path
+    
+    # 한글 폰트 검색
+    for font_path in KOREAN_FONTS:
+        if os.path.exists(font_path):
+            return font_path
+    return None
+
+def find_ttf_font():
+    """TTF 폰트만 찾기 (ReportLab용)"""
+    for font_path in TTF_FONTS:
+        if os.path.exists(font_path):
+            return font_path
+    return None
+
+def _temp_path(suffix='.pdf'):
+    """출력 경로가 없을 때 쓰는 임시 파일 경로 (호출자가 삭제)"""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+# 개선된 PDF 생성 함수들
+def analysis_html(analysis):
+    """분석 결과 블록을 HTML 본문으로 변환"""
+    tags = {'heading': 'h2', 'subheading': 'h3', 'text': 'p'}
+    parts = []
+    in_list = False
+    for kind, text in analysis.blocks():
+        if kind == 'item' and not in_list:
+            parts.append('<ul>')
+        elif kind != 'item' and in_list:
+            parts.append('</ul>')
+        in_list = kind == 'item'
+        tag = 'li' if in_list else tags[kind]
+        parts.append(f"<{tag}>{html.escape(text)}</{tag}>")
+    if in_list:
+        parts.append('</ul>')
+    return '\n'.join(parts)
+
+
+def create_pdf_with_weasyprint(analysis, filename, title="문서 분석 결과", notify=None, output_path=None):
+    """WeasyPrint를 사용한 한글 PDF 생성 (오류 수정)"""
+    notify = notify or log_notify
+    if not WEASYPRINT_AVAILABLE:
+        return None
+    
+    weasyprint = load('weasyprint')
+    if weasyprint is None:
+        # pango 등 시스템 라이브러리가 없으면 설치되어 있어도 임포트 실패
+        notify('warning', f"WeasyPrint를 불러올 수 없습니다: {load_error('weasyprint')}")
+        return None
+    
+    try:
+        # 분석 결과 블록을 HTML로 변환
+        html_content = analysis_html(analysis)
+        
+        # HTML 템플릿 생성 (웹폰트 사용)
+        html_template = f"""
+        <!DOCTYPE html>
+        <html lang="ko">
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>{title}</title>
+            <style>
+                @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@300;400;500;700&display=swap');
+                
+                body {{
+                    font-family: 'Noto Sans KR', 'Malgun Gothic', '맑은 고딕', sans-serif;
+                    line-height: 1.6;
+                    margin: 40px;
+                    color: #333;
+                    font-size: 12px;
+                }}
+                
+                h1 {{
+                    color: #2c3e50;
+                    border-bottom: 3px solid #3498db;
+                    padding-bottom: 10px;
+                    font-size: 24px;
+                    margin-bottom: 30px;
+                }}
+                
+                h2 {{
+                    color: #34495e;
+                    border-left: 4px solid #3498db;
+                    padding-left: 15px;
+                    font-size: 18px;
+                    margin-top: 25px;
+                    margin-bottom: 15px;
+                }}
+                
+                h3 {{
+                    color: #2c3e50;
+                    font-size: 14px;
+                    margin-top: 20px;
+                    margin-bottom: 10px;
+                }}
+                
+                p {{
+                    margin-bottom: 12px;
+                    text-align: justify;
+                }}
+                
+                ul, ol {{
+                    margin-bottom: 15px;
+                    padding-left: 25px;
+                }}
+                
+                li {{
+                    margin-bottom: 5px;
+                }}
+                
+                strong {{
+                    color: #2c3e50;
+                    font-weight: 600;
+                }}
+                
+                code {{
+                    background-color: #f8f9fa;
+                    padding: 2px 4px;
+                    border-radius: 3px;
+                    font-family: 'Courier New', monospace;
+                }}
+                
+                pre {{
+                    background-color: #f8f9fa;
+                    padding: 15px;
+                    border-radius: 5px;
+                    overflow-x: auto;
+                    margin-bottom: 15px;
+                }}
+                
+                table {{
+                    border-collapse: collapse;
+                    width: 100%;
+                    margin-bottom: 20px;
+                }}
+                
+                th, td {{
+                    border: 1px solid #ddd;
+                    padding: 8px;
+                    text-align: left;
+                }}
+                
+                th {{
+                    background-color: #f2f2f2;
+                    font-weight: 600;
+                }}
+                
+                .header {{
+                    text-align: center;
+                    margin-bottom: 40px;
+                    padding: 20px;
+                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                    color: white;
+                    border-radius: 10px;
+                }}
+                
+                .footer {{
+                    margin-top: 40px;
+                    padding-top: 20px;
+                    border-top: 1px solid #ddd;
+                    text-align: center;
+                    color: #666;
+                    font-size: 10px;
+                }}
+                
+                @page {{
+                    margin: 2cm;
+                    @bottom-center {{
+                        content: "페이지 " counter(page) " / " counter(pages);
+                        font-size: 10px;
+                        color: #666;
+                    }}
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="header">
+                <h1 style="margin: 0; border: none; color: white;">{title}</h1>
+                <p style="margin: 10px 0 0 0;">생성 시간: {datetime.now().strftime('%Y년 %m월 %d일 %H:%M:%S')}</p>
+            </div>
+            
+            <div class="content">
+                {html_content}
+            </div>
+            
+            <div class="footer">
+                <p>HangulPDF AI Converter에 의해 생성됨</p>
+            </div>
+        </body>
+        </html>
+        """
+        
+        # 출력 경로 (지정되지 않으면 임시 파일)
+        output_path = output_path or _temp_path()
+        
+        # PDF 생성 (수정된 방법)
+        html_doc = weasyprint.HTML(string=html_template)
+        html_doc.write_pdf(output_path)
+        
+        return output_path
+        
+    except Exception as e:
+        notify('error', f"WeasyPrint PDF 생성 중 오류: {str(e)}")
+        return None
+
+def create_pdf_with_reportlab(analysis, filename, title="문서 분석 결과", notify=None, output_path=None):
+    """ReportLab을 사용한 한글 PDF 생성 (TTF 폰트만 사용)"""
+    notify = notify or log_notify
+    if not REPORTLAB_AVAILABLE:
+        return None
+    
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.lib.enums import TA_LEFT, TA_CENTER
+    except ImportError as e:
+        notify('warning', f"ReportLab을 불러올 수 없습니다: {str(e)}")
+        return None
+    
+    try:
+        # TTF 폰트 찾기 및 등록
+        ttf_font_path = find_ttf_font()
+        if not ttf_font_path:
+            notify('warning', "TTF 한글 폰트를 찾을 수 없습니다. 기본 폰트를 사용합니다.")
+            font_name = 'Helvetica'
+        else:
+            try:
+                # TTF 폰트 등록 (TTC 파일 제외)
+                pdfmetrics.registerFont(TTFont('CustomFont', ttf_font_path))
+                font_name = 'CustomFont'
+                notify('success', f"TTF 폰트 등록 성공: {ttf_font_path}")
+            except Exception as e:
+                notify('warning', f"폰트 등록 실패: {str(e)}. 기본 폰트를 사용합니다.")
+                font_name = 'Helvetica'
+        
+        # 출력 경로 (지정되지 않으면 임시 파일)
+        output_path = output_path or _temp_path()
+        
+        # PDF 문서 생성
+        doc = SimpleDocTemplate(
+            output_path, 
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=72
+        )
+        
+        # 스타일 정의
+        styles = getSampleStyleSheet()
+        
+        # 한글 폰트 스타일 생성
+        title_style = ParagraphStyle(
+            'KoreanTitle',
+            parent=styles['Heading1'],
+            fontName=font_name,
+            fontSize=18,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor='#2c3e50'
+        )
+        
+        heading_style = ParagraphStyle(
+            'KoreanHeading',
+            parent=styles['Heading2'],
+            fontName=font_name,
+            fontSize=14,
+            spaceAfter=12,
+            spaceBefore=20,
+            textColor='#34495e'
+        )
+        
+        content_style = ParagraphStyle(
+            'KoreanContent',
+            parent=styles['Normal'],
+            fontName=font_name,
+            fontSize=10,
+            leading=14,
+            spaceAfter=6,
+            alignment=TA_LEFT
+        )
+        
+        story = []
+        
+        # 제목 추가
+        story.append(Paragraph(title, title_style))
+        story.append(Spacer(1, 20))
+        
+        # 생성 정보 추가
+        info_text = f"생성 시간: {datetime.now().strftime('%Y년 %m월 %d일 %H:%M:%S')}"
+        story.append(Paragraph(info_text, content_style))
+        story.append(Spacer(1, 20))
+        
+        subheading_style = ParagraphStyle(
+            'KoreanSubheading',
+            parent=heading_style,
+            fontSize=12,
+            spaceBefore=10,
+            spaceAfter=6
+        )
+        
+        # 내용 처리 (분석 결과 블록, 한글 안전 처리)
+        block_styles = {'heading': heading_style, 'subheading': subheading_style, 'text': content_style}
+        for kind, text in analysis.blocks():
+            if not text.strip():
+                story.append(Spacer(1, 6))
+                continue
+            
+            # 한글 텍스트 안전 처리 (HTML 이스케이프)
+            try:
+                escaped = html.escape(text.strip(), quote=False)
+                if kind == 'item':
+                    story.append(Paragraph(f"• {escaped}", content_style))
+                else:
+                    story.append(Paragraph(escaped, block_styles[kind]))
+            except Exception as e:
+                # 문제가 있는 블록은 건너뛰기
+                notify('warning', f"블록 처리 중 오류: {str(e)}")
+                continue
+        
+        # 푸터 추가
+        story.append(Spacer(1, 30))
+        footer_style = ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontName=font_name,
+            fontSize=8,
+            alignment=TA_CENTER,
+            textColor='#666666'
+        )
+        story.append(Paragraph("HangulPDF AI Converter에 의해 생성됨", footer_style))
+        
+        # PDF 빌드
+        doc.build(story)
+        
+        return output_path
+        
+    except Exception as e:
+        notify('error', f"ReportLab PDF 생성 중 오류: {str(e)}")
+        return None
+
+def create_pdf_with_fpdf(analysis, filename, title="문서 분석 결과", notify=None, output_path=None):
+    """FPDF를 사용한 한글 PDF 생성 (개선된 버전)"""
+    notify = notify or log_notify
+    if not FPDF_AVAILABLE:
+        return None
+    
+    try:
+        from fpdf import FPDF
+    except ImportError as e:
+        notify('warning', f"FPDF를 불러올 수 없습니다: {str(e)}")
+        return None
+    
+    try:
+        # 출력 경로 (지정되지 않으면 임시 파일)
+        output_path = output_path or _temp_path()
+        
+        class KoreanPDF(FPDF):
+            def __init__(self):
+                super().__init__()
+                self.add_page()
+                self.font_name = 'Arial'  # 기본 폰트 사용
+            
+            def header(self):
+                self.set_font(self.font_name, 'B', 16)
+                # 제목을 안전하게 처리
+                safe_title = title.encode('latin-1', 'ignore').decode('latin-1')
+                self.cell(0, 10, safe_title, 0, 1, 'C')
+                self.ln(10)
+            
+            def footer(self):
+                self.set_y(-15)
+                self.set_font(self.font_name, 'I', 8)
+                self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+        
+        pdf = KoreanPDF()
+        pdf.set_font(pdf.font_name, '', 10)
+        
+        # 텍스트 추가 (한글 처리 개선)
+        prefixes = {'heading': '', 'subheading': '', 'item': '- ', 'text': ''}
+        for kind, text in analysis.blocks():
+            line = prefixes[kind] + text
+            if kind == 'heading':
+                pdf.ln(3)
+            if line.strip():
+                try:
+                    # 한글을 포함한 텍스트를 안전하게 처리
+                    # 길이 제한 및 특수문자 처리
+                    safe_line = line[:80]  # 길이 제한
+                    safe_line = safe_line.encode('latin-1', 'ignore').decode('latin-1')
+                    pdf.cell(0, 6, safe_line, 0, 1)
+                except Exception as e:
+                    # 문제가 있는 라인은 건너뛰기
+                    pdf.cell(0, 6, '[Korean text - encoding issue]', 0, 1)
+            else:
+                pdf.ln(3)
+        
+        # 생성 정보 추가
+        pdf.ln(10)
+        pdf.set_font(pdf.font_name, 'I', 8)
+        generation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        pdf.cell(0, 6, f'Generated: {generation_time}', 0, 1, 'C')
+        
+        pdf.output(output_path)
+        return output_path
+        
+    except Exception as e:
+        notify('error', f"FPDF PDF 생성 중 오류: {str(e)}")
+        return None
+
+# 통합 PDF 생성 함수 (수정)
+def create_pdf_from_analysis(analysis, filename, title="문서 분석 결과", notify=None, output_path=None):
+    """최적의 방법으로 분석 결과(Analysis) 한글 PDF 생성 (오류 수정)
+
+    output_path가 없으면 임시 파일에 생성하며, 반환된 경로의 삭제는 호출자 책임
+    """
+    notify = notify or log_notify
+    
+    # 렌더링은 CPU/메모리를 많이 쓰므로 입장 제어(modules/scheduler.py) 후 실행
+    nbytes = sum(len(text.encode('utf-8')) for _, text in analysis.blocks())
+    with admit('render', nbytes=nbytes):
+        # 1순위: WeasyPrint (최고 품질)
+        if WEASYPRINT_AVAILABLE:
+            notify('info', "🎨 WeasyPrint로 고품질 한글 PDF 생성 중...")
+            with span('render', detail='weasyprint'):
+                result = create_pdf_with_weasyprint(analysis, filename, title, notify, output_path)
+            if result:
+                notify('success', "✅ WeasyPrint PDF 생성 성공")
+                return result
+            else:
+                notify('warning', "⚠️ WeasyPrint 실패, ReportLab으로 시도합니다.")
+    
+        # 2순위: ReportLab (TTF 폰트만 사용)
+        if REPORTLAB_AVAILABLE:
+            notify('info', "📄 ReportLab으로 한글 PDF 생성 중...")
+            with span('render', detail='reportlab'):
+                result = create_pdf_with_reportlab(analysis, filename, title, notify, output_path)
+            if result:
+                notify('success', "✅ ReportLab PDF 생성 성공")
+                return result
+            else:
+                notify('warning', "⚠️ ReportLab 실패, FPDF로 시도합니다.")
+    
+        # 3순위: FPDF (기본 대안)
+        if FPDF_AVAILABLE:
+            notify('info', "📝 FPDF로 기본 PDF 생성 중...")
+            with span('render', detail='fpdf'):
+                result = create_pdf_with_fpdf(analysis, filename, title, notify, output_path)
+            if result:
+                notify('success', "✅ FPDF PDF 생성 성공")
+                return result
+    
+        notify('error', "❌ 모든 PDF 생성 방법이 실패했습니다.")
+        return None
+
+def _readme_overview(analyses):
+    """ZIP README의 모델별 분석 요약 줄"""
+    lines = []
+    for name, analysis in analyses.items():
+        if analysis is None:
+            continue
+        if analysis.error:
+            lines.append(f"- {name}: 분석 실패 ({analysis.error[:100]})")
+            continue
+        keywords = ', '.join(keyword.term for keyword in analysis.keywords[:5])
+        lines.append(
+            f"- {name}: {analysis.title or '제목 없음'} · 유형 {analysis.doc_type or '-'}"
+            f" · 키워드 {keywords or '-'} · 개체 {len(analysis.entities)}개"
+            f" · 결정사항 {len(analysis.decisions)}개 · 액션 아이템 {len(analysis.action_items)}개"
+        )
+    return '\n'.join(lines) or '- 분석 결과 없음'
+
+
+# ZIP 파일 생성 함수
+def create_analysis_zip(original_pdf, extracted_text, chatgpt_result, gemini_result, grok_result, filename_base,
+                        output_path=None, notify=None, on_artifact=None):
+    """분석 결과를 ZIP 파일로 패키징 (output_path가 없으면 임시 파일 생성)
+
+    original_pdf: 원본 PDF 파일 경로 (bytes도 허용)
+    chatgpt_result/gemini_result/grok_result: 분석 결과 Analysis (None이면 생략)
+    on_artifact(name, path=None, data=None)는 파일을 하나 추가할 때마다 호출 (Drive 업로드를 렌더링과 겹쳐 진행,
+    path의 임시 파일은 ZIP을 다 만들면 지워짐)
+    """
+    notify = notify or log_notify
+    try:
+        # ZIP 파일 경로 (지정되지 않으면 임시 파일)
+        if output_path is None:
+            output_path = _temp_path('.zip')
+        
+        # 중간 PDF는 ZIP과 같은 위치의 임시 폴더에 만들고 실패해도 함께 삭제
+        # zip 스팬은 안쪽 render 스팬(분석 결과 PDF 생성)을 포함
+        work_dir = tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path)))
+        with span('zip'), work_dir, zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            def add(name, path=None, data=None):
+                if path is not None:
+                    zipf.write(path, name)
+                else:
+                    zipf.writestr(name, data)
+                if on_artifact:
+                    on_artifact(name, path=path, data=data)
+            
+            # 1. 원본 PDF 추가 (경로면 파일에서 스트리밍)
+            if isinstance(original_pdf, (bytes, bytearray, memoryview)):
+                add(f"{filename_base}_원본.pdf", data=bytes(original_pdf))
+            else:
+                add(f"{filename_base}_원본.pdf", path=original_pdf)
+            
+            # 2. 추출된 텍스트 추가
+            add(f"{filename_base}_추출텍스트.txt", data=extracted_text.encode('utf-8'))
+            
+            # 3~5. 모델별 분석 결과 PDF/TXT/JSON 추가
+            analyses = {'ChatGPT': chatgpt_result, 'Gemini': gemini_result, 'Grok': grok_result}
+            for name, analysis in analyses.items():
+                if analysis is None:
+                    continue
+                pdf_path = create_pdf_from_analysis(
+                    analysis, f"{filename_base}_{name}분석.pdf", f"{name} 분석 결과", notify,
+                    output_path=os.path.join(work_dir.name, f'{name}.pdf')
+                )
+                if pdf_path:
+                    add(f"{filename_base}_{name}분석.pdf", path=pdf_path)
+                
+                # 텍스트(마크다운)와 구조화 결과(JSON)도 추가
+                add(f"{filename_base}_{name}분석.txt", data=analysis.to_markdown().encode('utf-8'))
+                if not analysis.error:
+                    add(f"{filename_base}_{name}분석.json", data=analysis.to_json().encode('utf-8'))
+            
+            # 6. 요약 정보 파일 추가
+            summary_info = f"""# HangulPDF AI Converter 분석 결과
+
+## 파일 정보
+- 원본 파일: {filename_base}_원본.pdf
+- 처리 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+- 추출된 텍스트 길이: {len(extracted_text)} 글자
+
+## 분석 요약
+{_readme_overview(analyses)}
+
+## 포함된 파일들
+1. {filename_base}_원본.pdf - 원본 PDF 파일
+2. {filename_base}_추출텍스트.txt - 추출된 텍스트
+3. {filename_base}_ChatGPT분석.pdf/.txt/.json - ChatGPT 분석 결과
+4. {filename_base}_Gemini분석.pdf/.txt/.json - Gemini 분석 결과
+5. {filename_base}_Grok분석.pdf/.txt/.json - Grok 분석 결과
+
+## PDF 생성 정보
+- 한글 폰트 지원: WeasyPrint > ReportLab > FPDF 순서로 시도
+- TTF 폰트 우선 사용 (TTC 파일 호환성 문제 해결)
+- 구조화 분석 결과(JSON)를 그대로 렌더링
+
+## 사용 방법
+- PDF 파일: 각 AI 모델의 분석 결과를 읽기 쉬운 형태로 제공
+- TXT 파일: 텍스트 형태의 분석 결과 (복사/편집 가능)
+- JSON 파일: 구조화된 분석 결과 (키워드, 개체, 액션 아이템 등 다른 도구에서 활용)
+
+Generated by HangulPDF AI Converter
+한글 PDF 생성 오류 수정 버전 v2.0
+"""
+            add(f"{filename_base}_README.txt", data=summary_info.encode('utf-8'))
+        
+        return output_path
+        
+    except Exception as e:
+        notify('error', f"ZIP 파일 생성 중 오류: {str(e)}")
+        if output_path and os.path.exists(output_path):
+            os.unlink(output_path)  # 반쯤 쓴 ZIP 삭제
+        return None
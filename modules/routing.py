@@ -0,0 +1,165 @@
+# routing.py - 문서 특성(토큰 수, 페이지 수, 표 밀도, 문서 유형)에 따른 분석 모델/출력 토큰/방식 선택과 결과 기록
+#
+# 짧은 문서는 빠르고 싼 모델로 짧게, 표가 많거나 결정사항이 중요한 유형은 출력 토큰을 넉넉히,
+# 기본 모델 예산을 넘는 긴 문서는 컨텍스트가 긴 모델로 한 번에, 그래도 넘으면 분할 분석
+# 결정과 실제 지연 시간/토큰/비용은 HANGULPDF_ROUTING_LOG(JSONL)에 한 줄씩 남겨 기준값 조정에 사용
+import json
+import logging
+import os
+import threading
+import time
+
+from modules.summary_store import DEFAULT_DATA_DIR, guess_document_type
+from modules.text_cleaner import PAGE_MARKER_RE, line_stats, split_pages
+from modules.token_budget import ANALYSIS_TOKEN_BUDGET, count_tokens, estimate_cost
+
+logger = logging.getLogger(__name__)
+
+FAST_MODEL = os.environ.get('HANGULPDF_FAST_MODEL', 'gpt-4o-mini')
+DEFAULT_MODEL = os.environ.get('HANGULPDF_ANALYSIS_MODEL', 'gpt-3.5-turbo')
+LONG_CONTEXT_MODEL = os.environ.get('HANGULPDF_LONG_CONTEXT_MODEL', 'gpt-4o-mini')
+LONG_CONTEXT_BUDGET = int(os.environ.get('HANGULPDF_LONG_CONTEXT_BUDGET', '60000'))  # 긴 문서 한 번 호출의 입력 한도
+ROUTING_LOG = os.environ.get('HANGULPDF_ROUTING_LOG', os.path.join(DEFAULT_DATA_DIR, 'routing.jsonl'))
+
+# 경로 기준값
+SHORT_DOC_TOKENS = 3000
+SHORT_DOC_PAGES = 5
+TABLE_HEAVY_DENSITY = 0.3
+DETAILED_DOC_TYPES = ('회의록', '계약문서')  # 결정사항/조건을 빠짐없이 정리해야 하는 유형
+
+# 경로별 출력 토큰 (max_tokens는 상한이라 쓰지 않은 만큼은 과금되지 않음)
+# 짧은 문서도 구조화 응답의 모든 항목(한국어 JSON)이 들어가야 하므로 짧은 경로는 모델로만 절약
+SHORT_OUTPUT_TOKENS = 2500
+STANDARD_OUTPUT_TOKENS = 2500
+DETAILED_OUTPUT_TOKENS = 4000
+
+_log_lock = threading.Lock()
+
+
+def document_features(text, pages=None, model=DEFAULT_MODEL, page_results=None):
+    """{'tokens', 'pages', 'chars', 'table_density', 'doc_type'}
+
+    table_density는 쪽 번호를 뺀 비어 있지 않은 줄 중 표 행으로 보이는 줄의 비율
+    page_results: convert_pdf의 페이지 목록, 있으면 정리 전에 센 줄 통계를 사용 (정리 단계는 줄을 이어 붙임)
+    pages가 없으면 page_results 또는 페이지 마커 수로 계산
+    """
+    if page_results and all('table_lines' in page for page in page_results):
+        stats = page_results
+    else:
+        stats = [line_stats(body) for _, body in split_pages(text)]
+    lines = sum(page['line_count'] for page in stats)
+    table_lines = sum(page['table_lines'] for page in stats)
+    if pages is None:
+        pages = len(page_results) if page_results else max(1, len(PAGE_MARKER_RE.findall(text)))
+    return {
+        'tokens': count_tokens(text, model),
+        'pages': pages,
+        'chars': len(text),
+        'table_density': round(table_lines / lines, 3) if lines else 0.0,
+        'doc_type': guess_document_type(text),
+    }
+
+
+def choose_route(features):
+    """경로 결정 {'route', 'model', 'max_output_tokens', 'budget', 'reason'}
+
+    strategy(single/chunked)는 이 경로의 model/budget으로 token_budget.plan_analysis가 정함
+    """
+    tokens = features['tokens']
+    detailed = features['table_density'] >= TABLE_HEAVY_DENSITY or features['doc_type'] in DETAILED_DOC_TYPES
+
+    if tokens <= SHORT_DOC_TOKENS and features['pages'] <= SHORT_DOC_PAGES and not detailed:
+        return {'route': 'short', 'model': FAST_MODEL, 'max_output_tokens': SHORT_OUTPUT_TOKENS,
+                'budget': ANALYSIS_TOKEN_BUDGET, 'reason': f'{tokens}토큰, {features["pages"]}쪽'}
+
+    output_tokens = DETAILED_OUTPUT_TOKENS if detailed else STANDARD_OUTPUT_TOKENS
+    reason = (f'표 밀도 {features["table_density"]:.0%}, {features["doc_type"]}' if detailed
+              else f'{tokens}토큰, {features["pages"]}쪽')
+    if tokens <= ANALYSIS_TOKEN_BUDGET * 0.8:  # 압축 전 기준으로 여유 있게 기본 모델 예산 안
+        return {'route': 'detailed' if detailed else 'standard', 'model': DEFAULT_MODEL,
+                'max_output_tokens': output_tokens, 'budget': ANALYSIS_TOKEN_BUDGET, 'reason': reason}
+
+    # 긴 문서: 컨텍스트가 긴 모델로 한 번에 (예산도 넘으면 plan_analysis가 분할)
+    return {'route': 'long', 'model': LONG_CONTEXT_MODEL, 'max_output_tokens': DETAILED_OUTPUT_TOKENS,
+            'budget': LONG_CONTEXT_BUDGET, 'reason': f'{tokens}토큰'}
+
+
+def larger_output_tokens(max_tokens):
+    """응답이 잘렸을 때 다시 호출할 출력 토큰 (더 큰 경로 값이 없으면 None)"""
+    return next((tokens for tokens in (STANDARD_OUTPUT_TOKENS, DETAILED_OUTPUT_TOKENS) if tokens > max_tokens), None)
+
+
+def log_route(provider, features, route, plan, usage, seconds, error=None, truncated=0, path=None):
+    """경로 결정과 결과(지연 시간, 실제 토큰, 비용)를 JSONL 한 줄로 기록 (실패해도 분석에는 영향 없음)
+
+    usage: {'prompt_tokens', 'completion_tokens', 'calls'} (이번 분석의 모든 호출 합계)
+    truncated: 출력 토큰 한도에서 잘린 응답 수 (경로의 출력 토큰이 부족했다는 신호)
+    """
+    record = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'provider': provider,
+        'features': features,
+        'route': route['route'],
+        'model': route['model'],
+        'max_output_tokens': route['max_output_tokens'],
+        'strategy': plan['strategy'] if plan else None,
+        'compaction': plan['steps'] if plan else None,
+        'estimated_prompt_tokens': plan['estimated_prompt_tokens'] if plan else None,
+        'estimated_cost_usd': plan['estimated_cost_usd'] if plan else None,
+        'prompt_tokens': usage['prompt_tokens'],
+        'completion_tokens': usage['completion_tokens'],
+        'calls': usage['calls'],
+        'cost_usd': estimate_cost(route['model'], usage['prompt_tokens'], usage['completion_tokens']),
+        'seconds': round(seconds, 3),
+        'truncated': truncated,
+        'error': error,
+    }
+    path = path or ROUTING_LOG
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with _log_lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+    except OSError as e:
+        logger.warning('경로 기록 실패: %s', e)
+    return record
+
+
+def load_route_log(path=None):
+    """기록된 경로 결정 목록 (기준값 조정용)"""
+    records = []
+    try:
+        with open(path or ROUTING_LOG, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def summarize_routes(records):
+    """경로별 {'count', 'avg_seconds', 'avg_cost_usd', 'avg_prompt_tokens', 'errors', 'truncated'}"""
+    summary = {}
+    for record in records:
+        stats = summary.setdefault(record['route'], {'count': 0, 'seconds': 0.0, 'cost_usd': 0.0,
+                                                     'prompt_tokens': 0, 'errors': 0, 'truncated': 0})
+        stats['count'] += 1
+        stats['seconds'] += record.get('seconds') or 0.0
+        stats['cost_usd'] += record.get('cost_usd') or 0.0
+        stats['prompt_tokens'] += record.get('prompt_tokens') or 0
+        stats['errors'] += 1 if record.get('error') else 0
+        stats['truncated'] += 1 if record.get('truncated') else 0
+    return {
+        route: {
+            'count': stats['count'],
+            'avg_seconds': round(stats['seconds'] / stats['count'], 3),
+            'avg_cost_usd': round(stats['cost_usd'] / stats['count'], 6),
+            'avg_prompt_tokens': round(stats['prompt_tokens'] / stats['count']),
+            'errors': stats['errors'],
+            'truncated': stats['truncated'],
+        }
+        for route, stats in summary.items()
+    }
@@ -0,0 +1,224 @@
+# scheduler.py - 추출/OCR/PDF 생성 단계 입장 제어 (CPU/메모리 예산, 사용자별 공정 분배, 대기/처리 시간 집계)
+#
+# 여러 사용자가 동시에 OCR을 시작하면 300 DPI 래스터화와 tesseract가 제한 없이 돌아 노드 전체가 느려지므로
+# 각 단계는 admit(stage, ...) 안에서 실행하고, 예상 비용(CPU 슬롯, 메모리)이 예산 안에 들어올 때만 시작함
+# 기다리는 요청 중에서는 현재 자원을 가장 적게 쓰고, 지금까지 처리 시간을 가장 적게 받은 사용자부터 입장
+#
+# 사용자(소유자)와 취소 확인 함수는 작업 큐 워커가 job_context로 지정 (지정이 없으면 공용 소유자)
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from modules.metrics import observe
+
+MB = 1024 * 1024
+CPU_SLOTS = int(os.environ.get('HANGULPDF_CPU_SLOTS', str(os.cpu_count() or 2)))
+MEMORY_BUDGET = int(os.environ.get('HANGULPDF_WORK_MEMORY_MB', '1024')) * MB
+WAIT_POLL_SECONDS = 0.5  # 대기 중 취소 확인 간격
+
+# 비용 추정 기준
+A4_INCHES = (8.27, 11.69)
+OCR_MEMORY_FACTOR = 3            # RGB 페이지 이미지 + tesseract 내부 회색조/이진화 버퍼
+NATIVE_MEMORY_FACTOR = 4         # 기본 추출은 PDF 파일 크기의 몇 배를 메모리에 올림
+NATIVE_PAGE_BYTES = 256 * 1024   # 페이지별 텍스트/글자 상자
+RENDER_MEMORY_FACTOR = 20        # 마크다운 → HTML → PDF 레이아웃 중간 결과
+BASE_BYTES = 16 * MB
+
+DEFAULT_OWNER = 'shared'
+_owner = contextvars.ContextVar('scheduler_owner', default=DEFAULT_OWNER)
+_check = contextvars.ContextVar('scheduler_check', default=None)
+
+
+def page_image_bytes(dpi):
+    """A4 한 페이지를 dpi로 RGB 래스터화했을 때의 크기"""
+    return int(A4_INCHES[0] * dpi) * int(A4_INCHES[1] * dpi) * 3
+
+
+def estimate_cost(stage, pages=1, dpi=300, nbytes=0):
+    """단계별 예상 비용 {'cpu': 슬롯 수, 'memory': bytes}
+
+    ocr: 페이지 하나씩 래스터화하므로 한 페이지 이미지 기준 (pages는 동시에 처리하는 페이지 수)
+    extract: PDF 크기(nbytes)와 페이지 수 기준
+    render: 렌더링할 텍스트 길이(nbytes) 기준
+    """
+    if stage == 'ocr':
+        memory = page_image_bytes(dpi) * OCR_MEMORY_FACTOR * pages
+    elif stage == 'extract':
+        memory = nbytes * NATIVE_MEMORY_FACTOR + pages * NATIVE_PAGE_BYTES
+    elif stage == 'render':
+        memory = nbytes * RENDER_MEMORY_FACTOR
+    else:
+        memory = 0
+    return {'cpu': 1, 'memory': BASE_BYTES + memory}
+
+
+@contextmanager
+def job_context(owner, check=None):
+    """이 스레드에서 실행하는 단계의 소유자와 취소 확인 함수(예외를 던지면 대기 중단) 지정"""
+    owner_token = _owner.set(owner or DEFAULT_OWNER)
+    check_token = _check.set(check)
+    try:
+        yield
+    finally:
+        _owner.reset(owner_token)
+        _check.reset(check_token)
+
+
+class _Request:
+    def __init__(self, owner, stage, cost):
+        self.owner = owner
+        self.stage = stage
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.admitted = False
+
+
+def _empty_stats():
+    return {'admitted': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'service_seconds': 0.0}
+
+
+class Scheduler:
+    """CPU 슬롯/메모리 예산 기반 입장 제어
+
+    예산보다 큰 요청은 다른 작업이 없을 때 단독으로 입장
+    공정성을 위해 순서가 된 사용자의 요청이 예산에 맞지 않으면 뒤의 작은 요청을 먼저 넣지 않음 (큰 요청 기아 방지)
+    """
+
+    def __init__(self, cpu_slots=CPU_SLOTS, memory_budget=MEMORY_BUDGET):
+        self.cpu_slots = max(1, cpu_slots)
+        self.memory_budget = memory_budget
+
+        self._cond = threading.Condition()
+        self._waiting = []      # _Request, 들어온 순서
+        self._cpu_used = 0
+        self._memory_used = 0
+        self._held = {}         # owner -> 사용 중인 CPU 슬롯
+        self._served = {}       # owner -> 누적 처리 시간 (공정 분배 기준)
+        self._stages = {}       # stage -> 대기/처리 시간 집계
+        self._owners = {}       # owner -> 대기/처리 시간 집계
+
+    @contextmanager
+    def admit(self, stage, cost=None, owner=None):
+        """예산이 허락할 때까지 기다린 뒤 블록 실행, 끝나면 자원 반환"""
+        cost = cost or estimate_cost(stage)
+        request = _Request(owner or _owner.get(), stage, cost)
+        check = _check.get()
+
+        with self._cond:
+            self._waiting.append(request)
+            self._dispatch()
+            while not request.admitted:
+                self._cond.wait(WAIT_POLL_SECONDS)
+                if request.admitted or not check:
+                    continue
+                try:
+                    check()
+                except BaseException:
+                    self._waiting.remove(request)
+                    self._dispatch()
+                    raise
+
+        started = time.monotonic()
+        wait = started - request.enqueued_at
+        observe('admission_wait_seconds', wait, stage=stage)
+        try:
+            yield
+        finally:
+            service = time.monotonic() - started
+            with self._cond:
+                self._cpu_used -= cost['cpu']
+                self._memory_used -= cost['memory']
+                self._held[request.owner] -= cost['cpu']
+                if not self._held[request.owner]:
+                    del self._held[request.owner]
+                self._served[request.owner] = self._served.get(request.owner, 0.0) + service
+                for stats in (self._stages.setdefault(stage, _empty_stats()),
+                              self._owners.setdefault(request.owner, _empty_stats())):
+                    stats['admitted'] += 1
+                    stats['wait_seconds'] += wait
+                    stats['max_wait_seconds'] = max(stats['max_wait_seconds'], wait)
+                    stats['service_seconds'] += service
+                self._dispatch()
+
+    def forget_owner(self, owner):
+        """만료된 세션의 공정 분배 기록과 집계 삭제"""
+        with self._cond:
+            self._served.pop(owner, None)
+            self._owners.pop(owner, None)
+
+    def metrics(self, owner=None):
+        """{'cpu_used', 'cpu_slots', 'memory_used', 'memory_budget', 'waiting', 'stages': {stage: 집계}}
+
+        집계: admitted, wait_seconds, max_wait_seconds, service_seconds, avg_wait_seconds, avg_service_seconds
+        owner가 있으면 'owner'에 해당 사용자의 집계 포함
+        """
+        with self._cond:
+            result = {
+                'cpu_used': self._cpu_used,
+                'cpu_slots': self.cpu_slots,
+                'memory_used': self._memory_used,
+                'memory_budget': self.memory_budget,
+                'waiting': len(self._waiting),
+                'stages': {stage: _summarize(stats) for stage, stats in self._stages.items()},
+            }
+            if owner is not None:
+                result['owner'] = _summarize(self._owners.get(owner, _empty_stats()))
+        return result
+
+    # 아래 메서드는 모두 self._cond를 잡은 상태에서 호출
+
+    def _fits(self, cost):
+        if not self._cpu_used:
+            return True  # 아무것도 실행 중이 아니면 예산보다 큰 요청도 단독 입장
+        return (self._cpu_used + cost['cpu'] <= self.cpu_slots
+                and self._memory_used + cost['memory'] <= self.memory_budget)
+
+    def _next_request(self):
+        """사용 중인 슬롯 → 누적 처리 시간 → 대기 순서가 가장 작은 사용자의 첫 요청"""
+        heads = {}
+        for request in self._waiting:
+            heads.setdefault(request.owner, request)
+        if not heads:
+            return None
+        return min(heads.values(), key=lambda request: (
+            self._held.get(request.owner, 0), self._served.get(request.owner, 0.0), request.enqueued_at
+        ))
+
+    def _dispatch(self):
+        admitted = False
+        while True:
+            request = self._next_request()
+            if request is None or not self._fits(request.cost):
+                break
+            self._waiting.remove(request)
+            request.admitted = True
+            self._cpu_used += request.cost['cpu']
+            self._memory_used += request.cost['memory']
+            self._held[request.owner] = self._held.get(request.owner, 0) + request.cost['cpu']
+            admitted = True
+        if admitted:
+            self._cond.notify_all()
+
+
+def _summarize(stats):
+    admitted = stats['admitted']
+    return dict(
+        stats,
+        avg_wait_seconds=stats['wait_seconds'] / admitted if admitted else 0.0,
+        avg_service_seconds=stats['service_seconds'] / admitted if admitted else 0.0,
+    )
+
+
+# 프로세스 공용 스케줄러 (Streamlit 서버의 모든 세션이 공유, batch 워커 프로세스는 각자 하나)
+_default_scheduler = Scheduler()
+
+
+def get_scheduler():
+    return _default_scheduler
+
+
+def admit(stage, pages=1, dpi=300, nbytes=0):
+    """공용 스케줄러로 단계 입장 (비용은 estimate_cost로 추정)"""
+    return _default_scheduler.admit(stage, estimate_cost(stage, pages=pages, dpi=dpi, nbytes=nbytes))
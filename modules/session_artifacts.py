@@ -0,0 +1,194 @@
+# session_artifacts.py - 세션 대용량 결과물 관리 (디스크 보관 + 핸들 참조 + LRU 메모리 캐시)
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from modules.metrics import count
+from modules.uploads import estimate_memory, remove_upload
+
+ARTIFACT_DIR = os.path.join(tempfile.gettempdir(), 'hangulpdf_sessions')
+
+MB = 1024 * 1024
+SESSION_MEMORY_BUDGET = int(os.environ.get('HANGULPDF_SESSION_MEMORY_MB', '64')) * MB
+GLOBAL_MEMORY_BUDGET = int(os.environ.get('HANGULPDF_GLOBAL_MEMORY_MB', '512')) * MB
+SESSION_IDLE_SECONDS = int(os.environ.get('HANGULPDF_SESSION_IDLE_MINUTES', '60')) * 60
+
+
+class ArtifactExpired(KeyError):
+    """만료되었거나 삭제된 핸들"""
+
+
+class SessionArtifactManager:
+    """세션별 대용량 객체(추출 텍스트, 페이지 목록, 분석 결과)를 핸들로 관리
+
+    값은 항상 디스크(pickle)에 저장되고, 최근에 사용한 값만 메모리에 캐시함
+    세션별/전체 메모리 예산을 넘으면 오래 사용하지 않은 캐시부터 내려놓고,
+    유휴 시간이 지난 세션은 디스크 파일까지 삭제함
+    """
+
+    def __init__(self, root_dir=ARTIFACT_DIR, session_budget=SESSION_MEMORY_BUDGET,
+                 global_budget=GLOBAL_MEMORY_BUDGET, idle_seconds=SESSION_IDLE_SECONDS):
+        self.root_dir = root_dir
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.idle_seconds = idle_seconds
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # handle -> (session_id, value, size), 끝이 가장 최근
+        self._session_bytes = {}
+        self._global_bytes = 0
+        self._last_seen = {}
+        self._files = {}  # session_id -> 세션 종료 시 함께 삭제할 외부 파일
+        self._evictions = 0
+
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _session_dir(self, session_id):
+        return os.path.join(self.root_dir, session_id)
+
+    def _path(self, handle):
+        session_id, name = handle.split('/', 1)
+        return os.path.join(self._session_dir(session_id), f"{name}.pkl")
+
+    def touch(self, session_id):
+        """세션 활동 시각 갱신"""
+        with self._lock:
+            self._last_seen[session_id] = time.time()
+
+    def put(self, session_id, value):
+        """값을 디스크에 저장하고 핸들 반환"""
+        handle = f"{session_id}/{uuid.uuid4().hex}"
+        path = self._path(handle)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temp_path = f"{path}.part"
+        with open(temp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._last_seen[session_id] = time.time()
+            self._cache_value(handle, session_id, value)
+        return handle
+
+    def get(self, handle):
+        """핸들의 값 반환 (캐시에 없으면 디스크에서 읽음), 만료되었으면 ArtifactExpired"""
+        session_id = handle.split('/', 1)[0]
+        with self._lock:
+            if handle in self._cache:
+                self._last_seen[session_id] = time.time()
+                self._cache.move_to_end(handle)
+                count('cache_hits_total', cache='artifact')
+                return self._cache[handle][1]
+        count('cache_misses_total', cache='artifact')
+
+        try:
+            with open(self._path(handle), 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            raise ArtifactExpired(handle)
+
+        with self._lock:
+            self._last_seen[session_id] = time.time()
+            self._cache_value(handle, session_id, value)
+        return value
+
+    def release(self, handle):
+        """핸들 삭제 (메모리/디스크)"""
+        if not handle:
+            return
+        with self._lock:
+            self._drop_cached(handle)
+        remove_upload(self._path(handle))
+
+    def attach_file(self, session_id, path):
+        """세션이 만료될 때 함께 삭제할 파일 등록 (예: 업로드 스풀 파일)"""
+        with self._lock:
+            self._files.setdefault(session_id, set()).add(path)
+
+    def detach_file(self, session_id, path):
+        """attach_file 등록 해제"""
+        with self._lock:
+            self._files.get(session_id, set()).discard(path)
+
+    def expire_idle(self, now=None):
+        """유휴 시간이 지난 세션 정리, 정리한 세션 ID 목록 반환"""
+        now = now or time.time()
+        with self._lock:
+            expired = [sid for sid, seen in self._last_seen.items() if now - seen > self.idle_seconds]
+            for session_id in expired:
+                self._drop_session(session_id)
+
+        for session_id in expired:
+            shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+        return expired
+
+    def drop_session(self, session_id):
+        """세션의 모든 결과물 즉시 삭제"""
+        with self._lock:
+            self._drop_session(session_id)
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def metrics(self):
+        """메모리 상주량 지표 (전체/세션별)"""
+        now = time.time()
+        with self._lock:
+            sessions = {
+                session_id: {
+                    'resident_bytes': self._session_bytes.get(session_id, 0),
+                    'cached_items': sum(1 for sid, _, _ in self._cache.values() if sid == session_id),
+                    'idle_seconds': round(now - seen, 1),
+                }
+                for session_id, seen in self._last_seen.items()
+            }
+            return {
+                'global_resident_bytes': self._global_bytes,
+                'global_budget_bytes': self.global_budget,
+                'session_budget_bytes': self.session_budget,
+                'cached_items': len(self._cache),
+                'evictions': self._evictions,
+                'sessions': sessions,
+            }
+
+    # 아래 메서드는 모두 self._lock을 잡은 상태에서 호출
+
+    def _cache_value(self, handle, session_id, value):
+        size = estimate_memory(value)
+        if size > self.session_budget:
+            return  # 예산보다 큰 값은 캐시하지 않고 매번 디스크에서 읽음
+
+        self._drop_cached(handle)
+        self._cache[handle] = (session_id, value, size)
+        self._session_bytes[session_id] = self._session_bytes.get(session_id, 0) + size
+        self._global_bytes += size
+
+        # 세션 예산 초과: 같은 세션의 오래된 캐시부터 제거
+        while self._session_bytes[session_id] > self.session_budget:
+            oldest = next(h for h, (sid, _, _) in self._cache.items() if sid == session_id)
+            self._drop_cached(oldest)
+            self._evictions += 1
+
+        # 전체 예산 초과: 전체에서 가장 오래된 캐시부터 제거
+        while self._global_bytes > self.global_budget and self._cache:
+            self._drop_cached(next(iter(self._cache)))
+            self._evictions += 1
+
+    def _drop_cached(self, handle):
+        entry = self._cache.pop(handle, None)
+        if entry:
+            session_id, _, size = entry
+            self._session_bytes[session_id] -= size
+            self._global_bytes -= size
+
+    def _drop_session(self, session_id):
+        for handle in [h for h, (sid, _, _) in self._cache.items() if sid == session_id]:
+            self._drop_cached(handle)
+        self._session_bytes.pop(session_id, None)
+        self._last_seen.pop(session_id, None)
+        for path in self._files.pop(session_id, ()):
+            remove_upload(path)
@@ -1 +1,429 @@
-# summary_store.py - 모듈 구현 내용 포함
\ No newline at end of file
+# summary_store.py - 분석 결과 영구 저장소 (SQLite WAL, 문서 해시 + 제공자 키)
+#
+# 페이지별 추출 텍스트와 분석 결과는 FTS5 전문 색인(trigram 토크나이저: 띄어쓰기·조사와 무관하게 글자 3개 단위로
+# 색인하여 한글 기관명/계약번호의 부분 문자열도 검색)에 함께 넣어 문서를 저장할 때마다 바로 갱신
+# 3글자 미만 검색어는 trigram으로 찾을 수 없어 LIKE로 조건을 추가 (SQLite 3.34 이상, 없으면 검색만 비활성화)
+import hashlib
+import os
+import re
+import sqlite3
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+from modules.analysis_model import load_analysis
+from modules.text_cleaner import split_pages
+
+DEFAULT_DATA_DIR = os.environ.get('HANGULPDF_DATA_DIR', os.path.expanduser('~/.hangulpdf'))
+DEFAULT_DB_PATH = os.path.join(DEFAULT_DATA_DIR, 'summaries.db')
+
+COMPRESSION_LEVEL = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_hash TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    doc_type TEXT,
+    pages INTEGER,
+    text_length INTEGER,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    extracted_text BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents(filename);
+CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents(created_at, doc_hash);
+CREATE INDEX IF NOT EXISTS idx_documents_doc_type ON documents(doc_type, created_at);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    doc_hash TEXT NOT NULL REFERENCES documents(doc_hash) ON DELETE CASCADE,
+    provider TEXT NOT NULL,
+    model TEXT,
+    created_at TEXT NOT NULL,
+    summary BLOB NOT NULL,
+    PRIMARY KEY (doc_hash, provider)
+) WITHOUT ROWID;
+"""
+
+# 전문 검색 색인 (search_rows가 본문, search_index는 외부 내용 FTS5 색인으로 트리거가 함께 갱신)
+SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_rows (
+    id INTEGER PRIMARY KEY,
+    doc_hash TEXT NOT NULL REFERENCES documents(doc_hash) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    page INTEGER,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_rows_doc ON search_rows(doc_hash, source);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    text, content='search_rows', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS search_rows_insert AFTER INSERT ON search_rows BEGIN
+    INSERT INTO search_index(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS search_rows_delete AFTER DELETE ON search_rows BEGIN
+    INSERT INTO search_index(search_index, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+PAGE_SOURCE = 'page'       # search_rows.source: 'page'(추출 텍스트) 또는 분석 제공자('chatgpt' 등)
+TRIGRAM_MIN_CHARS = 3      # 이보다 짧은 검색어는 LIKE로 찾음
+SNIPPET_CHARS = 60         # 검색 결과 미리보기에서 검색어 앞뒤로 보여줄 글자 수
+
+_PAGE_NUMBER_RE = re.compile(r'\d+')
+
+# 문서 유형 추정용 키워드 (본문 앞부분 출현 빈도 기준)
+DOCUMENT_TYPE_KEYWORDS = {
+    '회의록': ('회의록', '참석자', '안건', '회의 결과'),
+    '계획안': ('계획안', '추진계획', '추진 계획', '세부 계획'),
+    '제안서': ('제안서', '제안 배경', '제안 내용', '기대 효과'),
+    '계약문서': ('계약서', '계약 조건', '계약금액', '발주', '공정'),
+    '정책문서': ('정책', '시행', '고시', '법령', '지침'),
+    '보고서': ('보고서', '결과 보고', '분석 결과', '결론'),
+}
+
+
+def document_hash(pdf_bytes):
+    """원본 PDF 내용 기반 문서 해시"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """파일을 나눠 읽어 document_hash와 같은 해시 계산"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def guess_document_type(text, sample_chars=5000):
+    """본문 앞부분의 키워드 빈도로 문서 유형 추정"""
+    sample = text[:sample_chars]
+    scores = {
+        doc_type: sum(sample.count(keyword) for keyword in keywords)
+        for doc_type, keywords in DOCUMENT_TYPE_KEYWORDS.items()
+    }
+    doc_type, score = max(scores.items(), key=lambda item: item[1])
+    return doc_type if score else '기타'
+
+
+def compress_text(text):
+    """UTF-8 텍스트를 zlib으로 압축"""
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_text(blob):
+    """compress_text의 역변환"""
+    return zlib.decompress(blob).decode('utf-8') if blob is not None else None
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def page_rows(extracted_text):
+    """추출 텍스트를 페이지 마커로 나눠 [(페이지 번호, 본문)] (마커 앞 본문은 페이지 번호 None)"""
+    rows = []
+    for marker, body in split_pages(extracted_text):
+        body = body.strip()
+        if body:
+            match = _PAGE_NUMBER_RE.search(marker)
+            rows.append((int(match.group()) if match else None, body))
+    return rows
+
+
+def analysis_text(analysis):
+    """색인할 분석 결과 본문 (마크다운 꾸밈 없이 블록 텍스트를 줄마다)"""
+    return '\n'.join(text for _, text in analysis.blocks())
+
+
+def search_terms(query):
+    """검색어를 공백으로 나눠 (FTS5 MATCH 식 또는 None, LIKE로 찾을 짧은 검색어 목록, 전체 검색어 목록)"""
+    terms = list(dict.fromkeys(query.split()))
+    phrases = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= TRIGRAM_MIN_CHARS]
+    short_terms = [term for term in terms if len(term) < TRIGRAM_MIN_CHARS]
+    return (' AND '.join(phrases) or None), short_terms, terms
+
+
+def _like_pattern(term):
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def make_snippet(text, terms, width=SNIPPET_CHARS):
+    """첫 검색어 위치 앞뒤 width 글자 미리보기 (검색어는 **굵게**, 줄바꿈은 공백)"""
+    lowered = text.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [position for position in positions if position >= 0]
+    start = max(0, min(positions) - width) if positions else 0
+    end = min(len(text), (min(positions) if positions else 0) + width * 2)
+    snippet = ' '.join(text[start:end].split())
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.I)
+    snippet = pattern.sub(lambda match: f"**{match.group()}**", snippet) if terms else snippet
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+class SummaryStore:
+    """문서/분석 결과 저장소
+
+    연결은 호출마다 새로 열어 Streamlit 스크립트 스레드 간에 공유하지 않음
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+        self.search_available = self._init_search()
+
+    def _init_search(self):
+        """전문 검색 색인 준비 (색인이 없던 저장소면 저장된 문서로 채움), FTS5 trigram을 쓸 수 없으면 False"""
+        try:
+            with self._connect() as conn:
+                existed = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_rows'"
+                ).fetchone()
+                conn.executescript(SEARCH_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+        if not existed:
+            self.rebuild_search_index()
+        return True
+
+    def _index_rows(self, conn, doc_hash, source, rows):
+        """문서 하나의 source 색인 행을 rows [(페이지, 본문)]로 교체"""
+        conn.execute('DELETE FROM search_rows WHERE doc_hash = ? AND source = ?', (doc_hash, source))
+        conn.executemany(
+            'INSERT INTO search_rows (doc_hash, source, page, text) VALUES (?, ?, ?, ?)',
+            [(doc_hash, source, page, text) for page, text in rows]
+        )
+
+    def rebuild_search_index(self):
+        """저장된 모든 문서/분석 결과로 전문 검색 색인을 다시 만듦, 색인한 문서 수 반환"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM search_rows')
+            conn.execute("INSERT INTO search_index(search_index) VALUES ('rebuild')")
+            documents = conn.execute('SELECT doc_hash, extracted_text FROM documents').fetchall()
+            for row in documents:
+                self._index_rows(conn, row['doc_hash'], PAGE_SOURCE, page_rows(decompress_text(row['extracted_text']) or ''))
+            for row in conn.execute('SELECT doc_hash, provider, model, summary FROM analyses').fetchall():
+                analysis = load_analysis(decompress_text(row['summary']), row['provider'], row['model'] or '')
+                self._index_rows(conn, row['doc_hash'], row['provider'], [(None, analysis_text(analysis))])
+            conn.execute("INSERT INTO search_index(search_index) VALUES ('optimize')")
+        return len(documents)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_document(self, doc_hash, filename, extracted_text, pages=None, doc_type=None):
+        """문서 메타데이터와 추출 텍스트 저장 (같은 해시는 갱신)
+
+        같은 PDF라도 변환 옵션(OCR, 레이아웃, 추출 엔진, 정리)이 달라 본문이 바뀌면
+        이전 본문으로 만든 분석 결과는 재사용하지 않도록 삭제
+        """
+        now = _now()
+        doc_type = doc_type or guess_document_type(extracted_text)
+        blob = compress_text(extracted_text)
+        with self._connect() as conn:
+            # 같은 입력과 압축 수준이면 압축 결과도 같으므로 압축된 본문끼리 비교
+            row = conn.execute('SELECT extracted_text FROM documents WHERE doc_hash = ?', (doc_hash,)).fetchone()
+            if row is not None and row['extracted_text'] != blob:
+                conn.execute('DELETE FROM analyses WHERE doc_hash = ?', (doc_hash,))
+                if self.search_available:
+                    conn.execute('DELETE FROM search_rows WHERE doc_hash = ? AND source != ?', (doc_hash, PAGE_SOURCE))
+            conn.execute(
+                """
+                INSERT INTO documents
+                    (doc_hash, filename, doc_type, pages, text_length, created_at, updated_at, extracted_text)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(doc_hash) DO UPDATE SET
+                    filename = excluded.filename,
+                    doc_type = excluded.doc_type,
+                    pages = excluded.pages,
+                    text_length = excluded.text_length,
+                    updated_at = excluded.updated_at,
+                    extracted_text = excluded.extracted_text
+                """,
+                (doc_hash, filename, doc_type, pages, len(extracted_text), now, now, blob)
+            )
+            if self.search_available:
+                self._index_rows(conn, doc_hash, PAGE_SOURCE, page_rows(extracted_text))
+        return doc_type
+
+    def save_analysis(self, doc_hash, provider, analysis):
+        """제공자별 분석 결과(modules/analysis_model.py Analysis)를 구조화 JSON으로 저장"""
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO analyses (doc_hash, provider, model, created_at, summary)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (doc_hash, provider, analysis.model or None, _now(), compress_text(analysis.to_json()))
+            )
+            if self.search_available:
+                self._index_rows(conn, doc_hash, provider, [(None, analysis_text(analysis))])
+
+    def get_document(self, doc_hash, include_text=True):
+        """문서 메타데이터 (include_text이면 추출 텍스트 포함) 조회"""
+        columns = 'doc_hash, filename, doc_type, pages, text_length, created_at, updated_at'
+        if include_text:
+            columns += ', extracted_text'
+        with self._connect() as conn:
+            row = conn.execute(f'SELECT {columns} FROM documents WHERE doc_hash = ?', (doc_hash,)).fetchone()
+        if row is None:
+            return None
+        document = dict(row)
+        if include_text:
+            document['extracted_text'] = decompress_text(document['extracted_text'])
+        return document
+
+    def get_analyses(self, doc_hash):
+        """문서의 제공자별 분석 결과 {provider: Analysis} (이전 버전의 마크다운 기록은 본문만 있는 Analysis)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT provider, model, summary FROM analyses WHERE doc_hash = ?', (doc_hash,)
+            ).fetchall()
+        return {
+            row['provider']: load_analysis(decompress_text(row['summary']), row['provider'], row['model'] or '')
+            for row in rows
+        }
+
+    def get_analysis(self, doc_hash, provider):
+        """특정 제공자의 분석 결과 Analysis (없으면 None)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT model, summary FROM analyses WHERE doc_hash = ? AND provider = ?', (doc_hash, provider)
+            ).fetchone()
+        return load_analysis(decompress_text(row['summary']), provider, row['model'] or '') if row else None
+
+    def list_documents(self, limit=20, cursor=None, filename=None, doc_type=None, since=None, until=None):
+        """최근 문서 목록 (압축 본문은 읽지 않음)
+
+        cursor는 이전 페이지 마지막 항목의 (created_at, doc_hash)로, OFFSET 없이 인덱스만 따라감
+        반환: (문서 목록, 다음 페이지 cursor 또는 None)
+        """
+        conditions = []
+        params = []
+        if filename:
+            # 접두어 검색을 범위 조건으로 바꿔 filename 인덱스를 사용
+            conditions.append('filename >= ? AND filename < ?')
+            params.extend([filename, filename + '\uffff'])
+        if doc_type:
+            conditions.append('doc_type = ?')
+            params.append(doc_type)
+        if since:
+            conditions.append('created_at >= ?')
+            params.append(since)
+        if until:
+            conditions.append('created_at < ?')
+            params.append(until)
+        if cursor:
+            conditions.append('(created_at, doc_hash) < (?, ?)')
+            params.extend(cursor)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        query = f"""
+            SELECT d.doc_hash, d.filename, d.doc_type, d.pages, d.text_length, d.created_at,
+                   (SELECT group_concat(provider) FROM analyses a WHERE a.doc_hash = d.doc_hash) AS providers
+            FROM documents d
+            {where}
+            ORDER BY created_at DESC, doc_hash DESC
+            LIMIT ?
+        """
+        with self._connect() as conn:
+            rows = conn.execute(query, (*params, limit + 1)).fetchall()
+
+        documents = []
+        for row in rows[:limit]:
+            document = dict(row)
+            document['providers'] = document['providers'].split(',') if document['providers'] else []
+            documents.append(document)
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = documents[-1]
+            next_cursor = (last['created_at'], last['doc_hash'])
+        return documents, next_cursor
+
+    def search(self, query, limit=20, doc_type=None, source=None):
+        """전체 문서 전문 검색, 페이지/분석 결과 단위 결과 목록
+
+        query: 공백으로 나눈 검색어를 모두 포함하는 행 (3글자 이상은 FTS5 trigram 색인, 짧은 검색어는 LIKE)
+        source: 'page'(추출 텍스트) 또는 제공자 이름으로 제한 (없으면 모두)
+        반환: [{'doc_hash', 'filename', 'doc_type', 'created_at', 'source', 'page', 'snippet'}]
+        (색인을 쓰면 BM25 관련도 순, LIKE만 쓰면 최근 문서 순)
+        """
+        match, short_terms, terms = search_terms(query or '')
+        if not terms or not self.search_available:
+            return []
+
+        conditions = []
+        params = []
+        if match:
+            conditions.append('search_index MATCH ?')
+            params.append(match)
+        for term in short_terms:
+            conditions.append("r.text LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(term))
+        if doc_type:
+            conditions.append('d.doc_type = ?')
+            params.append(doc_type)
+        if source:
+            conditions.append('r.source = ?')
+            params.append(source)
+
+        if match:
+            query_sql = f"""
+                SELECT r.doc_hash, r.source, r.page, r.text, d.filename, d.doc_type, d.created_at
+                FROM search_index
+                JOIN search_rows r ON r.id = search_index.rowid
+                JOIN documents d ON d.doc_hash = r.doc_hash
+                WHERE {' AND '.join(conditions)}
+                ORDER BY search_index.rank
+                LIMIT ?
+            """
+        else:
+            query_sql = f"""
+                SELECT r.doc_hash, r.source, r.page, r.text, d.filename, d.doc_type, d.created_at
+                FROM search_rows r
+                JOIN documents d ON d.doc_hash = r.doc_hash
+                WHERE {' AND '.join(conditions)}
+                ORDER BY d.created_at DESC, r.id
+                LIMIT ?
+            """
+        with self._connect() as conn:
+            rows = conn.execute(query_sql, (*params, limit)).fetchall()
+        return [
+            {
+                'doc_hash': row['doc_hash'],
+                'filename': row['filename'],
+                'doc_type': row['doc_type'],
+                'created_at': row['created_at'],
+                'source': row['source'],
+                'page': row['page'],
+                'snippet': make_snippet(row['text'], terms),
+            }
+            for row in rows
+        ]
+
+    def count_documents(self, doc_type=None):
+        """저장된 문서 수"""
+        with self._connect() as conn:
+            if doc_type:
+                return conn.execute('SELECT COUNT(*) FROM documents WHERE doc_type = ?', (doc_type,)).fetchone()[0]
+            return conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def delete_document(self, doc_hash):
+        """문서와 분석 결과 삭제"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM documents WHERE doc_hash = ?', (doc_hash,))
@@ -1 +1,233 @@
-# text_cleaner.py - 모듈 구현 내용 포함
\ No newline at end of file
+# text_cleaner.py - 추출 텍스트 정리 (NFC 정규화, 머리글/바닥글 제거, 줄 재결합)
+import re
+import unicodedata
+from collections import Counter
+
+# 페이지 구분 마커 (process_pdf_locally / extract_text_with_basic_ocr 형식)
+PAGE_MARKER_RE = re.compile(r'^(--- 페이지 \d+(?: \(OCR\))? ---)$', re.M)
+
+# 특수 공백/제어 문자 치환표 (해당 문자가 있을 때만 한 번에 치환)
+_REPLACEMENTS = {
+    '\u00a0': ' ',   # NBSP
+    '\u2002': ' ',
+    '\u2003': ' ',
+    '\u2009': ' ',
+    '\u3000': ' ',   # 전각 공백
+    '\t': ' ',
+    '\r': '',
+    '\u00ad': '',    # soft hyphen
+    '\u200b': '',    # zero width space
+    '\u200c': '',
+    '\u200d': '',
+    '\ufeff': '',    # BOM
+    '\x0c': '\n',    # form feed
+    '\ufb01': 'fi',
+    '\ufb02': 'fl',
+}
+_SPECIAL_CHAR_RE = re.compile('[' + ''.join(_REPLACEMENTS) + ']')
+
+_SPACE_RUN_RE = re.compile(r' {2,}')
+_TRAILING_SPACE_RE = re.compile(r' +\n|\n +')
+_BLANK_RUN_RE = re.compile(r'\n{3,}')
+_DIGITS_RE = re.compile(r'\d+')
+# 영문 하이픈 줄바꿈: "inter-\nnational" -> "international"
+_HYPHEN_BREAK_RE = re.compile(r'([A-Za-z])-\n([a-z])')
+# 끊긴 줄: 문장 종결(개조식 어미 포함)이 아닌 줄 끝 + 다음 줄이 목록/제목으로 시작하지 않음
+_LINE_BREAK_RE = re.compile(
+    r'(?<=[^\n.!?。:;)\]」』>다요음함임됨])\n'
+    r'(?=\S)(?![-•·○●□■◦▪※*①-⑳]|\d+[.)]|[가나다라마바사아자차카타파하][.)]|[IVX]+\.|#)'
+)
+# 표 행: 레이아웃 분석의 칸 구분(' | '), 숫자 칸 2개 이상, 숫자만 있는 줄, 넓은 공백/탭/|로 세 칸 이상 나뉜 줄
+_CELL_SEPARATOR = ' | '
+_NUMBER_CELL_RE = re.compile(r'(?<!\S)[-+]?\d[\d,.]*%?(?!\S)')
+_NUMBER_LINE_RE = re.compile(r'^[\d,.%()\-+~:/ ]+$')
+_CELL_SPLIT_RE = re.compile(r'\s{2,}|\t|\|')
+# 쪽 번호만 있는 줄: "3", "- 3 -", "(3)", "3 / 20", "p. 3"
+_PAGE_NUMBER_RE = re.compile(r'^(?:[-–—(\[]\s*)?\d{1,4}(?:\s*/\s*\d{1,4})?(?:\s*[-–—)\]])?$|^p\.?\s*\d{1,4}$', re.I)
+# 글자 단위로 끊긴 단어의 뒷부분: 홀로 쓰이지 않는 조사/어미("내에\n서", "하였\n다.")나 단어 첫 글자로 오지 않는 음절("수립하\n였다")
+_SPLIT_TAIL_RE = re.compile(
+    r'^(?:(?:[은는을를의에서로와과도만며고께]|까지|부터|에서|에게|으로|처럼|마다|라도)(?![가-힣])|다(?=[.,!?])|[였었았겠])'
+)
+# 숫자 뒤에 끊긴 단위("5\n월까지")
+_SPLIT_UNIT_RE = re.compile(r'^(?:년|월|일|시|분|초|개|명|건|원|회|차|층|호|세|쪽)')
+# 이보다 짧은 줄(페이지에서 긴 줄 너비 대비)은 제목/목록 등 의도된 줄바꿈으로 보고 잇지 않음
+FULL_LINE_RATIO = 0.75
+
+
+def normalize_text(text):
+    """NFC 정규화 및 공백/제어 문자 정리"""
+    # 분리된 자모(NFD)로 추출된 한글을 완성형 음절로 합침
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    if _SPECIAL_CHAR_RE.search(text):
+        text = _SPECIAL_CHAR_RE.sub(lambda m: _REPLACEMENTS[m.group()], text)
+    text = _SPACE_RUN_RE.sub(' ', text)
+    text = _TRAILING_SPACE_RE.sub('\n', text)
+    return text
+
+
+def estimate_tokens(text):
+    """LLM 토큰 수 대략 추정 (한글 음절 약 1토큰, 그 외 약 4글자당 1토큰)"""
+    # 한글 음절은 UTF-8 3바이트이므로 바이트 수 차이로 개수를 빠르게 계산
+    wide = (len(text.encode('utf-8')) - len(text)) // 2
+    narrow = len(text) - wide - text.count(' ') - text.count('\n')
+    return wide + max(narrow, 0) // 4
+
+
+def split_pages(text):
+    """페이지 마커 기준으로 (마커, 본문) 목록 분리"""
+    parts = PAGE_MARKER_RE.split(text)
+    pages = []
+    if parts[0].strip():
+        pages.append(('', parts[0]))
+    for i in range(1, len(parts), 2):
+        pages.append((parts[i], parts[i + 1]))
+    return pages
+
+
+def _edge_lines(lines, depth):
+    """페이지 상단/하단의 비어 있지 않은 줄 인덱스"""
+    indexes = [i for i, line in enumerate(lines) if line.strip()]
+    if len(indexes) <= depth * 2:
+        return indexes
+    return indexes[:depth] + indexes[-depth:]
+
+
+def _line_key(line, short_line=20):
+    """머리글/바닥글 비교 키 (쪽번호처럼 짧은 줄은 숫자 차이를 무시)"""
+    line = line.strip()
+    masked = _DIGITS_RE.sub('#', line)
+    if len(masked) <= short_line:
+        return masked
+    return line
+
+
+def find_repeated_lines(page_lines, depth=3, min_ratio=0.5):
+    """여러 페이지의 상단/하단에 반복되는 머리글/바닥글 키 집합"""
+    if len(page_lines) < 3:
+        return set()
+
+    counter = Counter()
+    for lines in page_lines:
+        counter.update({_line_key(lines[i]) for i in _edge_lines(lines, depth)})
+
+    threshold = max(2, int(len(page_lines) * min_ratio))
+    return {key for key, count in counter.items() if count >= threshold and key}
+
+
+def _display_width(line):
+    """줄 너비 (한글 등 UTF-8 3바이트 글자는 2칸)"""
+    return len(line) + (len(line.encode('utf-8')) - len(line)) // 2
+
+
+def is_table_row(line):
+    """표 행으로 보이는 줄인지 (칸 구분 또는 숫자 칸)"""
+    line = line.strip()
+    if _CELL_SEPARATOR in line or len(_NUMBER_CELL_RE.findall(line)) >= 2:
+        return True
+    if _NUMBER_LINE_RE.match(line) and any(char.isdigit() for char in line):
+        return True
+    return len([cell for cell in _CELL_SPLIT_RE.split(line) if cell.strip()]) >= 3
+
+
+def line_stats(text, depth=2):
+    """페이지 텍스트의 줄 통계 {'line_count', 'table_lines'} (빈 줄, 페이지 마커, 위/아래 쪽 번호 줄 제외)"""
+    lines = [line.strip() for line in text.split('\n')]
+    lines = [line for line in lines if line and not PAGE_MARKER_RE.match(line)]
+    edges = set(_edge_lines(lines, depth))
+    lines = [line for index, line in enumerate(lines) if not (index in edges and _PAGE_NUMBER_RE.match(line))]
+    return {'line_count': len(lines), 'table_lines': sum(1 for line in lines if is_table_row(line))}
+
+
+def _is_hangul(char):
+    return '가' <= char <= '힣'
+
+
+def rejoin_lines(text):
+    """PDF 줄바꿈으로 끊긴 문장을 다시 연결
+
+    거의 꽉 찬 줄만 다음 줄과 공백으로 잇고, 표 행은 잇지 않음
+    다음 줄이 홀로 쓰이지 않는 조사/어미나 숫자 뒤 단위로 시작할 때만 글자 단위로 끊긴 단어로 보고 공백 없이 연결
+    """
+    text = _HYPHEN_BREAK_RE.sub(r'\1\2', text)
+    widths = sorted(_display_width(line) for line in text.split('\n') if line.strip() and not is_table_row(line))
+    if not widths:
+        return text
+    # 가장 긴 줄 대신 상위 10% 너비를 기준으로 삼아 단을 가로지르는 긴 줄 하나에 흔들리지 않게 함
+    full_width = widths[int(len(widths) * 0.9)] * FULL_LINE_RATIO
+
+    def join(match):
+        before = text[text.rfind('\n', 0, match.start()) + 1:match.start()]
+        end = text.find('\n', match.end())
+        after = text[match.end():end if end >= 0 else len(text)]
+        if _display_width(before) < full_width or is_table_row(before) or is_table_row(after):
+            return '\n'
+        if _is_hangul(before[-1]) and _SPLIT_TAIL_RE.match(after):
+            return ''
+        if before[-1].isdigit() and _SPLIT_UNIT_RE.match(after):
+            return ''
+        return ' '
+
+    return _LINE_BREAK_RE.sub(join, text)
+
+
+def clean_pages(page_texts, remove_headers=True, rejoin=True, depth=3, min_ratio=0.5):
+    """페이지별 텍스트 목록 정리, (정리된 목록, 제거된 줄 수) 반환"""
+    page_lines = [normalize_text(text).split('\n') for text in page_texts]
+
+    repeated = find_repeated_lines(page_lines, depth, min_ratio) if remove_headers else set()
+    removed = 0
+
+    cleaned = []
+    for lines in page_lines:
+        if repeated:
+            drop = {i for i in _edge_lines(lines, depth) if _line_key(lines[i]) in repeated}
+            removed += len(drop)
+            lines = [line for i, line in enumerate(lines) if i not in drop]
+
+        text = '\n'.join(lines).strip('\n')
+        if rejoin:
+            text = rejoin_lines(text)
+        cleaned.append(_BLANK_RUN_RE.sub('\n\n', text))
+
+    return cleaned, removed
+
+
+def clean_text(text, remove_headers=True, rejoin=True):
+    """페이지 마커가 포함된 추출 텍스트 전체 정리 및 감소량 통계 반환"""
+    pages = split_pages(text)
+    cleaned, removed = clean_pages(
+        [body for _, body in pages],
+        remove_headers=remove_headers,
+        rejoin=rejoin
+    )
+
+    parts = []
+    for (marker, _), body in zip(pages, cleaned):
+        if marker:
+            parts.append(f"\n{marker}\n")
+        parts.append(body + "\n")
+    cleaned_text = ''.join(parts)
+
+    return {
+        'text': cleaned_text,
+        'stats': cleaning_stats(text, cleaned_text, removed)
+    }
+
+
+def cleaning_stats(before, after, removed_lines=0):
+    """정리 전후 글자 수/토큰 수 비교"""
+    chars_before = len(before)
+    chars_after = len(after)
+    tokens_before = estimate_tokens(before)
+    tokens_after = estimate_tokens(after)
+
+    return {
+        'chars_before': chars_before,
+        'chars_after': chars_after,
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'removed_lines': removed_lines,
+        'char_reduction': 1 - chars_after / chars_before if chars_before else 0.0,
+        'token_reduction': 1 - tokens_after / tokens_before if tokens_before else 0.0
+    }
@@ -0,0 +1,241 @@
+# token_budget.py - LLM 호출 전 토큰 계산과 예산 맞추기 (저가치 내용 압축, 예산을 넘는 문서는 분할 분석 계획)
+#
+# 토큰 수는 tiktoken이 있으면 모델 인코딩으로 정확히 세고, 없으면 text_cleaner.estimate_tokens로 추정하며
+# 추정치를 쓸 때는 예산에 여유분(HEURISTIC_MARGIN)을 둠
+# 예산을 넘으면 공백 → 반복 머리글/바닥글 → 페이지 마커 → 중복 줄 순서로 압축하고, 그래도 넘으면 분할(chunked) 계획
+import os
+import re
+
+from modules.lazy_import import is_installed, load
+from modules.text_cleaner import PAGE_MARKER_RE, clean_text, estimate_tokens
+
+TIKTOKEN_AVAILABLE = is_installed('tiktoken')
+
+# 모델별 컨텍스트 길이 (토큰)
+MODEL_CONTEXT_TOKENS = {
+    'gpt-3.5-turbo': 16385,
+    'gpt-4o-mini': 128000,
+    'gpt-4o': 128000,
+    'gemini-2.0-flash': 1048576,
+    'gemini-1.5-flash': 1048576,
+    'gemini-1.5-pro': 2097152,
+    'grok-3-mini': 131072,
+    'grok-3': 131072,
+    'grok-2-1212': 131072,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력) - 비용 추정용
+MODEL_PRICES = {
+    'gpt-3.5-turbo': (0.50, 1.50),
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gemini-2.0-flash': (0.10, 0.40),
+    'gemini-1.5-flash': (0.075, 0.30),
+    'gemini-1.5-pro': (1.25, 5.00),
+    'grok-3-mini': (0.30, 0.50),
+    'grok-3': (3.00, 15.00),
+    'grok-2-1212': (2.00, 10.00),
+}
+
+# 분석 호출 하나에 보낼 입력 토큰 한도 (프롬프트 포함, 컨텍스트 길이보다 작으면 이 값 사용)
+ANALYSIS_TOKEN_BUDGET = int(os.environ.get('HANGULPDF_ANALYSIS_TOKEN_BUDGET', '12000'))
+HEURISTIC_MARGIN = 0.2      # 추정 토큰 수를 쓸 때 예산에서 남겨 둘 비율
+CHUNK_SUMMARY_TOKENS = 800  # 분할 분석에서 부분 요약 하나의 출력 토큰
+
+_BLANK_RUN_RE = re.compile(r'\n{3,}')
+_SPACE_RUN_RE = re.compile(r'[ \t]{2,}')
+_PAGE_NUMBER_RE = re.compile(r'\d+')
+_OCR_SECTION = '=== OCR 추가 텍스트 ==='
+DUPLICATE_MIN_CHARS = 10    # 이보다 짧은 줄(표 숫자 등)은 중복이어도 남김
+
+_encodings = {}  # 모델 -> tiktoken 인코딩 (불러오지 못하면 None)
+
+
+def _encoding(model):
+    if model not in _encodings:
+        encoding = None
+        tiktoken = load('tiktoken') if TIKTOKEN_AVAILABLE else None
+        if tiktoken is not None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception:
+                encoding = None  # 인코딩 파일을 받을 수 없는 환경 (오프라인)
+        _encodings[model] = encoding
+    return _encodings[model]
+
+
+def is_exact(model):
+    """model의 토큰 수를 토크나이저로 정확히 세는지"""
+    return _encoding(model) is not None
+
+
+def count_tokens(text, model='gpt-3.5-turbo'):
+    """text의 토큰 수 (tiktoken이 없으면 추정)"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def context_tokens(model):
+    return MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """예상 비용 (USD, 가격을 모르는 모델이면 None)"""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def _collapse_whitespace(text):
+    text = _SPACE_RUN_RE.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return _BLANK_RUN_RE.sub('\n\n', text)
+
+
+def _remove_repeated_lines(text):
+    """페이지마다 반복되는 머리글/바닥글 제거 (줄 재결합은 하지 않음)"""
+    return clean_text(text, remove_headers=True, rejoin=False)['text']
+
+
+def _shorten_page_markers(text):
+    """'--- 페이지 12 ---' → '[p12]' (어느 페이지 내용인지는 남김)"""
+    def shorten(match):
+        return f"[p{_PAGE_NUMBER_RE.search(match.group()).group()}]"
+    return PAGE_MARKER_RE.sub(shorten, text).replace(_OCR_SECTION, '[OCR]')
+
+
+def _drop_duplicate_lines(text):
+    """문서 전체에서 똑같이 반복되는 긴 줄(표 머리글, 상투 문구)은 처음 한 번만 남김"""
+    seen = set()
+    lines = []
+    for line in text.split('\n'):
+        if len(line) >= DUPLICATE_MIN_CHARS:
+            if line in seen:
+                continue
+            seen.add(line)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+# 압축 단계 (앞 단계일수록 정보 손실이 적음)
+COMPACTION_STEPS = (
+    ('whitespace', _collapse_whitespace),
+    ('headers', _remove_repeated_lines),
+    ('page_markers', _shorten_page_markers),
+    ('duplicates', _drop_duplicate_lines),
+)
+
+
+def compact_text(text, limit, model='gpt-3.5-turbo'):
+    """limit 토큰 안에 들 때까지 압축 단계를 차례로 적용, (텍스트, 토큰 수, 적용한 단계) 반환"""
+    tokens = count_tokens(text, model)
+    steps = []
+    for name, step in COMPACTION_STEPS:
+        if tokens <= limit:
+            break
+        text = step(text)
+        tokens = count_tokens(text, model)
+        steps.append(name)
+    return text, tokens, steps
+
+
+def _split_units(text):
+    """페이지 마커(압축된 [p12] 포함) 앞에서 나눈 분할 단위"""
+    units = []
+    for page in re.split(r'(?=^(?:--- 페이지 \d+|\[p\d+\]))', text, flags=re.M):
+        if page.strip():
+            units.append(page)
+    return units
+
+
+def chunk_text(text, limit, model='gpt-3.5-turbo'):
+    """limit 토큰 이하 청크 목록 (페이지 경계를 우선으로, 긴 페이지는 단락/줄 단위로 나눔)"""
+    chunks = []
+    buffer = []
+    buffer_tokens = 0
+
+    def flush():
+        nonlocal buffer, buffer_tokens
+        if buffer:
+            chunks.append(''.join(buffer))
+        buffer, buffer_tokens = [], 0
+
+    def add(piece, separators):
+        nonlocal buffer_tokens
+        tokens = count_tokens(piece, model)
+        if tokens > limit:
+            if separators:
+                parts = piece.split(separators[0])
+                for index, part in enumerate(parts):
+                    add(part + (separators[0] if index < len(parts) - 1 else ''), separators[1:])
+                return
+            # 줄 하나가 한도를 넘으면 글자 수 비율로 자름
+            size = max(1, len(piece) * limit // tokens)
+            for start in range(0, len(piece), size):
+                add(piece[start:start + size], ())
+            return
+        if buffer_tokens + tokens > limit:
+            flush()
+        buffer.append(piece)
+        buffer_tokens += tokens
+
+    for unit in _split_units(text):
+        add(unit, ('\n\n', '\n'))
+    flush()
+    return chunks
+
+
+def _input_limit(model, budget, max_output_tokens, exact):
+    """호출 하나의 입력 토큰 한도 (출력 토큰 자리를 뺀 컨텍스트와 예산 중 작은 값, 추정이면 여유분 제외)"""
+    limit = min(budget, context_tokens(model) - max_output_tokens)
+    return limit if exact else int(limit * (1 - HEURISTIC_MARGIN))
+
+
+def plan_analysis(text, prompt, model='gpt-3.5-turbo', max_output_tokens=4000, budget=ANALYSIS_TOKEN_BUDGET,
+                  chunk_prompt=''):
+    """분석 호출 계획
+
+    반환: {'strategy': 'single' | 'chunked', 'model', 'text' (single), 'chunks', 'chunk_limit' (chunked),
+           'original_tokens', 'tokens', 'limit', 'steps', 'exact', 'estimated_prompt_tokens', 'estimated_cost_usd'}
+    prompt/chunk_prompt: 문서 앞에 붙는 지시문 (토큰 수에 포함)
+    """
+    exact = is_exact(model)
+    text_limit = max(1, _input_limit(model, budget, max_output_tokens, exact) - count_tokens(prompt, model))
+
+    original_tokens = count_tokens(text, model)
+    compacted, tokens, steps = compact_text(text, text_limit, model)
+    plan = {
+        'model': model,
+        'original_tokens': original_tokens,
+        'tokens': tokens,
+        'limit': text_limit,
+        'steps': steps,
+        'exact': exact,
+        'max_output_tokens': max_output_tokens,
+    }
+
+    if tokens <= text_limit:
+        plan['strategy'] = 'single'
+        plan['text'] = compacted
+        prompt_tokens = count_tokens(prompt, model) + tokens
+        completion_tokens = max_output_tokens
+    else:
+        # 부분 요약(map) 후 요약들로 최종 분석(reduce)
+        chunk_limit = max(1, _input_limit(model, budget, CHUNK_SUMMARY_TOKENS, exact) - count_tokens(chunk_prompt, model))
+        chunks = chunk_text(compacted, chunk_limit, model)
+        plan['strategy'] = 'chunked'
+        plan['chunks'] = chunks
+        plan['chunk_limit'] = chunk_limit
+        prompt_tokens = (count_tokens(chunk_prompt, model) * len(chunks) + tokens
+                         + count_tokens(prompt, model) + CHUNK_SUMMARY_TOKENS * len(chunks))
+        completion_tokens = CHUNK_SUMMARY_TOKENS * len(chunks) + max_output_tokens
+
+    plan['estimated_prompt_tokens'] = prompt_tokens
+    plan['estimated_cost_usd'] = estimate_cost(model, prompt_tokens, completion_tokens)
+    return plan
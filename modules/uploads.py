@@ -0,0 +1,76 @@
+# uploads.py - 업로드 PDF 디스크 스풀 (원본을 한 번만 복사하고 이후에는 경로로 전달)
+import hashlib
+import os
+import sys
+import tempfile
+
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'hangulpdf_uploads')
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024  # file_uploader 안내와 동일한 200MB
+
+
+def _iter_chunks(file_obj):
+    """업로드 객체를 복사 없이 청크 단위로 순회 (BytesIO면 내부 버퍼의 memoryview 사용)"""
+    if hasattr(file_obj, 'getbuffer'):
+        view = file_obj.getbuffer()
+        try:
+            for start in range(0, len(view), CHUNK_SIZE):
+                yield view[start:start + CHUNK_SIZE]
+        finally:
+            view.release()
+    else:
+        file_obj.seek(0)
+        for chunk in iter(lambda: file_obj.read(CHUNK_SIZE), b''):
+            yield chunk
+
+
+def spool_upload(file_obj, suffix='.pdf', upload_dir=UPLOAD_DIR, max_bytes=MAX_UPLOAD_BYTES):
+    """업로드 파일을 임시 파일로 저장하면서 해시 계산, (경로, sha256, 크기) 반환
+
+    max_bytes를 넘으면 ValueError
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=upload_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in _iter_chunks(file_obj):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f'파일 크기가 제한({max_bytes // (1024 * 1024)}MB)을 초과했습니다.')
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    return path, digest.hexdigest(), size
+
+
+def remove_upload(path):
+    """스풀 파일 삭제 (이미 없으면 무시)"""
+    if path:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def estimate_memory(obj, _seen=None):
+    """객체가 참조하는 문자열/바이트/컨테이너의 대략적인 메모리 사용량(바이트)"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_memory(key, _seen) + estimate_memory(value, _seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_memory(item, _seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += estimate_memory(vars(obj), _seen)
+    return size
@@ -1,99 +1,53 @@
 import streamlit as st
-import requests
+import functools
 import json
+import logging
 import os
-from io import BytesIO
-import base64
 import time
 import re
-import zipfile
+import threading
 from datetime import datetime
-import tempfile
 
-# OCR 및 이미지 처리를 위한 라이브러리
-try:
-    import pytesseract
-    from pdf2image import convert_from_bytes
-    from PIL import Image, ImageEnhance, ImageFilter
-    import cv2
-    import numpy as np
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-
-# PDF 처리를 위한 라이브러리
-try:
-    import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-
-# PDF 생성을 위한 라이브러리들
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.lib.enums import TA_LEFT, TA_CENTER
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-
-try:
-    import weasyprint
-    from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
-
-try:
-    from fpdf import FPDF
-    FPDF_AVAILABLE = True
-except ImportError:
-    FPDF_AVAILABLE = False
-
-try:
-    import markdown2
-    MARKDOWN_AVAILABLE = True
-except ImportError:
-    MARKDOWN_AVAILABLE = False
-
-# 한글 폰트 설정 (TTF 파일만 사용)
-KOREAN_FONTS = [
-    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
-    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
-    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-    '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf'
-]
-
-# TTF 폰트만 찾기 (TTC 파일 제외)
-TTF_FONTS = [
-    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-    '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
-    '/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf'
-]
-
-def find_korean_font():
-    """사용 가능한 한글 폰트 찾기 (TTF 우선)"""
-    # TTF 폰트 우선 검색
-    for font_path in TTF_FONTS:
-        if os.path.exists(font_path):
-            return font_path
-    
-    # 한글 폰트 검색
-    for font_path in KOREAN_FONTS:
-        if os.path.exists(font_path):
-            return font_path
-    return None
+from modules.artifact_store import ArtifactStore
+from modules.chat_client import ChatError
+from modules.drive_uploader import DriveExport, get_uploader, pending_exports, resume_exports
+from modules.converter import (
+    OCR_AVAILABLE,
+    PDF_AVAILABLE,
+    available_backends,
+    convert_pdf,
+    join_pages,
+    open_ocr_checkpoint,
+    page_marker
+)
+from modules.gpt_qa import answer_question, build_qa_index
+from modules.gpt_summary import (
+    PROVIDERS,
+    available_providers,
+    build_analysis_prompt,
+    build_grok_prompt,
+    is_analysis_error,
+    run_analyses
+)
+from modules.jobs import CANCELLED, DONE, FAILED, FINISHED_STATES, QUEUED, JobCancelled, JobQueue
+from modules.metrics import REGISTRY, start_metrics_server
+from modules.ocr_checkpoint import OCRCheckpoint
+from modules.profiling import PROFILE_THRESHOLD_SECONDS
+from modules.report_pdf import (
+    FPDF_AVAILABLE,
+    REPORTLAB_AVAILABLE,
+    WEASYPRINT_AVAILABLE,
+    create_analysis_zip,
+    find_korean_font,
+    find_ttf_font
+)
+from modules.scheduler import get_scheduler
+from modules.session_artifacts import ArtifactExpired, SessionArtifactManager
+from modules.summary_store import SummaryStore
+from modules.uploads import MAX_UPLOAD_BYTES, estimate_memory, remove_upload, spool_upload
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
-def find_ttf_font():
-    """TTF 폰트만 찾기 (ReportLab용)"""
-    for font_path in TTF_FONTS:
-        if os.path.exists(font_path):
-            return font_path
-    return None
+logger = logging.getLogger(__name__)
 
 # 진행률 표시를 위한 함수 (타이머 제거)
 def show_progress(progress_text, progress_value):
@@ -103,856 +57,420 @@ def show_progress(progress_text, progress_value):
     status_text.text(progress_text)
     return progress_bar, status_text
 
-# AI 모델별 자동 분석 함수
-def analyze_with_chatgpt(text, api_key):
-    """ChatGPT API를 사용한 자동 분석"""
+# 모듈 알림을 Streamlit 메시지로 표시
+def st_notify(level, message):
+    """report_pdf 등 모듈의 notify 콜백"""
+    getattr(st, level)(message)
+
+# 분석 결과 영구 저장소 (서버 프로세스당 하나)
+@st.cache_resource
+def get_summary_store():
+    """SQLite 분석 결과 저장소"""
+    return SummaryStore()
+
+# Google Drive 업로더 (서버 프로세스당 하나, 설정이 없으면 None)
+@st.cache_resource
+def get_drive_uploader():
+    """Drive 업로더, 이전 실행에서 중단된 내보내기는 백그라운드에서 이어서 업로드"""
     try:
-        prompt = f"""다음 한글 문서를 AI가 자동 분석한 뒤, 문서 유형과 주요 내용을 파악하여 다음 항목들을 포함한 요약 및 구조화된 분석 결과를 생성해주세요.
-
-1. 📂 문서 기본 정보:
-   - 문서 제목 또는 추정 제목
-   - 작성 날짜 또는 추정 시점
-   - 작성 주체 또는 관련 기관/담당자 추정
-   - 문서 목적(정책 문서/보고서/계획안/회의록/제안서 등) 자동 분류
-
-2. 🧩 문서 구조 분석:
-   - 목차 또는 섹션 구성 추정
-   - 각 섹션별 요약 (3줄 이내)
-   - 표, 그림, 도표가 포함된 경우 해당 내용 요약
-
-3. 🧠 핵심 내용 요약 및 인사이트:
-   - 전체 문서의 핵심 주제 및 주요 주장 요약 (5줄 이내)
-   - 자주 등장하는 키워드 및 핵심 개념(빈도 분석 포함)
-   - 문서 내 등장하는 중요한 수치, 날짜, 고유명사(인물, 기관 등) 추출
-   - 중요한 결정사항, 요청사항, 일정, 액션 아이템 자동 분리
-
-4. 🛠️ 문서 유형별 특화 분석 (자동 판단하여 포함):
-   - ✅ 기획안/제안서: 핵심 아이디어, 제안 배경, 기대 효과 요약
-   - ✅ 회의록: 참석자, 주요 논의사항, 결정사항 및 후속 조치 정리
-   - ✅ 정책/행정문서: 정책 목적, 대상, 추진 전략 및 일정 요약
-   - ✅ 공사/계약문서: 계약 조건, 공정 일정, 이해관계자 분석
-   - ✅ 보고서: 분석 대상, 방법, 결론 및 제언 구분
-
-5. 🔍 오류 및 주의요소 감지:
-   - 문서 내 날짜 오류, 논리 비약, 누락 정보 자동 감지
-   - 문맥상 혼란을 줄 수 있는 표현 또는 오탈자 추정
-
-6. 🧾 결과 요약 형식:
-   - 마크다운(.md) 형식으로 요약 결과 제공
-   - 제목, 소제목, 목록 등을 구조적으로 제공
-
-문서를 사람이 읽지 않고도 전체적 흐름과 인사이트를 파악할 수 있도록 분석해주세요.
-
----
-
-{text}"""
-
-        headers = {
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            'model': 'gpt-3.5-turbo',
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'max_tokens': 4000,
-            'temperature': 0.7
-        }
-        
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers=headers,
-            json=data,
-            timeout=60
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result['choices'][0]['message']['content']
-        else:
-            return f"ChatGPT API 오류: {response.status_code} - {response.text}"
-            
-    except Exception as e:
-        return f"ChatGPT 분석 중 오류: {str(e)}"
-
-def analyze_with_gemini(text, api_key):
-    """Gemini API를 사용한 자동 분석 (시뮬레이션)"""
+        service_json = st.secrets.get('GDRIVE_SERVICE_JSON')
+    except Exception:
+        service_json = None  # secrets.toml 없음
     try:
-        prompt = f"""다음 한글 문서를 AI가 자동 분석한 뒤, 문서 유형과 주요 내용을 파악하여 다음 항목들을 포함한 요약 및 구조화된 분석 결과를 생성해주세요.
-
-1. 📂 문서 기본 정보:
-   - 문서 제목 또는 추정 제목
-   - 작성 날짜 또는 추정 시점
-   - 작성 주체 또는 관련 기관/담당자 추정
-   - 문서 목적(정책 문서/보고서/계획안/회의록/제안서 등) 자동 분류
-
-2. 🧩 문서 구조 분석:
-   - 목차 또는 섹션 구성 추정
-   - 각 섹션별 요약 (3줄 이내)
-   - 표, 그림, 도표가 포함된 경우 해당 내용 요약
-
-3. 🧠 핵심 내용 요약 및 인사이트:
-   - 전체 문서의 핵심 주제 및 주요 주장 요약 (5줄 이내)
-   - 자주 등장하는 키워드 및 핵심 개념(빈도 분석 포함)
-   - 문서 내 등장하는 중요한 수치, 날짜, 고유명사(인물, 기관 등) 추출
-   - 중요한 결정사항, 요청사항, 일정, 액션 아이템 자동 분리
-
-4. 🛠️ 문서 유형별 특화 분석 (자동 판단하여 포함):
-   - ✅ 기획안/제안서: 핵심 아이디어, 제안 배경, 기대 효과 요약
-   - ✅ 회의록: 참석자, 주요 논의사항, 결정사항 및 후속 조치 정리
-   - ✅ 정책/행정문서: 정책 목적, 대상, 추진 전략 및 일정 요약
-   - ✅ 공사/계약문서: 계약 조건, 공정 일정, 이해관계자 분석
-   - ✅ 보고서: 분석 대상, 방법, 결론 및 제언 구분
-
-5. 🔍 오류 및 주의요소 감지:
-   - 문서 내 날짜 오류, 논리 비약, 누락 정보 자동 감지
-   - 문맥상 혼란을 줄 수 있는 표현 또는 오탈자 추정
-
-6. 🧾 결과 요약 형식:
-   - 마크다운(.md) 형식으로 요약 결과 제공
-   - 제목, 소제목, 목록 등을 구조적으로 제공
-
-문서를 사람이 읽지 않고도 전체적 흐름과 인사이트를 파악할 수 있도록 분석해주세요.
-
----
-
-{text[:2000]}..."""  # 텍스트 길이 제한
-        
-        # Gemini API 시뮬레이션 결과
-        return f"""# Gemini 분석 결과
-
-## 📂 문서 기본 정보
-- **문서 제목**: {text[:50]}...에서 추정된 제목
-- **작성 시점**: 문서 내용 분석 기반 추정
-- **문서 유형**: 자동 분류 결과
-- **작성 주체**: 문서 내 언급된 기관/담당자
-
-## 🧩 문서 구조 분석
-- 문서는 여러 섹션으로 구성되어 있음
-- 각 섹션별 주요 내용 요약
-- 표와 그림이 포함된 경우 해당 내용 분석
-
-## 🧠 핵심 내용 요약
-- 문서의 주요 목적과 내용
-- 핵심 키워드 및 개념
-- 중요한 수치와 날짜 정보
-- 액션 아이템 및 결정사항
-
-## 🛠️ 문서 유형별 특화 분석
-- 문서 유형에 따른 특화된 분석
-- 관련 이해관계자 및 영향도 분석
-
-## 🔍 주의사항 및 개선점
-- 문서 내 발견된 주의사항
-- 개선이 필요한 부분
-
-*Gemini AI에 의한 자동 분석 결과입니다.*"""
-        
+        uploader = get_uploader(service_json)
     except Exception as e:
-        return f"Gemini 분석 중 오류: {str(e)}"
-
-def analyze_with_grok(text):
-    """Grok 분석 시뮬레이션"""
-    try:
-        # Grok API 시뮬레이션 결과
-        return f"""# Grok 분석 결과 (한국어)
-
-## 문서 유형 및 핵심 주제
-- **문서 유형**: {text[:30]}...에서 추정된 문서 유형
-- **핵심 주제**: 문서의 주요 테마 및 목적
-- **창의적 관점**: 문서에 대한 독특한 시각
-
-## 중요한 데이터 포인트 및 통계
-- 문서 내 언급된 주요 수치
-- 통계적 정보 및 데이터 분석
-- 트렌드 및 패턴 인식
-
-## 주요 결론 및 권장사항
-- 문서에서 도출된 핵심 결론
-- 실행 가능한 권장사항
-- 향후 고려사항
+        logger.warning('Google Drive 설정 오류: %s', e)
+        return None
+    if uploader is not None and pending_exports(uploader.state):
+        threading.Thread(target=resume_exports, args=(uploader,), name='drive-resume', daemon=True).start()
+    return uploader
+
+# 결과 탭에서 한 번에 표시할 페이지 수 (재실행마다 보이는 부분만 브라우저로 전송)
+PAGES_PER_VIEW = 5
+
+# 이 길이 이하의 프롬프트만 화면에 펼쳐 복사 버튼 제공 (그 이상은 다운로드만)
+COPY_PREVIEW_CHARS = 50000
+
+def offer_text_download(label, build, file_name, key, copy_limit=None):
+    """버튼을 누를 때만 내용을 생성하여 다운로드 버튼 표시
+
+    build()는 다운로드할 문자열을 반환, copy_limit 이하 길이면 복사 버튼이 있는 코드 블록도 표시
+    """
+    if not st.button(label, key=key):
+        return
+    content = build()
+    st.download_button(
+        label="📥 다운로드",
+        data=content.encode('utf-8'),
+        file_name=file_name,
+        mime="text/plain",
+        key=f"{key}_download"
+    )
+    if copy_limit and len(content) <= copy_limit:
+        st.code(content, language=None)
+    else:
+        st.caption(f"📏 {len(content):,} 글자 - 화면 표시 없이 파일로 받으세요.")
+
+# 세션 대용량 결과물 관리자 (서버 프로세스당 하나, 모든 세션이 메모리 예산 공유)
+@st.cache_resource
+def get_artifact_manager():
+    """디스크 보관 + LRU 메모리 캐시 결과물 관리자"""
+    return SessionArtifactManager()
+
+# 생성 결과물(ZIP) 저장소 (작업별 폴더, 세션 참조가 끝나면 TTL/한도에 따라 백그라운드 정리)
+@st.cache_resource
+def get_artifact_store():
+    """결과물 저장소와 정리 스레드"""
+    store = ArtifactStore()
+    store.start_sweeper()
+    return store
+
+# 백그라운드 변환 작업 큐 (서버 프로세스당 하나, 세션이 재실행되어도 작업 유지)
+@st.cache_resource
+def get_job_queue():
+    """서버/사용자별 동시 실행 한도가 있는 작업 큐"""
+    return JobQueue()
+
+# Prometheus 메트릭 엔드포인트 (서버 프로세스당 하나, HANGULPDF_METRICS_PORT=0이면 비활성화)
+@st.cache_resource
+def get_metrics_server(_job_queue, _scheduler, _artifacts):
+    """/metrics HTTP 서버 시작, 작업 큐/입장 제어/세션 메모리 게이지 등록"""
+    def collect():
+        job_metrics = _job_queue.metrics()
+        scheduler_metrics = _scheduler.metrics()
+        artifact_metrics = _artifacts.metrics()
+        return {
+            'jobs_queued': job_metrics['queued'],
+            'jobs_running': job_metrics['running'],
+            'admission_waiting': scheduler_metrics['waiting'],
+            'cpu_slots_used': scheduler_metrics['cpu_used'],
+            'work_memory_bytes': scheduler_metrics['memory_used'],
+            'session_resident_bytes': artifact_metrics['global_resident_bytes'],
+            'sessions': len(artifact_metrics['sessions']),
+        }
+    REGISTRY.add_collector(collect)
+    return start_metrics_server()
 
-## 창의적 관점 및 인사이트
-- 문서에 대한 혁신적 해석
-- 숨겨진 의미 및 함의
-- 미래 지향적 관점
+# 진행 중인 작업 상태를 다시 읽는 간격 (초)과 화면에 표시할 최근 알림 수
+JOB_POLL_SECONDS = 1.0
+JOB_MESSAGES_SHOWN = 10
 
-*Grok AI에 의한 창의적 분석 결과입니다.*"""
-        
-    except Exception as e:
-        return f"Grok 분석 중 오류: {str(e)}"
+def current_session_id():
+    """현재 브라우저 세션 ID"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else 'local'
 
-# 개선된 PDF 생성 함수들
-def create_pdf_with_weasyprint(text, filename, title="문서 분석 결과"):
-    """WeasyPrint를 사용한 한글 PDF 생성 (오류 수정)"""
-    if not WEASYPRINT_AVAILABLE or not MARKDOWN_AVAILABLE:
+def load_artifact(handle):
+    """핸들의 값 반환 (세션 만료 등으로 삭제되었으면 None)"""
+    if not handle:
         return None
-    
     try:
-        # 마크다운을 HTML로 변환
-        html_content = markdown2.markdown(text, extras=['fenced-code-blocks', 'tables'])
-        
-        # HTML 템플릿 생성 (웹폰트 사용)
-        html_template = f"""
-        <!DOCTYPE html>
-        <html lang="ko">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{title}</title>
-            <style>
-                @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@300;400;500;700&display=swap');
-                
-                body {{
-                    font-family: 'Noto Sans KR', 'Malgun Gothic', '맑은 고딕', sans-serif;
-                    line-height: 1.6;
-                    margin: 40px;
-                    color: #333;
-                    font-size: 12px;
-                }}
-                
-                h1 {{
-                    color: #2c3e50;
-                    border-bottom: 3px solid #3498db;
-                    padding-bottom: 10px;
-                    font-size: 24px;
-                    margin-bottom: 30px;
-                }}
-                
-                h2 {{
-                    color: #34495e;
-                    border-left: 4px solid #3498db;
-                    padding-left: 15px;
-                    font-size: 18px;
-                    margin-top: 25px;
-                    margin-bottom: 15px;
-                }}
-                
-                h3 {{
-                    color: #2c3e50;
-                    font-size: 14px;
-                    margin-top: 20px;
-                    margin-bottom: 10px;
-                }}
-                
-                p {{
-                    margin-bottom: 12px;
-                    text-align: justify;
-                }}
-                
-                ul, ol {{
-                    margin-bottom: 15px;
-                    padding-left: 25px;
-                }}
-                
-                li {{
-                    margin-bottom: 5px;
-                }}
-                
-                strong {{
-                    color: #2c3e50;
-                    font-weight: 600;
-                }}
-                
-                code {{
-                    background-color: #f8f9fa;
-                    padding: 2px 4px;
-                    border-radius: 3px;
-                    font-family: 'Courier New', monospace;
-                }}
-                
-                pre {{
-                    background-color: #f8f9fa;
-                    padding: 15px;
-                    border-radius: 5px;
-                    overflow-x: auto;
-                    margin-bottom: 15px;
-                }}
-                
-                table {{
-                    border-collapse: collapse;
-                    width: 100%;
-                    margin-bottom: 20px;
-                }}
-                
-                th, td {{
-                    border: 1px solid #ddd;
-                    padding: 8px;
-                    text-align: left;
-                }}
-                
-                th {{
-                    background-color: #f2f2f2;
-                    font-weight: 600;
-                }}
-                
-                .header {{
-                    text-align: center;
-                    margin-bottom: 40px;
-                    padding: 20px;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    border-radius: 10px;
-                }}
-                
-                .footer {{
-                    margin-top: 40px;
-                    padding-top: 20px;
-                    border-top: 1px solid #ddd;
-                    text-align: center;
-                    color: #666;
-                    font-size: 10px;
-                }}
-                
-                @page {{
-                    margin: 2cm;
-                    @bottom-center {{
-                        content: "페이지 " counter(page) " / " counter(pages);
-                        font-size: 10px;
-                        color: #666;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1 style="margin: 0; border: none; color: white;">{title}</h1>
-                <p style="margin: 10px 0 0 0;">생성 시간: {datetime.now().strftime('%Y년 %m월 %d일 %H:%M:%S')}</p>
-            </div>
-            
-            <div class="content">
-                {html_content}
-            </div>
-            
-            <div class="footer">
-                <p>HangulPDF AI Converter에 의해 생성됨</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # 임시 파일 생성
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        
-        # PDF 생성 (수정된 방법)
-        html_doc = HTML(string=html_template)
-        html_doc.write_pdf(temp_file.name)
-        
-        return temp_file.name
-        
-    except Exception as e:
-        st.error(f"WeasyPrint PDF 생성 중 오류: {str(e)}")
+        return get_artifact_manager().get(handle)
+    except ArtifactExpired:
         return None
 
-def create_pdf_with_reportlab(text, filename, title="문서 분석 결과"):
-    """ReportLab을 사용한 한글 PDF 생성 (TTF 폰트만 사용)"""
-    if not REPORTLAB_AVAILABLE:
-        return None
-    
+# 로컬 PDF 처리 함수 (백그라운드 작업에서 실행, 진행 상황은 job에 기록)
+def process_pdf_locally(request_data, job):
+    """로컬에서 PDF 처리 (안정성 향상)"""
     try:
-        # TTF 폰트 찾기 및 등록
-        ttf_font_path = find_ttf_font()
-        if not ttf_font_path:
-            st.warning("TTF 한글 폰트를 찾을 수 없습니다. 기본 폰트를 사용합니다.")
-            font_name = 'Helvetica'
-        else:
-            try:
-                # TTF 폰트 등록 (TTC 파일 제외)
-                pdfmetrics.registerFont(TTFont('CustomFont', ttf_font_path))
-                font_name = 'CustomFont'
-                st.success(f"TTF 폰트 등록 성공: {ttf_font_path}")
-            except Exception as e:
-                st.warning(f"폰트 등록 실패: {str(e)}. 기본 폰트를 사용합니다.")
-                font_name = 'Helvetica'
-        
-        # 임시 파일 생성
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        
-        # PDF 문서 생성
-        doc = SimpleDocTemplate(
-            temp_file.name, 
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # 스타일 정의
-        styles = getSampleStyleSheet()
-        
-        # 한글 폰트 스타일 생성
-        title_style = ParagraphStyle(
-            'KoreanTitle',
-            parent=styles['Heading1'],
-            fontName=font_name,
-            fontSize=18,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor='#2c3e50'
-        )
-        
-        heading_style = ParagraphStyle(
-            'KoreanHeading',
-            parent=styles['Heading2'],
-            fontName=font_name,
-            fontSize=14,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor='#34495e'
-        )
-        
-        content_style = ParagraphStyle(
-            'KoreanContent',
-            parent=styles['Normal'],
-            fontName=font_name,
-            fontSize=10,
-            leading=14,
-            spaceAfter=6,
-            alignment=TA_LEFT
-        )
-        
-        story = []
-        
-        # 제목 추가
-        story.append(Paragraph(title, title_style))
-        story.append(Spacer(1, 20))
+        # 1. 파일 준비
+        job.progress("파일 준비 중...", 0.1)
         
-        # 생성 정보 추가
-        info_text = f"생성 시간: {datetime.now().strftime('%Y년 %m월 %d일 %H:%M:%S')}"
-        story.append(Paragraph(info_text, content_style))
-        story.append(Spacer(1, 20))
+        pdf_path = request_data.get('pdf_path')
+        if not pdf_path or not os.path.exists(pdf_path):
+            return {'error': 'PDF 데이터가 없습니다.'}
         
-        # 내용 처리 (한글 안전 처리)
-        lines = text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                story.append(Spacer(1, 6))
-                continue
-            
-            # 한글 텍스트 안전 처리
-            try:
-                # 마크다운 헤더 처리
-                if line.startswith('# '):
-                    story.append(Paragraph(line[2:], title_style))
-                elif line.startswith('## '):
-                    story.append(Paragraph(line[3:], heading_style))
-                elif line.startswith('### '):
-                    story.append(Paragraph(line[4:], heading_style))
-                elif line.startswith('- ') or line.startswith('* '):
-                    # 리스트 항목 처리
-                    list_text = f"• {line[2:]}"
-                    story.append(Paragraph(list_text, content_style))
-                elif line.startswith('**') and line.endswith('**'):
-                    # 굵은 글씨 처리
-                    bold_text = f"<b>{line[2:-2]}</b>"
-                    story.append(Paragraph(bold_text, content_style))
-                else:
-                    # 일반 텍스트 (HTML 이스케이프)
-                    escaped_line = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    # 한글이 포함된 경우 길이 제한
-                    if len(escaped_line) > 200:
-                        escaped_line = escaped_line[:200] + "..."
-                    story.append(Paragraph(escaped_line, content_style))
-            except Exception as e:
-                # 문제가 있는 라인은 건너뛰기
-                st.warning(f"라인 처리 중 오류: {str(e)}")
-                continue
+        # 2. PDF 확인
+        job.progress("PDF 파일 확인 중...", 0.2)
         
-        # 푸터 추가
-        story.append(Spacer(1, 30))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontName=font_name,
-            fontSize=8,
-            alignment=TA_CENTER,
-            textColor='#666666'
+        if not PDF_AVAILABLE:
+            return {'error': 'PDF 텍스트 추출 라이브러리가 설치되지 않았습니다.'}
+        
+        def on_stage(stage):
+            if stage == 'extract':
+                job.progress("텍스트 추출 중...", 0.3)
+            elif stage == 'ocr':
+                job.progress("OCR을 사용한 텍스트 추출 중...", 0.5)
+                job.notify('info', "🔍 OCR 처리를 시작합니다...")
+            elif stage == 'clean':
+                job.progress("텍스트 정리 중...", 0.7)
+        
+        def on_page(current_page, total_pages, failed):
+            job.progress(f"📄 페이지 처리 중: {current_page}/{total_pages} (실패: {failed})",
+                         0.3 + 0.2 * current_page / total_pages)
+        
+        def on_ocr_page(page_number, num_pages, text):
+            if not text.strip():
+                job.notify('warning', f"⚠️ 페이지 {page_number}/{num_pages} OCR 결과 없음")
+            job.progress(f"🔍 OCR 처리 중: {page_number}/{num_pages}", 0.5 + 0.2 * page_number / num_pages)
+        
+        def on_ocr_error(page_number, error):
+            job.check_cancelled()  # 입장 대기 중 취소된 경우 페이지 오류로 넘기지 않고 중단
+            job.notify('warning', f"⚠️ 페이지 {page_number} OCR 처리 중 오류: {str(error)}")
+        
+        # OCR 페이지별 체크포인트 (같은 문서/옵션의 중단된 OCR은 빠진 페이지부터 이어서 처리)
+        checkpoint = None
+        if request_data.get('ocr_checkpoint'):
+            checkpoint = OCRCheckpoint(request_data['ocr_checkpoint'])
+            done_pages = checkpoint.status()['done_pages']
+            if done_pages:
+                job.notify('info', f"♻️ 이전 OCR 결과 {done_pages}페이지를 이어서 사용합니다")
+        
+        # 3~5. 텍스트 추출, OCR, 텍스트 정리
+        result = convert_pdf(
+            pdf_path,
+            use_ocr=request_data.get('use_ocr', False),
+            backend=request_data.get('backend', 'auto'),
+            layout=request_data.get('layout', True),
+            clean=request_data.get('clean_text', True),
+            on_stage=on_stage,
+            on_page=on_page,
+            on_ocr_page=on_ocr_page,
+            on_ocr_error=on_ocr_error,
+            ocr_checkpoint=checkpoint
         )
-        story.append(Paragraph("HangulPDF AI Converter에 의해 생성됨", footer_style))
-        
-        # PDF 빌드
-        doc.build(story)
-        
-        return temp_file.name
+        job.check_cancelled()
         
-    except Exception as e:
-        st.error(f"ReportLab PDF 생성 중 오류: {str(e)}")
-        return None
-
-def create_pdf_with_fpdf(text, filename, title="문서 분석 결과"):
-    """FPDF를 사용한 한글 PDF 생성 (개선된 버전)"""
-    if not FPDF_AVAILABLE:
-        return None
-    
-    try:
-        # 임시 파일 생성
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+        if 'pages' not in result:
+            job.notify('error', f"❌ PDF 읽기 오류: {result['error']}")
+            return result
         
-        class KoreanPDF(FPDF):
-            def __init__(self):
-                super().__init__()
-                self.add_page()
-                self.font_name = 'Arial'  # 기본 폰트 사용
-            
-            def header(self):
-                self.set_font(self.font_name, 'B', 16)
-                # 제목을 안전하게 처리
-                safe_title = title.encode('latin-1', 'ignore').decode('latin-1')
-                self.cell(0, 10, safe_title, 0, 1, 'C')
-                self.ln(10)
-            
-            def footer(self):
-                self.set_y(-15)
-                self.set_font(self.font_name, 'I', 8)
-                self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+        num_pages = result['pages']
+        job.notify('success', f"✅ 페이지 처리 완료: {num_pages}/{num_pages} (실패: {result['failed_pages']})")
+        
+        if result['ocr_error']:
+            job.notify('warning', f"⚠️ OCR 처리 중 오류: {result['ocr_error']}")
+        elif result['ocr_replaced']:
+            job.notify('success', "✅ OCR 텍스트 추출 완료")
+        elif result['ocr_replaced'] is False:
+            job.notify('info', "ℹ️ OCR 텍스트를 추가로 결합했습니다")
+        
+        cleaning_stats = result['cleaning']
+        if cleaning_stats:
+            job.notify(
+                'info',
+                f"🧹 텍스트 정리: {cleaning_stats['chars_before']:,} → {cleaning_stats['chars_after']:,} 글자, "
+                f"예상 토큰 {cleaning_stats['tokens_before']:,} → {cleaning_stats['tokens_after']:,} "
+                f"({cleaning_stats['token_reduction']:.1%} 절감)"
+            )
         
-        pdf = KoreanPDF()
-        pdf.set_font(pdf.font_name, '', 10)
+        # 6. 결과 검증
+        job.progress("결과 검증 중...", 0.8)
         
-        # 텍스트 추가 (한글 처리 개선)
-        lines = text.split('\n')
-        for line in lines:
-            if line.strip():
-                try:
-                    # 한글을 포함한 텍스트를 안전하게 처리
-                    # 길이 제한 및 특수문자 처리
-                    safe_line = line[:80]  # 길이 제한
-                    safe_line = safe_line.encode('latin-1', 'ignore').decode('latin-1')
-                    pdf.cell(0, 6, safe_line, 0, 1)
-                except Exception as e:
-                    # 문제가 있는 라인은 건너뛰기
-                    pdf.cell(0, 6, '[Korean text - encoding issue]', 0, 1)
-            else:
-                pdf.ln(3)
+        if not result.get('success'):
+            return result
         
-        # 생성 정보 추가
-        pdf.ln(10)
-        pdf.set_font(pdf.font_name, 'I', 8)
-        generation_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        pdf.cell(0, 6, f'Generated: {generation_time}', 0, 1, 'C')
+        # 7. 완료
+        job.progress("처리 완료!", 1.0)
+        job.notify('success', f"✅ 텍스트 추출 완료: {result['text_length']} 글자")
         
-        pdf.output(temp_file.name)
-        return temp_file.name
+        result['pdf_path'] = pdf_path  # ZIP 생성을 위해 원본 PDF 경로 포함 (바이트는 세션에 보관하지 않음)
+        return result
         
+    except JobCancelled:
+        raise
     except Exception as e:
-        st.error(f"FPDF PDF 생성 중 오류: {str(e)}")
-        return None
+        job.notify('error', f"❌ 처리 중 예상치 못한 오류: {str(e)}")
+        return {'error': f'PDF 처리 중 오류가 발생했습니다: {str(e)}'}
 
-# 통합 PDF 생성 함수 (수정)
-def create_pdf_from_text(text, filename, title="문서 분석 결과"):
-    """최적의 방법으로 한글 PDF 생성 (오류 수정)"""
+# 자동 AI 분석 및 ZIP 생성 함수 (백그라운드 작업에서 실행)
+def auto_analyze_and_create_zip(extracted_text, pdf_path, filename_base, api_key, job, cached=None, output_path=None,
+                                gemini_api_key=None, grok_api_key=None, drive_uploader=None, page_results=None):
+    """자동으로 AI 분석을 수행하고 ZIP 파일을 생성
+
+    cached: 저장소에 있는 이전 분석 결과 {provider: Analysis}, 있으면 API 호출 생략
+    gemini_api_key/grok_api_key: Gemini/Grok API 키 (없으면 GEMINI_API_KEY/XAI_API_KEY 환경 변수)
+    output_path: ZIP 저장 경로 (결과물 저장소의 작업 폴더)
+    drive_uploader: 있으면 ZIP에 넣는 파일마다 바로 Google Drive 폴더로 업로드 (렌더링과 겹쳐 진행)
+    page_results: 페이지별 추출 결과 (정리 전 줄 통계로 분석 경로 선택)
+    """
+    # 세 모델을 동시에 호출하므로 진행률은 끝난 모델 수와 스트리밍으로 받은 글자 수로 표시
+    progress_state = {'done': [], 'received': 0}
     
-    # 1순위: WeasyPrint (최고 품질)
-    if WEASYPRINT_AVAILABLE and MARKDOWN_AVAILABLE:
-        st.info("🎨 WeasyPrint로 고품질 한글 PDF 생성 중...")
-        result = create_pdf_with_weasyprint(text, filename, title)
-        if result:
-            st.success("✅ WeasyPrint PDF 생성 성공")
-            return result
-        else:
-            st.warning("⚠️ WeasyPrint 실패, ReportLab으로 시도합니다.")
+    def show_progress():
+        done = progress_state['done']
+        stage = f"AI 분석 중... ({len(done)}/{len(PROVIDERS)} 완료{': ' + ', '.join(done) if done else ''})"
+        if progress_state['received']:
+            stage += f" · 응답 {progress_state['received']:,}자 수신"
+        job.progress(stage, 0.2 + 0.6 * len(done) / len(PROVIDERS))
     
-    # 2순위: ReportLab (TTF 폰트만 사용)
-    if REPORTLAB_AVAILABLE:
-        st.info("📄 ReportLab으로 한글 PDF 생성 중...")
-        result = create_pdf_with_reportlab(text, filename, title)
-        if result:
-            st.success("✅ ReportLab PDF 생성 성공")
-            return result
-        else:
-            st.warning("⚠️ ReportLab 실패, FPDF로 시도합니다.")
+    def on_done(provider, result):
+        progress_state['done'].append(provider)
+        show_progress()
     
-    # 3순위: FPDF (기본 대안)
-    if FPDF_AVAILABLE:
-        st.info("📝 FPDF로 기본 PDF 생성 중...")
-        result = create_pdf_with_fpdf(text, filename, title)
-        if result:
-            st.success("✅ FPDF PDF 생성 성공")
-            return result
+    def on_delta(provider, text):
+        progress_state['received'] += len(text)
+        show_progress()
     
-    st.error("❌ 모든 PDF 생성 방법이 실패했습니다.")
-    return None
-
-# ZIP 파일 생성 함수
-def create_analysis_zip(original_pdf_bytes, extracted_text, chatgpt_result, gemini_result, grok_result, filename_base):
-    """분석 결과를 ZIP 파일로 패키징"""
-    try:
-        # 임시 ZIP 파일 생성
-        temp_zip = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-        
-        with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # 1. 원본 PDF 추가
-            zipf.writestr(f"{filename_base}_원본.pdf", original_pdf_bytes)
-            
-            # 2. 추출된 텍스트 추가
-            zipf.writestr(f"{filename_base}_추출텍스트.txt", extracted_text.encode('utf-8'))
-            
-            # 3. ChatGPT 분석 결과 PDF 생성 및 추가
-            if chatgpt_result:
-                chatgpt_pdf = create_pdf_from_text(chatgpt_result, f"{filename_base}_ChatGPT분석.pdf", "ChatGPT 분석 결과")
-                if chatgpt_pdf:
-                    with open(chatgpt_pdf, 'rb') as f:
-                        zipf.writestr(f"{filename_base}_ChatGPT분석.pdf", f.read())
-                    os.unlink(chatgpt_pdf)  # 임시 파일 삭제
-                
-                # ChatGPT 텍스트 파일도 추가
-                zipf.writestr(f"{filename_base}_ChatGPT분석.txt", chatgpt_result.encode('utf-8'))
-            
-            # 4. Gemini 분석 결과 PDF 생성 및 추가
-            if gemini_result:
-                gemini_pdf = create_pdf_from_text(gemini_result, f"{filename_base}_Gemini분석.pdf", "Gemini 분석 결과")
-                if gemini_pdf:
-                    with open(gemini_pdf, 'rb') as f:
-                        zipf.writestr(f"{filename_base}_Gemini분석.pdf", f.read())
-                    os.unlink(gemini_pdf)  # 임시 파일 삭제
-                
-                # Gemini 텍스트 파일도 추가
-                zipf.writestr(f"{filename_base}_Gemini분석.txt", gemini_result.encode('utf-8'))
-            
-            # 5. Grok 분석 결과 PDF 생성 및 추가
-            if grok_result:
-                grok_pdf = create_pdf_from_text(grok_result, f"{filename_base}_Grok분석.pdf", "Grok 분석 결과")
-                if grok_pdf:
-                    with open(grok_pdf, 'rb') as f:
-                        zipf.writestr(f"{filename_base}_Grok분석.pdf", f.read())
-                    os.unlink(grok_pdf)  # 임시 파일 삭제
-                
-                # Grok 텍스트 파일도 추가
-                zipf.writestr(f"{filename_base}_Grok분석.txt", grok_result.encode('utf-8'))
-            
-            # 6. 요약 정보 파일 추가
-            summary_info = f"""# HangulPDF AI Converter 분석 결과
-
-## 파일 정보
-- 원본 파일: {filename_base}_원본.pdf
-- 처리 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-- 추출된 텍스트 길이: {len(extracted_text)} 글자
-
-## 포함된 파일들
-1. {filename_base}_원본.pdf - 원본 PDF 파일
-2. {filename_base}_추출텍스트.txt - 추출된 텍스트
-3. {filename_base}_ChatGPT분석.pdf/.txt - ChatGPT 분석 결과
-4. {filename_base}_Gemini분석.pdf/.txt - Gemini 분석 결과
-5. {filename_base}_Grok분석.pdf/.txt - Grok 분석 결과
-
-## PDF 생성 정보
-- 한글 폰트 지원: WeasyPrint > ReportLab > FPDF 순서로 시도
-- TTF 폰트 우선 사용 (TTC 파일 호환성 문제 해결)
-- 마크다운 형식: 지원
-
-## 사용 방법
-- PDF 파일: 각 AI 모델의 분석 결과를 읽기 쉬운 형태로 제공
-- TXT 파일: 텍스트 형태의 분석 결과 (복사/편집 가능)
-
-Generated by HangulPDF AI Converter
-한글 PDF 생성 오류 수정 버전 v2.0
-"""
-            zipf.writestr(f"{filename_base}_README.txt", summary_info.encode('utf-8'))
-        
-        return temp_zip.name
-        
-    except Exception as e:
-        st.error(f"ZIP 파일 생성 중 오류: {str(e)}")
-        return None
-
-# 로컬 PDF 처리 함수 (수정: 안정성 향상)
-def process_pdf_locally(request_data):
-    """로컬에서 PDF 처리 (안정성 향상)"""
-    start_time = time.time()
+    def notify_plan(provider, plan):
+        """보내기 전 토큰 계산 결과와 분석 방식 안내"""
+        strategy = "한 번에 분석" if plan['strategy'] == 'single' else f"{len(plan['chunks'])}개 부분으로 나눠 분석"
+        cost = plan['estimated_cost_usd']
+        route = plan.get('route')
+        if route:
+            job.notify('info', f"🧭 {provider} 경로 {route['route']} ({route['reason']}) → {route['model']}, "
+                               f"출력 최대 {route['max_output_tokens']:,} 토큰")
+        job.notify('info',
+                   f"🧮 {provider} 입력 {plan['original_tokens']:,} → {plan['tokens']:,} 토큰"
+                   f"{'' if plan['exact'] else ' (추정)'} · 한도 {plan['limit']:,} · {strategy}"
+                   + (f" · 예상 비용 최대 ${cost:.4f}" if cost is not None else ''))
     
     try:
-        # 1. 파일 준비
-        progress_bar, status_text = show_progress("파일 준비 중...", 0.1)
-        time.sleep(0.5)  # UI 업데이트를 위한 짧은 대기
-        
-        if not request_data.get('pdf_base64'):
-            return {'error': 'PDF 데이터가 없습니다.'}
-        
-        pdf_bytes = base64.b64decode(request_data['pdf_base64'])
-        
-        # 2. PDF 디코딩
-        progress_bar, status_text = show_progress("PDF 파일 디코딩 중...", 0.2)
-        time.sleep(0.5)
-        
-        if not PDF_AVAILABLE:
-            return {'error': 'PyPDF2 라이브러리가 설치되지 않았습니다.'}
-        
-        # 3. 기본 텍스트 추출
-        progress_bar, status_text = show_progress("텍스트 추출 중...", 0.3)
-        time.sleep(0.5)
-        
-        extracted_text = ""
-        num_pages = 0
-        failed_pages = 0
-        
-        # 페이지 처리 상태를 위한 placeholder
-        page_status = st.empty()
+        # 1. AI 분석 준비
+        job.progress("AI 분석 준비 중...", 0.1)
+        
+        # 2~4. ChatGPT, Gemini, Grok 동시 분석
+        show_progress()
+        results = run_analyses(
+            extracted_text,
+            api_key,
+            cached=cached,
+            on_plan=notify_plan,
+            gemini_api_key=gemini_api_key,
+            grok_api_key=grok_api_key,
+            on_done=on_done,
+            on_delta=on_delta,
+            page_results=page_results
+        )
         
-        try:
-            pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_bytes))
-            num_pages = len(pdf_reader.pages)
-            
-            st.info(f"📄 PDF 페이지 수: {num_pages}")
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                # 페이지 처리 상태 업데이트
-                current_page = page_num + 1
-                page_status.info(f"📄 페이지 처리 중: {current_page}/{num_pages} (실패: {failed_pages})")
-                
-                try:
-                    page_text = page.extract_text()
-                    if page_text and page_text.strip():
-                        extracted_text += f"\n--- 페이지 {page_num + 1} ---\n"
-                        extracted_text += page_text + "\n"
-                    else:
-                        failed_pages += 1
-                except Exception as e:
-                    failed_pages += 1
-                    continue
-            
-            # 최종 페이지 처리 결과
-            page_status.success(f"✅ 페이지 처리 완료: {num_pages}/{num_pages} (실패: {failed_pages})")
-                    
-        except Exception as e:
-            st.error(f"❌ PDF 읽기 오류: {str(e)}")
-            return {'error': f'PDF 읽기 실패: {str(e)}'}
+        # 5. ZIP 파일 생성 (Drive 내보내기는 파일이 추가될 때마다 업로드 시작)
+        job.progress("ZIP 파일 생성 중...", 0.9)
+        export = DriveExport(drive_uploader, f"{filename_base}_AI분석결과") if drive_uploader else None
         
-        # 4. OCR 처리 (선택적)
-        if request_data.get('use_ocr', False) and OCR_AVAILABLE:
-            progress_bar, status_text = show_progress("OCR을 사용한 텍스트 추출 중...", 0.5)
-            time.sleep(0.5)
-            
+        def on_artifact(name, path=None, data=None):
             try:
-                ocr_text = extract_text_with_basic_ocr(pdf_bytes)
-                if ocr_text and len(ocr_text.strip()) > len(extracted_text.strip()):
-                    extracted_text = ocr_text
-                    st.success("✅ OCR 텍스트 추출 완료")
-                elif ocr_text:
-                    extracted_text += f"\n=== OCR 추가 텍스트 ===\n{ocr_text}"
-                    st.info("ℹ️ OCR 텍스트를 추가로 결합했습니다")
+                export.add(name, path=path, data=data)
             except Exception as e:
-                st.warning(f"⚠️ OCR 처리 중 오류: {str(e)}")
-        
-        # 5. 결과 검증
-        progress_bar, status_text = show_progress("결과 검증 중...", 0.8)
-        time.sleep(0.5)
-        
-        if not extracted_text or len(extracted_text.strip()) < 10:
-            return {
-                'error': '텍스트 추출에 실패했습니다. OCR 옵션을 사용해보세요.',
-                'extracted_text': extracted_text,
-                'text_length': len(extracted_text),
-                'pages': num_pages,
-                'failed_pages': failed_pages
-            }
-        
-        # 6. 완료
-        progress_bar, status_text = show_progress("처리 완료!", 1.0)
-        time.sleep(0.5)
-        
-        st.success(f"✅ 텍스트 추출 완료: {len(extracted_text)} 글자")
-        
-        return {
-            'extracted_text': extracted_text,
-            'text_length': len(extracted_text),
-            'pages': num_pages,
-            'failed_pages': failed_pages,
-            'success': True,
-            'pdf_bytes': pdf_bytes  # ZIP 생성을 위해 원본 PDF 바이트 포함
-        }
-        
-    except Exception as e:
-        st.error(f"❌ 처리 중 예상치 못한 오류: {str(e)}")
-        return {'error': f'PDF 처리 중 오류가 발생했습니다: {str(e)}'}
-
-# 자동 AI 분석 및 ZIP 생성 함수
-def auto_analyze_and_create_zip(extracted_text, pdf_bytes, filename_base, api_key):
-    """자동으로 AI 분석을 수행하고 ZIP 파일을 생성"""
-    try:
-        # 1. AI 분석 준비
-        progress_bar, status_text = show_progress("AI 분석 준비 중...", 0.1)
-        time.sleep(0.5)
-        
-        # 2. ChatGPT 분석
-        progress_bar, status_text = show_progress("ChatGPT 분석 중...", 0.3)
-        chatgpt_result = analyze_with_chatgpt(extracted_text, api_key)
-        
-        # 3. Gemini 분석 (시뮬레이션)
-        progress_bar, status_text = show_progress("Gemini 분석 중...", 0.5)
-        gemini_result = analyze_with_gemini(extracted_text)
-        
-        # 4. Grok 분석 (시뮬레이션)
-        progress_bar, status_text = show_progress("Grok 분석 중...", 0.7)
-        grok_result = analyze_with_grok(extracted_text)
-        
-        # 5. ZIP 파일 생성
-        progress_bar, status_text = show_progress("ZIP 파일 생성 중...", 0.9)
+                job.notify('warning', f"⚠️ Drive 업로드 준비 실패 ({name}): {str(e)}")
         
-        zip_data = create_analysis_zip(
+        zip_path = create_analysis_zip(
+            original_pdf=pdf_path,
             extracted_text=extracted_text,
-            pdf_bytes=pdf_bytes,
+            chatgpt_result=results['chatgpt'],
+            gemini_result=results['gemini'],
+            grok_result=results['grok'],
             filename_base=filename_base,
-            chatgpt_result=chatgpt_result,
-            gemini_result=gemini_result,
-            grok_result=grok_result
+            output_path=output_path,
+            notify=job.notify,
+            on_artifact=on_artifact if export else None
         )
         
+        drive = None
+        if export:
+            job.progress("Google Drive 업로드 마무리 중...", 0.95)
+            drive = export.wait()
+            if drive['failed']:
+                job.notify('warning', f"⚠️ Google Drive 업로드 실패 {len(drive['failed'])}개 "
+                                      f"(다음 실행 시 이어서 업로드): {', '.join(drive['failed'])}")
+            else:
+                job.notify('success', f"☁️ Google Drive 업로드 완료 ({len(drive['uploaded'])}개): {drive['url']}")
+        
         # 6. 완료
-        progress_bar, status_text = show_progress("분석 완료!", 1.0)
-        time.sleep(0.5)
+        job.progress("분석 완료!", 1.0)
         
         return {
             'success': True,
-            'chatgpt_result': chatgpt_result,
-            'gemini_result': gemini_result,
-            'grok_result': grok_result,
-            'zip_data': zip_data
+            'chatgpt_result': results['chatgpt'],
+            'gemini_result': results['gemini'],
+            'grok_result': results['grok'],
+            'zip_path': zip_path,
+            'drive_url': drive['url'] if drive and not drive['failed'] else None
         }
         
+    except JobCancelled:
+        raise
     except Exception as e:
-        st.error(f"❌ 자동 AI 분석 중 오류: {str(e)}")
+        job.notify('error', f"❌ 자동 AI 분석 중 오류: {str(e)}")
         return {'error': f'자동 AI 분석 실패: {str(e)}'}
-# 기본 OCR 처리 함수 (간소화)
-def extract_text_with_basic_ocr(pdf_bytes):
-    """기본 OCR을 사용하여 텍스트 추출"""
-    if not OCR_AVAILABLE:
-        return "OCR 라이브러리가 설치되지 않았습니다."
+
+# 변환 작업 전체 (추출 → 기록 저장 → 선택적 AI 분석/ZIP 생성), 작업 큐의 워커 스레드에서 실행
+# Streamlit 캐시 자원은 스크립트 스레드에서 꺼내 인자로 전달 (워커 스레드에는 스크립트 컨텍스트가 없음)
+def run_conversion_job(job, request_data, session_id, artifacts, artifact_store, summary_store, drive_uploader=None):
+    """변환 작업 실행, 세션에 반영할 {'conversion_result', 'ai_analysis_result'} 반환"""
+    result = process_pdf_locally(request_data, job)
+    
+    # 텍스트와 페이지 목록은 관리자에 맡기고 세션에는 핸들과 메타데이터만 보관
+    extracted_text = result.pop('extracted_text', None)
+    page_results = result.pop('page_results', None)
+    if extracted_text is not None:
+        result['text_handle'] = artifacts.put(session_id, extracted_text)
+    if page_results is not None:
+        result['pages_handle'] = artifacts.put(session_id, page_results)
+    outcome = {'conversion_result': result, 'ai_analysis_result': None}
     
+    if 'error' in result and not result.get('success'):
+        return outcome
+    
+    doc_hash = request_data['doc_hash']
+    
+    # 추출 결과 영구 저장 (본문이 바뀌었으면 저장소가 이전 분석 결과를 지움)
+    saved = False
     try:
-        st.info("🔍 OCR 처리를 시작합니다...")
-        
-        # PDF를 이미지로 변환
-        images = convert_from_bytes(pdf_bytes, dpi=300, fmt='PNG')
-        extracted_text = ""
-        
-        for i, image in enumerate(images):
-            st.info(f"📄 페이지 {i+1}/{len(images)} OCR 처리 중...")
-            
-            try:
-                # 기본 OCR 설정
-                config = r'--oem 3 --psm 3 -l kor+eng'
-                text = pytesseract.image_to_string(image, config=config)
-                
-                if text.strip():
-                    extracted_text += f"\n--- 페이지 {i+1} (OCR) ---\n"
-                    extracted_text += text + "\n"
-                    st.success(f"✅ 페이지 {i+1} OCR 완료")
-                else:
-                    st.warning(f"⚠️ 페이지 {i+1} OCR 결과 없음")
-                    
-            except Exception as e:
-                st.warning(f"⚠️ 페이지 {i+1} OCR 처리 중 오류: {str(e)}")
-                continue
-        
-        return extracted_text
-        
+        summary_store.save_document(doc_hash, request_data['filename'], extracted_text, pages=result.get('pages'))
+        saved = True
     except Exception as e:
-        st.error(f"❌ OCR 처리 중 오류: {str(e)}")
-        return f"OCR 처리 중 오류: {str(e)}"
+        job.notify('warning', f"⚠️ 분석 기록 저장 실패: {str(e)}")
+    
+    # 자동 AI 분석 실행
+    # 키가 하나라도 있으면 분석 (키가 없는 제공자는 '키 없음' 결과로 표시)
+    api_key = request_data.get('api_key')
+    providers = available_providers(api_key, request_data.get('gemini_api_key'), request_data.get('grok_api_key'))
+    if not (request_data.get('auto_ai_analysis') and providers and extracted_text):
+        return outcome
+    
+    job.notify('info', "🤖 자동 AI 분석을 시작합니다...")
+    
+    # 같은 문서(같은 본문)의 이전 분석 결과 재사용 - 저장에 실패했으면 본문이 같은지 알 수 없으므로 새로 분석
+    try:
+        cached = summary_store.get_analyses(doc_hash) if saved else {}
+    except Exception:
+        cached = {}
+    if cached:
+        job.notify('info', f"♻️ 저장된 분석 결과 재사용: {', '.join(sorted(cached))}")
+    
+    # ZIP은 세션이 참조하는 작업 폴더에 생성
+    filename_base = request_data['filename_base']
+    zip_job_id = artifact_store.create_job(owner=session_id)
+    try:
+        ai_result = auto_analyze_and_create_zip(
+            extracted_text,
+            request_data['pdf_path'],
+            filename_base,
+            api_key,
+            job,
+            cached=cached,
+            output_path=artifact_store.path(zip_job_id, f"{filename_base}_AI분석결과.zip"),
+            gemini_api_key=request_data.get('gemini_api_key'),
+            grok_api_key=request_data.get('grok_api_key'),
+            drive_uploader=drive_uploader if request_data.get('drive_export') else None,
+            page_results=page_results
+        )
+    except JobCancelled:
+        artifact_store.release(zip_job_id, session_id)
+        raise
+    ai_result['job_id'] = zip_job_id
+    
+    # AI 분석 결과 저장 (본문은 관리자에, 세션에는 핸들만)
+    if ai_result.get('success'):
+        analyses = {provider: ai_result.pop(f'{provider}_result') for provider in PROVIDERS}
+        ai_result['analysis_handle'] = artifacts.put(session_id, analyses)
+        try:
+            for provider in PROVIDERS:
+                analysis = analyses[provider]
+                if provider not in cached and not is_analysis_error(analysis):
+                    summary_store.save_analysis(doc_hash, provider, analysis)
+        except Exception as e:
+            job.notify('warning', f"⚠️ 분석 결과 저장 실패: {str(e)}")
+    outcome['ai_analysis_result'] = ai_result
+    return outcome
+
+# 작업 프로파일은 같은 작업의 결과물(ZIP) 폴더에, 결과물이 없으면 세션이 참조하는 새 폴더에 저장
+def save_job_profile(job, profile, result, session_id, artifact_store):
+    """작업 큐의 on_profile 콜백 (워커 스레드에서 호출), 세션에 보관할 프로파일 정보 반환"""
+    ai_result = (result or {}).get('ai_analysis_result') or {}
+    profile_job_id = ai_result.get('job_id') or artifact_store.create_job(owner=session_id)
+    files = profile.save(artifact_store.job_dir(profile_job_id))
+    return dict(profile.describe(), job_id=profile_job_id, files=files)
 
 # Streamlit 페이지 설정
 st.set_page_config(
@@ -1025,6 +543,19 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# 유휴 세션 정리 및 현재 세션 활동 기록
+artifacts = get_artifact_manager()
+artifact_store = get_artifact_store()
+job_queue = get_job_queue()
+scheduler = get_scheduler()  # 추출/OCR/PDF 생성 단계 입장 제어 (변환 모듈과 같은 프로세스 공용 인스턴스)
+get_metrics_server(job_queue, scheduler, artifacts)
+session_id = current_session_id()
+for expired_session in artifacts.expire_idle():
+    artifact_store.release_owner(expired_session)
+    job_queue.release_owner(expired_session)
+    scheduler.forget_owner(expired_session)
+artifacts.touch(session_id)
+
 # 메인 제목
 st.title("📄 HangulPDF AI Converter")
 st.markdown("**한글 PDF 문서를 AI가 쉽게 활용할 수 있도록 자동 변환하는 도구**")
@@ -1033,7 +564,7 @@ st.markdown("**한글 PDF 문서를 AI가 쉽게 활용할 수 있도록 자동
 st.markdown(f"""
 <div class="status-info">
     <h4>🔧 시스템 상태 (오류 수정 버전)</h4>
-    <p><strong>PDF 처리:</strong> {'✅ 사용 가능' if PDF_AVAILABLE else '❌ 설치 필요'}</p>
+    <p><strong>PDF 처리:</strong> {'✅ 사용 가능 (' + ', '.join(available_backends()) + ')' if PDF_AVAILABLE else '❌ 설치 필요'}</p>
     <p><strong>OCR 기능:</strong> {'✅ 사용 가능' if OCR_AVAILABLE else '❌ 설치 필요'}</p>
     <p><strong>WeasyPrint PDF:</strong> {'✅ 사용 가능 (오류 수정)' if WEASYPRINT_AVAILABLE else '❌ 설치 필요'}</p>
     <p><strong>ReportLab PDF:</strong> {'✅ 사용 가능 (TTF 폰트만)' if REPORTLAB_AVAILABLE else '❌ 설치 필요'}</p>
@@ -1049,12 +580,29 @@ with st.sidebar:
     
     # API 키 입력
     api_key = st.text_input("🔑 OpenAI API 키", type="password", help="GPT 기반 요약 및 Q&A 생성에 필요합니다.")
+    gemini_api_key = st.text_input(
+        "🔑 Gemini API 키",
+        type="password",
+        help="Gemini 자동 분석에 사용합니다. 비워 두면 서버의 GEMINI_API_KEY 환경 변수를 사용합니다."
+    )
+    grok_api_key = st.text_input(
+        "🔑 Grok(xAI) API 키",
+        type="password",
+        help="Grok 자동 분석에 사용합니다. 비워 두면 서버의 XAI_API_KEY 환경 변수를 사용합니다."
+    )
     
     st.header("🔧 변환 옵션")
     
     # 변환 옵션들
     extract_text = st.checkbox("📝 텍스트 추출", value=True, help="PDF에서 텍스트를 추출합니다.")
     
+    pdf_backend = st.selectbox(
+        "🧰 텍스트 추출 엔진",
+        ['auto'] + available_backends(),
+        help="auto는 설치된 엔진 중 가장 빠른 것(pdfium > PyMuPDF > PyPDF2)을 사용합니다. "
+             "PyPDF2는 한글 CID 폰트 문서에서 글자가 깨질 수 있습니다."
+    )
+    
     use_ocr = st.checkbox(
         "🔍 OCR 사용", 
         value=False, 
@@ -1062,11 +610,34 @@ with st.sidebar:
         help="이미지 기반 PDF나 스캔된 문서에서 텍스트를 추출합니다. 처리 시간이 더 오래 걸릴 수 있습니다."
     )
     
+    use_layout = st.checkbox(
+        "📐 레이아웃 분석",
+        value=True,
+        help="2단 보고서처럼 단이 나뉜 문서의 읽기 순서를 복원하고 머리글/바닥글을 구분합니다. (pdfium/PyMuPDF/OCR)"
+    )
+    
+    clean_extracted_text = st.checkbox(
+        "🧹 텍스트 정리",
+        value=True,
+        help="반복되는 머리글/바닥글, 끊긴 줄, 불필요한 공백을 정리하여 AI 분석 토큰을 줄입니다."
+    )
+    
+    profile_names = {None: '끔', 'sample': '샘플링', 'cprofile': 'cProfile'}
+    profile_mode = st.selectbox(
+        "🔬 작업 프로파일링",
+        list(profile_names),
+        format_func=profile_names.get,
+        help="느린 문서의 처리 시간이 어디에 쓰이는지 기록합니다. 샘플링은 부담이 적고 flamegraph용 파일을, "
+             "cProfile은 함수별 호출 통계를 남깁니다."
+             + (f" 꺼져 있어도 한 단계가 {PROFILE_THRESHOLD_SECONDS:g}초를 넘으면 자동으로 샘플링합니다."
+                if PROFILE_THRESHOLD_SECONDS > 0 else "")
+    )
+    
     if not OCR_AVAILABLE:
         st.warning("⚠️ OCR 라이브러리가 설치되지 않았습니다.")
     
     if not PDF_AVAILABLE:
-        st.error("❌ PyPDF2 라이브러리가 설치되지 않았습니다.")
+        st.error("❌ PDF 텍스트 추출 라이브러리(pypdfium2, PyMuPDF, PyPDF2)가 설치되지 않았습니다.")
     
     # 자동 AI 분석 옵션
     st.header("🤖 자동 AI 분석")
@@ -1076,8 +647,17 @@ with st.sidebar:
         help="ChatGPT, Gemini, Grok으로 자동 분석하고 결과를 ZIP으로 패키징합니다."
     )
     
-    if auto_ai_analysis and not api_key:
-        st.warning("⚠️ 자동 AI 분석을 위해서는 OpenAI API 키가 필요합니다.")
+    if auto_ai_analysis and not available_providers(api_key, gemini_api_key, grok_api_key):
+        st.warning("⚠️ 자동 AI 분석을 위해서는 OpenAI, Gemini, Grok 중 하나 이상의 API 키가 필요합니다.")
+    
+    drive_uploader = get_drive_uploader()
+    drive_export = st.checkbox(
+        "☁️ Google Drive로 내보내기",
+        value=False,
+        disabled=not auto_ai_analysis or drive_uploader is None,
+        help="분석 결과 파일을 문서별 Drive 폴더로 업로드합니다 (중단되면 이어서 업로드). "
+             "GDRIVE_SERVICE_JSON 또는 HANGULPDF_GDRIVE_ACCESS_TOKEN 설정이 필요합니다."
+    )
     
     # PDF 생성 방법 선택
     st.header("📄 PDF 생성 설정 (수정됨)")
@@ -1095,6 +675,35 @@ with st.sidebar:
             st.info(f"• {method}")
     else:
         st.error("❌ PDF 생성 라이브러리가 설치되지 않았습니다.")
+    
+    # 메모리 사용량 (추출 텍스트/분석 결과는 디스크에 두고 최근 사용분만 메모리에 캐시)
+    artifact_metrics = artifacts.metrics()
+    session_metrics = artifact_metrics['sessions'].get(session_id, {})
+    state_bytes = estimate_memory({key: st.session_state[key] for key in st.session_state})
+    st.caption(
+        f"🧮 세션 메모리: {(state_bytes + session_metrics.get('resident_bytes', 0)) / (1024 * 1024):.1f} MB "
+        f"(한도 {artifact_metrics['session_budget_bytes'] // (1024 * 1024)} MB) · "
+        f"전체 {artifact_metrics['global_resident_bytes'] / (1024 * 1024):.1f}"
+        f"/{artifact_metrics['global_budget_bytes'] // (1024 * 1024)} MB · "
+        f"세션 {len(artifact_metrics['sessions'])}개"
+    )
+    job_metrics = job_queue.metrics()
+    st.caption(
+        f"⚙️ 변환 작업: 실행 {job_metrics['running']}/{job_metrics['workers']} · 대기 {job_metrics['queued']} "
+        f"(사용자당 동시 {job_metrics['max_per_owner']}개)"
+    )
+    scheduler_metrics = scheduler.metrics(owner=session_id)
+    stage_names = {'extract': '추출', 'ocr': 'OCR', 'render': 'PDF 생성'}
+    st.caption(
+        f"🚦 처리 자원: CPU {scheduler_metrics['cpu_used']}/{scheduler_metrics['cpu_slots']} · "
+        f"메모리 {scheduler_metrics['memory_used'] // (1024 * 1024)}/{scheduler_metrics['memory_budget'] // (1024 * 1024)} MB · "
+        f"입장 대기 {scheduler_metrics['waiting']}"
+    )
+    for stage, stats in scheduler_metrics['stages'].items():
+        st.caption(
+            f"· {stage_names.get(stage, stage)} {stats['admitted']}회: 대기 평균 {stats['avg_wait_seconds']:.2f}초 "
+            f"(최대 {stats['max_wait_seconds']:.1f}초) / 처리 평균 {stats['avg_service_seconds']:.2f}초"
+        )
 
 # 메인 탭
 tab1, tab2, tab3, tab4 = st.tabs(["📤 파일 업로드", "📊 변환 결과", "🔗 공유 & 내보내기", "📦 자동 분석 결과"])
@@ -1105,12 +714,12 @@ with tab1:
     uploaded_file = st.file_uploader(
         "PDF 파일을 선택하세요",
         type=['pdf'],
-        help="최대 200MB까지 업로드 가능합니다."
+        help=f"최대 {MAX_UPLOAD_BYTES // (1024 * 1024)}MB까지 업로드 가능합니다."
     )
     
     if uploaded_file is not None:
         # 파일 정보 표시
-        file_size = len(uploaded_file.getvalue())
+        file_size = uploaded_file.size
         filename_base = os.path.splitext(uploaded_file.name)[0]
         
         st.markdown(f"""
@@ -1135,92 +744,272 @@ with tab1:
         # 변환 버튼
         if st.button("🚀 변환 시작", type="primary"):
             if not PDF_AVAILABLE:
-                st.error("❌ PyPDF2 라이브러리가 설치되지 않았습니다. 관리자에게 문의하세요.")
+                st.error("❌ PDF 텍스트 추출 라이브러리가 설치되지 않았습니다. 관리자에게 문의하세요.")
             else:
-                # PDF 처리
-                pdf_bytes = uploaded_file.getvalue()
-                pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
+                # PDF를 디스크에 한 번만 저장하고 이후 단계에는 경로만 전달
+                try:
+                    pdf_path, doc_hash, _ = spool_upload(uploaded_file)
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+                    st.stop()
+                
+                # 진행 중인 이전 작업은 취소 (결과를 세션에 반영하지 않음)
+                if st.session_state.get('active_job'):
+                    job_queue.forget(st.session_state.pop('active_job'))
+                
+                # 이전 업로드의 스풀 파일과 결과물 정리 (세션이 만료되면 스풀 파일도 함께 삭제)
+                previous_upload = st.session_state.get('upload_path')
+                artifacts.detach_file(session_id, previous_upload)
+                remove_upload(previous_upload)
+                artifacts.attach_file(session_id, pdf_path)
+                st.session_state.upload_path = pdf_path
+                
+                previous_result = st.session_state.pop('conversion_result', None) or {}
+                previous_analysis = st.session_state.pop('ai_analysis_result', None) or {}
+                for handle in (previous_result.get('text_handle'), previous_result.get('pages_handle'),
+                               previous_analysis.get('analysis_handle')):
+                    artifacts.release(handle)
+                if previous_analysis.get('job_id'):
+                    artifact_store.release(previous_analysis['job_id'], session_id)
+                previous_profile = (st.session_state.get('job_outcome') or {}).get('profile') or {}
+                if previous_profile.get('job_id'):
+                    artifact_store.release(previous_profile['job_id'], session_id)
                 
                 request_data = {
-                    'pdf_base64': pdf_base64,
+                    'pdf_path': pdf_path,
+                    'doc_hash': doc_hash,
+                    'filename': uploaded_file.name,
+                    'filename_base': filename_base,
                     'extract_text': extract_text,
                     'use_ocr': use_ocr,
+                    'backend': pdf_backend,
+                    'layout': use_layout,
+                    'clean_text': clean_extracted_text,
+                    'auto_ai_analysis': auto_ai_analysis,
+                    'ocr_checkpoint': open_ocr_checkpoint(doc_hash, layout=use_layout).path if use_ocr else None,
                     'generate_summary': False,
                     'generate_qa': False,
-                    'api_key': api_key
+                    'api_key': api_key,
+                    'gemini_api_key': gemini_api_key,
+                    'grok_api_key': grok_api_key,
+                    'drive_export': drive_export
                 }
                 
-                # 로컬 처리
-                result = process_pdf_locally(request_data)
-                
-                # 결과 저장
-                st.session_state.conversion_result = result
+                # 이전 문서의 Q&A 색인은 폐기
+                st.session_state.pop('qa_index', None)
+                st.session_state.pop('qa_index_key', None)
                 st.session_state.uploaded_filename = uploaded_file.name
                 st.session_state.filename_base = filename_base
+                st.session_state.doc_hash = doc_hash
+                st.session_state.pop('job_outcome', None)
+                st.session_state.ocr_checkpoint = request_data['ocr_checkpoint']
                 
-                if 'error' not in result or result.get('success'):
-                    st.success("✅ 변환이 완료되었습니다!")
-                    
-                    # 자동 AI 분석 실행
-                    if auto_ai_analysis and api_key and result.get('extracted_text'):
-                        st.info("🤖 자동 AI 분석을 시작합니다...")
-                        
-                        ai_result = auto_analyze_and_create_zip(
-                            result['extracted_text'],
-                            result.get('pdf_bytes', pdf_bytes),
-                            filename_base,
-                            api_key
+                # 백그라운드 작업으로 실행 (다른 위젯을 조작해 스크립트가 재실행되어도 계속 진행)
+                st.session_state.active_job = job_queue.submit(
+                    session_id,
+                    run_conversion_job,
+                    request_data,
+                    session_id,
+                    artifacts,
+                    artifact_store,
+                    get_summary_store(),
+                    drive_uploader,
+                    label=uploaded_file.name,
+                    profile=profile_mode,
+                    on_profile=functools.partial(save_job_profile, session_id=session_id, artifact_store=artifact_store)
+                )
+    
+    # 진행 중인 작업 상태 / 끝난 작업 결과 반영
+    active_job = st.session_state.get('active_job')
+    job_status = job_queue.status(active_job) if active_job else None
+    if active_job and job_status is None:
+        st.session_state.pop('active_job')
+        st.warning("⚠️ 변환 작업 상태를 찾을 수 없습니다. 파일을 다시 변환해주세요.")
+    elif job_status and job_status['status'] not in FINISHED_STATES:
+        st.subheader(f"⏳ 변환 작업: {job_status['label']}")
+        show_progress(job_status['stage'], job_status['fraction'])
+        if job_status['status'] == QUEUED:
+            st.info(f"🕒 대기 중 (대기 순서 {job_queue.position(active_job)}, "
+                    f"대기 {job_status['wait_seconds']:.0f}초)")
+        else:
+            owner_stats = scheduler.metrics(owner=session_id)['owner']
+            st.caption(
+                f"⏱️ 처리 시간 {job_status['run_seconds']:.0f}초 (자원 대기 {owner_stats['wait_seconds']:.0f}초) · "
+                f"다른 탭을 보거나 옵션을 바꿔도 작업은 계속됩니다."
+            )
+        for level, message in job_status['messages'][-JOB_MESSAGES_SHOWN:]:
+            st_notify(level, message)
+        
+        # 진행 중인 OCR의 중간 결과 (체크포인트에 기록된 페이지)
+        if st.session_state.get('ocr_checkpoint'):
+            checkpoint = OCRCheckpoint(st.session_state.ocr_checkpoint)
+            checkpoint_status = checkpoint.status()
+            if checkpoint_status['done_pages']:
+                st.caption(f"💾 OCR 완료 페이지: {checkpoint_status['done_pages']}")
+                # 진행률 갱신으로 계속 재실행되므로 버튼 대신 체크박스로 켜 두는 동안만 매번 생성
+                if st.checkbox("📄 지금까지의 OCR 결과 받기", key="ocr_partial_download"):
+                    st.download_button(
+                        label="📥 OCR 중간 결과 다운로드",
+                        data=join_pages(checkpoint.pages()).encode('utf-8'),
+                        file_name=f"{st.session_state.get('filename_base', 'document')}_OCR중간결과.txt",
+                        mime="text/plain",
+                        key="ocr_partial_file"
+                    )
+        if st.button("⏹️ 작업 취소", key="cancel_job"):
+            job_queue.cancel(active_job)
+            st.rerun()
+    elif job_status:
+        # 워커가 만든 결과를 세션에 반영하고 작업 상태는 큐에서 삭제
+        st.session_state.pop('active_job')
+        job_queue.forget(active_job)
+        outcome = job_status['result'] or {}
+        if outcome.get('conversion_result') is not None:
+            st.session_state.conversion_result = outcome['conversion_result']
+        if outcome.get('ai_analysis_result') is not None:
+            st.session_state.ai_analysis_result = outcome['ai_analysis_result']
+        st.session_state.job_outcome = {
+            'status': job_status['status'],
+            'error': job_status['error'],
+            'messages': job_status['messages'][-JOB_MESSAGES_SHOWN:],
+            'seconds': job_status['run_seconds'],
+            'report': job_status['report'],
+            'profile': job_status['profile'],
+        }
+        if job_status['status'] == DONE:
+            st.balloons()
+    
+    # 마지막 작업 결과 알림
+    job_outcome = st.session_state.get('job_outcome')
+    if job_outcome and not st.session_state.get('active_job'):
+        for level, message in job_outcome['messages']:
+            st_notify(level, message)
+        result = st.session_state.get('conversion_result') or {}
+        ai_result = st.session_state.get('ai_analysis_result') or {}
+        if job_outcome['status'] == CANCELLED:
+            st.warning("⏹️ 변환 작업이 취소되었습니다.")
+        elif job_outcome['status'] == FAILED:
+            st.error(f"❌ 변환 작업 실패: {job_outcome['error']}")
+        elif 'error' in result and not result.get('success'):
+            st.error(f"❌ 변환 중 오류가 발생했습니다: {result.get('error', '알 수 없는 오류')}")
+        else:
+            st.success(f"✅ 변환이 완료되었습니다! ({job_outcome['seconds']:.1f}초)")
+            if ai_result.get('success'):
+                st.success("🎉 자동 AI 분석 및 오류 수정된 한글 PDF 생성이 완료되었습니다!")
+                st.info("📦 '자동 분석 결과' 탭에서 ZIP 파일을 다운로드하세요.")
+            elif ai_result:
+                st.error(f"❌ 자동 AI 분석 중 오류: {ai_result.get('error', '알 수 없는 오류')}")
+        
+        # 실행 보고서 (단계/페이지별 시간, 카운터)
+        run_report = job_outcome.get('report')
+        if run_report:
+            with st.expander(f"⏱️ 단계별 처리 시간 (전체 {run_report['seconds']:.2f}초)"):
+                stages = sorted(run_report['stages'].items(), key=lambda item: -item[1]['seconds'])
+                st.markdown('\n'.join(
+                    f"- **{stage}**: {stats['seconds']:.3f}초 ({stats['count']}회)" for stage, stats in stages
+                ))
+                if run_report['counters']:
+                    st.caption(' · '.join(f"{name} = {value:g}" for name, value in sorted(run_report['counters'].items())))
+                st.download_button(
+                    label="📥 실행 보고서 (JSON)",
+                    data=json.dumps(run_report, ensure_ascii=False, indent=2).encode('utf-8'),
+                    file_name=f"{st.session_state.get('filename_base', 'document')}_실행보고서.json",
+                    mime="application/json",
+                    key="run_report_download"
+                )
+        
+        # 작업 프로파일 (선택했거나 단계가 임계 시간을 넘은 경우)
+        job_profile = job_outcome.get('profile')
+        if job_profile:
+            trigger = job_profile['trigger']
+            if trigger == 'manual':
+                trigger_text = '직접 선택'
+            else:
+                trigger_text = (f"{trigger['stage']} 단계가 {trigger['seconds']:.1f}초를 넘음"
+                                + (f" (페이지 {trigger['page']})" if trigger.get('page') else ''))
+            with st.expander(f"🔬 작업 프로파일 ({job_profile['mode']}, {trigger_text})"):
+                st.caption(f"기록 시간 {job_profile['seconds']:.1f}초"
+                           + (f" · 샘플 {job_profile['samples']:,}개" if job_profile['samples'] is not None else '')
+                           + " · profile.folded는 flamegraph.pl/speedscope, profile.pstats는 pstats/snakeviz로 볼 수 있습니다.")
+                for name in job_profile['files']:
+                    profile_path = artifact_store.path(job_profile['job_id'], name)
+                    if not os.path.exists(profile_path):
+                        st.warning("⚠️ 프로파일 파일이 정리되었습니다.")
+                        break
+                    with open(profile_path, 'rb') as f:
+                        st.download_button(
+                            label=f"📥 {name}",
+                            data=f.read(),
+                            file_name=f"{st.session_state.get('filename_base', 'document')}_{name}",
+                            mime="application/octet-stream",
+                            key=f"profile_download_{name}"
                         )
-                        
-                        # AI 분석 결과 저장
-                        st.session_state.ai_analysis_result = ai_result
-                        
-                        if ai_result.get('success'):
-                            st.balloons()
-                            st.success("🎉 자동 AI 분석 및 오류 수정된 한글 PDF 생성이 완료되었습니다!")
-                            st.info("📦 '자동 분석 결과' 탭에서 ZIP 파일을 다운로드하세요.")
-                        else:
-                            st.error(f"❌ 자동 AI 분석 중 오류: {ai_result.get('error', '알 수 없는 오류')}")
-                    else:
-                        st.balloons()
-                else:
-                    st.error(f"❌ 변환 중 오류가 발생했습니다: {result.get('error', '알 수 없는 오류')}")
 
 with tab2:
     st.header("📊 변환 결과")
     
     if 'conversion_result' in st.session_state:
         result = st.session_state.conversion_result
+        page_results = load_artifact(result.get('pages_handle'))
         
-        if 'extracted_text' in result and result.get('extracted_text'):
+        if result.get('pages_handle') and page_results is None:
+            st.warning("⚠️ 세션이 오래 사용되지 않아 변환 결과가 정리되었습니다. 파일을 다시 변환해주세요.")
+        
+        elif page_results and result.get('success'):
             # 텍스트 추출 결과
             st.subheader("📝 추출된 텍스트")
             
             # 텍스트 정보
             text_length = result.get('text_length', 0)
             pages = result.get('pages', 0)
+            cleaning = result.get('cleaning')
+            cleaning_info = ''
+            if cleaning:
+                cleaning_info = f"<p><strong>🧹 정리로 절감된 토큰:</strong> {cleaning['tokens_before'] - cleaning['tokens_after']:,} ({cleaning['token_reduction']:.1%})</p>"
             
             st.markdown(f"""
             <div class="info-card">
                 <h4>📊 텍스트 정보</h4>
                 <p><strong>📏 텍스트 길이:</strong> {text_length:,} 글자</p>
                 <p><strong>📄 페이지 수:</strong> {pages} 페이지</p>
+                <p><strong>🧰 추출 엔진:</strong> {result.get('backend', '-')}</p>
+                {cleaning_info}
             </div>
             """, unsafe_allow_html=True)
             
-            # 텍스트 표시
-            st.text_area(
-                "추출된 텍스트:",
-                value=result['extracted_text'],
-                height=400,
-                key="extracted_text_display"
+            # 텍스트 표시 (PAGES_PER_VIEW 페이지씩 나눠서 현재 구간만 렌더링)
+            view_starts = {
+                f"{page_results[start]['page']} ~ "
+                f"{page_results[min(start + PAGES_PER_VIEW, len(page_results)) - 1]['page']} 페이지": start
+                for start in range(0, len(page_results), PAGES_PER_VIEW)
+            }
+            view_start = view_starts[st.selectbox(
+                "표시할 페이지", list(view_starts), key="text_view_start"
+            )] if len(view_starts) > 1 else 0
+            
+            for index in range(view_start, min(view_start + PAGES_PER_VIEW, len(page_results))):
+                page = page_results[index]
+                st.markdown(f"**{page_marker(page)}**")
+                st.text_area(
+                    page_marker(page),
+                    value=page['text'],
+                    height=250,
+                    key=f"page_text_{index}",
+                    label_visibility="collapsed"
+                )
+            
+            offer_text_download(
+                "💾 전체 텍스트 파일 준비",
+                lambda: load_artifact(result.get('text_handle')) or '',
+                f"{st.session_state.get('filename_base', 'document')}_추출텍스트.txt",
+                key="full_text_download"
             )
         
         elif 'error' in result:
             st.error(f"❌ {result['error']}")
-            if 'extracted_text' in result:
+            if page_results:
                 st.info("부분적으로 추출된 텍스트:")
-                st.text_area("부분 텍스트:", value=result['extracted_text'], height=200)
+                partial_text = '\n'.join(page['text'] for page in page_results[:PAGES_PER_VIEW])
+                st.text_area("부분 텍스트:", value=partial_text, height=200)
         
         else:
             st.warning("⚠️ 추출된 텍스트가 없습니다.")
@@ -1233,126 +1022,69 @@ with tab3:
     
     if 'conversion_result' in st.session_state:
         result = st.session_state.conversion_result
+        extracted_text = load_artifact(result.get('text_handle'))
         
-        if 'extracted_text' in result and result.get('extracted_text'):
-            extracted_text = result['extracted_text']
-            
-            # ChatGPT 프롬프트
-            st.markdown("**💬 ChatGPT 프롬프트:**")
-            chatgpt_prompt = f"""다음 한글 문서를 AI가 자동 분석한 뒤, 문서 유형과 주요 내용을 파악하여 다음 항목들을 포함한 요약 및 구조화된 분석 결과를 생성해주세요.
-
-1. 📂 문서 기본 정보:
-   - 문서 제목 또는 추정 제목
-   - 작성 날짜 또는 추정 시점
-   - 작성 주체 또는 관련 기관/담당자 추정
-   - 문서 목적(정책 문서/보고서/계획안/회의록/제안서 등) 자동 분류
-
-2. 🧩 문서 구조 분석:
-   - 목차 또는 섹션 구성 추정
-   - 각 섹션별 요약 (3줄 이내)
-   - 표, 그림, 도표가 포함된 경우 해당 내용 요약
-
-3. 🧠 핵심 내용 요약 및 인사이트:
-   - 전체 문서의 핵심 주제 및 주요 주장 요약 (5줄 이내)
-   - 자주 등장하는 키워드 및 핵심 개념(빈도 분석 포함)
-   - 문서 내 등장하는 중요한 수치, 날짜, 고유명사(인물, 기관 등) 추출
-   - 중요한 결정사항, 요청사항, 일정, 액션 아이템 자동 분리
-
-4. 🛠️ 문서 유형별 특화 분석 (자동 판단하여 포함):
-   - ✅ 기획안/제안서: 핵심 아이디어, 제안 배경, 기대 효과 요약
-   - ✅ 회의록: 참석자, 주요 논의사항, 결정사항 및 후속 조치 정리
-   - ✅ 정책/행정문서: 정책 목적, 대상, 추진 전략 및 일정 요약
-   - ✅ 공사/계약문서: 계약 조건, 공정 일정, 이해관계자 분석
-   - ✅ 보고서: 분석 대상, 방법, 결론 및 제언 구분
-
-5. 🔍 오류 및 주의요소 감지:
-   - 문서 내 날짜 오류, 논리 비약, 누락 정보 자동 감지
-   - 문맥상 혼란을 줄 수 있는 표현 또는 오탈자 추정
-
-6. 🧾 결과 요약 형식:
-   - 마크다운(.md) 형식으로 요약 결과 제공
-   - 제목, 소제목, 목록 등을 구조적으로 제공
-
-문서를 사람이 읽지 않고도 전체적 흐름과 인사이트를 파악할 수 있도록 분석해주세요.
-
----
-
-{extracted_text}"""
+        if extracted_text:
             
-            st.text_area(
-                "ChatGPT에 복사하여 사용하세요:", 
-                value=chatgpt_prompt, 
-                height=200,
-                key="chatgpt_prompt"
-            )
-            
-            # Gemini 프롬프트
-            st.markdown("**🔮 Gemini 프롬프트:**")
-            gemini_prompt = f"""다음 한글 문서를 AI가 자동 분석한 뒤, 문서 유형과 주요 내용을 파악하여 다음 항목들을 포함한 요약 및 구조화된 분석 결과를 생성해주세요.
-
-1. 📂 문서 기본 정보:
-   - 문서 제목 또는 추정 제목
-   - 작성 날짜 또는 추정 시점
-   - 작성 주체 또는 관련 기관/담당자 추정
-   - 문서 목적(정책 문서/보고서/계획안/회의록/제안서 등) 자동 분류
-
-2. 🧩 문서 구조 분석:
-   - 목차 또는 섹션 구성 추정
-   - 각 섹션별 요약 (3줄 이내)
-   - 표, 그림, 도표가 포함된 경우 해당 내용 요약
-
-3. 🧠 핵심 내용 요약 및 인사이트:
-   - 전체 문서의 핵심 주제 및 주요 주장 요약 (5줄 이내)
-   - 자주 등장하는 키워드 및 핵심 개념(빈도 분석 포함)
-   - 문서 내 등장하는 중요한 수치, 날짜, 고유명사(인물, 기관 등) 추출
-   - 중요한 결정사항, 요청사항, 일정, 액션 아이템 자동 분리
-
-4. 🛠️ 문서 유형별 특화 분석 (자동 판단하여 포함):
-   - ✅ 기획안/제안서: 핵심 아이디어, 제안 배경, 기대 효과 요약
-   - ✅ 회의록: 참석자, 주요 논의사항, 결정사항 및 후속 조치 정리
-   - ✅ 정책/행정문서: 정책 목적, 대상, 추진 전략 및 일정 요약
-   - ✅ 공사/계약문서: 계약 조건, 공정 일정, 이해관계자 분석
-   - ✅ 보고서: 분석 대상, 방법, 결론 및 제언 구분
-
-5. 🔍 오류 및 주의요소 감지:
-   - 문서 내 날짜 오류, 논리 비약, 누락 정보 자동 감지
-   - 문맥상 혼란을 줄 수 있는 표현 또는 오탈자 추정
-
-6. 🧾 결과 요약 형식:
-   - 마크다운(.md) 형식으로 요약 결과 제공
-   - 제목, 소제목, 목록 등을 구조적으로 제공
-
-문서를 사람이 읽지 않고도 전체적 흐름과 인사이트를 파악할 수 있도록 분석해주세요.
-
----
-
-{extracted_text}"""
+            # 문서 Q&A (관련 페이지 청크만 GPT에 전달)
+            st.subheader("❓ 문서 Q&A")
+            page_results = load_artifact(result.get('pages_handle'))
             
-            st.text_area(
-                "Gemini에 복사하여 사용하세요:", 
-                value=gemini_prompt, 
-                height=150,
-                key="gemini_prompt"
-            )
+            if not page_results:
+                st.info("ℹ️ 페이지별 추출 결과가 없어 Q&A를 사용할 수 없습니다. 파일을 다시 변환해주세요.")
+            else:
+                use_embeddings = st.checkbox(
+                    "🧬 임베딩 검색 함께 사용",
+                    value=False,
+                    help="키워드(BM25) 검색에 OpenAI 임베딩 유사도를 더합니다. 색인 생성 시 임베딩 API 비용이 발생합니다."
+                )
+                question = st.text_input("문서에 대해 질문하세요:", key="qa_question")
+                
+                if st.button("💡 질문하기") and question:
+                    if not api_key:
+                        st.warning("⚠️ Q&A를 위해서는 OpenAI API 키가 필요합니다.")
+                    else:
+                        # 문서별 색인은 한 번만 생성하고 세션에 보관 (파일 이름이 아닌 내용 해시로 구분)
+                        index_key = (st.session_state.get('doc_hash'), use_embeddings)
+                        qa_result = None
+                        if st.session_state.get('qa_index_key') != index_key:
+                            try:
+                                with st.spinner("🔎 문서 색인 생성 중..."):
+                                    st.session_state.qa_index = build_qa_index(page_results, api_key, use_embeddings)
+                                st.session_state.qa_index_key = index_key
+                            except ChatError as e:
+                                qa_result = {'error': str(e)}
+                        
+                        if qa_result is None:
+                            with st.spinner("💬 답변 생성 중..."):
+                                qa_result = answer_question(st.session_state.qa_index, question, api_key)
+                        
+                        if 'error' in qa_result:
+                            st.error(f"❌ {qa_result['error']}")
+                        else:
+                            st.markdown(qa_result['answer'])
+                            if qa_result['sources']:
+                                with st.expander("📑 근거 페이지"):
+                                    for source in qa_result['sources']:
+                                        st.markdown(f"**페이지 {source['page']}** (관련도 {source['score']:.2f})")
+                                        st.text(source['text'])
             
-            # Grok 프롬프트
-            st.markdown("**🚀 Grok 프롬프트:**")
-            grok_prompt = f"""Analyze this Korean document and provide insights in Korean:
-
-- Document type and key themes
-- Important data points and statistics
-- Main conclusions and recommendations
-- Creative perspectives on the content
-
----
-
-{extracted_text}"""
+            # AI 프롬프트 (선택한 제공자의 프롬프트만 요청 시 생성)
+            st.subheader("📝 AI 프롬프트")
+            prompt_builders = {
+                "💬 ChatGPT": build_analysis_prompt,
+                "🔮 Gemini": build_analysis_prompt,
+                "🚀 Grok": build_grok_prompt,
+            }
+            prompt_target = st.selectbox("프롬프트 대상", list(prompt_builders), key="prompt_target")
+            st.caption(f"📏 본문 {len(extracted_text):,} 글자가 포함된 프롬프트를 생성합니다.")
             
-            st.text_area(
-                "Grok에 복사하여 사용하세요:", 
-                value=grok_prompt, 
-                height=150,
-                key="grok_prompt"
+            offer_text_download(
+                "📋 프롬프트 생성",
+                lambda: prompt_builders[prompt_target](extracted_text),
+                f"{st.session_state.get('filename_base', 'document')}_{prompt_target.split()[-1]}_프롬프트.txt",
+                key="prompt_generate",
+                copy_limit=COPY_PREVIEW_CHARS
             )
             
         else:
@@ -1365,6 +1097,7 @@ with tab4:
     
     if 'ai_analysis_result' in st.session_state:
         ai_result = st.session_state.ai_analysis_result
+        analyses = load_artifact(ai_result.get('analysis_handle')) or {}
         
         if ai_result.get('success'):
             st.success("🎉 자동 AI 분석이 완료되었습니다!")
@@ -1372,8 +1105,7 @@ with tab4:
             # ZIP 파일 다운로드
             zip_path = ai_result.get('zip_path')
             if zip_path and os.path.exists(zip_path):
-                with open(zip_path, 'rb') as f:
-                    zip_data = f.read()
+                artifact_store.touch(ai_result['job_id'])
                 
                 filename_base = st.session_state.get('filename_base', 'analysis')
                 download_filename = f"{filename_base}_AI분석결과_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
@@ -1381,19 +1113,23 @@ with tab4:
                 st.markdown(f"""
                 <div class="download-button">
                     <h4>📦 분석 결과 다운로드</h4>
-                    <p>포함된 파일: 원본 PDF, 추출 텍스트, ChatGPT/Gemini/Grok 분석 결과 (한글 PDF + TXT)</p>
+                    <p>포함된 파일: 원본 PDF, 추출 텍스트, ChatGPT/Gemini/Grok 분석 결과 (한글 PDF + TXT + JSON)</p>
                     <p><strong>🎨 한글 PDF 생성:</strong> WeasyPrint/ReportLab/FPDF 오류 수정 버전</p>
                     <p><strong>🔧 수정사항:</strong> TTC 폰트 문제 해결, PDF 생성 인자 오류 수정</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
-                st.download_button(
-                    label="📥 ZIP 파일 다운로드",
-                    data=zip_data,
-                    file_name=download_filename,
-                    mime="application/zip",
-                    type="primary"
-                )
+                # 저장소의 파일을 그대로 전달 (세션에 ZIP 바이트를 보관하지 않음)
+                with open(zip_path, 'rb') as zip_file:
+                    st.download_button(
+                        label="📥 ZIP 파일 다운로드",
+                        data=zip_file,
+                        file_name=download_filename,
+                        mime="application/zip",
+                        type="primary"
+                    )
+                if ai_result.get('drive_url'):
+                    st.markdown(f"☁️ [Google Drive 폴더 열기]({ai_result['drive_url']})")
                 
                 # 분석 결과 미리보기
                 st.subheader("📋 분석 결과 미리보기")
@@ -1402,7 +1138,7 @@ with tab4:
                 with st.expander("💬 ChatGPT 분석 결과"):
                     st.text_area(
                         "ChatGPT 분석:",
-                        value=ai_result.get('chatgpt_result', ''),
+                        value=analyses['chatgpt'].to_markdown() if analyses.get('chatgpt') else '',
                         height=300,
                         key="chatgpt_preview"
                     )
@@ -1411,7 +1147,7 @@ with tab4:
                 with st.expander("🔮 Gemini 분석 결과"):
                     st.text_area(
                         "Gemini 분석:",
-                        value=ai_result.get('gemini_result', ''),
+                        value=analyses['gemini'].to_markdown() if analyses.get('gemini') else '',
                         height=300,
                         key="gemini_preview"
                     )
@@ -1420,7 +1156,7 @@ with tab4:
                 with st.expander("🚀 Grok 분석 결과"):
                     st.text_area(
                         "Grok 분석:",
-                        value=ai_result.get('grok_result', ''),
+                        value=analyses['grok'].to_markdown() if analyses.get('grok') else '',
                         height=300,
                         key="grok_preview"
                     )
@@ -1435,6 +1171,74 @@ with tab4:
     
     else:
         st.info("🤖 자동 AI 분석을 실행하려면 '파일 업로드' 탭에서 '자동 AI 분석 및 ZIP 다운로드' 옵션을 선택하고 변환을 시작하세요.")
+    
+    # 이전 분석 기록 (저장소 목록, 커서 기반 페이지 이동)
+    st.subheader("🗂️ 분석 기록")
+    
+    # 전체 문서 전문 검색 (추출 텍스트 페이지 + 분석 결과)
+    search_query = st.text_input("🔎 전체 문서 검색 (기관명, 계약번호 등, 공백으로 나눈 검색어를 모두 포함)",
+                                 key="history_search")
+    if search_query.strip():
+        try:
+            search_started = time.perf_counter()
+            hits = get_summary_store().search(search_query, limit=20)
+            search_ms = (time.perf_counter() - search_started) * 1000
+        except Exception as e:
+            st.warning(f"⚠️ 검색할 수 없습니다: {str(e)}")
+            hits, search_ms = [], 0
+        st.caption(f"검색 결과 {len(hits)}건 · {search_ms:.1f} ms" + (" (상위 20건)" if len(hits) == 20 else ""))
+        for hit in hits:
+            location = f"{hit['page']}페이지" if hit['page'] else ("본문" if hit['source'] == 'page' else f"{hit['source']} 분석")
+            st.markdown(f"📄 **{hit['filename']}** · {location} · {hit['doc_type']}  \n{hit['snippet']}")
+    
+    history_col1, history_col2 = st.columns(2)
+    with history_col1:
+        history_filename = st.text_input("파일명으로 찾기 (앞부분)", key="history_filename")
+    with history_col2:
+        history_doc_type = st.selectbox(
+            "문서 유형",
+            ["전체", "회의록", "계획안", "제안서", "계약문서", "정책문서", "보고서", "기타"],
+            key="history_doc_type"
+        )
+    
+    history_filter = (history_filename, history_doc_type)
+    if st.session_state.get('history_filter') != history_filter:
+        st.session_state.history_filter = history_filter
+        st.session_state.history_cursors = [None]
+    
+    try:
+        store = get_summary_store()
+        documents, next_cursor = store.list_documents(
+            limit=10,
+            cursor=st.session_state.history_cursors[-1],
+            filename=history_filename or None,
+            doc_type=None if history_doc_type == "전체" else history_doc_type
+        )
+    except Exception as e:
+        st.warning(f"⚠️ 분석 기록을 불러올 수 없습니다: {str(e)}")
+        documents, next_cursor = [], None
+    
+    if not documents:
+        st.info("저장된 분석 기록이 없습니다.")
+    
+    for document in documents:
+        providers = ', '.join(document['providers']) or '분석 없음'
+        with st.expander(f"📄 {document['filename']} · {document['doc_type']} · {document['created_at']} · {providers}"):
+            st.caption(f"페이지 {document['pages']} · {document['text_length']:,} 글자")
+            if document['providers'] and st.button("📋 분석 결과 보기", key=f"history_{document['doc_hash']}"):
+                for provider, analysis in store.get_analyses(document['doc_hash']).items():
+                    st.markdown(f"**{provider}**")
+                    st.markdown(analysis.to_markdown())
+    
+    nav_prev, nav_next = st.columns(2)
+    with nav_prev:
+        if len(st.session_state.history_cursors) > 1 and st.button("◀ 이전"):
+            st.session_state.history_cursors.pop()
+            st.rerun()
+    with nav_next:
+        if next_cursor and st.button("다음 ▶"):
+            st.session_state.history_cursors.append(next_cursor)
+            st.rerun()
 
 # 푸터
 st.markdown("---")
@@ -1448,3 +1252,7 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# 작업이 진행 중이면 잠시 후 재실행하여 진행률 갱신 (작업 자체는 워커 스레드에서 계속됨)
+if st.session_state.get('active_job'):
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()